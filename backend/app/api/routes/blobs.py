@@ -0,0 +1,56 @@
+"""Content-addressed blob API routes."""
+
+from fastapi import APIRouter, Header, HTTPException, Response, status
+
+from app.core.storage.blob_store import BLOB_HASH_PATTERN, get_blob_store, guess_mime_type
+
+
+router = APIRouter(prefix="/blobs", tags=["blobs"])
+
+# Blobs never change under a hash, so clients may cache them indefinitely
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Blobs are served same-origin (SVG included): never sniff, never run scripts
+SECURITY_HEADERS = {
+    "X-Content-Type-Options": "nosniff",
+    "Content-Security-Policy": "default-src 'none'; style-src 'unsafe-inline'; sandbox",
+}
+
+
+def _if_none_match_tags(if_none_match: str | None) -> list[str]:
+    """Split an If-None-Match header into its entity tags."""
+    if not if_none_match:
+        return []
+    return [tag.strip() for tag in if_none_match.split(",")]
+
+
+@router.get("/{blob_hash}")
+async def get_blob(blob_hash: str, if_none_match: str | None = Header(default=None)):
+    """Get a blob's bytes by its SHA-256 hash."""
+    if not BLOB_HASH_PATTERN.match(blob_hash):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Blob hash must be 64 lowercase hex characters",
+        )
+
+    etag = f'"{blob_hash}"'
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL, **SECURITY_HEADERS}
+    store = get_blob_store()
+
+    # Content is fixed by the hash, so a matching ETag needs no storage lookup;
+    # "*" only matches a blob that actually exists
+    tags = _if_none_match_tags(if_none_match)
+    if any(tag.removeprefix("W/") == etag for tag in tags) or (
+        "*" in tags and await store.exists(blob_hash)
+    ):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    try:
+        data = await store.get(blob_hash)
+    except FileNotFoundError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Blob {blob_hash} not found",
+        )
+
+    mime_type = await store.get_mime_type(blob_hash) or guess_mime_type(data)
+    return Response(content=data, media_type=mime_type, headers=headers)
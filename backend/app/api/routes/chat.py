@@ -1,19 +1,22 @@
 """Chat session and message API routes."""
 
 import io
-import zipfile
-import base64
+import asyncio
+import hashlib
+import itertools
 import mimetypes
+from collections import deque
 from datetime import datetime
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, WebSocket
-from fastapi.responses import StreamingResponse, Response
+from typing import AsyncIterator, Awaitable, Callable, List, Optional, Set, Tuple
+from fastapi import APIRouter, Depends, Header, HTTPException, status, WebSocket
+from fastapi.responses import FileResponse, StreamingResponse, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import select, func, or_
 from pydantic import BaseModel
 
+from app.core.config import settings
 from app.core.storage.database import get_db
-from app.models.database import ChatSession, Project, ContentBlock, File
+from app.models.database import ChatSession, Project, ContentBlock, ContentBlockTombstone, File
 from app.models.database.file import FileType
 from app.core.storage.file_manager import get_file_manager
 from app.models.schemas import (
@@ -23,13 +26,21 @@ from app.models.schemas import (
     ChatSessionListResponse,
     ContentBlockResponse,
     ContentBlockListResponse,
+    ContentBlockChangesResponse,
 )
 from app.api.websocket import ChatWebSocketHandler
 from app.core.sandbox import get_container_manager
+from app.core.sandbox.container import decode_file_content
+from app.core.agent.tools.output_budget import TOOL_OUTPUTS_DIR
 from app.core.storage.storage_factory import get_storage
+from app.core.storage.zip_stream import stream_zip
+from app.services.block_count_cache import BlockCountCache
 
 router = APIRouter(prefix="/chats", tags=["chat"])
 
+# Block totals for list_content_blocks, recounted only when a session gains blocks
+_block_counts = BlockCountCache(max_sessions=settings.history_cache_max_sessions)
+
 
 # Workspace file models
 class WorkspaceFile(BaseModel):
@@ -183,6 +194,7 @@ async def delete_chat_session(
 
     await db.delete(session)
     await db.commit()
+    _block_counts.invalidate(session_id)
 
 
 # Content Blocks endpoints (unified model)
@@ -191,6 +203,10 @@ async def list_content_blocks(
     session_id: str,
     skip: int = 0,
     limit: int = 500,
+    after_seq: Optional[int] = None,
+    before_seq: Optional[int] = None,
+    latest: bool = False,
+    include_total: bool = True,
     db: AsyncSession = Depends(get_db),
 ):
     """
@@ -199,41 +215,129 @@ async def list_content_blocks(
     This is the new unified API that replaces the separate messages + agent_actions model.
     Each content block represents a single piece of content (text, tool call, or tool result)
     with guaranteed ordering via sequence_number.
+
+    Pages are addressed by sequence number (keyset pagination), so every page
+    is an index range scan regardless of how deep into the history it is:
+    after_seq returns the blocks following a sequence number, before_seq the
+    blocks preceding one, and latest the most recent window. Blocks are always
+    returned in ascending order, and has_more says whether further blocks exist
+    in the direction paged. skip is only applied when no cursor is given. The
+    total is cached per session; pass include_total=false to skip it.
     """
     # Verify session exists
-    session_query = select(ChatSession).where(ChatSession.id == session_id)
+    session_query = select(ChatSession.id).where(ChatSession.id == session_id)
     session_result = await db.execute(session_query)
-    session = session_result.scalar_one_or_none()
 
-    if not session:
+    if session_result.scalar_one_or_none() is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Chat session with id {session_id} not found",
         )
 
-    # Get total count
-    count_query = (
-        select(func.count())
-        .select_from(ContentBlock)
-        .where(ContentBlock.chat_session_id == session_id)
+    total = await _block_counts.get_total(db, session_id) if include_total else None
+
+    # Page backwards from before_seq (or the end) unless paging forwards from after_seq
+    backwards = after_seq is None and (before_seq is not None or latest)
+
+    query = select(ContentBlock).where(ContentBlock.chat_session_id == session_id)
+    if after_seq is not None:
+        query = query.where(ContentBlock.sequence_number > after_seq)
+    if before_seq is not None:
+        query = query.where(ContentBlock.sequence_number < before_seq)
+    if backwards:
+        query = query.order_by(ContentBlock.sequence_number.desc())
+    else:
+        query = query.order_by(ContentBlock.sequence_number.asc())
+    if after_seq is None and before_seq is None and not latest:
+        query = query.offset(skip)
+
+    # Fetch one extra row to learn whether another page follows
+    result = await db.execute(query.limit(limit + 1))
+    blocks = list(result.scalars().all())
+    has_more = len(blocks) > limit
+    blocks = blocks[:limit]
+    if backwards:
+        blocks.reverse()
+
+    return ContentBlockListResponse(
+        blocks=[ContentBlockResponse.model_validate(b) for b in blocks],
+        total=total,
+        has_more=has_more,
     )
-    total_result = await db.execute(count_query)
-    total = total_result.scalar_one()
 
-    # Get content blocks ordered by sequence_number
-    query = (
-        select(ContentBlock)
-        .where(ContentBlock.chat_session_id == session_id)
-        .order_by(ContentBlock.sequence_number.asc())
-        .offset(skip)
-        .limit(limit)
+
+@router.get("/{session_id}/blocks/changes", response_model=ContentBlockChangesResponse)
+async def list_content_block_changes(
+    session_id: str,
+    response: Response,
+    since_seq: Optional[int] = None,
+    since_updated_at: Optional[datetime] = None,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    List content blocks changed since a client's last sync.
+
+    Returns blocks with a sequence number above since_seq or updated after
+    since_updated_at, and the IDs of blocks deleted after since_updated_at.
+    Pass back the returned max_seq and max_updated_at on the next call. With
+    no cursor at all every block is returned.
+
+    The ETag is derived from the session's latest sequence number, update and
+    deletion times plus the cursor, all read from indexes, so a matching
+    If-None-Match is answered with 304 before any block is loaded.
+    """
+    session_query = select(ChatSession.id).where(ChatSession.id == session_id)
+    session_result = await db.execute(session_query)
+
+    if session_result.scalar_one_or_none() is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Chat session with id {session_id} not found",
+        )
+
+    state_result = await db.execute(
+        select(func.max(ContentBlock.sequence_number), func.max(ContentBlock.updated_at)).where(
+            ContentBlock.chat_session_id == session_id
+        )
     )
-    result = await db.execute(query)
+    max_seq, max_updated_at = state_result.one()
+    tombstone_result = await db.execute(
+        select(func.max(ContentBlockTombstone.deleted_at)).where(
+            ContentBlockTombstone.chat_session_id == session_id
+        )
+    )
+    last_deleted_at = tombstone_result.scalar_one_or_none()
+
+    state = f"{max_seq}|{max_updated_at}|{last_deleted_at}|{since_seq}|{since_updated_at}"
+    etag = f'W/"{hashlib.sha256(state.encode()).hexdigest()[:32]}"'
+    if if_none_match is not None and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+    query = select(ContentBlock).where(ContentBlock.chat_session_id == session_id)
+    changed = []
+    if since_seq is not None:
+        changed.append(ContentBlock.sequence_number > since_seq)
+    if since_updated_at is not None:
+        changed.append(ContentBlock.updated_at > since_updated_at)
+    if changed:
+        query = query.where(or_(*changed))
+    result = await db.execute(query.order_by(ContentBlock.sequence_number.asc()))
     blocks = result.scalars().all()
 
-    return ContentBlockListResponse(
+    tombstone_query = select(ContentBlockTombstone.id).where(
+        ContentBlockTombstone.chat_session_id == session_id
+    )
+    if since_updated_at is not None:
+        tombstone_query = tombstone_query.where(ContentBlockTombstone.deleted_at > since_updated_at)
+    deleted = (await db.execute(tombstone_query)).scalars().all()
+
+    response.headers["ETag"] = etag
+    return ContentBlockChangesResponse(
         blocks=[ContentBlockResponse.model_validate(b) for b in blocks],
-        total=total,
+        deleted=list(deleted),
+        max_seq=max_seq,
+        max_updated_at=max(filter(None, (max_updated_at, last_deleted_at)), default=None),
     )
 
 
@@ -385,110 +489,103 @@ async def list_workspace_files(session_id: str, db: AsyncSession = Depends(get_d
     return WorkspaceFilesResponse(uploaded=uploaded, output=output)
 
 
-async def _read_file_content(session_id: str, path: str, db: AsyncSession = None) -> str:
-    """Read file content from container, storage backend, or project file storage."""
-    # Validate path is within workspace
+def _validate_workspace_path(path: str) -> None:
+    """Reject paths outside the workspace."""
     if not path.startswith("/workspace/"):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Path must be within /workspace/",
         )
 
-    # Handle project files (uploaded files) - read from file manager on disk
-    if path.startswith("/workspace/project_files/") and db:
-        filename = path.split("/")[-1]
 
-        # Get session to find project_id
-        session_query = select(ChatSession).where(ChatSession.id == session_id)
-        session_result = await db.execute(session_query)
-        session = session_result.scalar_one_or_none()
+async def _get_project_file_path(session_id: str, path: str, db: AsyncSession):
+    """Resolve a /workspace/project_files/ path to the uploaded file on disk."""
+    filename = path.split("/")[-1]
 
-        if not session:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Session not found: {session_id}",
-            )
+    # Get session to find project_id
+    session_query = select(ChatSession).where(ChatSession.id == session_id)
+    session_result = await db.execute(session_query)
+    session = session_result.scalar_one_or_none()
 
-        # Find file in database
-        file_query = select(File).where(
-            File.project_id == session.project_id, File.filename == filename
+    if not session:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Session not found: {session_id}",
         )
-        file_result = await db.execute(file_query)
-        file_record = file_result.scalar_one_or_none()
 
-        if not file_record:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"File not found: {path}",
-            )
+    # Find file in database
+    file_query = select(File).where(
+        File.project_id == session.project_id, File.filename == filename
+    )
+    file_result = await db.execute(file_query)
+    file_record = file_result.scalar_one_or_none()
 
-        # Read from file manager
-        file_manager = get_file_manager()
-        file_path = file_manager.get_file_path(file_record.file_path)
+    if not file_record:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"File not found: {path}",
+        )
 
-        if not file_path or not file_path.exists():
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"File not found on disk: {path}",
-            )
+    file_manager = get_file_manager()
+    file_path = file_manager.get_file_path(file_record.file_path)
 
-        # Read file content
-        mime_type = file_record.mime_type or mimetypes.guess_type(filename)[0]
-        content_bytes = file_path.read_bytes()
+    if not file_path or not file_path.exists():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"File not found on disk: {path}",
+        )
+    return file_path
 
-        if mime_type and mime_type.startswith("image/"):
-            b64_content = base64.b64encode(content_bytes).decode("utf-8")
-            return f"data:{mime_type};base64,{b64_content}"
-        else:
-            return content_bytes.decode("utf-8")
+
+async def _read_storage_bytes(session_id: str, path: str) -> bytes:
+    """Read a file through the storage backend (works even when container is stopped)."""
+    storage = get_storage()
+    try:
+        return await storage.read_file(session_id, path)
+    except FileNotFoundError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"File not found: {path}",
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to read file: {str(e)}",
+        )
+
+
+async def _read_file_bytes(session_id: str, path: str, db: AsyncSession = None) -> bytes:
+    """Read raw file bytes from container, storage backend, or project file storage."""
+    _validate_workspace_path(path)
+
+    # Handle project files (uploaded files) - read from file manager on disk
+    if path.startswith("/workspace/project_files/") and db:
+        file_path = await _get_project_file_path(session_id, path, db)
+        return file_path.read_bytes()
 
     # Try container first for output files
     container = await _get_container_for_session(session_id, raise_if_not_found=False)
+    if not container:
+        return await _read_storage_bytes(session_id, path)
 
-    if container:
-        # Check if file exists
-        exit_code, _, _ = await container.execute(
-            f"test -f '{path}'", workdir="/workspace", timeout=5
+    try:
+        return await container.read_bytes(path)
+    except (FileNotFoundError, IsADirectoryError):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"File not found: {path}",
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to read file: {str(e)}",
         )
-        if exit_code != 0:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"File not found: {path}",
-            )
 
-        content = await container.read_file(path)
-        if content is None:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Failed to read file content",
-            )
-        return content
-    else:
-        # Fall back to storage backend
-        storage = get_storage()
-        try:
-            content_bytes = await storage.read_file(session_id, path)
-            # Check if it's binary (image, etc.)
-            mime_type, _ = mimetypes.guess_type(path)
-            if mime_type and mime_type.startswith("image/"):
-                # Return as base64 data URI
-                import base64 as b64
-
-                b64_content = b64.b64encode(content_bytes).decode("utf-8")
-                return f"data:{mime_type};base64,{b64_content}"
-            else:
-                # Return as text
-                return content_bytes.decode("utf-8")
-        except FileNotFoundError:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"File not found: {path}",
-            )
-        except Exception as e:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Failed to read file: {str(e)}",
-            )
+
+async def _read_file_content(session_id: str, path: str, db: AsyncSession = None) -> str:
+    """Read file content as text, or as a base64 data URI for binary files."""
+    content_bytes = await _read_file_bytes(session_id, path, db)
+    return decode_file_content(content_bytes, path)
 
 
 @router.get("/{session_id}/workspace/files/content")
@@ -513,34 +610,41 @@ async def get_workspace_file_content(
 @router.get("/{session_id}/workspace/files/download")
 async def download_workspace_file(session_id: str, path: str, db: AsyncSession = Depends(get_db)):
     """Download a single workspace file."""
-    content = await _read_file_content(session_id, path, db)
+    _validate_workspace_path(path)
 
     # Get filename and mime type
     filename = path.split("/")[-1]
     mime_type, _ = mimetypes.guess_type(filename)
     mime_type = mime_type or "application/octet-stream"
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
 
-    # Handle binary files (data URIs)
-    if content.startswith("data:"):
-        # Extract base64 content
-        try:
-            header, b64_data = content.split(",", 1)
-            file_bytes = base64.b64decode(b64_data)
-        except Exception:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Failed to decode file content",
-            )
-    else:
-        file_bytes = content.encode("utf-8")
+    if path.startswith("/workspace/project_files/"):
+        file_path = await _get_project_file_path(session_id, path, db)
+        return FileResponse(file_path, media_type=mime_type, headers=headers)
 
-    return Response(
-        content=file_bytes,
-        media_type=mime_type,
-        headers={
-            "Content-Disposition": f'attachment; filename="{filename}"',
-        },
-    )
+    container = await _get_container_for_session(session_id, raise_if_not_found=False)
+    if not container:
+        file_bytes = await _read_storage_bytes(session_id, path)
+        return Response(content=file_bytes, media_type=mime_type, headers=headers)
+
+    # Stream straight out of the container's archive, pulling the first chunk
+    # up front so a missing file still gets a 404 instead of a broken stream
+    stream = container.open_stream(path)
+    try:
+        first_chunk = await anext(stream, None)
+    except (FileNotFoundError, IsADirectoryError):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"File not found: {path}",
+        )
+
+    async def _body():
+        if first_chunk is not None:
+            yield first_chunk
+            async for chunk in stream:
+                yield chunk
+
+    return StreamingResponse(_body(), media_type=mime_type, headers=headers)
 
 
 @router.get("/{session_id}/workspace/download-all")
@@ -548,6 +652,7 @@ async def download_all_workspace_files(
     session_id: str, type: str = "output", db: AsyncSession = Depends(get_db)
 ):
     """Download all files of a type as a zip archive."""
+    container = None
     if type == "uploaded":
         # Get uploaded files from database (project files)
         session_query = select(ChatSession).where(ChatSession.id == session_id)
@@ -595,32 +700,18 @@ async def download_all_workspace_files(
             detail=f"No {type} files found",
         )
 
-    # Create zip file in memory
-    zip_buffer = io.BytesIO()
-    with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zip_file:
-        for file in files:
-            try:
-                content = await _read_file_content(session_id, file.path, db)
-                if content:
-                    # Handle binary files (data URIs)
-                    if content.startswith("data:"):
-                        try:
-                            header, b64_data = content.split(",", 1)
-                            file_bytes = base64.b64decode(b64_data)
-                        except Exception:
-                            continue
-                    else:
-                        file_bytes = content.encode("utf-8")
-
-                    zip_file.writestr(file.name, file_bytes)
-            except HTTPException:
-                # Skip files that can't be read
-                continue
-
-    zip_buffer.seek(0)
+    if type == "output" and container:
+        # One archive export of the whole directory instead of a read per file
+        chunks = _iter_container_files(container, directory, {f.name for f in files})
+    elif type == "output":
+        chunks = _prefetch_files(files, lambda f: _read_storage_bytes(session_id, f.path))
+    else:
+        file_manager = get_file_manager()
+        paths = {f.filename: file_manager.get_file_path(f.file_path) for f in project_files}
+        chunks = _prefetch_files(files, lambda f: _read_project_file(paths.get(f.name)))
 
     return StreamingResponse(
-        zip_buffer,
+        stream_zip(chunks),
         media_type="application/zip",
         headers={
             "Content-Disposition": f'attachment; filename="{type}_files.zip"',
@@ -628,6 +719,57 @@ async def download_all_workspace_files(
     )
 
 
+async def _iter_container_files(
+    container, directory: str, names: Set[str]
+) -> AsyncIterator[Tuple[str, int, memoryview]]:
+    """Stream the listed top-level files of a container directory from one tar export."""
+    # Spilled tool output can be large and is never part of the download
+    spill_parent, _, spill_dir = TOOL_OUTPUTS_DIR.rpartition("/")
+    exclude = [spill_dir] if spill_parent == directory else []
+    try:
+        async for member, data in container.open_archive(directory, exclude=exclude):
+            # Members are named relative to the directory's parent ("out/report.csv")
+            name = member.name.partition("/")[2]
+            if member.isreg() and name in names:
+                yield name, member.size, data
+    except Exception as e:
+        # Headers are already sent, all we can do is end the archive early
+        print(f"[WORKSPACE] Zip export of {directory} failed: {e}")
+
+
+async def _prefetch_files(
+    files: List[WorkspaceFile], load: Callable[[WorkspaceFile], Awaitable[bytes]]
+) -> AsyncIterator[Tuple[str, int, bytes]]:
+    """Load files concurrently in a bounded window, yielding them in order."""
+    pending = deque()
+    remaining = iter(files)
+    try:
+        for file in itertools.islice(remaining, max(1, settings.workspace_export_prefetch)):
+            pending.append((file, asyncio.ensure_future(load(file))))
+
+        while pending:
+            file, task = pending.popleft()
+            next_file = next(remaining, None)
+            if next_file is not None:
+                pending.append((next_file, asyncio.ensure_future(load(next_file))))
+            try:
+                data = await task
+            except HTTPException:
+                # Skip files that can't be read
+                continue
+            yield file.name, len(data), data
+    finally:
+        for _, task in pending:
+            task.cancel()
+
+
+async def _read_project_file(file_path) -> bytes:
+    """Read an uploaded project file from disk."""
+    if not file_path or not file_path.exists():
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found")
+    return await asyncio.to_thread(file_path.read_bytes)
+
+
 # Request model for upload to project
 class UploadToProjectRequest(BaseModel):
     """Request model for uploading workspace file to project."""
@@ -674,29 +816,13 @@ async def upload_workspace_file_to_project(
         )
 
     # Read file content from workspace
-    try:
-        content = await _read_file_content(session_id, path, db)
-    except HTTPException:
-        raise
+    file_bytes = await _read_file_bytes(session_id, path, db)
 
     # Get filename
     filename = path.split("/")[-1]
     mime_type, _ = mimetypes.guess_type(filename)
     mime_type = mime_type or "application/octet-stream"
 
-    # Handle binary files (data URIs)
-    if content.startswith("data:"):
-        try:
-            header, b64_data = content.split(",", 1)
-            file_bytes = base64.b64decode(b64_data)
-        except Exception:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Failed to decode file content",
-            )
-    else:
-        file_bytes = content.encode("utf-8")
-
     # Check if file already exists in project
     existing_query = select(File).where(File.project_id == project_id, File.filename == filename)
     existing_result = await db.execute(existing_query)
@@ -11,6 +11,7 @@ from app.models.schemas.file import FileResponse as FileSchema, FileListResponse
 from app.core.storage.file_manager import get_file_manager
 from app.core.storage.project_volume_storage import get_project_volume_storage
 from app.core.sandbox import is_allowed_file
+from app.core.sandbox.manager import sync_project_file
 
 
 router = APIRouter(prefix="/files", tags=["files"])
@@ -61,6 +62,8 @@ async def upload_file(
             filename=file.filename,
             content=file_content,
         )
+        # Sandboxes claimed from the warm pool hold a copy instead of the mount
+        await sync_project_file(project_id, file.filename, file_content)
 
         # Create database record
         db_file = File(
@@ -169,6 +172,7 @@ async def delete_file(
         project_id=file_record.project_id,
         filename=file_record.filename,
     )
+    await sync_project_file(file_record.project_id, file_record.filename, None)
 
     # Delete database record
     await db.delete(file_record)
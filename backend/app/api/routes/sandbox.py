@@ -3,8 +3,9 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
+from app.core.config import settings
 from app.core.storage.database import get_db
 from app.models.database import ChatSession, AgentConfiguration
 from app.core.sandbox import get_container_manager, sanitize_command
@@ -18,6 +19,7 @@ class ExecuteCommandRequest(BaseModel):
 
     command: str
     workdir: str = "/workspace"
+    timeout: int = Field(default=30, gt=0, le=settings.sandbox_exec_max_timeout)
 
 
 class ExecuteCommandResponse(BaseModel):
@@ -205,6 +207,7 @@ async def execute_command(
         exit_code, stdout, stderr = await container.execute(
             command=safe_command,
             workdir=request.workdir,
+            timeout=request.timeout,
         )
 
         return ExecuteCommandResponse(
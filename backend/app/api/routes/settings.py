@@ -7,6 +7,8 @@ from sqlalchemy import select, delete
 
 from app.core.storage.database import get_db
 from app.core.security.encryption import get_encryption_service
+from app.core.llm.key_cache import get_api_key_cache
+from app.core.llm.registry import get_provider_registry
 from app.core.llm.providers import (
     get_available_providers,
     get_test_model_for_provider,
@@ -96,6 +98,9 @@ async def set_api_key(
         db.add(new_key)
 
     await db.commit()
+    # Drop the old decrypted key and providers holding it
+    get_api_key_cache().invalidate(key_data.provider)
+    get_provider_registry().invalidate(key_data.provider)
 
     return {"message": f"API key for {key_data.provider} saved successfully"}
 
@@ -111,6 +116,8 @@ async def delete_api_key(
     stmt = delete(ApiKey).where(ApiKey.provider == provider)
     result = await db.execute(stmt)
     await db.commit()
+    get_api_key_cache().invalidate(provider)
+    get_provider_registry().invalidate(provider)
 
     if result.rowcount == 0:
         raise HTTPException(
@@ -2,11 +2,11 @@
 
 import json
 import asyncio
-from dataclasses import dataclass
 from typing import Dict, Any, Optional
 from fastapi import WebSocket, WebSocketDisconnect
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
+from sqlalchemy.orm.attributes import set_committed_value
 
 from app.models.database import (
     ChatSession,
@@ -16,7 +16,9 @@ from app.models.database import (
     ContentBlockAuthor,
 )
 from sqlalchemy import func
+from app.core.config import settings
 from app.core.llm import create_llm_provider_with_db
+from app.core.storage.blob_store import get_blob_store
 from app.core.storage.database import AsyncSessionLocal
 from app.core.agent.executor import ReActAgent
 from app.core.agent.tools import (
@@ -32,48 +34,35 @@ from app.core.agent.tools import (
 from app.core.sandbox.manager import get_container_manager
 from app.api.websocket.task_registry import get_agent_task_registry
 from app.api.websocket.streaming_manager import streaming_manager
-from collections import deque
 
 # Import new architectural services
 from app.services.message_orchestrator import MessageOrchestrator
 from app.services.message_persistence import MessagePersistenceService
 from app.services.streaming_buffer import StreamingBuffer
 from app.services.event_bus import EventBus
+from app.services.stream_store import (  # noqa: F401 - state classes re-exported
+    StreamState,
+    ToolCallState,
+    get_stream_state_store,
+)
+from app.services.chunk_rope import ChunkRope
+from app.services.block_persister import get_block_persister
+from app.services.history_cache import ConversationHistoryCache
 
 
-@dataclass
-class ToolCallState:
-    """State for an active tool call."""
-
-    tool_name: str
-    partial_args: str = ""
-    step: int = 0
-    status: str = "streaming"  # streaming, running, complete
-
-
-@dataclass
-class StreamState:
-    """State for a streaming block, used for reconnection support."""
-
-    block_id: str
-    session_id: str
-    accumulated_content: str = ""
-    streaming: bool = True
-    sequence_number: int = 0
-    active_tool_call: Optional[ToolCallState] = None  # Track currently streaming tool call
-
-
-# Global stream state for reconnection support
-# Maps session_id -> StreamState
-_stream_states: Dict[str, StreamState] = {}
-
-# Legacy chunk buffer (kept for backward compatibility during transition)
-_chunk_buffers: Dict[str, deque] = {}
-MAX_BUFFER_SIZE = 1000
+# Live stream state for reconnection support lives in _stream_store.states
+# (session_id -> StreamState); the store shares it with other workers if configured
+_stream_store = get_stream_state_store()
+_stream_states = _stream_store.states
 
 # Initialize architectural services (stateless singletons only)
 _event_bus = EventBus()
-_streaming_buffer = StreamingBuffer(max_buffer_size=10000)
+_history_cache = ConversationHistoryCache(max_sessions=settings.history_cache_max_sessions)
+_streaming_buffer = StreamingBuffer(
+    max_buffer_size=settings.stream_buffer_max_chunks,
+    max_buffer_bytes=settings.stream_buffer_max_bytes,
+    max_total_bytes=settings.stream_buffer_total_bytes,
+)
 
 
 def create_orchestrator(db: AsyncSession) -> MessageOrchestrator:
@@ -140,6 +129,7 @@ class ChatWebSocketHandler:
         self.task_registry = get_agent_task_registry()  # Get global task registry
         self._sequence_cache: dict[str, int] = {}  # Cache for sequence numbers per session
         self._db_lock = asyncio.Lock()  # Lock for serializing database operations
+        self.persister = get_block_persister()  # Write-behind for streaming block updates
 
     async def _safe_commit(self) -> None:
         """
@@ -151,6 +141,61 @@ class ChatWebSocketHandler:
         async with self._db_lock:
             await self.db.commit()
 
+    def _queue_block_update(
+        self, block: ContentBlock, content: Any = None, metadata: dict | None = None
+    ) -> None:
+        """
+        Queue a block update with the write-behind persister.
+
+        The in-memory block is updated without marking it dirty, so this
+        connection's session stays consistent but never writes the change itself.
+
+        Args:
+            block: Block to update
+            content: New content, or a callable returning it at write time
+            metadata: New block metadata
+        """
+        if content is not None and not callable(content):
+            set_committed_value(block, "content", content)
+        if metadata is not None:
+            set_committed_value(block, "block_metadata", metadata)
+        self.persister.update(block.id, content=content, metadata=metadata)
+
+    def _queue_text_update(self, block: ContentBlock, text: ChunkRope) -> None:
+        """Queue a streaming text block's content, joined from the rope only when written."""
+        self._queue_block_update(block, content=lambda: {"text": text.text()})
+
+    async def _persist_block(
+        self, block: ContentBlock, content: Any = None, metadata: dict | None = None
+    ) -> None:
+        """
+        Update a block and wait until it (and everything queued before it) is written.
+
+        Args:
+            block: Block to update
+            content: New content
+            metadata: New block metadata
+        """
+        self._queue_block_update(block, content=content, metadata=metadata)
+        await self.persister.flush()
+
+    async def _store_image_blob(self, metadata: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Replace an inline image in tool result metadata with a blob reference.
+
+        Args:
+            metadata: Tool result metadata
+
+        Returns:
+            Metadata holding an image_blob reference instead of image_data
+            (unchanged if there is no image, or if storing it fails)
+        """
+        try:
+            return await get_blob_store().externalize_image(metadata)
+        except Exception as e:
+            print(f"[AGENT] Failed to store image blob, keeping it inline: {e}")
+            return metadata
+
     async def _get_next_sequence_number(self, session_id: str) -> int:
         """
         Get the next sequence number for a content block in a session.
@@ -295,6 +340,15 @@ class ChatWebSocketHandler:
                         )
                     )
 
+                    # Open a fresh broadcast channel for the lifetime of the task
+                    # (registering it below cancels any task still running)
+                    channel = _stream_store.open_channel(session_id)
+                    self.current_agent_task.add_done_callback(
+                        lambda _task, channel=channel: _stream_store.close_channel(
+                            session_id, channel
+                        )
+                    )
+
                     # Register task in global registry for reconnection support
                     await self.task_registry.register_task(
                         session_id=session_id,
@@ -427,8 +481,6 @@ class ChatWebSocketHandler:
         agent_config: AgentConfiguration,
     ):
         """Handle simple LLM response without agent (with incremental saving)."""
-        global _chunk_buffers
-
         # Add system instructions if present
         messages = []
         if agent_config.system_instructions:
@@ -450,42 +502,29 @@ class ChatWebSocketHandler:
         )
 
         # Update task registry with block ID
-        existing_task = await self.task_registry.get_task(session_id)
-        if existing_task:
-            existing_task.message_id = assistant_block.id  # Using block_id now
-            print(f"[TASK REGISTRY] Updated task with block ID {assistant_block.id}")
+        await self.task_registry.set_message_id(session_id, assistant_block.id)
+        print(f"[TASK REGISTRY] Updated task with block ID {assistant_block.id}")
 
         # Create cancel event
         self.cancel_event = asyncio.Event()
 
         # Stream response
         # Use a mutable container to ensure the finalization callback gets the latest content
-        content_holder = {"content": "", "cancelled": False}
-
-        # Batching for performance: only commit every N chunks
-        chunks_since_commit = 0
-        CHUNK_COMMIT_INTERVAL = 50  # Commit every 50 chunks
+        content_holder = {"content": ChunkRope(), "cancelled": False}
 
         # Create finalization callback for StreamingManager
         async def finalize_block():
             """Ensure block is properly finalized even if WebSocket disconnects"""
             try:
                 print(f"[FINALIZATION] Running finalization for block {assistant_block.id}")
-                # Fetch the block again to ensure we have latest state
-                block_result = await self.db.execute(
-                    select(ContentBlock).where(ContentBlock.id == assistant_block.id)
+                await self._persist_block(
+                    assistant_block,
+                    content={"text": content_holder["content"].text()},
+                    metadata={"streaming": False, "cancelled": content_holder["cancelled"]},
+                )
+                print(
+                    f"[FINALIZATION] Block {assistant_block.id} finalized with {len(content_holder['content'])} chars"
                 )
-                block = block_result.scalar_one_or_none()
-                if block:
-                    block.content = {"text": content_holder["content"]}
-                    block.block_metadata = {
-                        "streaming": False,
-                        "cancelled": content_holder["cancelled"],
-                    }
-                    await self._safe_commit()
-                    print(
-                        f"[FINALIZATION] Block {block.id} finalized with {len(content_holder['content'])} chars"
-                    )
             except Exception as e:
                 print(f"[FINALIZATION] Error finalizing block: {e}")
                 import traceback
@@ -503,7 +542,7 @@ class ChatWebSocketHandler:
         _stream_states[session_id] = StreamState(
             block_id=assistant_block.id,
             session_id=session_id,
-            accumulated_content="",
+            content=content_holder["content"],
             streaming=True,
             sequence_number=assistant_block.sequence_number,
         )
@@ -511,12 +550,13 @@ class ChatWebSocketHandler:
 
         try:
             # Send assistant_text_start event
-            await self.websocket.send_json(
+            await self._send_stream_event(
+                session_id,
                 {
                     "type": "assistant_text_start",
                     "block_id": assistant_block.id,
                     "sequence_number": assistant_block.sequence_number,
-                }
+                },
             )
         except Exception:
             print("[SIMPLE RESPONSE] WebSocket disconnected at start, continuing...")
@@ -528,8 +568,9 @@ class ChatWebSocketHandler:
                     print("[SIMPLE RESPONSE] Cancellation detected")
                     content_holder["cancelled"] = True
                     try:
-                        await self.websocket.send_json(
-                            {"type": "cancelled", "content": "Response cancelled by user"}
+                        await self._send_stream_event(
+                            session_id,
+                            {"type": "cancelled", "content": "Response cancelled by user"},
                         )
                     except Exception:
                         print(
@@ -538,18 +579,13 @@ class ChatWebSocketHandler:
                     break
 
                 if isinstance(chunk, str):
-                    content_holder["content"] += chunk
-                    chunks_since_commit += 1
+                    content_holder["content"].append(chunk)
 
                     # Update streaming manager activity
                     await streaming_manager.update_activity(
                         session_id, len(content_holder["content"])
                     )
 
-                    # Update stream state for reconnection support
-                    if session_id in _stream_states:
-                        _stream_states[session_id].accumulated_content = content_holder["content"]
-
                     # Create chunk event with block_id for proper tracking
                     chunk_data = {
                         "type": "chunk",
@@ -557,33 +593,22 @@ class ChatWebSocketHandler:
                         "block_id": assistant_block.id,  # Include block_id for frontend tracking
                     }
 
-                    # Legacy buffer (for backward compatibility)
-                    if session_id not in _chunk_buffers:
-                        _chunk_buffers[session_id] = deque(maxlen=MAX_BUFFER_SIZE)
-                    _chunk_buffers[session_id].append(chunk_data)
-
                     try:
-                        await self.websocket.send_json(chunk_data)
+                        await self._send_stream_event(session_id, chunk_data)
                     except Exception:
                         print(
                             "[SIMPLE RESPONSE] WebSocket disconnected during chunk, continuing..."
                         )
 
-                    # BATCHED INCREMENTAL SAVE: Update block content, commit periodically
-                    assistant_block.content = {"text": content_holder["content"]}
-                    if chunks_since_commit >= CHUNK_COMMIT_INTERVAL:
-                        await self._safe_commit()
-                        chunks_since_commit = 0
-                        print(
-                            f"[SIMPLE RESPONSE] Committed content update ({len(content_holder['content'])} chars)"
-                        )
+                    # INCREMENTAL SAVE: written in the background, text joined at write time
+                    self._queue_text_update(assistant_block, content_holder["content"])
 
         except asyncio.CancelledError:
             print("[SIMPLE RESPONSE] Task cancelled")
             content_holder["cancelled"] = True
             try:
-                await self.websocket.send_json(
-                    {"type": "cancelled", "content": "Response cancelled by user"}
+                await self._send_stream_event(
+                    session_id, {"type": "cancelled", "content": "Response cancelled by user"}
                 )
             except Exception:
                 print("[SIMPLE RESPONSE] WebSocket disconnected, cannot send cancellation message")
@@ -591,12 +616,11 @@ class ChatWebSocketHandler:
             self.cancel_event = None
 
         # Update the content block with final content
-        assistant_block.content = {"text": content_holder["content"]}
-        assistant_block.block_metadata = {
-            "streaming": False,
-            "cancelled": content_holder["cancelled"],
-        }
-        await self._safe_commit()
+        await self._persist_block(
+            assistant_block,
+            content={"text": content_holder["content"].text()},
+            metadata={"streaming": False, "cancelled": content_holder["cancelled"]},
+        )
         print(
             f"[SIMPLE RESPONSE] Final block saved with ID: {assistant_block.id}, Content length: {len(content_holder['content'])} chars"
         )
@@ -606,12 +630,13 @@ class ChatWebSocketHandler:
 
         # Send completion
         try:
-            await self.websocket.send_json(
+            await self._send_stream_event(
+                session_id,
                 {
                     "type": "assistant_text_end",
                     "block_id": assistant_block.id,
                     "cancelled": content_holder["cancelled"],
-                }
+                },
             )
         except Exception:
             print("[SIMPLE RESPONSE] WebSocket disconnected, cannot send end message")
@@ -621,9 +646,7 @@ class ChatWebSocketHandler:
             session_id, "completed" if not content_holder["cancelled"] else "cancelled"
         )
 
-        # Clear chunk buffer and stream state for this session
-        if session_id in _chunk_buffers:
-            del _chunk_buffers[session_id]
+        # Clear stream state for this session
         if session_id in _stream_states:
             del _stream_states[session_id]
             print(f"[SIMPLE RESPONSE] Cleared stream state for session {session_id}")
@@ -667,27 +690,32 @@ class ChatWebSocketHandler:
 
                 # Update the block to mark it as complete with error
                 if assistant_block:
-                    assistant_block.block_metadata = {
-                        "agent_mode": True,
-                        "streaming": False,  # No longer streaming
-                        "has_error": True,
-                        "error_message": error_msg,
-                        "cancelled": False,
-                    }
-                    await self._safe_commit()
+                    await self._persist_block(
+                        assistant_block,
+                        metadata={
+                            "agent_mode": True,
+                            "streaming": False,  # No longer streaming
+                            "has_error": True,
+                            "error_message": error_msg,
+                            "cancelled": False,
+                        },
+                    )
                     print(
                         f"[AGENT HANDLER] Updated block {assistant_block.id} metadata after exception"
                     )
             except Exception as db_error:
                 print(f"[AGENT HANDLER] Failed to update block metadata: {db_error}")
 
-            await self.websocket.send_json({"type": "error", "content": f"Error: {error_msg}"})
-            await self.websocket.send_json(
+            await self._send_stream_event(
+                session_id, {"type": "error", "content": f"Error: {error_msg}"}
+            )
+            await self._send_stream_event(
+                session_id,
                 {
                     "type": "assistant_text_end",
                     "block_id": assistant_block.id if assistant_block else None,
                     "error": True,
-                }
+                },
             )
 
     async def _handle_agent_response_impl(
@@ -699,8 +727,6 @@ class ChatWebSocketHandler:
         agent_config: AgentConfiguration,
     ):
         """Implementation of agent response handling with incremental saving."""
-        global _chunk_buffers
-
         # Get container manager
         container_manager = get_container_manager()
 
@@ -765,16 +791,14 @@ class ChatWebSocketHandler:
         )
 
         # Update task registry with block ID
-        existing_task = await self.task_registry.get_task(session_id)
-        if existing_task:
-            existing_task.message_id = assistant_block.id  # Using block_id now
-            print(f"[TASK REGISTRY] Updated task with block ID {assistant_block.id}")
+        await self.task_registry.set_message_id(session_id, assistant_block.id)
+        print(f"[TASK REGISTRY] Updated task with block ID {assistant_block.id}")
 
         # Create cancel event
         self.cancel_event = asyncio.Event()
 
         # Track state
-        assistant_content = ""  # Content for current text block only
+        assistant_content = ChunkRope()  # Content for current text block only
         has_error = False
         error_message = None
         cancelled = False
@@ -784,32 +808,24 @@ class ChatWebSocketHandler:
         )
         text_block_has_content = False  # Track if current text block has any content
 
-        # Batching for performance: only commit every N chunks or when action completes
-        chunks_since_commit = 0
-        CHUNK_COMMIT_INTERVAL = 50  # Commit every 50 chunks
-
         # Create finalization callback for StreamingManager
         async def finalize_agent_block():
             """Ensure agent block is properly finalized even if WebSocket disconnects"""
             try:
                 print(f"[FINALIZATION] Running finalization for agent block {assistant_block.id}")
-                # Fetch the block again to ensure we have latest state
-                block_result = await self.db.execute(
-                    select(ContentBlock).where(ContentBlock.id == assistant_block.id)
-                )
-                block = block_result.scalar_one_or_none()
-                if block:
-                    block.content = {"text": assistant_content}
-                    block.block_metadata = {
+                await self._persist_block(
+                    assistant_block,
+                    content={"text": assistant_content.text()},
+                    metadata={
                         "streaming": False,
                         "agent_mode": True,
                         "has_error": has_error,
                         "cancelled": cancelled,
-                    }
-                    await self._safe_commit()
-                    print(
-                        f"[FINALIZATION] Agent block {block.id} finalized with {len(assistant_content)} chars"
-                    )
+                    },
+                )
+                print(
+                    f"[FINALIZATION] Agent block {assistant_block.id} finalized with {len(assistant_content)} chars"
+                )
             except Exception as e:
                 print(f"[FINALIZATION] Error finalizing agent block: {e}")
                 import traceback
@@ -827,19 +843,20 @@ class ChatWebSocketHandler:
         _stream_states[session_id] = StreamState(
             block_id=assistant_block.id,
             session_id=session_id,
-            accumulated_content="",
+            content=assistant_content,
             streaming=True,
             sequence_number=assistant_block.sequence_number,
         )
         print(f"[AGENT] Initialized stream state for block {assistant_block.id}")
 
         # Send assistant_text_start event
-        await self.websocket.send_json(
+        await self._send_stream_event(
+            session_id,
             {
                 "type": "assistant_text_start",
                 "block_id": assistant_block.id,
                 "sequence_number": assistant_block.sequence_number,
-            }
+            },
         )
         print("[AGENT] Starting agent execution loop...")
 
@@ -853,12 +870,13 @@ class ChatWebSocketHandler:
                     # Agent was cancelled
                     cancelled = True
                     print(f"[AGENT] Agent cancelled: {event.get('content')}")
-                    await self.websocket.send_json(
+                    await self._send_stream_event(
+                        session_id,
                         {
                             "type": "cancelled",
                             "content": event.get("content", "Response cancelled by user"),
                             "partial_content": event.get("partial_content"),
-                        }
+                        },
                     )
                     break
 
@@ -876,13 +894,14 @@ class ChatWebSocketHandler:
                         )
 
                     try:
-                        await self.websocket.send_json(
+                        await self._send_stream_event(
+                            session_id,
                             {
                                 "type": "action_streaming",
                                 "tool": tool_name,
                                 "status": status,
                                 "step": step,
-                            }
+                            },
                         )
                     except Exception:
                         print(
@@ -902,19 +921,52 @@ class ChatWebSocketHandler:
                         _stream_states[session_id].active_tool_call.step = step
 
                     try:
-                        await self.websocket.send_json(
+                        await self._send_stream_event(
+                            session_id,
                             {
                                 "type": "action_args_chunk",
                                 "tool": tool_name,
                                 "partial_args": partial_args,
                                 "step": step,
-                            }
+                            },
                         )
                     except Exception:
                         print(
                             "[AGENT] WebSocket disconnected during action_args_chunk, continuing..."
                         )
 
+                elif event_type == "action_output_chunk":
+                    # Live stdout/stderr from a running tool (final result still
+                    # arrives as an observation and is persisted as TOOL_RESULT)
+                    tool_name = event.get("tool")
+                    output_chunk = event.get("content", "")
+                    step = event.get("step", 0)
+
+                    # Track output for reconnection
+                    if session_id in _stream_states:
+                        tool_state = _stream_states[session_id].active_tool_call
+                        if tool_state is None:
+                            tool_state = ToolCallState(tool_name=tool_name, step=step)
+                            _stream_states[session_id].active_tool_call = tool_state
+                        tool_state.status = "running"
+                        tool_state.output += output_chunk
+
+                    try:
+                        await self._send_stream_event(
+                            session_id,
+                            {
+                                "type": "action_output_chunk",
+                                "tool": tool_name,
+                                "stream": event.get("stream", "stdout"),
+                                "content": output_chunk,
+                                "step": step,
+                            },
+                        )
+                    except Exception:
+                        print(
+                            "[AGENT] WebSocket disconnected during action_output_chunk, continuing..."
+                        )
+
                 elif event_type == "action":
                     # Agent is using a tool - create TOOL_CALL content block
                     tool_name = event.get("tool")
@@ -925,25 +977,25 @@ class ChatWebSocketHandler:
                     # MULTIPLE TEXT BLOCKS: Finalize current text block BEFORE creating tool_call
                     # This ensures text appears before the tool call in sequence order
                     if text_block_has_content and current_text_block:
-                        # Finalize the current text block
-                        current_text_block.content = {"text": assistant_content}
-                        current_text_block.block_metadata = {
-                            **current_text_block.block_metadata,
-                            "streaming": False,
-                        }
-                        await self._safe_commit()
+                        # Finalize the current text block (written with the next flush)
+                        self._queue_block_update(
+                            current_text_block,
+                            content={"text": assistant_content.text()},
+                            metadata={**current_text_block.block_metadata, "streaming": False},
+                        )
                         print(
                             f"[AGENT] Finalized text block {current_text_block.id} with {len(assistant_content)} chars before tool call"
                         )
 
                         # Send assistant_text_end for this block (intermediate - not final)
                         try:
-                            await self.websocket.send_json(
+                            await self._send_stream_event(
+                                session_id,
                                 {
                                     "type": "assistant_text_end",
                                     "block_id": current_text_block.id,
                                     "is_final": False,  # Indicates more content may follow
-                                }
+                                },
                             )
                         except Exception:
                             print("[AGENT] WebSocket disconnected during assistant_text_end")
@@ -951,7 +1003,7 @@ class ChatWebSocketHandler:
                         # Mark that we need a new text block after the tool completes
                         current_text_block = None
                         text_block_has_content = False
-                        assistant_content = ""
+                        assistant_content = ChunkRope()
 
                     # Update tool state to "running" (tool block created, now executing)
                     if session_id in _stream_states:
@@ -980,11 +1032,12 @@ class ChatWebSocketHandler:
 
                     try:
                         # Send tool_call_block event
-                        await self.websocket.send_json(
+                        await self._send_stream_event(
+                            session_id,
                             {
                                 "type": "tool_call_block",
                                 "block": self._block_to_dict(current_tool_call_block),
-                            }
+                            },
                         )
                     except Exception:
                         print("[AGENT] WebSocket disconnected during action, continuing...")
@@ -996,6 +1049,9 @@ class ChatWebSocketHandler:
                     metadata = event.get("metadata", {})
                     print(f"[AGENT] Observation (success={success}): {observation[:100]}...")
 
+                    # Keep image bytes out of the block row and websocket frame
+                    metadata = await self._store_image_blob(metadata)
+
                     # Clear active tool call - it's complete
                     if session_id in _stream_states:
                         _stream_states[session_id].active_tool_call = None
@@ -1007,12 +1063,13 @@ class ChatWebSocketHandler:
                             "tool_name", "unknown"
                         )
                         # Update the TOOL_CALL block status
-                        current_tool_call_block.content = {
-                            **current_tool_call_block.content,
-                            "status": "complete" if success else "error",
-                        }
-                        await self._safe_commit()
-                        chunks_since_commit = 0  # Reset counter after action commit
+                        self._queue_block_update(
+                            current_tool_call_block,
+                            content={
+                                **current_tool_call_block.content,
+                                "status": "complete" if success else "error",
+                            },
+                        )
 
                     # Create TOOL_RESULT content block
                     tool_result_block = await self._create_content_block(
@@ -1036,20 +1093,22 @@ class ChatWebSocketHandler:
 
                     try:
                         # Send tool_result_block event
-                        await self.websocket.send_json(
+                        await self._send_stream_event(
+                            session_id,
                             {
                                 "type": "tool_result_block",
                                 "block": self._block_to_dict(tool_result_block),
-                            }
+                            },
                         )
 
                         # Send workspace_files_changed event for file-modifying tools
                         if tool_name_for_result in ("file_write", "edit", "bash") and success:
-                            await self.websocket.send_json(
+                            await self._send_stream_event(
+                                session_id,
                                 {
                                     "type": "workspace_files_changed",
                                     "tool": tool_name_for_result,
-                                }
+                                },
                             )
                     except Exception:
                         print("[AGENT] WebSocket disconnected during observation, continuing...")
@@ -1126,7 +1185,7 @@ class ChatWebSocketHandler:
                             content={"text": ""},
                             metadata={"streaming": True, "agent_mode": True},
                         )
-                        assistant_content = ""  # Reset content for new block
+                        assistant_content = ChunkRope()  # Reset content for new block
                         text_block_has_content = False
                         print(
                             f"[AGENT] Created NEW text block {current_text_block.id} (seq: {current_text_block.sequence_number}) after tool"
@@ -1135,34 +1194,30 @@ class ChatWebSocketHandler:
                         # Update stream state for reconnection
                         if session_id in _stream_states:
                             _stream_states[session_id].block_id = current_text_block.id
-                            _stream_states[session_id].accumulated_content = ""
+                            _stream_states[session_id].content = assistant_content
                             _stream_states[session_id].sequence_number = (
                                 current_text_block.sequence_number
                             )
 
                         # Send assistant_text_start for new block
                         try:
-                            await self.websocket.send_json(
+                            await self._send_stream_event(
+                                session_id,
                                 {
                                     "type": "assistant_text_start",
                                     "block_id": current_text_block.id,
                                     "sequence_number": current_text_block.sequence_number,
-                                }
+                                },
                             )
                         except Exception:
                             print("[AGENT] WebSocket disconnected during assistant_text_start")
 
-                    assistant_content += chunk
+                    assistant_content.append(chunk)
                     text_block_has_content = True
-                    chunks_since_commit += 1
 
                     # Update streaming manager activity
                     await streaming_manager.update_activity(session_id, len(assistant_content))
 
-                    # Update stream state for reconnection support
-                    if session_id in _stream_states:
-                        _stream_states[session_id].accumulated_content = assistant_content
-
                     # Create chunk event with block_id for proper tracking
                     chunk_data = {
                         "type": "chunk",
@@ -1170,26 +1225,14 @@ class ChatWebSocketHandler:
                         "block_id": current_text_block.id,  # Use current text block ID
                     }
 
-                    # Legacy buffer (for backward compatibility)
-                    if session_id not in _chunk_buffers:
-                        _chunk_buffers[session_id] = deque(maxlen=MAX_BUFFER_SIZE)
-                    _chunk_buffers[session_id].append(chunk_data)
-
                     # Forward chunk to frontend if WebSocket connected
                     try:
-                        await self.websocket.send_json(chunk_data)
+                        await self._send_stream_event(session_id, chunk_data)
                     except Exception:
                         print("[AGENT] WebSocket disconnected during chunk, continuing...")
 
-                    # Batched commit: only commit periodically
-                    if current_text_block:
-                        current_text_block.content = {"text": assistant_content}
-                        if chunks_since_commit >= CHUNK_COMMIT_INTERVAL:
-                            await self._safe_commit()
-                            chunks_since_commit = 0
-                            print(
-                                f"[AGENT] Committed content update ({len(assistant_content)} chars)"
-                            )
+                    # Incremental save: written in the background, text joined at write time
+                    self._queue_text_update(current_text_block, assistant_content)
 
                 elif event_type == "final_answer":
                     # Agent has completed the task (legacy - now using chunks)
@@ -1204,48 +1247,42 @@ class ChatWebSocketHandler:
                             content={"text": ""},
                             metadata={"streaming": True, "agent_mode": True},
                         )
-                        assistant_content = ""
+                        assistant_content = ChunkRope()
                         text_block_has_content = False
                         print(
                             f"[AGENT] Created NEW text block {current_text_block.id} for final_answer"
                         )
 
                         try:
-                            await self.websocket.send_json(
+                            await self._send_stream_event(
+                                session_id,
                                 {
                                     "type": "assistant_text_start",
                                     "block_id": current_text_block.id,
                                     "sequence_number": current_text_block.sequence_number,
-                                }
+                                },
                             )
                         except Exception:
                             print("[AGENT] WebSocket disconnected during assistant_text_start")
 
-                    assistant_content += answer
+                    assistant_content.append(answer)
                     text_block_has_content = True
-                    chunks_since_commit += 1
                     print(f"[AGENT] Final Answer: {answer[:100]}...")
 
                     # Update stream state
                     if session_id in _stream_states:
-                        _stream_states[session_id].accumulated_content = assistant_content
+                        _stream_states[session_id].content = assistant_content
 
                     try:
-                        await self.websocket.send_json(
-                            {"type": "chunk", "content": answer, "block_id": current_text_block.id}
+                        await self._send_stream_event(
+                            session_id,
+                            {"type": "chunk", "content": answer, "block_id": current_text_block.id},
                         )
                     except Exception:
                         print("[AGENT] WebSocket disconnected during final_answer, continuing...")
 
-                    # Batched commit: only commit periodically
-                    if current_text_block:
-                        current_text_block.content = {"text": assistant_content}
-                        if chunks_since_commit >= CHUNK_COMMIT_INTERVAL:
-                            await self._safe_commit()
-                            chunks_since_commit = 0
-                            print(
-                                f"[AGENT] Committed content update ({len(assistant_content)} chars)"
-                            )
+                    # Incremental save: written in the background, text joined at write time
+                    self._queue_text_update(current_text_block, assistant_content)
 
                 elif event_type == "error":
                     # Error occurred
@@ -1254,7 +1291,9 @@ class ChatWebSocketHandler:
                     print(f"[AGENT] ERROR: {error_message}")
 
                     try:
-                        await self.websocket.send_json({"type": "error", "content": error_message})
+                        await self._send_stream_event(
+                            session_id, {"type": "error", "content": error_message}
+                        )
                     except Exception:
                         print(
                             "[AGENT] WebSocket disconnected during error, message saved in database"
@@ -1267,8 +1306,8 @@ class ChatWebSocketHandler:
             cancelled = True
             print("[AGENT] Task cancelled via CancelledError")
             try:
-                await self.websocket.send_json(
-                    {"type": "cancelled", "content": "Response cancelled by user"}
+                await self._send_stream_event(
+                    session_id, {"type": "cancelled", "content": "Response cancelled by user"}
                 )
             except Exception:
                 print("[AGENT] WebSocket disconnected, cannot send cancellation message")
@@ -1282,28 +1321,31 @@ class ChatWebSocketHandler:
 
         # MULTIPLE TEXT BLOCKS: Finalize the current text block (if any)
         if current_text_block and text_block_has_content:
-            current_text_block.content = {"text": assistant_content}
-            current_text_block.block_metadata = {
-                "streaming": False,
-                "agent_mode": True,
-                "has_error": has_error,
-                "cancelled": cancelled,
-            }
-            await self._safe_commit()
+            await self._persist_block(
+                current_text_block,
+                content={"text": assistant_content.text()},
+                metadata={
+                    "streaming": False,
+                    "agent_mode": True,
+                    "has_error": has_error,
+                    "cancelled": cancelled,
+                },
+            )
             print(
                 f"[AGENT] Final text block saved with ID: {current_text_block.id}, Content length: {len(assistant_content)} chars"
             )
 
             # Send completion for this block (final - no more content)
             try:
-                await self.websocket.send_json(
+                await self._send_stream_event(
+                    session_id,
                     {
                         "type": "assistant_text_end",
                         "block_id": current_text_block.id,
                         "has_error": has_error,
                         "cancelled": cancelled,
                         "is_final": True,  # Indicates this is the last text block
-                    }
+                    },
                 )
             except Exception:
                 print("[AGENT] WebSocket disconnected, cannot send end message")
@@ -1315,16 +1357,18 @@ class ChatWebSocketHandler:
 
             # Still send final signal
             try:
-                await self.websocket.send_json(
-                    {"type": "agent_complete", "has_error": has_error, "cancelled": cancelled}
+                await self._send_stream_event(
+                    session_id,
+                    {"type": "agent_complete", "has_error": has_error, "cancelled": cancelled},
                 )
             except Exception:
                 print("[AGENT] WebSocket disconnected, cannot send agent_complete")
         elif current_text_block is None:
             # No text block at all (tools ran without any text after last finalization)
             try:
-                await self.websocket.send_json(
-                    {"type": "agent_complete", "has_error": has_error, "cancelled": cancelled}
+                await self._send_stream_event(
+                    session_id,
+                    {"type": "agent_complete", "has_error": has_error, "cancelled": cancelled},
                 )
             except Exception:
                 print("[AGENT] WebSocket disconnected, cannot send agent_complete")
@@ -1337,10 +1381,7 @@ class ChatWebSocketHandler:
         await self.task_registry.mark_completed(session_id, status)
         print(f"[TASK REGISTRY] Marked task as {status} for session {session_id}")
 
-        # Clear chunk buffer and stream state for this session
-        if session_id in _chunk_buffers:
-            del _chunk_buffers[session_id]
-            print(f"[AGENT] Cleared chunk buffer for session {session_id}")
+        # Clear stream state for this session
         if session_id in _stream_states:
             del _stream_states[session_id]
             print(f"[AGENT] Cleared stream state for session {session_id}")
@@ -1355,6 +1396,9 @@ class ChatWebSocketHandler:
         Get conversation history for a session using ContentBlocks.
         For vision models, formats image results using vision API format.
 
+        Served from the per-session history cache, which only loads and
+        formats blocks created since the previous turn.
+
         Args:
             session_id: The chat session ID
             model_name: The LLM model name (for vision support detection)
@@ -1362,87 +1406,9 @@ class ChatWebSocketHandler:
         Returns:
             List of message dicts formatted for the LLM API
         """
-        # Query content blocks ordered by sequence number
-        query = (
-            select(ContentBlock)
-            .where(ContentBlock.chat_session_id == session_id)
-            .order_by(ContentBlock.sequence_number.asc())
+        return await _history_cache.get_history(
+            self.db, session_id, vision=is_vision_model(model_name)
         )
-        result = await self.db.execute(query)
-        blocks = result.scalars().all()
-
-        is_vlm = is_vision_model(model_name)
-        history = []
-
-        for block in blocks:
-            if block.block_type == ContentBlockType.USER_TEXT:
-                # User message
-                text = (
-                    block.content.get("text", "")
-                    if isinstance(block.content, dict)
-                    else str(block.content)
-                )
-                history.append({"role": "user", "content": text})
-
-            elif block.block_type == ContentBlockType.ASSISTANT_TEXT:
-                # Assistant message
-                text = (
-                    block.content.get("text", "")
-                    if isinstance(block.content, dict)
-                    else str(block.content)
-                )
-                if text:  # Only add non-empty assistant messages
-                    history.append({"role": "assistant", "content": text})
-
-            elif block.block_type == ContentBlockType.TOOL_CALL:
-                # Tool call - add as assistant message with function_call
-                tool_name = block.content.get("tool_name", "unknown")
-                tool_args = block.content.get("arguments", {})
-                args_str = json.dumps(tool_args) if isinstance(tool_args, dict) else str(tool_args)
-                history.append(
-                    {
-                        "role": "assistant",
-                        "content": f"Using tool: {tool_name}",
-                        "function_call": {"name": tool_name, "arguments": args_str},
-                    }
-                )
-
-            elif block.block_type == ContentBlockType.TOOL_RESULT:
-                # Tool result - add as user message (function result)
-                tool_name = block.content.get("tool_name", "unknown")
-                result_text = block.content.get("result", "")
-                success = block.content.get("success", True)
-                metadata = block.block_metadata or {}
-
-                # Check if this is an image result for a VLM
-                has_image = metadata.get("type") == "image" and metadata.get("image_data")
-
-                if has_image and is_vlm:
-                    # Vision model: Use multi-content format with image
-                    image_data = metadata["image_data"]
-                    text_content = f"Tool result ({tool_name}): {result_text}"
-
-                    history.append(
-                        {
-                            "role": "user",
-                            "content": [
-                                {"type": "text", "text": text_content},
-                                {
-                                    "type": "image_url",
-                                    "image_url": {
-                                        "url": image_data  # data URI format: data:image/png;base64,...
-                                    },
-                                },
-                            ],
-                        }
-                    )
-                else:
-                    # Non-vision model or text-only result: Use text format
-                    status_text = "Success" if success else "Error"
-                    output_content = f"Tool result ({tool_name}) [{status_text}]: {result_text}"
-                    history.append({"role": "user", "content": output_content})
-
-        return history
 
     async def _generate_title_if_needed(
         self, session_id: str, user_message: str, agent_config: AgentConfiguration
@@ -1542,10 +1508,68 @@ Respond with ONLY the title, nothing else. The title should capture the main top
 
             traceback.print_exc()
 
+    async def _send_stream_event(self, session_id: str, event: dict) -> None:
+        """Send a stream event to this connection and to any attached connections."""
+        _stream_store.publish(session_id, event)
+        await self.websocket.send_json(event)
+
+    async def _task_running(self, session_id: str) -> bool:
+        """Whether the session's task is still registered as running (on any worker)."""
+        task = await self.task_registry.get_task(session_id)
+        return task is not None and task.status == "running"
+
+    async def _sync_stream_state(self, session_id: str, existing_task):
+        """
+        Send the current stream snapshot and subscribe to what follows it.
+
+        The subscription starts after the sequence number the snapshot was
+        taken at, so no event falls into the gap or is applied twice, whether
+        the stream runs on this worker or another one.
+
+        Args:
+            session_id: Chat session ID
+            existing_task: Running task from the task registry
+
+        Returns:
+            Subscription to the session's events (see StreamStateStore.subscribe),
+            or None if the WebSocket is gone
+        """
+        snapshot = await _stream_store.snapshot(session_id)
+        if snapshot:
+            payload, seq = snapshot
+            print(
+                f"[STREAM SYNC] Found stream state for block {payload['block_id']}, content length: {len(payload['accumulated_content'])}"
+            )
+            if payload.get("active_tool_call"):
+                print(
+                    f"[STREAM SYNC] Active tool call: {payload['active_tool_call']['tool_name']} (status: {payload['active_tool_call']['status']})"
+                )
+            subscription = await _stream_store.subscribe(
+                session_id, after_seq=seq, is_running=lambda: self._task_running(session_id)
+            )
+        else:
+            # Fallback to legacy resuming_stream, replaying the events the channel retained
+            print("[STREAM SYNC] No stream state found, using legacy resuming_stream")
+            payload = {"type": "resuming_stream", "message_id": existing_task.message_id}
+            subscription = await _stream_store.subscribe(
+                session_id, after_seq=0, is_running=lambda: self._task_running(session_id)
+            )
+
+        try:
+            await self.websocket.send_json(payload)
+            print(f"[STREAM SYNC] Sent {payload['type']} event")
+        except (WebSocketDisconnect, ConnectionError, Exception) as e:
+            print(f"[STREAM SYNC] WebSocket already disconnected: {e}")
+            subscription.unsubscribe()
+            return None
+        return subscription
+
     async def _attach_to_existing_stream(self, session_id: str, existing_task):
-        """Attach new WebSocket connection to an existing streaming task."""
-        global _chunk_buffers, _stream_states
+        """Attach new WebSocket connection to an existing streaming task.
 
+        Sends a snapshot of the in-progress block, then forwards the events the
+        running task publishes to the session's stream hub channel as they arrive.
+        """
         print(f"[STREAM SYNC] Attaching to existing stream for session {session_id}")
 
         # CRITICAL: Copy cancel_event and task reference from existing task to this handler
@@ -1557,200 +1581,48 @@ Respond with ONLY the title, nothing else. The title should capture the main top
         )
 
         ws_connected = True
+        last_event_type = None
 
-        # Check if we have stream state for this session
-        if session_id in _stream_states:
-            stream_state = _stream_states[session_id]
-            print(
-                f"[STREAM SYNC] Found stream state for block {stream_state.block_id}, content length: {len(stream_state.accumulated_content)}"
-            )
-            if stream_state.active_tool_call:
-                print(
-                    f"[STREAM SYNC] Active tool call: {stream_state.active_tool_call.tool_name} (status: {stream_state.active_tool_call.status})"
-                )
-
-            # Build stream_sync payload
-            sync_payload = {
-                "type": "stream_sync",
-                "block_id": stream_state.block_id,
-                "accumulated_content": stream_state.accumulated_content,
-                "streaming": stream_state.streaming,
-                "sequence_number": stream_state.sequence_number,
-            }
-
-            # Include active tool call state if present
-            if stream_state.active_tool_call:
-                sync_payload["active_tool_call"] = {
-                    "tool_name": stream_state.active_tool_call.tool_name,
-                    "partial_args": stream_state.active_tool_call.partial_args,
-                    "step": stream_state.active_tool_call.step,
-                    "status": stream_state.active_tool_call.status,
-                }
-
-            # Send stream_sync event with full state
-            try:
-                await self.websocket.send_json(sync_payload)
-                print(f"[STREAM SYNC] Sent stream_sync event for block {stream_state.block_id}")
-            except WebSocketDisconnect:
-                print("[STREAM SYNC] WebSocket already disconnected")
-                return
-        else:
-            # Fallback to legacy resuming_stream for backward compatibility
-            print("[STREAM SYNC] No stream state found, using legacy resuming_stream")
-            try:
-                await self.websocket.send_json(
-                    {"type": "resuming_stream", "message_id": existing_task.message_id}
-                )
-            except WebSocketDisconnect:
-                print("[STREAM SYNC] WebSocket already disconnected")
-                return
+        # The task's channel is closed when it finishes; don't open a new one for it
+        subscription = None
+        if not existing_task.task.done():
+            subscription = await self._sync_stream_state(session_id, existing_task)
+            ws_connected = subscription is not None
 
-            # Send buffered chunks if available (legacy fallback)
-            if session_id in _chunk_buffers:
-                buffer = _chunk_buffers[session_id]
-                buffer_snapshot = list(buffer)
-                print(f"[STREAM SYNC] Sending {len(buffer_snapshot)} buffered chunks (legacy)")
+        try:
+            while subscription is not None:
+                event = await subscription.get()
+                if event is None:
+                    if not subscription.lagged:
+                        break  # Task finished
+                    # Fell too far behind the producer: start over from a fresh snapshot
+                    print("[STREAM SYNC] Subscriber lagged, resyncing stream state")
+                    subscription = await self._sync_stream_state(session_id, existing_task)
+                    ws_connected = subscription is not None
+                    continue
 
-                for chunk in buffer_snapshot:
-                    if not ws_connected:
-                        break
-                    try:
-                        await self.websocket.send_json(chunk)
-                        await asyncio.sleep(0.001)
-                    except (WebSocketDisconnect, ConnectionError, Exception) as e:
-                        print(
-                            f"[STREAM SYNC] WebSocket disconnected while sending buffered chunks: {e}"
-                        )
-                        ws_connected = False
-                        break
-
-        # Track content length and tool state for detecting changes
-        initial_state = _stream_states.get(session_id, StreamState("", session_id))
-        last_content_length = len(initial_state.accumulated_content)
-        last_tool_args = (
-            initial_state.active_tool_call.partial_args if initial_state.active_tool_call else None
-        )
-        last_tool_status = (
-            initial_state.active_tool_call.status if initial_state.active_tool_call else None
-        )
-        last_tool_name = (
-            initial_state.active_tool_call.tool_name if initial_state.active_tool_call else None
+                try:
+                    await self.websocket.send_json(event)
+                    last_event_type = event.get("type")
+                except (WebSocketDisconnect, ConnectionError, Exception) as e:
+                    print(f"[STREAM SYNC] WebSocket disconnected while forwarding event: {e}")
+                    ws_connected = False
+                    break
+        finally:
+            if subscription is not None:
+                subscription.unsubscribe()
+
+        # Re-read the task: a record from another worker is a snapshot of its status
+        existing_task = await self.task_registry.get_task(session_id) or existing_task
+
+        # Tell the client the task is over if it didn't see the final event itself
+        stream_finished = last_event_type in (
+            "assistant_text_end",
+            "agent_complete",
+            "cancelled",
+            "error",
         )
-        tool_was_active = initial_state.active_tool_call is not None
-
-        # Keep WebSocket open and forward new chunks/tool events as they arrive
-        while ws_connected and existing_task.status == "running" and not existing_task.task.done():
-            try:
-                # Check for new content in stream state
-                if session_id in _stream_states:
-                    current_state = _stream_states[session_id]
-                    current_length = len(current_state.accumulated_content)
-
-                    # If content grew, we have new chunks - send them
-                    if current_length > last_content_length:
-                        new_content = current_state.accumulated_content[last_content_length:]
-                        if new_content:
-                            try:
-                                await self.websocket.send_json(
-                                    {
-                                        "type": "chunk",
-                                        "content": new_content,
-                                        "block_id": current_state.block_id,
-                                    }
-                                )
-                                last_content_length = current_length
-                            except (WebSocketDisconnect, ConnectionError, Exception) as e:
-                                print(
-                                    f"[STREAM SYNC] WebSocket disconnected while forwarding chunk: {e}"
-                                )
-                                ws_connected = False
-                                break
-
-                    # Check for tool call state changes
-                    current_tool = current_state.active_tool_call
-                    if current_tool:
-                        # Tool is active - check for updates
-                        if current_tool.partial_args != last_tool_args:
-                            # Args changed - send action_args_chunk
-                            try:
-                                await self.websocket.send_json(
-                                    {
-                                        "type": "action_args_chunk",
-                                        "tool": current_tool.tool_name,
-                                        "partial_args": current_tool.partial_args,
-                                        "step": current_tool.step,
-                                    }
-                                )
-                                last_tool_args = current_tool.partial_args
-                            except (WebSocketDisconnect, ConnectionError, Exception) as e:
-                                print(
-                                    f"[STREAM SYNC] WebSocket disconnected while forwarding tool args: {e}"
-                                )
-                                ws_connected = False
-                                break
-
-                        if current_tool.status != last_tool_status:
-                            # Status changed
-                            if current_tool.status == "running" and last_tool_status == "streaming":
-                                # Tool args complete, now running - send action event
-                                try:
-                                    args = {}
-                                    if current_tool.partial_args:
-                                        try:
-                                            args = json.loads(current_tool.partial_args)
-                                        except Exception:
-                                            pass
-                                    await self.websocket.send_json(
-                                        {
-                                            "type": "action",
-                                            "tool": current_tool.tool_name,
-                                            "args": args,
-                                            "step": current_tool.step,
-                                        }
-                                    )
-                                except (WebSocketDisconnect, ConnectionError, Exception) as e:
-                                    print(
-                                        f"[STREAM SYNC] WebSocket disconnected while forwarding action: {e}"
-                                    )
-                                    ws_connected = False
-                                    break
-                            last_tool_status = current_tool.status
-
-                        last_tool_name = current_tool.tool_name
-                        tool_was_active = True
-
-                    elif tool_was_active:
-                        # Tool was active but now cleared - tool completed
-                        # Trigger a refetch on the frontend by sending a hint
-                        print("[STREAM SYNC] Tool completed, notifying frontend to refetch blocks")
-                        try:
-                            await self.websocket.send_json(
-                                {"type": "tool_completed", "tool": last_tool_name}
-                            )
-                        except (WebSocketDisconnect, ConnectionError, Exception) as e:
-                            print(
-                                f"[STREAM SYNC] WebSocket disconnected while sending tool_completed: {e}"
-                            )
-                            ws_connected = False
-                            break
-                        tool_was_active = False
-                        last_tool_args = None
-                        last_tool_status = None
-                        last_tool_name = None
-
-                await asyncio.sleep(0.03)  # Check for new content every 30ms
-
-            except WebSocketDisconnect:
-                print("[STREAM SYNC] WebSocket disconnected from resumed stream")
-                ws_connected = False
-                break
-            except Exception as e:
-                print(f"[STREAM SYNC] Error in chunk forwarding loop: {e}")
-                ws_connected = False
-                break
-
-        # If task completed successfully, send completion message
-        if ws_connected and existing_task.task.done():
+        if ws_connected and existing_task.task.done() and not stream_finished:
             try:
                 if existing_task.status == "completed":
                     # Get the block_id from stream state or task
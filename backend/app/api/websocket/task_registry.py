@@ -1,24 +1,72 @@
-"""Global registry for managing agent execution tasks independently of WebSocket connections."""
+"""Global registry for managing agent execution tasks independently of WebSocket connections.
+
+AgentTaskRegistry keeps tasks in-process, which is enough for a single
+worker. SharedAgentTaskRegistry additionally records every task in Redis and
+listens for cancel requests on a pub/sub channel, so a connection landing on
+any worker can find, follow and cancel a task another worker is running.
+"""
 
 import asyncio
-from typing import Dict, Optional
+import logging
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional
 from dataclasses import dataclass
 from datetime import datetime
 
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
 
 @dataclass
 class AgentTask:
     """Represents a running agent task."""
 
-    task: asyncio.Task
+    task: asyncio.Task  # RemoteTaskHandle for tasks running on another worker
     session_id: str
     message_id: str
-    cancel_event: asyncio.Event
+    cancel_event: asyncio.Event  # RemoteCancelEvent for tasks running on another worker
     created_at: datetime
     status: str  # 'running', 'completed', 'error', 'cancelled'
 
 
-class AgentTaskRegistry:
+class TaskRegistry(ABC):
+    """Interface for tracking the agent task running for each session."""
+
+    @abstractmethod
+    async def register_task(
+        self, session_id: str, message_id: str, task: asyncio.Task, cancel_event: asyncio.Event
+    ) -> None:
+        """Register a new agent task, cancelling any task already running for the session."""
+
+    @abstractmethod
+    async def get_task(self, session_id: str) -> Optional[AgentTask]:
+        """Get the task for a session."""
+
+    @abstractmethod
+    async def set_message_id(self, session_id: str, message_id: str) -> None:
+        """Record the block a session's task is streaming into."""
+
+    @abstractmethod
+    async def cancel_task(self, session_id: str) -> bool:
+        """Cancel a running task."""
+
+    @abstractmethod
+    async def mark_completed(self, session_id: str, status: str = "completed") -> None:
+        """Mark a task as completed."""
+
+    @abstractmethod
+    async def cleanup_task(self, session_id: str) -> None:
+        """Remove a task from the registry."""
+
+    async def start(self) -> None:
+        """Start background work (no-op by default)."""
+
+    async def close(self) -> None:
+        """Stop background work (no-op by default)."""
+
+
+class AgentTaskRegistry(TaskRegistry):
     """
     Global registry to manage agent execution tasks.
 
@@ -56,6 +104,12 @@ class AgentTaskRegistry:
         async with self._lock:
             return self._tasks.get(session_id)
 
+    async def set_message_id(self, session_id: str, message_id: str) -> None:
+        """Record the block a session's task is streaming into."""
+        async with self._lock:
+            if session_id in self._tasks:
+                self._tasks[session_id].message_id = message_id
+
     async def cancel_task(self, session_id: str) -> bool:
         """Cancel a running task."""
         async with self._lock:
@@ -97,13 +151,215 @@ class AgentTaskRegistry:
             return len(to_remove)
 
 
+class RemoteTaskHandle:
+    """Stand-in for the asyncio.Task of an agent running on another worker."""
+
+    def __init__(self, registry: "SharedAgentTaskRegistry", session_id: str, status: str):
+        self._registry = registry
+        self._session_id = session_id
+        self._status = status
+
+    def done(self) -> bool:
+        """Whether the task had finished when its record was read."""
+        return self._status != "running"
+
+    def cancel(self) -> bool:
+        """Ask the owning worker to cancel the task."""
+        self._registry.request_cancel(self._session_id)
+        return True
+
+
+class RemoteCancelEvent:
+    """Stand-in for the cancel event of an agent running on another worker."""
+
+    def __init__(self, registry: "SharedAgentTaskRegistry", session_id: str):
+        self._registry = registry
+        self._session_id = session_id
+        self._set = False
+
+    def set(self) -> None:
+        """Ask the owning worker to cancel the task."""
+        if not self._set:
+            self._set = True
+            self._registry.request_cancel(self._session_id)
+
+    def is_set(self) -> bool:
+        return self._set
+
+
+class SharedAgentTaskRegistry(AgentTaskRegistry):
+    """
+    Task registry shared between workers through Redis.
+
+    Tasks run where they were started and stay in the local registry; a
+    hash per session records which worker owns the task, its block and its
+    status. Tasks owned elsewhere are returned with RemoteTaskHandle and
+    RemoteCancelEvent stand-ins, and cancelling one publishes the session
+    ID on a channel the owning worker listens to.
+    """
+
+    def __init__(
+        self,
+        redis,
+        worker_id: str,
+        ttl: Optional[int] = None,
+        key_prefix: str = "ocp",
+    ):
+        """
+        Initialize the registry.
+
+        Args:
+            redis: redis.asyncio client (decode_responses=True)
+            worker_id: ID of this worker, stored as the owner of its tasks
+            ttl: Seconds a task record outlives its last update
+            key_prefix: Prefix for all Redis keys
+        """
+        super().__init__()
+        self.redis = redis
+        self.worker_id = worker_id
+        self.ttl = ttl if ttl is not None else settings.stream_state_ttl
+        self.cancel_channel = f"{key_prefix}:task:cancel"
+        self._key_prefix = key_prefix
+        self._listener: Optional[asyncio.Task] = None
+        self._pending_cancels: set = set()
+
+    def task_key(self, session_id: str) -> str:
+        return f"{self._key_prefix}:task:{session_id}"
+
+    async def _write(self, session_id: str, fields: Dict[str, Any]) -> None:
+        """Update a task record and refresh its expiry."""
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.hset(self.task_key(session_id), mapping=fields)
+        pipe.expire(self.task_key(session_id), self.ttl)
+        await pipe.execute()
+
+    async def register_task(
+        self, session_id: str, message_id: str, task: asyncio.Task, cancel_event: asyncio.Event
+    ) -> None:
+        """Register a new agent task, cancelling one running for the session anywhere."""
+        record = await self.redis.hgetall(self.task_key(session_id))
+        if record.get("status") == "running" and record.get("worker_id") != self.worker_id:
+            await self.redis.publish(self.cancel_channel, session_id)
+
+        await super().register_task(session_id, message_id, task, cancel_event)
+        await self.redis.delete(self.task_key(session_id))
+        await self._write(
+            session_id,
+            {
+                "worker_id": self.worker_id,
+                "message_id": message_id,
+                "status": "running",
+                "created_at": datetime.utcnow().isoformat(),
+            },
+        )
+
+    async def get_task(self, session_id: str) -> Optional[AgentTask]:
+        """Get the task for a session, from this worker or from the shared record."""
+        local = await super().get_task(session_id)
+        if local is not None:
+            return local
+
+        record = await self.redis.hgetall(self.task_key(session_id))
+        if not record:
+            return None
+        status = record.get("status", "running")
+        return AgentTask(
+            task=RemoteTaskHandle(self, session_id, status),
+            session_id=session_id,
+            message_id=record.get("message_id", ""),
+            cancel_event=RemoteCancelEvent(self, session_id),
+            created_at=datetime.fromisoformat(record["created_at"]),
+            status=status,
+        )
+
+    async def set_message_id(self, session_id: str, message_id: str) -> None:
+        await super().set_message_id(session_id, message_id)
+        await self._write(session_id, {"message_id": message_id})
+
+    async def cancel_task(self, session_id: str) -> bool:
+        if await super().cancel_task(session_id):
+            await self._write(session_id, {"status": "cancelled"})
+            return True
+
+        record = await self.redis.hgetall(self.task_key(session_id))
+        if record.get("status") == "running" and record.get("worker_id") != self.worker_id:
+            await self.redis.publish(self.cancel_channel, session_id)
+            return True
+        return False
+
+    async def mark_completed(self, session_id: str, status: str = "completed") -> None:
+        await super().mark_completed(session_id, status)
+        await self._write(session_id, {"status": status})
+
+    async def cleanup_task(self, session_id: str) -> None:
+        await super().cleanup_task(session_id)
+        record = await self.redis.hgetall(self.task_key(session_id))
+        if record.get("worker_id") == self.worker_id:
+            await self.redis.delete(self.task_key(session_id))
+
+    def request_cancel(self, session_id: str) -> None:
+        """Publish a cancel request without waiting (for the synchronous stand-ins)."""
+        request = asyncio.create_task(self.redis.publish(self.cancel_channel, session_id))
+        self._pending_cancels.add(request)
+        request.add_done_callback(self._pending_cancels.discard)
+
+    async def start(self) -> None:
+        """Start listening for cancel requests aimed at this worker's tasks."""
+        if self._listener is None or self._listener.done():
+            pubsub = self.redis.pubsub()
+            await pubsub.subscribe(self.cancel_channel)
+            self._listener = asyncio.create_task(self._listen(pubsub))
+
+    async def _listen(self, pubsub) -> None:
+        """Cancel local tasks named on the cancel channel."""
+        try:
+            async for message in pubsub.listen():
+                if message.get("type") != "message":
+                    continue
+                session_id = message["data"]
+                if await AgentTaskRegistry.cancel_task(self, session_id):
+                    logger.info(f"Cancelled task for session {session_id} on remote request")
+                    await self._write(session_id, {"status": "cancelled"})
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Task cancel listener stopped: {e}")
+        finally:
+            await pubsub.aclose()
+
+    async def close(self) -> None:
+        """Stop listening for cancel requests."""
+        listener, self._listener = self._listener, None
+        if listener is not None and not listener.done():
+            listener.cancel()
+            try:
+                await listener
+            except asyncio.CancelledError:
+                pass
+
+
 # Global singleton instance
 _agent_task_registry: Optional[AgentTaskRegistry] = None
 
 
 def get_agent_task_registry() -> AgentTaskRegistry:
-    """Get the global agent task registry singleton."""
+    """Get the global agent task registry singleton (shared through Redis when configured)."""
     global _agent_task_registry
     if _agent_task_registry is None:
-        _agent_task_registry = AgentTaskRegistry()
+        from app.core.storage.redis_client import (
+            WORKER_ID,
+            get_redis_client,
+            shared_state_enabled,
+        )
+
+        if shared_state_enabled():
+            _agent_task_registry = SharedAgentTaskRegistry(get_redis_client(), WORKER_ID)
+        else:
+            _agent_task_registry = AgentTaskRegistry()
     return _agent_task_registry
+
+
+async def shutdown_agent_task_registry() -> None:
+    """Stop the global registry's background work."""
+    if _agent_task_registry is not None:
+        await _agent_task_registry.close()
@@ -0,0 +1,347 @@
+"""Token-budgeted context window management for agent prompts."""
+
+import json
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Protocol, Tuple
+
+from app.core.config import settings
+
+# Estimated tokens for an image part (providers bill images separately from text)
+IMAGE_TOKENS = 1000
+# Per-message overhead for role and formatting tokens
+MESSAGE_OVERHEAD_TOKENS = 4
+# Characters of an elided tool output kept as a preview
+TOOL_OUTPUT_PREVIEW_CHARS = 200
+
+# Prefixes of the user-role messages that carry tool output (live and from history)
+TOOL_OUTPUT_PREFIXES = ("Tool result (", "Tool '")
+
+
+class Tokenizer(Protocol):
+    """Counts the tokens in a piece of text."""
+
+    def count(self, text: str) -> int: ...
+
+
+class HeuristicTokenizer:
+    """Cheap token estimate of roughly four characters per token."""
+
+    def __init__(self, chars_per_token: float = 4.0):
+        """
+        Initialize the tokenizer.
+
+        Args:
+            chars_per_token: Average characters per token
+        """
+        self.chars_per_token = chars_per_token
+
+    def count(self, text: str) -> int:
+        return int(len(text) / self.chars_per_token + 0.5)
+
+
+class LiteLLMTokenizer:
+    """Model-specific token counts from LiteLLM, falling back to the heuristic."""
+
+    def __init__(self, model: str):
+        """
+        Initialize the tokenizer.
+
+        Args:
+            model: LiteLLM model name used to pick the tokenizer
+        """
+        self.model = model
+        self.fallback = HeuristicTokenizer()
+
+    def count(self, text: str) -> int:
+        try:
+            import litellm
+
+            return litellm.token_counter(model=self.model, text=text)
+        except Exception:
+            return self.fallback.count(text)
+
+
+def get_tokenizer(model: str, kind: Optional[str] = None) -> Tokenizer:
+    """
+    Get the tokenizer configured for prompt size estimates.
+
+    Args:
+        model: LiteLLM model name
+        kind: "heuristic" or "litellm" (defaults to settings.llm_context_tokenizer)
+
+    Returns:
+        Tokenizer instance
+    """
+    kind = kind or settings.llm_context_tokenizer
+    if kind == "litellm":
+        return LiteLLMTokenizer(model)
+    return HeuristicTokenizer()
+
+
+@dataclass
+class PromptMetrics:
+    """Prompt size for one LLM call, before and after fitting to the budget."""
+
+    budget: int
+    tokens_before: int
+    tokens_after: int
+    messages_before: int
+    messages_after: int
+    elided_messages: int = 0
+    dropped_messages: int = 0
+
+    @property
+    def trimmed(self) -> bool:
+        """Whether anything was elided or dropped to fit the budget."""
+        return bool(self.elided_messages or self.dropped_messages)
+
+
+class ContextWindowManager:
+    """
+    Fits an agent's message list into a model's context window.
+
+    The system prompt, the current user message and the most recent
+    messages are pinned. When the prompt is over budget, older tool outputs
+    are first cut down to a short preview, and if that isn't enough the
+    oldest unpinned turns are dropped. Turns are dropped whole (a tool call
+    with its results, a user message with the reply to it), so no tool
+    result is left without its call. Message dicts are never mutated;
+    elided messages are copies.
+    """
+
+    def __init__(
+        self,
+        budget: int,
+        tokenizer: Optional[Tokenizer] = None,
+        keep_recent: Optional[int] = None,
+    ):
+        """
+        Initialize the manager.
+
+        Args:
+            budget: Maximum prompt size in tokens
+            tokenizer: Token counter (defaults to the heuristic)
+            keep_recent: Most recent messages never elided or dropped
+        """
+        self.budget = budget
+        self.tokenizer = tokenizer or HeuristicTokenizer()
+        self.keep_recent = (
+            keep_recent if keep_recent is not None else settings.llm_context_keep_recent
+        )
+        self.last_metrics: Optional[PromptMetrics] = None
+        # id(message) -> (message, tokens); holding the message keeps the id from being reused
+        self._counts: Dict[int, Tuple[Dict[str, Any], int]] = {}
+        # id(message) -> (message, elided copy or None), so later calls reuse the same copy
+        self._elided: Dict[int, Tuple[Dict[str, Any], Optional[Dict[str, Any]]]] = {}
+
+    @classmethod
+    def for_model(
+        cls, provider: str, model: str, tokenizer: Optional[Tokenizer] = None
+    ) -> "ContextWindowManager":
+        """
+        Create a manager budgeted for a model's context window.
+
+        Args:
+            provider: Provider identifier
+            model: Model ID
+            tokenizer: Token counter (defaults to the configured one)
+
+        Returns:
+            ContextWindowManager instance
+        """
+        from app.core.llm.providers import get_context_window
+
+        window = get_context_window(provider, model)
+        budget = max(window - settings.llm_context_reserve_tokens, window // 2)
+        return cls(budget=budget, tokenizer=tokenizer or get_tokenizer(model))
+
+    def count_message(self, message: Dict[str, Any]) -> int:
+        """
+        Estimate the tokens a message takes up in the prompt.
+
+        Counts are cached per message object, so messages must not be mutated
+        after they are first counted.
+
+        Args:
+            message: Chat message dict
+
+        Returns:
+            Estimated token count
+        """
+        cached = self._counts.get(id(message))
+        if cached is not None and cached[0] is message:
+            return cached[1]
+
+        tokens = MESSAGE_OVERHEAD_TOKENS
+        content = message.get("content")
+        if isinstance(content, str):
+            tokens += self.tokenizer.count(content)
+        elif isinstance(content, list):
+            for part in content:
+                if part.get("type") == "text":
+                    tokens += self.tokenizer.count(part.get("text", ""))
+                else:
+                    tokens += IMAGE_TOKENS
+
+        function_call = message.get("function_call")
+        if function_call:
+            arguments = function_call.get("arguments") or ""
+            if not isinstance(arguments, str):
+                arguments = json.dumps(arguments)
+            tokens += self.tokenizer.count(function_call.get("name") or "")
+            tokens += self.tokenizer.count(arguments)
+
+        self._counts[id(message)] = (message, tokens)
+        return tokens
+
+    def fit(
+        self, messages: List[Dict[str, Any]], current_index: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Fit messages into the budget.
+
+        Args:
+            messages: Full message list, system prompt first
+            current_index: Index of the user message being answered (defaults
+                to the last user message that isn't a tool result)
+
+        Returns:
+            New list of messages to send
+        """
+        counts = [self.count_message(message) for message in messages]
+        total = sum(counts)
+        metrics = PromptMetrics(
+            budget=self.budget,
+            tokens_before=total,
+            tokens_after=total,
+            messages_before=len(messages),
+            messages_after=len(messages),
+        )
+        self.last_metrics = metrics
+        if total <= self.budget:
+            return list(messages)
+
+        fitted = list(messages)
+        start = 1 if fitted and fitted[0].get("role") == "system" else 0
+        groups = _turn_starts(fitted, start)
+        # Never split a turn at the pinned boundary
+        end = max(len(fitted) - self.keep_recent, start)
+        end = max((index for index in groups if index <= end), default=start)
+        if current_index is None:
+            current_index = next(
+                (
+                    index
+                    for index in range(len(fitted) - 1, start - 1, -1)
+                    if fitted[index].get("role") == "user" and not _is_tool_result(fitted[index])
+                ),
+                None,
+            )
+
+        # Elide older tool outputs first, oldest first
+        for index in range(start, end):
+            if total <= self.budget:
+                break
+            elided = self._elided_copy(fitted[index])
+            if elided is None:
+                continue
+            saved = counts[index] - self.count_message(elided)
+            if saved <= 0:
+                continue
+            fitted[index] = elided
+            counts[index] -= saved
+            total -= saved
+            metrics.elided_messages += 1
+
+        # Then drop whole turns from the front of the unpinned range, keeping
+        # the turn of the user message being answered
+        dropped = set()
+        for turn_start, turn_end in zip(groups, groups[1:] + [len(fitted)]):
+            if total <= self.budget or turn_end > end:
+                break
+            if current_index is not None and turn_start <= current_index < turn_end:
+                continue
+            total -= sum(counts[turn_start:turn_end])
+            dropped.update(range(turn_start, turn_end))
+        if dropped:
+            fitted = [message for index, message in enumerate(fitted) if index not in dropped]
+            metrics.dropped_messages = len(dropped)
+
+        metrics.tokens_after = total
+        metrics.messages_after = len(fitted)
+        return fitted
+
+    def _elided_copy(self, message: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Get the (cached) elided copy of a message."""
+        cached = self._elided.get(id(message))
+        if cached is None or cached[0] is not message:
+            cached = (message, self._elide(message))
+            self._elided[id(message)] = cached
+        return cached[1]
+
+    def _elide(self, message: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Get a shortened copy of a tool output message, or None if it isn't one."""
+        content = message.get("content")
+
+        if isinstance(content, list):
+            # Vision tool result: keep the text, drop the image
+            text = " ".join(part.get("text", "") for part in content if part.get("type") == "text")
+            if not text.startswith(TOOL_OUTPUT_PREFIXES):
+                return None
+            content = text + "\n[image elided to fit the context window]"
+            return {**message, "content": content}
+
+        if not isinstance(content, str) or not content.startswith(TOOL_OUTPUT_PREFIXES):
+            return None
+        if len(content) <= TOOL_OUTPUT_PREVIEW_CHARS:
+            return None
+
+        elided_tokens = self.tokenizer.count(content[TOOL_OUTPUT_PREVIEW_CHARS:])
+        preview = content[:TOOL_OUTPUT_PREVIEW_CHARS]
+        return {
+            **message,
+            "content": f"{preview}\n[... ~{elided_tokens} tokens of older tool output elided ...]",
+        }
+
+
+def _is_tool_result(message: Dict[str, Any]) -> bool:
+    """Whether a message carries a tool result (native or as user-role text)."""
+    if message.get("role") in ("tool", "function"):
+        return True
+    if message.get("role") != "user":
+        return False
+    content = message.get("content")
+    if isinstance(content, list):
+        content = " ".join(part.get("text", "") for part in content if part.get("type") == "text")
+    return isinstance(content, str) and content.startswith(TOOL_OUTPUT_PREFIXES)
+
+
+def _turn_starts(messages: List[Dict[str, Any]], start: int) -> List[int]:
+    """
+    Get the indexes where the turns of a conversation start.
+
+    Tool results belong to the call before them, and an assistant message
+    directly answering a user message belongs to that message, so dropping
+    whole turns never separates a call from its results.
+
+    Args:
+        messages: Message list
+        start: Index of the first message after the system prompt
+
+    Returns:
+        Ascending indexes of the first message of each turn
+    """
+    starts = []
+    for index in range(start, len(messages)):
+        message = messages[index]
+        previous = messages[index - 1] if index > start else None
+        continues = previous is not None and (
+            _is_tool_result(message)
+            or (
+                message.get("role") == "assistant"
+                and previous.get("role") == "user"
+                and not _is_tool_result(previous)
+            )
+        )
+        if not continues:
+            starts.append(index)
+    return starts
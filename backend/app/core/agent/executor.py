@@ -1,11 +1,18 @@
 """ReAct agent executor for autonomous task completion."""
 
 import json
-from typing import Dict, List, Any, AsyncIterator
+import asyncio
+from typing import Dict, List, Any, AsyncIterator, Tuple
 from pydantic import BaseModel
 
-from app.core.agent.tools.base import ToolRegistry
+from app.core.agent.context import ContextWindowManager, PromptMetrics
+from app.core.agent.tools.base import Tool, ToolRegistry, ToolResult
+from app.core.config import settings
 from app.core.llm.provider import LLMProvider
+from app.core.llm.prompt_cache import LLMUsage
+
+# A tool call from the LLM: (tool name, raw JSON arguments, parsed arguments)
+ToolCall = Tuple[str, str, Dict[str, Any]]
 
 
 class AgentStep(BaseModel):
@@ -45,6 +52,7 @@ class ReActAgent:
         system_instructions: str | None = None,
         max_validation_retries: int = 3,
         max_same_tool_retries: int = 5,
+        context_manager: ContextWindowManager | None = None,
     ):
         """Initialize the ReAct agent.
 
@@ -55,6 +63,8 @@ class ReActAgent:
             system_instructions: Custom system instructions for the agent
             max_validation_retries: Maximum validation retry attempts before giving up
             max_same_tool_retries: Maximum retries for same tool to prevent loops
+            context_manager: Fits prompts into the model's context window
+                (defaults to one budgeted for the provider's model)
         """
         self.llm = llm_provider
         self.tools = tool_registry
@@ -68,6 +78,22 @@ class ReActAgent:
         # Track tool usage to detect loops
         self.tool_call_history = []
 
+        self.context = context_manager or self._default_context_manager()
+        # Prompt size of each LLM call made by run()
+        self.prompt_metrics: List[PromptMetrics] = []
+        # Token usage (with prompt cache hits) of each LLM call that reported it
+        self.llm_usage: List[LLMUsage] = []
+        # System message memoized per tool set (see _build_system_message)
+        self._system_message: Tuple[int, str] | None = None
+
+    def _default_context_manager(self) -> ContextWindowManager:
+        """Create a context manager budgeted for the LLM provider's model."""
+        provider = getattr(self.llm, "provider", None)
+        model = getattr(self.llm, "model", None)
+        if not isinstance(provider, str) or not isinstance(model, str):
+            provider, model = settings.default_llm_provider, settings.default_llm_model
+        return ContextWindowManager.for_model(provider, model)
+
     def _default_system_instructions(self) -> str:
         """Get default system instructions for the agent."""
         return """You are an autonomous coding agent with access to a sandbox environment.
@@ -137,17 +163,34 @@ If a tool returns an error or unexpected result, acknowledge it and try to fix i
 - ALWAYS use function calls to invoke tools - do not just describe what you would do
 - For edit: ALWAYS read the file first using file_read before editing
 - Think before acting, especially for complex or irreversible operations
+- When you need several independent reads (file_read, search, ast_search), request them all in one turn; they run in parallel
 - After each tool result, consider whether you need to think through the implications
 
 When you have completed the task, provide a final answer summarizing what you did.
 """
 
     def _build_system_message(self) -> str:
-        """Build the system message with tool descriptions."""
-        tool_descriptions = "\n".join(
-            [f"- {tool.name}: {tool.description}" for tool in self.tools.list_tools()]
+        """Build the system message with tool descriptions.
+
+        The message is built once per tool set, with tools in name order, so
+        it is byte-identical across iterations and runs and stays cacheable.
+        """
+        if self._system_message is None or self._system_message[0] != self.tools.version:
+            tools = sorted(self.tools.list_tools(), key=lambda tool: tool.name)
+            tool_descriptions = "\n".join([f"- {tool.name}: {tool.description}" for tool in tools])
+            self._system_message = (
+                self.tools.version,
+                self.system_instructions.format(tools=tool_descriptions),
+            )
+        return self._system_message[1]
+
+    def _record_usage(self, usage: LLMUsage) -> None:
+        """Record the token usage one LLM call reported."""
+        self.llm_usage.append(usage)
+        print(
+            f"[REACT AGENT] Prompt cache: {usage.cache_read_tokens} tokens hit, "
+            f"{usage.cache_miss_tokens} missed"
         )
-        return self.system_instructions.format(tools=tool_descriptions)
 
     def _validate_before_edit(self, messages: List[Dict], file_path: str) -> tuple[bool, str]:
         """Validate that agent has read the file before editing.
@@ -199,6 +242,315 @@ Use file_read('{file_path}') FIRST to see the exact content, then try your edit.
 
         return (True, "")
 
+    async def _execute_with_output(
+        self, tool: Tool, args: Dict[str, Any], cancel_event: Any = None
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """Execute a streaming tool, relaying its output while it runs.
+
+        The tool runs as a separate task that pushes output chunks into a queue.
+        If cancel_event is set mid-run the tool task is cancelled, which aborts
+        the underlying command.
+
+        Args:
+            tool: Tool that supports output streaming
+            args: Tool arguments
+            cancel_event: Optional asyncio.Event for cancelling execution
+
+        Yields:
+            ("output", (stream, text)) for each chunk, then ("result", ToolResult),
+            or ("cancelled", None) if execution was cancelled
+        """
+        output_queue: asyncio.Queue = asyncio.Queue()
+
+        async def on_output(stream: str, text: str) -> None:
+            output_queue.put_nowait((stream, text))
+
+        tool_task = asyncio.create_task(
+            tool.validate_and_execute(output_callback=on_output, **args)
+        )
+        cancel_task = asyncio.create_task(cancel_event.wait()) if cancel_event else None
+
+        try:
+            while True:
+                get_task = asyncio.create_task(output_queue.get())
+                waiters = {tool_task, get_task}
+                if cancel_task:
+                    waiters.add(cancel_task)
+
+                done, _ = await asyncio.wait(waiters, return_when=asyncio.FIRST_COMPLETED)
+
+                if get_task in done:
+                    yield "output", get_task.result()
+                    continue
+                get_task.cancel()
+
+                if cancel_task in done:
+                    tool_task.cancel()
+                    yield "cancelled", None
+                    return
+
+                # Tool finished - relay anything it emitted right before returning
+                while not output_queue.empty():
+                    yield "output", output_queue.get_nowait()
+                result: ToolResult = tool_task.result()
+                yield "result", result
+                return
+        finally:
+            if cancel_task:
+                cancel_task.cancel()
+            if not tool_task.done():
+                tool_task.cancel()
+
+    def _parse_tool_calls(self, tool_calls: Dict[int, Dict[str, Any]]) -> List[ToolCall]:
+        """Turn the tool calls streamed in one LLM turn into executable calls.
+
+        Args:
+            tool_calls: Accumulated calls by stream index
+
+        Returns:
+            (name, raw arguments, parsed arguments) for each call to a known tool,
+            in the order the LLM made them
+        """
+        calls = []
+        for index in sorted(tool_calls):
+            function_name = tool_calls[index]["name"]
+            function_args = tool_calls[index]["arguments"]
+            if not function_name or not self.tools.has_tool(function_name):
+                print(f"[REACT AGENT] Skipping call to unknown tool: {function_name}")
+                continue
+
+            try:
+                args = (
+                    json.loads(function_args) if isinstance(function_args, str) else function_args
+                )
+            except json.JSONDecodeError:
+                args = {}
+            raw_args = (
+                function_args if isinstance(function_args, str) else json.dumps(function_args)
+            )
+            calls.append((function_name, raw_args, args))
+        return calls
+
+    def _batch_tool_calls(self, calls: List[ToolCall]) -> List[List[ToolCall]]:
+        """Group tool calls into batches that may run concurrently.
+
+        Consecutive calls to read-only tools share a batch; any other call
+        gets a batch of its own, so side effects happen in the order the LLM
+        asked for them.
+
+        Args:
+            calls: Tool calls in request order
+
+        Returns:
+            Batches in execution order
+        """
+        batches: List[List[ToolCall]] = []
+        last_concurrent = False
+        for call in calls:
+            tool = self.tools.get(call[0])
+            concurrent = tool.read_only and not tool.supports_output_streaming
+            if concurrent and last_concurrent:
+                batches[-1].append(call)
+            else:
+                batches.append([call])
+            last_concurrent = concurrent
+        return batches
+
+    async def _handle_tool_call(
+        self,
+        call: ToolCall,
+        result: ToolResult | None,
+        messages: List[Dict],
+        steps: List[AgentStep],
+        thought: str,
+        step: int,
+        count_for_loops: bool = True,
+        cancel_event: Any = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Execute one tool call and record it in the conversation.
+
+        Args:
+            call: (name, raw arguments, parsed arguments)
+            result: Result if the call was already executed in a concurrent batch
+            messages: Conversation, extended with the call and its result
+            steps: Recorded agent steps
+            thought: Text the LLM produced before its tool calls (first call of a turn only)
+            step: Current iteration number
+            count_for_loops: Whether the call counts towards loop detection
+            cancel_event: Optional asyncio.Event for cancelling execution
+
+        Yields:
+            The call's events; a "cancelled" event means the run must stop
+        """
+        function_name, raw_args, args = call
+        print(f"[REACT AGENT] Executing function: {function_name}")
+
+        # Add assistant's function call to conversation for proper context
+        # This is critical so the LLM remembers what it decided to do in previous iterations
+        messages.append(
+            {
+                "role": "assistant",
+                "content": thought or None,
+                "function_call": {"name": function_name, "arguments": raw_args},
+            }
+        )
+
+        # Validate edit_lines requires file_read first
+        if function_name == "edit_lines":
+            file_path = args.get("path", "")
+            should_proceed, validation_msg = self._validate_before_edit(messages, file_path)
+
+            if not should_proceed:
+                print(f"[REACT AGENT] Validation failed for edit_lines: {file_path}")
+                # Add validation error to conversation (don't execute the tool)
+                messages.append({"role": "user", "content": validation_msg})
+                return
+
+        # Execute tool
+        tool = self.tools.get(function_name)
+        if result is None:
+            if tool.supports_output_streaming:
+                # Relay live output (e.g. a long build) while the tool runs
+                async for kind, payload in self._execute_with_output(tool, args, cancel_event):
+                    if kind == "output":
+                        stream, text = payload
+                        yield {
+                            "type": "action_output_chunk",
+                            "tool": function_name,
+                            "stream": stream,
+                            "content": text,
+                            "step": step,
+                        }
+                    elif kind == "result":
+                        result = payload
+
+                if result is None:
+                    print("[REACT AGENT] Cancellation during tool execution")
+                    yield {
+                        "type": "cancelled",
+                        "content": "Response cancelled by user",
+                        "partial_content": thought,
+                        "step": step,
+                    }
+                    return
+            else:
+                # Use validate_and_execute for parameter validation
+                result = await tool.validate_and_execute(**args)
+
+        # Handle validation errors internally (don't show in frontend)
+        if result.is_validation_error:
+            print(f"[REACT AGENT] Validation error for {function_name}: {result.error}")
+
+            # Track validation retries
+            self.validation_retry_count += 1
+
+            # Check if we've exceeded retry limit
+            if self.validation_retry_count >= self.max_validation_retries:
+                # Max retries exceeded - add suggestion to try different approach
+                error_with_suggestion = (
+                    f"{result.error}\n\n"
+                    f"You've attempted this {self.validation_retry_count} times with validation errors. "
+                    f"Consider:\n"
+                    f"1. Using a different tool to accomplish the task\n"
+                    f"2. Breaking the task into smaller steps\n"
+                    f"3. Carefully reviewing the tool's parameter requirements"
+                )
+                messages.append(
+                    {
+                        "role": "user",
+                        "content": f"Tool '{function_name}' validation failed: {error_with_suggestion}",
+                    }
+                )
+                # Reset counter for next tool
+                self.validation_retry_count = 0
+            else:
+                # Add validation error to conversation for LLM to learn from
+                messages.append(
+                    {
+                        "role": "user",
+                        "content": f"Tool '{function_name}' validation failed (attempt {self.validation_retry_count}/{self.max_validation_retries}): {result.error}",
+                    }
+                )
+
+            # Don't save as agent_action
+            return
+
+        # Reset validation retry counter on successful validation
+        self.validation_retry_count = 0
+
+        # Track tool call for loop detection (once per tool per turn, so reading
+        # several files in one turn isn't mistaken for a loop)
+        if count_for_loops:
+            self.tool_call_history.append(function_name)
+
+            # Check for tool call loops (same tool failing repeatedly)
+            recent_calls = self.tool_call_history[-self.max_same_tool_retries :]
+            if len(recent_calls) == self.max_same_tool_retries and len(set(recent_calls)) == 1:
+                # Same tool called max_same_tool_retries times in a row
+                print(
+                    f"[REACT AGENT] Loop detected: {function_name} called {self.max_same_tool_retries} times"
+                )
+                observation = (
+                    f"Error: Tool '{function_name}' has been called {self.max_same_tool_retries} times "
+                    f"consecutively without success. This suggests the current approach isn't working. "
+                    f"Please try a different tool or approach to accomplish the task."
+                )
+                messages.append({"role": "user", "content": observation})
+                # Clear history to allow trying again later if needed
+                self.tool_call_history = []
+                return
+
+        # Execution successful or execution error (not validation) - show in frontend
+        yield {
+            "type": "action",
+            "content": f"Using tool: {function_name}",
+            "tool": function_name,
+            "args": args,
+            "step": step,
+        }
+
+        # Create observation
+        # For failures, include BOTH error message AND output so LLM can see what went wrong
+        if result.success:
+            observation = result.output
+        else:
+            # Combine error message with output (stdout/stderr) for better context
+            observation_parts = []
+            if result.error:
+                observation_parts.append(f"Error: {result.error}")
+            if result.output:
+                observation_parts.append(result.output)
+            observation = (
+                "\n".join(observation_parts) if observation_parts else "Error: Unknown failure"
+            )
+
+        yield {
+            "type": "observation",
+            "content": observation,
+            "success": result.success,
+            "metadata": result.metadata,
+            "step": step,
+        }
+
+        # Add tool result to conversation as user message
+        messages.append(
+            {
+                "role": "user",
+                "content": f"Tool '{function_name}' returned: {observation}",
+            }
+        )
+
+        # Record step
+        steps.append(
+            AgentStep(
+                thought=thought or None,
+                action=function_name,
+                action_input=args,
+                observation=observation,
+                step_number=step,
+            )
+        )
+
     async def run(
         self,
         user_message: str,
@@ -228,6 +580,7 @@ Use file_read('{file_path}') FIRST to see the exact content, then try your edit.
             print(f"  Conversation history: {len(conversation_history)} messages")
 
         messages.append({"role": "user", "content": user_message})
+        current_index = len(messages) - 1
 
         # Agent loop
         steps: List[AgentStep] = []
@@ -247,7 +600,20 @@ Use file_read('{file_path}') FIRST to see the exact content, then try your edit.
 
             try:
                 # Get LLM response with function calling
-                llm_messages = messages.copy()
+                # Fit the prompt into the context window (pinned system prompt + recent turns)
+                llm_messages = self.context.fit(messages, current_index=current_index)
+                metrics = self.context.last_metrics
+                self.prompt_metrics.append(metrics)
+                print(
+                    f"[REACT AGENT] Prompt: {metrics.tokens_after} tokens in "
+                    f"{metrics.messages_after} messages (budget {metrics.budget})"
+                )
+                if metrics.trimmed:
+                    print(
+                        f"[REACT AGENT] Trimmed prompt from {metrics.tokens_before} tokens: "
+                        f"{metrics.elided_messages} tool outputs elided, "
+                        f"{metrics.dropped_messages} messages dropped"
+                    )
                 tools_for_llm = self.tools.get_tools_for_llm()
                 print(f"[REACT AGENT] Tools for LLM: {len(tools_for_llm) if tools_for_llm else 0}")
 
@@ -263,6 +629,7 @@ Use file_read('{file_path}') FIRST to see the exact content, then try your edit.
                 async for chunk in self.llm.generate_stream(
                     messages=llm_messages,
                     tools=tools_for_llm if tools_for_llm else None,
+                    on_usage=self._record_usage,
                 ):
                     # Check for cancellation during streaming
                     if cancel_event and cancel_event.is_set():
@@ -335,202 +702,60 @@ Use file_read('{file_path}') FIRST to see the exact content, then try your edit.
                 print(f"[REACT AGENT] Tool calls: {list(tool_calls.keys())}")
 
                 # Check if LLM wants to call any functions
-                # ReAct pattern: Execute ONE tool per iteration (use first/lowest index)
-                if tool_calls:
-                    # Get the first tool call (lowest index)
-                    first_index = min(tool_calls.keys())
-                    tool_call = tool_calls[first_index]
-                    function_name = tool_call["name"]
-                    function_args = tool_call["arguments"]
-
-                    if len(tool_calls) > 1:
+                # Execute every tool call of the turn, then go back to the LLM once
+                calls = self._parse_tool_calls(tool_calls)
+                if calls:
+                    if len(calls) > 1:
                         print(
-                            f"[REACT AGENT] WARNING: LLM suggested {len(tool_calls)} tool calls, but ReAct pattern supports one per iteration. Executing first: {function_name}"
-                        )
-
-                    if function_name and self.tools.has_tool(function_name):
-                        print(f"[REACT AGENT] Executing function: {function_name}")
-
-                        # Add assistant's function call to conversation for proper context
-                        # This is critical so the LLM remembers what it decided to do in previous iterations
-                        messages.append(
-                            {
-                                "role": "assistant",
-                                "content": full_response or None,
-                                "function_call": {
-                                    "name": function_name,
-                                    "arguments": (
-                                        function_args
-                                        if isinstance(function_args, str)
-                                        else json.dumps(function_args)
-                                    ),
-                                },
-                            }
+                            f"[REACT AGENT] Executing {len(calls)} tool calls: {[c[0] for c in calls]}"
                         )
 
-                        # Parse function arguments
-                        try:
-                            args = (
-                                json.loads(function_args)
-                                if isinstance(function_args, str)
-                                else function_args
-                            )
-                        except json.JSONDecodeError:
-                            args = {}
-
-                        # Validate edit_lines requires file_read first
-                        if function_name == "edit_lines":
-                            file_path = args.get("path", "")
-                            should_proceed, validation_msg = self._validate_before_edit(
-                                messages, file_path
-                            )
-
-                            if not should_proceed:
-                                print(
-                                    f"[REACT AGENT] Validation failed for edit_lines: {file_path}"
-                                )
-                                # Add validation error to conversation
-                                messages.append(
-                                    {
-                                        "role": "user",
-                                        "content": validation_msg,
-                                    }
-                                )
-                                # Continue to next iteration (don't execute the tool)
-                                continue
-
-                        # Execute tool
-                        tool = self.tools.get(function_name)
-                        if tool:
-                            # Use validate_and_execute for parameter validation
-                            result = await tool.validate_and_execute(**args)
-
-                            # Handle validation errors internally (don't show in frontend)
-                            if result.is_validation_error:
-                                print(
-                                    f"[REACT AGENT] Validation error for {function_name}: {result.error}"
-                                )
-
-                                # Track validation retries
-                                self.validation_retry_count += 1
-
-                                # Check if we've exceeded retry limit
-                                if self.validation_retry_count >= self.max_validation_retries:
-                                    # Max retries exceeded - add suggestion to try different approach
-                                    error_with_suggestion = (
-                                        f"{result.error}\n\n"
-                                        f"You've attempted this {self.validation_retry_count} times with validation errors. "
-                                        f"Consider:\n"
-                                        f"1. Using a different tool to accomplish the task\n"
-                                        f"2. Breaking the task into smaller steps\n"
-                                        f"3. Carefully reviewing the tool's parameter requirements"
-                                    )
-                                    messages.append(
-                                        {
-                                            "role": "user",
-                                            "content": f"Tool '{function_name}' validation failed: {error_with_suggestion}",
-                                        }
-                                    )
-                                    # Reset counter for next tool
-                                    self.validation_retry_count = 0
-                                else:
-                                    # Add validation error to conversation for LLM to learn from
-                                    messages.append(
-                                        {
-                                            "role": "user",
-                                            "content": f"Tool '{function_name}' validation failed (attempt {self.validation_retry_count}/{self.max_validation_retries}): {result.error}",
-                                        }
-                                    )
-
-                                # Continue to next iteration (don't save as agent_action)
-                                continue
-
-                            # Reset validation retry counter on successful validation
-                            self.validation_retry_count = 0
-
-                            # Track tool call for loop detection
-                            self.tool_call_history.append(function_name)
-
-                            # Check for tool call loops (same tool failing repeatedly)
-                            recent_calls = self.tool_call_history[-self.max_same_tool_retries :]
-                            if (
-                                len(recent_calls) == self.max_same_tool_retries
-                                and len(set(recent_calls)) == 1
-                            ):
-                                # Same tool called max_same_tool_retries times in a row
-                                print(
-                                    f"[REACT AGENT] Loop detected: {function_name} called {self.max_same_tool_retries} times"
-                                )
-                                observation = (
-                                    f"Error: Tool '{function_name}' has been called {self.max_same_tool_retries} times "
-                                    f"consecutively without success. This suggests the current approach isn't working. "
-                                    f"Please try a different tool or approach to accomplish the task."
-                                )
-                                messages.append(
-                                    {
-                                        "role": "user",
-                                        "content": observation,
-                                    }
-                                )
-                                # Clear history to allow trying again later if needed
-                                self.tool_call_history = []
-                                continue
-
-                            # Execution successful or execution error (not validation) - show in frontend
-                            yield {
-                                "type": "action",
-                                "content": f"Using tool: {function_name}",
-                                "tool": function_name,
-                                "args": args,
-                                "step": iteration + 1,
-                            }
-
-                            # Create observation
-                            # For failures, include BOTH error message AND output so LLM can see what went wrong
-                            if result.success:
-                                observation = result.output
-                            else:
-                                # Combine error message with output (stdout/stderr) for better context
-                                observation_parts = []
-                                if result.error:
-                                    observation_parts.append(f"Error: {result.error}")
-                                if result.output:
-                                    observation_parts.append(result.output)
-                                observation = (
-                                    "\n".join(observation_parts)
-                                    if observation_parts
-                                    else "Error: Unknown failure"
-                                )
-
+                    used_this_turn = set()
+                    first_call = True
+                    for batch in self._batch_tool_calls(calls):
+                        # Check for cancellation between tool calls
+                        if cancel_event and cancel_event.is_set():
+                            print("[REACT AGENT] Cancellation before tool execution")
                             yield {
-                                "type": "observation",
-                                "content": observation,
-                                "success": result.success,
-                                "metadata": result.metadata,
+                                "type": "cancelled",
+                                "content": "Response cancelled by user",
+                                "partial_content": full_response,
                                 "step": iteration + 1,
                             }
+                            return
 
-                            # Add tool result to conversation as user message
-                            messages.append(
-                                {
-                                    "role": "user",
-                                    "content": f"Tool '{function_name}' returned: {observation}",
-                                }
+                        results = [None] * len(batch)
+                        if len(batch) > 1:
+                            # Read-only tools can't affect each other: run them concurrently
+                            print(
+                                f"[REACT AGENT] Running {len(batch)} read-only tools concurrently"
                             )
-
-                            # Record step
-                            steps.append(
-                                AgentStep(
-                                    thought=full_response if full_response else None,
-                                    action=function_name,
-                                    action_input=args,
-                                    observation=observation,
-                                    step_number=iteration + 1,
+                            results = await asyncio.gather(
+                                *(
+                                    self.tools.get(name).validate_and_execute(**args)
+                                    for name, _, args in batch
                                 )
                             )
 
-                            # Continue loop
-                            continue
+                        for call, result in zip(batch, results):
+                            async for event in self._handle_tool_call(
+                                call,
+                                result,
+                                messages=messages,
+                                steps=steps,
+                                thought=full_response if first_call else "",
+                                step=iteration + 1,
+                                count_for_loops=call[0] not in used_this_turn,
+                                cancel_event=cancel_event,
+                            ):
+                                yield event
+                                if event["type"] == "cancelled":
+                                    return
+                            used_this_turn.add(call[0])
+                            first_call = False
+
+                    # Continue loop
+                    continue
 
                 # No function call - agent is providing final answer
                 if full_response:
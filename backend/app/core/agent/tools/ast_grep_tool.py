@@ -119,6 +119,10 @@ class AstGrepTool(Tool):
     def name(self) -> str:
         return "ast_search"
 
+    @property
+    def read_only(self) -> bool:
+        return True
+
     @property
     def description(self) -> str:
         shortcuts = ", ".join(PATTERN_SHORTCUTS.keys())
@@ -1,11 +1,15 @@
 """Base tool interface and registry for ReAct agent."""
 
 from abc import ABC, abstractmethod
-from typing import Dict, Any, List, Optional, Type, Callable
+from typing import Dict, Any, List, Optional, Type, Callable, Awaitable
 from pydantic import BaseModel, Field, ValidationError
 import json
 
 
+# Receives incremental tool output as (stream, text), e.g. ("stdout", "building...\n")
+OutputCallback = Callable[[str, str], Awaitable[None]]
+
+
 class ToolParameter(BaseModel):
     """Tool parameter definition."""
 
@@ -78,6 +82,26 @@ class Tool(ABC):
         """
         return None
 
+    @property
+    def supports_output_streaming(self) -> bool:
+        """
+        Whether execute() accepts an `output_callback` for incremental output.
+
+        Streaming tools report output while they run; the final ToolResult still
+        carries the complete output.
+        """
+        return False
+
+    @property
+    def read_only(self) -> bool:
+        """
+        Whether the tool only inspects state and has no side effects.
+
+        The agent runs calls to read-only tools from the same turn concurrently;
+        everything else runs one at a time, in the order requested.
+        """
+        return False
+
     def get_definition(self) -> ToolDefinition:
         """Get tool definition for LLM."""
         return ToolDefinition(
@@ -86,7 +110,9 @@ class Tool(ABC):
             parameters=self.parameters,
         )
 
-    async def validate_and_execute(self, **kwargs) -> ToolResult:
+    async def validate_and_execute(
+        self, output_callback: OutputCallback | None = None, **kwargs
+    ) -> ToolResult:
         """
         Validate parameters with Pydantic schema (if provided) and execute tool.
 
@@ -96,20 +122,30 @@ class Tool(ABC):
         3. Providing helpful error messages with schema examples
         4. Executing the tool with validated parameters
 
+        Args:
+            output_callback: Receives incremental output if the tool supports streaming
+            **kwargs: Tool parameters
+
         Returns:
             ToolResult with success=False and actionable error message on validation failure
         """
+        extra = (
+            {"output_callback": output_callback}
+            if output_callback is not None and self.supports_output_streaming
+            else {}
+        )
+
         # If no schema provided, execute directly
         if self.input_schema is None:
             try:
-                return await self.execute(**kwargs)
+                return await self.execute(**kwargs, **extra)
             except Exception as e:
                 return ToolResult(success=False, output="", error=f"Tool execution error: {str(e)}")
 
         # Validate parameters with Pydantic schema
         try:
             validated_input = self.input_schema(**kwargs)
-            return await self.execute(**validated_input.model_dump())
+            return await self.execute(**validated_input.model_dump(), **extra)
 
         except ValidationError as e:
             # Use custom validation error handler if provided
@@ -194,15 +230,24 @@ class ToolRegistry:
 
     def __init__(self):
         self._tools: Dict[str, Tool] = {}
+        # Bumped whenever the tool set changes, so callers can cache what they build from it
+        self.version = 0
+        self._llm_tools: List[Dict[str, Any]] | None = None
 
     def register(self, tool: Tool) -> None:
         """Register a tool."""
         self._tools[tool.name] = tool
+        self._changed()
 
     def unregister(self, tool_name: str) -> None:
         """Unregister a tool."""
         if tool_name in self._tools:
             del self._tools[tool_name]
+            self._changed()
+
+    def _changed(self) -> None:
+        self.version += 1
+        self._llm_tools = None
 
     def get(self, tool_name: str) -> Tool | None:
         """Get a tool by name."""
@@ -213,8 +258,15 @@ class ToolRegistry:
         return list(self._tools.values())
 
     def get_tools_for_llm(self) -> List[Dict[str, Any]]:
-        """Get all tools formatted for LLM function calling."""
-        return [tool.format_for_llm() for tool in self._tools.values()]
+        """
+        Get all tools formatted for LLM function calling.
+
+        Schemas are sorted by name and built once per tool set, so every request
+        sends a byte-identical, cacheable prefix. Callers must not mutate them.
+        """
+        if self._llm_tools is None:
+            self._llm_tools = [self._tools[name].format_for_llm() for name in sorted(self._tools)]
+        return self._llm_tools
 
     def has_tool(self, tool_name: str) -> bool:
         """Check if a tool is registered."""
@@ -1,7 +1,9 @@
 """Bash command execution tool for agent."""
 
 from typing import List
-from app.core.agent.tools.base import Tool, ToolParameter, ToolResult
+from app.core.agent.tools.base import OutputCallback, Tool, ToolParameter, ToolResult
+from app.core.agent.tools.output_budget import apply_output_budget
+from app.core.config import settings
 from app.core.sandbox.container import SandboxContainer
 from app.core.sandbox.security import sanitize_command
 
@@ -49,10 +51,38 @@ class BashTool(Tool):
         else:
             return f"[ERROR] Exit code {exit_code}\n" f"{combined_output}"
 
+    async def _execute_streaming(
+        self, command: str, workdir: str, timeout: int, output_callback: OutputCallback
+    ) -> tuple[int, str, str]:
+        """Run a command via execute_stream, forwarding output chunks as they arrive.
+
+        Returns:
+            Tuple of (exit_code, stdout, stderr) with the complete output
+        """
+        exit_code = 1
+        output: dict[str, list[str]] = {"stdout": [], "stderr": []}
+
+        async for stream, data in self._container.execute_stream(
+            command=command,
+            workdir=workdir,
+            timeout=timeout,
+        ):
+            if stream == "exit":
+                exit_code = data
+                continue
+            output[stream].append(data)
+            await output_callback(stream, data)
+
+        return exit_code, "".join(output["stdout"]), "".join(output["stderr"])
+
     @property
     def name(self) -> str:
         return "bash"
 
+    @property
+    def supports_output_streaming(self) -> bool:
+        return True
+
     @property
     def description(self) -> str:
         return (
@@ -84,14 +114,22 @@ class BashTool(Tool):
             ToolParameter(
                 name="timeout",
                 type="number",
-                description="Command timeout in seconds (default: 30)",
+                description=(
+                    f"Command timeout in seconds (default: 30, "
+                    f"max: {settings.sandbox_exec_max_timeout})"
+                ),
                 required=False,
                 default=30,
             ),
         ]
 
     async def execute(
-        self, command: str, workdir: str = "/workspace/out", timeout: int = 30, **kwargs
+        self,
+        command: str,
+        workdir: str = "/workspace/out",
+        timeout: int = 30,
+        output_callback: OutputCallback | None = None,
+        **kwargs,
     ) -> ToolResult:
         """Execute a bash command in the sandbox.
 
@@ -99,20 +137,28 @@ class BashTool(Tool):
             command: The bash command to execute
             workdir: Working directory for execution
             timeout: Command timeout in seconds
+            output_callback: Optional callback receiving (stream, text) chunks while
+                the command runs
 
         Returns:
-            ToolResult with command output
+            ToolResult with command output (head and tail only if over the
+            observation budget)
         """
         try:
             # Sanitize command for security
             safe_command = sanitize_command(command)
 
             # Execute command in container
-            exit_code, stdout, stderr = await self._container.execute(
-                command=safe_command,
-                workdir=workdir,
-                timeout=timeout,
-            )
+            if output_callback is not None:
+                exit_code, stdout, stderr = await self._execute_streaming(
+                    safe_command, workdir, timeout, output_callback
+                )
+            else:
+                exit_code, stdout, stderr = await self._container.execute(
+                    command=safe_command,
+                    workdir=workdir,
+                    timeout=timeout,
+                )
 
             # Format output based on exit code (exit code is the sole truth)
             output = self._format_output(exit_code, stdout, stderr)
@@ -120,7 +166,7 @@ class BashTool(Tool):
             # Determine success based on exit code
             success = exit_code == 0
 
-            return ToolResult(
+            result = ToolResult(
                 success=success,
                 output=output,
                 error=f"Command exited with code {exit_code}" if exit_code != 0 else None,
@@ -131,6 +177,9 @@ class BashTool(Tool):
                 },
             )
 
+            # Keep huge outputs (e.g. cat of a large log) out of the conversation
+            return await apply_output_budget(self._container, result)
+
         except Exception as e:
             return ToolResult(
                 success=False,
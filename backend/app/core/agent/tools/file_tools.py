@@ -1,8 +1,10 @@
 """File operation tools for agent."""
 
-from typing import List, Type
+from typing import List, Optional, Type
 from pydantic import BaseModel, Field, field_validator, ConfigDict
 from app.core.agent.tools.base import Tool, ToolParameter, ToolResult
+from app.core.agent.tools.output_budget import fit_lines, truncate_middle
+from app.core.config import settings
 from app.core.sandbox.container import SandboxContainer
 from app.core.sandbox.security import validate_file_path
 
@@ -18,6 +20,7 @@ class FileReadInput(BaseModel):
             "examples": [
                 {"path": "/workspace/out/script.py"},
                 {"path": "/workspace/project_files/data.csv"},
+                {"path": "/workspace/out/big.log", "offset": 401, "limit": 200},
             ]
         }
     )
@@ -25,6 +28,8 @@ class FileReadInput(BaseModel):
     path: str = Field(
         description="Full path to the file (e.g., '/workspace/project_files/data.csv' or '/workspace/out/script.py')"
     )
+    offset: int = Field(default=1, ge=1, description="Line number to start reading from")
+    limit: Optional[int] = Field(default=None, ge=1, description="Maximum number of lines to read")
 
     @field_validator("path")
     @classmethod
@@ -77,6 +82,10 @@ class FileReadTool(Tool):
     def name(self) -> str:
         return "file_read"
 
+    @property
+    def read_only(self) -> bool:
+        return True
+
     @property
     def description(self) -> str:
         return (
@@ -91,6 +100,7 @@ class FileReadTool(Tool):
             "• Images (PNG, JPG, SVG, etc.) → frontend displays automatically\n"
             "• Data files (CSV, JSON) → returns content for inspection\n\n"
             "PATHS: /workspace/project_files (user files) or /workspace/out (your files)\n"
+            "LARGE FILES: output stops at the size limit; read on with offset (and limit).\n"
             "NOTE: Line numbers in output are for edit_lines tool."
         )
 
@@ -103,6 +113,19 @@ class FileReadTool(Tool):
                 description="Full path to the file (e.g., '/workspace/project_files/data.csv' or '/workspace/out/script.py')",
                 required=True,
             ),
+            ToolParameter(
+                name="offset",
+                type="integer",
+                description="Line number to start reading from (text files, default 1)",
+                required=False,
+                default=1,
+            ),
+            ToolParameter(
+                name="limit",
+                type="integer",
+                description="Maximum number of lines to read (text files, default all that fit)",
+                required=False,
+            ),
         ]
 
     @property
@@ -110,11 +133,18 @@ class FileReadTool(Tool):
         """Pydantic schema for parameter validation."""
         return FileReadInput
 
-    async def execute(self, path: str, **kwargs) -> ToolResult:
+    async def execute(
+        self, path: str, offset: int = 1, limit: Optional[int] = None, **kwargs
+    ) -> ToolResult:
         """Read a file from the sandbox.
 
+        Text output stops at the observation budget, ending with a marker that
+        says which offset to read on from.
+
         Args:
             path: Path to the file to read
+            offset: First line to return (text files)
+            limit: Maximum number of lines to return (text files)
 
         Returns:
             ToolResult with file content (text or base64 data URI for binary files)
@@ -187,11 +217,36 @@ class FileReadTool(Tool):
                 # Format text content with line numbers for easy reference
                 # This is essential for using edit_lines tool
                 lines = content.split("\n")
-                formatted_lines = []
-                for i, line in enumerate(lines, 1):
-                    formatted_lines.append(f"{i:>4}: {line}")
-                output_msg = "\n".join(formatted_lines)
                 metadata["line_count"] = len(lines)
+                if offset > len(lines):
+                    return ToolResult(
+                        success=False,
+                        output="",
+                        error=f"offset {offset} is past the end of {path} ({len(lines)} lines)",
+                        metadata=metadata,
+                    )
+
+                last = len(lines) if limit is None else min(len(lines), offset - 1 + limit)
+                formatted_lines = [f"{i:>4}: {lines[i - 1]}" for i in range(offset, last + 1)]
+
+                # Large files: show what fits and say where to read on
+                max_chars = settings.tool_output_max_chars
+                shown = fit_lines(formatted_lines, max_chars)
+                output_msg = "\n".join(formatted_lines[:shown])
+                if shown < len(formatted_lines):
+                    shown_to = offset + shown - 1
+                    metadata.update(
+                        {
+                            "output_truncated": True,
+                            "output_size": sum(len(line) + 1 for line in formatted_lines) - 1,
+                            "full_output_path": path,
+                        }
+                    )
+                    output_msg = (
+                        f"{truncate_middle(output_msg, max_chars)}\n\n"
+                        f"[... showing lines {offset}-{shown_to} of {len(lines)}; read on with "
+                        f'file_read(path="{path}", offset={shown_to + 1}) ...]'
+                    )
 
             return ToolResult(
                 success=True,
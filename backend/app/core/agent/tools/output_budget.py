@@ -0,0 +1,120 @@
+"""Observation budget for tool output.
+
+Oversized tool output is cut down to its head and tail before it reaches the
+agent's messages and the TOOL_RESULT block. The full output is spilled to a
+file in the workspace, so the agent can page through it with other tools and
+the UI can fetch it on demand through the workspace file-content route.
+Tools that read files page through them instead (see fit_lines), so the
+agent is never pointed back at output it can't get more of.
+"""
+
+import uuid
+from typing import List
+
+from app.core.agent.tools.base import ToolResult
+from app.core.config import settings
+from app.core.sandbox.container import SandboxContainer
+
+TOOL_OUTPUTS_DIR = "/workspace/out/.tool_outputs"
+# Share of the budget given to the head of the output (the rest goes to the tail)
+HEAD_FRACTION = 0.6
+
+
+def truncate_middle(text: str, max_chars: int, full_output_path: str | None = None) -> str:
+    """
+    Keep the head and tail of a string, replacing the middle with a marker.
+
+    Args:
+        text: Text to truncate
+        max_chars: Characters of the original text to keep
+        full_output_path: Where the full text can be read, mentioned in the marker
+
+    Returns:
+        The text unchanged if it fits, otherwise head + marker + tail
+    """
+    if len(text) <= max_chars:
+        return text
+
+    head_chars = int(max_chars * HEAD_FRACTION)
+    tail_chars = max_chars - head_chars
+    omitted = len(text) - head_chars - tail_chars
+
+    marker = f"[... {omitted} characters truncated"
+    if full_output_path:
+        marker += f"; full output in {full_output_path}"
+    marker += " ...]"
+
+    tail = text[-tail_chars:] if tail_chars else ""
+    return f"{text[:head_chars]}\n\n{marker}\n\n{tail}"
+
+
+def fit_lines(lines: List[str], max_chars: int) -> int:
+    """
+    Count the leading lines that fit in a character budget when joined.
+
+    Args:
+        lines: Lines of output, in order
+        max_chars: Budget in characters (0 or less means no limit)
+
+    Returns:
+        Number of leading lines that fit; at least one if there are any
+    """
+    if max_chars <= 0:
+        return len(lines)
+    size = 0
+    for count, line in enumerate(lines):
+        size += len(line) + (1 if count else 0)
+        if size > max_chars:
+            return max(count, 1)
+    return len(lines)
+
+
+async def apply_output_budget(
+    container: SandboxContainer,
+    result: ToolResult,
+    max_chars: int | None = None,
+) -> ToolResult:
+    """
+    Truncate a tool result's output to the observation budget.
+
+    Args:
+        container: Sandbox the full output is spilled into
+        result: Tool result to check
+        max_chars: Budget in characters (defaults to settings.tool_output_max_chars)
+
+    Returns:
+        The result unchanged if it fits, otherwise a copy with truncated output
+        and the full output's location in metadata
+    """
+    max_chars = max_chars if max_chars is not None else settings.tool_output_max_chars
+    output = result.output
+    if max_chars <= 0 or len(output) <= max_chars:
+        return result
+
+    full_output_path = await _spill(container, output)
+
+    metadata = {**result.metadata, "output_truncated": True, "output_size": len(output)}
+    if full_output_path:
+        metadata["full_output_path"] = full_output_path
+
+    return result.model_copy(
+        update={
+            "output": truncate_middle(output, max_chars, full_output_path),
+            "metadata": metadata,
+        }
+    )
+
+
+async def _spill(container: SandboxContainer, output: str) -> str | None:
+    """Write the full output to the workspace, returning its path or None on failure."""
+    path = f"{TOOL_OUTPUTS_DIR}/{uuid.uuid4().hex}.txt"
+    try:
+        exit_code, _, _ = await container.execute(
+            f"mkdir -p {TOOL_OUTPUTS_DIR}", workdir="/workspace", timeout=5
+        )
+        if exit_code != 0 or not await container.write_file(path, output):
+            return None
+    except Exception as e:
+        print(f"[TOOL OUTPUT] Failed to spill output to {path}: {e}")
+        return None
+    return path
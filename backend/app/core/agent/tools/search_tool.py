@@ -21,6 +21,10 @@ class SearchTool(Tool):
     def name(self) -> str:
         return "search"
 
+    @property
+    def read_only(self) -> bool:
+        return True
+
     @property
     def description(self) -> str:
         return (
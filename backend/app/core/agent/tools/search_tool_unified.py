@@ -5,6 +5,7 @@ from pathlib import Path
 import json
 import re
 from app.core.agent.tools.base import Tool, ToolParameter, ToolResult
+from app.core.agent.tools.output_budget import apply_output_budget
 from app.core.sandbox.container import SandboxContainer
 
 
@@ -93,6 +94,10 @@ class UnifiedSearchTool(Tool):
     def name(self) -> str:
         return "search"
 
+    @property
+    def read_only(self) -> bool:
+        return True
+
     @property
     def description(self) -> str:
         return (
@@ -215,11 +220,13 @@ class UnifiedSearchTool(Tool):
             detected_mode = mode or self._detect_mode(query)
 
             if detected_mode == "code":
-                return await self._search_code(query, language, search_path, max_results)
+                result = await self._search_code(query, language, search_path, max_results)
             elif detected_mode == "filename":
-                return await self._search_filename(query, search_path, max_results)
+                result = await self._search_filename(query, search_path, max_results)
             else:  # text
-                return await self._search_text(query, search_path, file_pattern, max_results)
+                result = await self._search_text(query, search_path, file_pattern, max_results)
+
+            return await apply_output_budget(self._container, result)
 
         except Exception as e:
             return ToolResult(
@@ -33,6 +33,10 @@ class ThinkTool(Tool):
     def name(self) -> str:
         return "think"
 
+    @property
+    def read_only(self) -> bool:
+        return True
+
     @property
     def description(self) -> str:
         return (
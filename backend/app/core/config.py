@@ -15,6 +15,27 @@ class Settings(BaseSettings):
 
     # Database
     database_url: str = "sqlite+aiosqlite:///./data/open-claude-pilot.db"
+    block_flush_interval: float = 0.25  # Seconds between write-behind flushes of streaming blocks
+    block_flush_max_pending: int = 100  # Pending blocks that trigger an early flush
+    history_cache_max_sessions: int = 256  # Sessions whose formatted LLM history is cached
+    stream_buffer_max_chunks: int = 10000  # Chunks kept per streaming message
+    stream_buffer_max_bytes: int = 8388608  # UTF-8 bytes kept per streaming message
+    stream_buffer_total_bytes: int = 268435456  # Byte ceiling across all buffered streams
+    stream_store_url: str = ""  # redis://... shares stream/task state across workers
+    stream_state_sync_interval: float = 0.25  # Seconds between shared stream snapshots
+    stream_state_ttl: int = 3600  # Seconds shared stream and task records outlive updates
+    database_profile: str = "default"  # "production": SQLite WAL, pragmas, writer/reader split
+    database_read_pool_size: int = 4  # Read connections in the SQLite production profile
+    database_write_timeout: float = 30.0  # Seconds to wait for the single SQLite writer
+    sqlite_busy_timeout_ms: int = 5000  # Wait this long on a locked database before failing
+    sqlite_mmap_size: int = 268435456  # Bytes of the database file memory-mapped per connection
+    sqlite_cache_size_kib: int = 65536  # Page cache per connection
+    postgres_pool_size: int = 10  # Persistent connections per process (PostgreSQL)
+    postgres_max_overflow: int = 20  # Extra connections opened under burst load
+    postgres_pool_timeout: float = 30.0  # Seconds to wait for a free connection
+    postgres_pool_recycle: int = 1800  # Reconnect connections older than this (seconds)
+    postgres_pool_pre_ping: bool = True  # Check connections before use (survives failovers)
+    postgres_statement_cache_size: int = 500  # Prepared statements per connection, 0 for PgBouncer
 
     # Server
     host: str = "127.0.0.1"
@@ -22,11 +43,21 @@ class Settings(BaseSettings):
     cors_origins: str = "http://localhost:3000,http://localhost:5173,http://localhost:5174"
 
     # Docker
-    docker_container_pool_size: int = 5
+    docker_container_pool_size: int = 5  # Warm containers kept per warm environment type
+    docker_warm_pool_env_types: str = (
+        ""  # Comma-separated opt-in (e.g. "python3.13"), empty disables
+    )
+    sandbox_exec_max_workers: int = 32  # Threads running blocking Docker exec calls
+    sandbox_exec_kill_grace: int = 5  # Seconds between SIGTERM and SIGKILL on timeout
+    sandbox_exec_max_timeout: int = 600  # Longest command timeout allowed (seconds)
 
     # Storage Configuration
     storage_mode: str = "volume"  # Options: "local", "volume", "s3"
     storage_workspace_base: str = "./data/workspaces"  # For local mode
+    storage_sidecar_image: str = "alpine:latest"  # Helper container for volume access
+    storage_sidecar_idle_ttl: int = 300  # Seconds before an idle volume sidecar is removed
+    blob_storage_path: str = "./data/blobs"  # Image/binary tool results (S3 mode uses the bucket)
+    workspace_export_prefetch: int = 4  # Files read ahead while streaming a zip download
 
     # S3/MinIO Configuration (for storage_mode="s3")
     s3_bucket_name: str | None = None
@@ -38,6 +69,19 @@ class Settings(BaseSettings):
     # LLM Defaults
     default_llm_provider: str = "openai"
     default_llm_model: str = "gpt-5-mini"  # Use API-native model names (gpt-5, gpt-5-mini, etc.)
+    llm_context_tokenizer: str = "heuristic"  # Prompt token counting: "heuristic" or "litellm"
+    llm_context_reserve_tokens: int = 4096  # Context window kept free for the response
+    llm_context_keep_recent: int = 8  # Most recent messages never elided to fit the window
+    tool_output_max_chars: int = 16000  # Tool output kept in observations, the rest is spilled
+    llm_prompt_caching: bool = True  # Cache breakpoints and usage reporting where supported
+    llm_cassette_mode: str = ""  # "record" or "replay" LLM streams (offline benchmarks)
+    llm_cassette_path: str = "./data/cassettes/llm.json"  # Cassette file for record/replay
+    llm_replay_speed: str = "realtime"  # "realtime", "accelerated", "instant" or a factor like 4
+    llm_provider_cache_size: int = 64  # Constructed providers kept per (provider, model, key)
+    llm_http_max_connections: int = 100  # Pooled connections to LLM APIs
+    llm_http_keepalive_expiry: float = 120.0  # Seconds an idle LLM API connection is kept open
+    api_key_usage_flush_interval: float = 30.0  # Seconds between batched last_used_at writes
+    api_key_cache_ttl: float = 300.0  # Seconds a decrypted API key is reused without a DB check
 
     # API Key Encryption
     master_encryption_key: str | None = None
@@ -1,5 +1,14 @@
 """LLM integration module."""
 
+from app.core.llm.prompt_cache import LLMUsage
 from app.core.llm.provider import LLMProvider, create_llm_provider, create_llm_provider_with_db
+from app.core.llm.cassette import RecordingLLMProvider, ReplayLLMProvider
 
-__all__ = ["LLMProvider", "create_llm_provider", "create_llm_provider_with_db"]
+__all__ = [
+    "LLMProvider",
+    "LLMUsage",
+    "RecordingLLMProvider",
+    "ReplayLLMProvider",
+    "create_llm_provider",
+    "create_llm_provider_with_db",
+]
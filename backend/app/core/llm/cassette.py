@@ -0,0 +1,308 @@
+"""
+LLM Cassettes - record and replay generate_stream for offline benchmarks.
+RecordingLLMProvider calls the real model and saves every streamed chunk
+(text and tool-call deltas), the delay before it and the reported usage to a
+cassette file. ReplayLLMProvider plays those streams back without touching
+the network, in real time, sped up, or instantly, so the agent, the
+WebSocket handler and persistence can be profiled under realistic token
+streams.
+
+Requests are matched by a hash of model, messages and tools; a request the
+cassette hasn't seen gets the next recorded interaction in order, cycling,
+so runs whose prompts drift (timestamps, IDs) still replay. Streams that
+errored or were closed early are recorded too, marked incomplete, but are
+never replayed.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+from dataclasses import asdict
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from litellm import acompletion
+
+from app.core.llm.prompt_cache import LLMUsage
+from app.core.llm.provider import LLMProvider
+
+CASSETTE_VERSION = 1
+
+# Named replay speeds (a number is a speed-up factor)
+REPLAY_SPEEDS = {"realtime": 1.0, "accelerated": 10.0, "instant": 0.0}
+
+
+def parse_replay_speed(value: str | float) -> float:
+    """
+    Parse a replay speed setting.
+
+    Args:
+        value: "realtime", "accelerated" (10x), "instant", or a factor such as 4 or "4x"
+
+    Returns:
+        Speed-up factor, 0 for instant
+
+    Raises:
+        ValueError: If the value is not a known speed or a non-negative number
+    """
+    if isinstance(value, (int, float)):
+        speed = float(value)
+    else:
+        name = value.strip().lower()
+        if name in REPLAY_SPEEDS:
+            return REPLAY_SPEEDS[name]
+        try:
+            speed = float(name.removesuffix("x"))
+        except ValueError:
+            raise ValueError(f"Unknown replay speed: {value!r}") from None
+    if speed < 0:
+        raise ValueError(f"Replay speed must not be negative: {value!r}")
+    return speed
+
+
+def request_hash(model: str, messages: List[Dict[str, Any]], tools: Optional[List] = None) -> str:
+    """
+    Hash an LLM request for matching it against recorded interactions.
+
+    Args:
+        model: Model name
+        messages: Chat messages
+        tools: Tool schemas
+
+    Returns:
+        Hex SHA-256 of the canonical JSON request
+    """
+    canonical = json.dumps(
+        {"model": model, "messages": messages, "tools": tools or []},
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class Cassette:
+    """
+    Recorded generate_stream interactions, stored as a JSON file.
+
+    Each interaction holds the request hash, the streamed chunks as
+    {"delay": seconds of model time before the chunk, "chunk": text or dict},
+    the usage the provider reported, if any, and whether the stream ran to
+    completion.
+    """
+
+    def __init__(self, path: str, interactions: Optional[List[Dict[str, Any]]] = None):
+        """
+        Initialize the cassette.
+
+        Args:
+            path: File the cassette is saved to
+            interactions: Recorded interactions, in recording order
+        """
+        self.path = path
+        self.interactions: List[Dict[str, Any]] = interactions or []
+        self._cursor = 0
+        self._by_hash: Dict[str, Dict[str, Any]] = {}
+        self._replayable: List[Dict[str, Any]] = []
+        for interaction in self.interactions:
+            self._index(interaction)
+
+    def _index(self, interaction: Dict[str, Any]) -> None:
+        """Make an interaction available for replay, unless its stream was cut short."""
+        if not interaction.get("complete", True):
+            return
+        self._replayable.append(interaction)
+        self._by_hash.setdefault(interaction["request_hash"], interaction)
+
+    @classmethod
+    def load(cls, path: str, missing_ok: bool = False) -> "Cassette":
+        """
+        Load a cassette file.
+
+        Args:
+            path: Cassette file path
+            missing_ok: Return an empty cassette if the file doesn't exist
+
+        Returns:
+            Cassette instance
+
+        Raises:
+            FileNotFoundError: If the file is missing and missing_ok is False
+        """
+        if missing_ok and not os.path.exists(path):
+            return cls(path)
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(path, data.get("interactions", []))
+
+    def save(self) -> None:
+        """Write the cassette to disk atomically."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": CASSETTE_VERSION, "interactions": self.interactions}, f)
+        os.replace(tmp_path, self.path)
+
+    def add(self, interaction: Dict[str, Any]) -> None:
+        """Append a recorded interaction."""
+        self.interactions.append(interaction)
+        self._index(interaction)
+
+    def find(self, request_hash: str) -> Optional[Dict[str, Any]]:
+        """
+        Find the interaction to replay for a request.
+
+        Args:
+            request_hash: Hash of the incoming request
+
+        Returns:
+            The complete interaction recorded for this request, else the next
+            complete one in recording order (cycling), or None if there are none
+        """
+        interaction = self._by_hash.get(request_hash)
+        if interaction is not None:
+            return interaction
+        if not self._replayable:
+            return None
+        interaction = self._replayable[self._cursor % len(self._replayable)]
+        self._cursor += 1
+        return interaction
+
+    def __len__(self) -> int:
+        return len(self.interactions)
+
+
+# Cassettes shared by every provider using the same file
+_cassettes: Dict[str, Cassette] = {}
+
+
+def get_cassette(path: str, missing_ok: bool = False) -> Cassette:
+    """
+    Get the shared cassette for a file, loading it on first use.
+
+    Args:
+        path: Cassette file path
+        missing_ok: Start an empty cassette if the file doesn't exist (recording)
+
+    Returns:
+        Cassette instance
+    """
+    key = os.path.abspath(path)
+    if key not in _cassettes:
+        _cassettes[key] = Cassette.load(path, missing_ok=missing_ok)
+    return _cassettes[key]
+
+
+class RecordingLLMProvider(LLMProvider):
+    """LLM provider that records every stream it generates to a cassette."""
+
+    def __init__(self, cassette: Cassette, **kwargs):
+        """
+        Initialize the provider.
+
+        Args:
+            cassette: Cassette to record into (saved after each stream)
+            **kwargs: LLMProvider arguments
+        """
+        super().__init__(**kwargs)
+        self.cassette = cassette
+
+    async def generate_stream(
+        self,
+        messages: List[Dict[str, str]],
+        tools: List[Dict[str, Any | None]] = None,
+        on_usage: Callable[[LLMUsage], None] | None = None,
+        **kwargs,
+    ) -> AsyncIterator[str | Dict[str, Any]]:
+        """
+        Generate a stream from the real model, recording it as it passes through.
+
+        Delays only count time spent waiting on the model, not time the
+        consumer took with the previous chunk, so replays don't add it twice.
+        A stream that errors or is closed early is saved marked incomplete.
+        """
+        chunks: List[Dict[str, Any]] = []
+        recorded_usage: List[LLMUsage] = []
+        complete = False
+
+        def capture_usage(usage: LLMUsage) -> None:
+            recorded_usage.append(usage)
+            if on_usage:
+                on_usage(usage)
+
+        try:
+            last = time.monotonic()
+            async for chunk in super().generate_stream(
+                messages, tools=tools, on_usage=capture_usage, **kwargs
+            ):
+                chunks.append({"delay": round(time.monotonic() - last, 6), "chunk": chunk})
+                yield chunk
+                last = time.monotonic()
+            complete = True
+        finally:
+            self.cassette.add(
+                {
+                    "request_hash": request_hash(self.model, messages, tools),
+                    "model": self.model,
+                    "chunks": chunks,
+                    "usage": asdict(recorded_usage[-1]) if recorded_usage else None,
+                    "complete": complete,
+                }
+            )
+            self.cassette.save()
+
+
+class ReplayLLMProvider(LLMProvider):
+    """LLM provider that plays back recorded streams without calling any model."""
+
+    def __init__(self, cassette: Cassette, speed: float = 1.0, **kwargs):
+        """
+        Initialize the provider.
+
+        Args:
+            cassette: Cassette to replay from
+            speed: Speed-up factor for recorded delays (1 real time, 0 instant)
+            **kwargs: LLMProvider arguments (provider and model keep context budgeting realistic)
+        """
+        super().__init__(**kwargs)
+        self.cassette = cassette
+        self.speed = speed
+
+    def _interaction(self, messages: List[Dict[str, Any]], tools: Optional[List]) -> Dict:
+        interaction = self.cassette.find(request_hash(self.model, messages, tools))
+        if interaction is None:
+            raise Exception(
+                f"LLM streaming failed: cassette {self.cassette.path} is empty "
+                "(no complete streams)"
+            )
+        return interaction
+
+    async def generate_stream(
+        self,
+        messages: List[Dict[str, str]],
+        tools: List[Dict[str, Any | None]] = None,
+        on_usage: Callable[[LLMUsage], None] | None = None,
+        **kwargs,
+    ) -> AsyncIterator[str | Dict[str, Any]]:
+        """Replay a recorded stream, keeping its chunking and (scaled) timing."""
+        interaction = self._interaction(messages, tools)
+        for recorded in interaction["chunks"]:
+            if self.speed > 0 and recorded["delay"] > 0:
+                await asyncio.sleep(recorded["delay"] / self.speed)
+            elif self.speed == 0:
+                await asyncio.sleep(0)  # Still let other tasks run between chunks
+            yield recorded["chunk"]
+
+        if interaction.get("usage"):
+            if on_usage:
+                on_usage(LLMUsage(**interaction["usage"]))
+
+    async def generate(self, messages: List[Dict[str, str]], stream: bool = False, **kwargs) -> Any:
+        """Build a completion from a recorded stream's text (no network access)."""
+        interaction = self._interaction(messages, kwargs.get("tools"))
+        text = "".join(c["chunk"] for c in interaction["chunks"] if isinstance(c["chunk"], str))
+        return await acompletion(
+            model=self._build_model_name(), messages=messages, stream=stream, mock_response=text
+        )
@@ -0,0 +1,69 @@
+"""Shared keep-alive HTTP client for LLM API calls.
+
+LiteLLM otherwise gives its SDK-based providers short-lived clients, so turns
+can pay a fresh TCP and TLS handshake. One pooled httpx client is installed as
+litellm.aclient_session instead. httpx keeps a separate keep-alive pool per
+upstream origin, so every provider host reuses its own warm connections, over
+HTTP/2 when the optional h2 package is installed.
+"""
+
+import importlib.util
+from typing import Optional
+
+import httpx
+import litellm
+
+from app.core.config import settings
+
+
+def http2_available() -> bool:
+    """Check whether httpx can negotiate HTTP/2 (needs the optional h2 package)."""
+    return importlib.util.find_spec("h2") is not None
+
+
+def create_llm_http_client() -> httpx.AsyncClient:
+    """
+    Create a pooled async client for LLM API traffic.
+
+    Returns:
+        httpx.AsyncClient with keep-alive limits from settings
+    """
+    limits = httpx.Limits(
+        max_connections=settings.llm_http_max_connections,
+        max_keepalive_connections=settings.llm_http_max_connections,
+        keepalive_expiry=settings.llm_http_keepalive_expiry,
+    )
+    # Generous read timeout: streamed completions can pause between tokens
+    timeout = httpx.Timeout(600.0, connect=10.0)
+    return httpx.AsyncClient(http2=http2_available(), limits=limits, timeout=timeout)
+
+
+# Global client instance (lazy initialized)
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def get_llm_http_client() -> httpx.AsyncClient:
+    """
+    Get the shared LLM HTTP client, installing it as LiteLLM's async session.
+
+    Returns:
+        httpx.AsyncClient instance
+    """
+    global _http_client
+
+    if _http_client is None or _http_client.is_closed:
+        _http_client = create_llm_http_client()
+        litellm.aclient_session = _http_client
+
+    return _http_client
+
+
+async def shutdown_llm_http_client() -> None:
+    """Close the shared client and its pooled connections."""
+    global _http_client
+
+    if _http_client is not None:
+        if litellm.aclient_session is _http_client:
+            litellm.aclient_session = None
+        await _http_client.aclose()
+        _http_client = None
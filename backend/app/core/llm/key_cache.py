@@ -0,0 +1,133 @@
+"""In-memory cache of decrypted API keys.
+
+Entries are keyed by provider and tagged with the ApiKey row version (its id
+and created_at, which is reset whenever the key is replaced). Within the TTL a
+lookup costs nothing. After the TTL only the version columns are re-read, and
+the key is decrypted again only if the row changed. Saving or deleting a key
+in this process invalidates its entry immediately; other processes pick the
+change up within one TTL.
+"""
+
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.database import ApiKey
+
+RowVersion = Tuple[str, Optional[datetime]]
+
+
+@dataclass
+class StoredApiKey:
+    """A decrypted API key and the row it came from."""
+
+    key_id: str
+    version: RowVersion
+    api_key: str
+
+
+@dataclass
+class _CacheEntry:
+    key: Optional[StoredApiKey]  # None records that the provider has no stored key
+    expires_at: float
+
+
+class ApiKeyCache:
+    """TTL-bounded cache of decrypted API keys, one entry per provider."""
+
+    def __init__(
+        self,
+        ttl: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            ttl: Seconds an entry is trusted before the row version is re-checked
+            clock: Monotonic time source (injectable for tests)
+        """
+        self.ttl = ttl if ttl is not None else settings.api_key_cache_ttl
+        self._clock = clock
+        self._entries: Dict[str, _CacheEntry] = {}
+        self.decrypt_count = 0  # Decryptions performed, for monitoring
+
+    async def get(self, db: AsyncSession, provider: str) -> Optional[StoredApiKey]:
+        """
+        Get the decrypted stored key for a provider.
+
+        Args:
+            db: Database session used when the entry needs refreshing
+            provider: Provider name
+
+        Returns:
+            StoredApiKey, or None if no key is stored for the provider
+        """
+        provider = provider.lower()
+        now = self._clock()
+        entry = self._entries.get(provider)
+        if entry is not None and entry.expires_at > now:
+            return entry.key
+
+        # FUTURE: Add .where(ApiKey.user_id == current_user.id)
+        result = await db.execute(
+            select(ApiKey.id, ApiKey.created_at).where(ApiKey.provider == provider)
+        )
+        row = result.one_or_none()
+
+        if row is None:
+            key = None
+        elif entry is not None and entry.key is not None and entry.key.version == tuple(row):
+            # Row unchanged since we decrypted it
+            key = entry.key
+        else:
+            key = await self._load(db, tuple(row))
+
+        self._entries[provider] = _CacheEntry(key=key, expires_at=now + self.ttl)
+        return key
+
+    async def _load(self, db: AsyncSession, version: RowVersion) -> StoredApiKey:
+        """Fetch and decrypt the key for a row version."""
+        from app.core.security.encryption import get_encryption_service
+
+        result = await db.execute(select(ApiKey.encrypted_key).where(ApiKey.id == version[0]))
+        encrypted_key = result.scalar_one()
+        api_key = get_encryption_service().decrypt(encrypted_key)
+        self.decrypt_count += 1
+        return StoredApiKey(key_id=version[0], version=version, api_key=api_key)
+
+    def invalidate(self, provider: Optional[str] = None) -> None:
+        """
+        Drop cached keys.
+
+        Args:
+            provider: Provider whose entry to drop, or None for all
+        """
+        if provider is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(provider.lower(), None)
+
+
+# Global cache instance
+_api_key_cache: Optional[ApiKeyCache] = None
+
+
+def get_api_key_cache() -> ApiKeyCache:
+    """
+    Get the global decrypted API key cache.
+
+    Returns:
+        ApiKeyCache instance
+    """
+    global _api_key_cache
+
+    if _api_key_cache is None:
+        _api_key_cache = ApiKeyCache()
+
+    return _api_key_cache
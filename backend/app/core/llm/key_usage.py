@@ -0,0 +1,144 @@
+"""Batched last_used_at tracking for stored API keys.
+
+Recording use of a key is a dictionary write. A background task writes the
+latest timestamp for every key used since the last flush in one transaction,
+so turns never wait on a commit just to bump a timestamp.
+"""
+
+import asyncio
+import logging
+from datetime import datetime
+from typing import Dict, Optional
+
+from sqlalchemy import bindparam, update
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.core.config import settings
+from app.models.database import ApiKey
+
+logger = logging.getLogger(__name__)
+
+
+class ApiKeyUsageRecorder:
+    """Write-behind queue of ApiKey.last_used_at updates."""
+
+    def __init__(
+        self,
+        session_factory: Optional[async_sessionmaker] = None,
+        flush_interval: Optional[float] = None,
+    ):
+        """
+        Initialize the recorder.
+
+        Args:
+            session_factory: Factory for the sessions used to write (defaults to AsyncSessionLocal)
+            flush_interval: Seconds between background flushes
+        """
+        if session_factory is None:
+            from app.core.storage.database import AsyncSessionLocal
+
+            session_factory = AsyncSessionLocal
+
+        self.session_factory = session_factory
+        self.flush_interval = (
+            flush_interval if flush_interval is not None else settings.api_key_usage_flush_interval
+        )
+        self._pending: Dict[str, datetime] = {}
+        self._flush_lock = asyncio.Lock()
+        self._worker: Optional[asyncio.Task] = None
+
+    def touch(self, key_id: str, used_at: Optional[datetime] = None) -> None:
+        """
+        Record that a key was used.
+
+        Args:
+            key_id: ApiKey ID
+            used_at: Time of use (defaults to now)
+        """
+        self._pending[key_id] = used_at or datetime.utcnow()
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+
+    async def flush(self) -> int:
+        """
+        Write all pending timestamps now.
+
+        Returns:
+            Number of keys updated
+        """
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+
+            batch, self._pending = self._pending, {}
+            rows = [{"k_id": key_id, "v_used": used_at} for key_id, used_at in batch.items()]
+            try:
+                async with self.session_factory() as session:
+                    connection = await session.connection()
+                    stmt = (
+                        update(ApiKey)
+                        .where(ApiKey.id == bindparam("k_id"))
+                        .values(last_used_at=bindparam("v_used"))
+                    )
+                    await connection.execute(stmt, rows)
+                    await session.commit()
+            except BaseException:
+                # Keep the newer of the failed and any freshly queued timestamps
+                for key_id, used_at in batch.items():
+                    self._pending[key_id] = max(used_at, self._pending.get(key_id, used_at))
+                raise
+            return len(batch)
+
+    async def _run(self) -> None:
+        """Flush once per interval until nothing is left pending."""
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"API key usage flush failed, will retry: {e}")
+
+            if not self._pending:
+                self._worker = None
+                return
+
+    async def close(self) -> None:
+        """Stop the background task and write everything still pending."""
+        worker, self._worker = self._worker, None
+        if worker is not None and not worker.done():
+            worker.cancel()
+            try:
+                await worker
+            except asyncio.CancelledError:
+                pass
+        await self.flush()
+
+
+# Global instance
+_usage_recorder: Optional[ApiKeyUsageRecorder] = None
+
+
+def get_api_key_usage_recorder() -> ApiKeyUsageRecorder:
+    """
+    Get the global API key usage recorder.
+
+    Returns:
+        ApiKeyUsageRecorder instance
+    """
+    global _usage_recorder
+
+    if _usage_recorder is None:
+        _usage_recorder = ApiKeyUsageRecorder()
+
+    return _usage_recorder
+
+
+async def shutdown_api_key_usage_recorder() -> None:
+    """Flush and stop the global usage recorder."""
+    global _usage_recorder
+
+    if _usage_recorder is not None:
+        await _usage_recorder.close()
+        _usage_recorder = None
@@ -0,0 +1,158 @@
+"""
+Prompt Cache - provider prompt-prefix caching support.
+Agent runs resend the same system prompt and tool schemas on every
+iteration. Providers with automatic prefix caching (OpenAI, DeepSeek) reuse
+them as long as the prefix is byte-stable; providers with explicit caching
+(Anthropic) also need cache_control breakpoints marking where cacheable
+prefixes end. Cache hits and misses are read back from the usage payload.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+# Providers that cache repeated prompt prefixes: "explicit" ones only cache up to
+# cache_control breakpoints in the request, "automatic" ones cache long prefixes
+# on their own
+PROMPT_CACHING = {
+    "anthropic": "explicit",
+    "openai": "automatic",
+    "azure": "automatic",
+    "deepseek": "automatic",
+}
+
+# Providers that serve Anthropic models with the Anthropic caching API
+CLAUDE_HOSTS = {"bedrock", "vertex_ai", "openrouter"}
+
+EPHEMERAL = {"type": "ephemeral"}
+
+
+def prompt_caching_mode(provider: str, model: str) -> Optional[str]:
+    """
+    Get how a provider caches prompt prefixes.
+
+    Args:
+        provider: Provider name
+        model: Model name
+
+    Returns:
+        "explicit", "automatic", or None if the provider doesn't cache prompts
+    """
+    provider = provider.lower()
+    if provider in CLAUDE_HOSTS and "claude" in model.lower():
+        return "explicit"
+    return PROMPT_CACHING.get(provider)
+
+
+@dataclass
+class LLMUsage:
+    """Token usage of LLM calls, with how much of the prompt came from the cache."""
+
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cache_read_tokens: int = 0  # Prompt tokens served from the cache (hits)
+    cache_write_tokens: int = 0  # Prompt tokens written to the cache
+
+    @property
+    def cache_miss_tokens(self) -> int:
+        """Prompt tokens not served from the cache."""
+        return max(self.prompt_tokens - self.cache_read_tokens, 0)
+
+    @property
+    def cache_hit_ratio(self) -> float:
+        """Fraction of prompt tokens served from the cache."""
+        return self.cache_read_tokens / self.prompt_tokens if self.prompt_tokens else 0.0
+
+    def add(self, other: "LLMUsage") -> None:
+        """Accumulate another call's usage into this one."""
+        self.prompt_tokens += other.prompt_tokens
+        self.completion_tokens += other.completion_tokens
+        self.cache_read_tokens += other.cache_read_tokens
+        self.cache_write_tokens += other.cache_write_tokens
+
+
+def _int_field(source: Any, name: str) -> int:
+    """Read an integer field from a usage object or dict (0 if missing)."""
+    value = source.get(name) if isinstance(source, dict) else getattr(source, name, None)
+    return value if isinstance(value, int) else 0
+
+
+def parse_usage(usage: Any) -> Optional[LLMUsage]:
+    """
+    Read token usage from a LiteLLM usage payload.
+
+    Handles both OpenAI-style prompt_tokens_details.cached_tokens and
+    Anthropic-style cache_read_input_tokens/cache_creation_input_tokens.
+
+    Args:
+        usage: Usage object or dict from a response or final stream chunk
+
+    Returns:
+        LLMUsage, or None if the payload carries no token counts
+    """
+    if usage is None:
+        return None
+    prompt_tokens = _int_field(usage, "prompt_tokens")
+    completion_tokens = _int_field(usage, "completion_tokens")
+    if not prompt_tokens and not completion_tokens:
+        return None
+
+    cache_read = _int_field(usage, "cache_read_input_tokens")
+    if not cache_read:
+        details = (
+            usage.get("prompt_tokens_details")
+            if isinstance(usage, dict)
+            else getattr(usage, "prompt_tokens_details", None)
+        )
+        if details is not None:
+            cache_read = _int_field(details, "cached_tokens")
+
+    return LLMUsage(
+        prompt_tokens=prompt_tokens,
+        completion_tokens=completion_tokens,
+        cache_read_tokens=cache_read,
+        cache_write_tokens=_int_field(usage, "cache_creation_input_tokens"),
+    )
+
+
+def _with_breakpoint(message: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy a message with a cache breakpoint after its text content."""
+    content = message["content"]
+    if isinstance(content, str):
+        blocks = [{"type": "text", "text": content, "cache_control": EPHEMERAL}]
+    else:
+        blocks = [dict(block) for block in content]
+        blocks[-1]["cache_control"] = EPHEMERAL
+    return {**message, "content": blocks}
+
+
+def add_cache_breakpoints(
+    messages: List[Dict[str, Any]], tools: Optional[List[Dict[str, Any]]] = None
+) -> Tuple[List[Dict[str, Any]], Optional[List[Dict[str, Any]]]]:
+    """
+    Mark the cacheable prefixes of a request for explicit-caching providers.
+
+    Breakpoints go after the tool schemas, after the system prompt and after
+    the last message with content (the history boundary), so the next
+    iteration of an agent run reads everything up to there from the cache.
+    The inputs are not mutated; changed messages and tools are copies.
+
+    Args:
+        messages: Chat messages
+        tools: Tool schemas in OpenAI format
+
+    Returns:
+        (messages, tools) with cache_control breakpoints
+    """
+    if tools:
+        tools = [*tools[:-1], {**tools[-1], "cache_control": EPHEMERAL}]
+
+    messages = list(messages)
+    if messages and messages[0].get("role") == "system" and messages[0].get("content"):
+        messages[0] = _with_breakpoint(messages[0])
+
+    for index in range(len(messages) - 1, 0, -1):
+        if messages[index].get("content"):
+            messages[index] = _with_breakpoint(messages[index])
+            break
+
+    return messages, tools
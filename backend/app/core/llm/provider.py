@@ -1,11 +1,17 @@
 """LLM provider abstraction using LiteLLM."""
 
-import os
-from typing import List, Dict, Any, AsyncIterator, Optional
+from typing import List, Dict, Any, AsyncIterator, Callable, Optional
 from litellm import acompletion
 import litellm
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+
+from app.core.config import settings
+from app.core.llm.prompt_cache import (
+    LLMUsage,
+    add_cache_breakpoints,
+    parse_usage,
+    prompt_caching_mode,
+)
 
 # Disable LiteLLM logging by default
 litellm.suppress_debug_info = True
@@ -15,54 +21,41 @@ class LLMProvider:
     """LLM provider using LiteLLM for unified API access."""
 
     def __init__(
-        self, provider: str = "openai", model: str = "gpt-4", api_key: str | None = None, **config
+        self,
+        provider: str = "openai",
+        model: str = "gpt-4",
+        api_key: str | None = None,
+        api_base: str | None = None,
+        **config,
     ):
         """
         Initialize LLM provider.
 
+        Credentials are passed to LiteLLM on every call rather than exported to
+        os.environ, so providers holding different keys can run concurrently in
+        one process.
+
         Args:
             provider: Provider name (openai, anthropic, azure, etc.)
             model: Model name
-            api_key: API key for the provider
+            api_key: API key for the provider (None uses the provider's environment variable)
+            api_base: Optional custom API endpoint
             **config: Additional configuration (temperature, max_tokens, etc.)
         """
         self.provider = provider
         self.model = model
         self.api_key = api_key
+        self.api_base = api_base
         self.config = config
 
-        # Set API key in environment if provided
-        if api_key:
-            self._set_api_key(provider, api_key)
-
-    def _set_api_key(self, provider: str, api_key: str):
-        """Set API key in environment based on provider.
-
-        Uses LiteLLM's provider metadata when available, with fallback
-        to common naming conventions.
-        """
-        from app.core.llm.providers import PROVIDER_METADATA
-
-        provider_lower = provider.lower()
-
-        # First try to get from our provider metadata (synced with LiteLLM)
-        if provider_lower in PROVIDER_METADATA:
-            env_key = PROVIDER_METADATA[provider_lower].get("env_key")
-            if env_key:
-                os.environ[env_key] = api_key
-                return
-
-        # Fallback: try common naming conventions
-        # Most providers use PROVIDER_API_KEY format
-        provider_upper = provider_lower.upper().replace("-", "_")
-        common_patterns = [
-            f"{provider_upper}_API_KEY",
-            f"{provider_upper}AI_API_KEY",
-            f"{provider_upper}_KEY",
-        ]
-
-        # Set the first pattern as default
-        os.environ[common_patterns[0]] = api_key
+    def _credential_params(self) -> Dict[str, Any]:
+        """Build the per-call credential kwargs for LiteLLM."""
+        params = {}
+        if self.api_key:
+            params["api_key"] = self.api_key
+        if self.api_base:
+            params["api_base"] = self.api_base
+        return params
 
     def _build_model_name(self) -> str:
         """Build the full model name for LiteLLM.
@@ -87,7 +80,7 @@ class LLMProvider:
             Completion response or async iterator if streaming
         """
         # Merge config with kwargs
-        params = {**self.config, **kwargs}
+        params = {**self.config, **self._credential_params(), **kwargs}
 
         model_name = self._build_model_name()
 
@@ -102,14 +95,24 @@ class LLMProvider:
             raise Exception(f"LLM generation failed: {str(e)}")
 
     async def generate_stream(
-        self, messages: List[Dict[str, str]], tools: List[Dict[str, Any | None]] = None, **kwargs
+        self,
+        messages: List[Dict[str, str]],
+        tools: List[Dict[str, Any | None]] = None,
+        on_usage: Callable[[LLMUsage], None] | None = None,
+        **kwargs,
     ) -> AsyncIterator[str | Dict[str, Any]]:
         """
         Generate streaming completion from LLM.
 
+        For providers that cache prompt prefixes, the request is marked up
+        with cache breakpoints where the provider needs them and asks for
+        token usage, which is passed to on_usage once the stream ends. Providers
+        are shared across sessions, so usage is never accumulated here.
+
         Args:
             messages: List of message dicts with 'role' and 'content'
             tools: Optional list of tools for function calling
+            on_usage: Called with the call's token usage, if the provider reports it
             **kwargs: Additional parameters for the completion
 
         Yields:
@@ -122,10 +125,20 @@ class LLMProvider:
         print(f"  Tools count: {len(tools) if tools else 0}")
         print(f"  Messages count: {len(messages)}")
 
-        params = {**self.config, **kwargs}
+        params = {**self.config, **self._credential_params(), **kwargs}
         model_name = self._build_model_name()
         print(f"  Full model name: {model_name}")
 
+        caching = (
+            prompt_caching_mode(self.provider, self.model) if settings.llm_prompt_caching else None
+        )
+        if caching:
+            # Report usage (with cached tokens) in the final chunk
+            params.setdefault("stream_options", {"include_usage": True})
+        if caching == "explicit":
+            messages, tools = add_cache_breakpoints(messages, tools)
+            print("  Prompt caching: cache_control breakpoints added")
+
         # Add tools to params if provided
         if tools:
             params["tools"] = tools
@@ -138,8 +151,10 @@ class LLMProvider:
 
             print("[LLM PROVIDER] Stream started, processing chunks...")
             chunk_num = 0
+            usage = None
             async for chunk in response:
                 chunk_num += 1
+                usage = parse_usage(getattr(chunk, "usage", None)) or usage
                 # Extract content from the chunk
                 if hasattr(chunk, "choices") and len(chunk.choices) > 0:
                     delta = chunk.choices[0].delta
@@ -166,6 +181,14 @@ class LLMProvider:
                                 }
 
             print(f"[LLM PROVIDER] Stream complete. Total chunks: {chunk_num}")
+            if usage:
+                print(
+                    f"[LLM PROVIDER] Usage: {usage.prompt_tokens} prompt tokens "
+                    f"({usage.cache_read_tokens} cached, {usage.cache_write_tokens} written to cache), "
+                    f"{usage.completion_tokens} completion tokens"
+                )
+                if on_usage:
+                    on_usage(usage)
 
         except Exception as e:
             print(f"[LLM PROVIDER] ERROR: {str(e)}")
@@ -176,21 +199,64 @@ class LLMProvider:
 
 
 def create_llm_provider(
-    provider: str, model: str, llm_config: Dict[str, Any], api_key: str | None = None
+    provider: str,
+    model: str,
+    llm_config: Dict[str, Any],
+    api_key: str | None = None,
+    cassette_mode: str | None = None,
+    cassette_path: str | None = None,
+    replay_speed: str | float | None = None,
 ) -> LLMProvider:
     """
     Factory function to create LLM provider.
 
+    With a cassette mode ("record" or "replay", LLM_CASSETTE_MODE by default)
+    the provider records its streams to a cassette file, or replays them from
+    one without calling the model (see app.core.llm.cassette).
+
     Args:
         provider: Provider name
         model: Model name
         llm_config: LLM configuration dict
         api_key: Optional API key
+        cassette_mode: "record", "replay", or "" for a live provider
+        cassette_path: Cassette file (defaults to LLM_CASSETTE_PATH)
+        replay_speed: "realtime", "accelerated", "instant" or a speed-up factor
 
     Returns:
         LLMProvider instance
+
+    Raises:
+        ValueError: If the cassette mode or replay speed is unknown
     """
-    return LLMProvider(provider=provider, model=model, api_key=api_key, **llm_config)
+    mode = settings.llm_cassette_mode if cassette_mode is None else cassette_mode
+    if not mode:
+        return LLMProvider(provider=provider, model=model, api_key=api_key, **llm_config)
+
+    from app.core.llm.cassette import (
+        RecordingLLMProvider,
+        ReplayLLMProvider,
+        get_cassette,
+        parse_replay_speed,
+    )
+
+    path = cassette_path or settings.llm_cassette_path
+    if mode == "record":
+        return RecordingLLMProvider(
+            get_cassette(path, missing_ok=True),
+            provider=provider,
+            model=model,
+            api_key=api_key,
+            **llm_config,
+        )
+    if mode == "replay":
+        speed = parse_replay_speed(
+            settings.llm_replay_speed if replay_speed is None else replay_speed
+        )
+        return ReplayLLMProvider(
+            get_cassette(path), speed=speed, provider=provider, model=model, **llm_config
+        )
+    raise ValueError(f"Unknown LLM cassette mode: {mode!r} (expected 'record' or 'replay')")
 
 
 async def create_llm_provider_with_db(
@@ -203,6 +269,11 @@ async def create_llm_provider_with_db(
     """
     Factory function to create LLM provider with database API key lookup.
 
+    Providers come from the shared registry, so repeated turns on the same
+    model and key reuse one instance. Stored keys are read through a TTL-bounded
+    decrypted-key cache, and key usage is recorded in the background instead of
+    committing last_used_at on every call.
+
     Priority order:
     1. Explicitly provided api_key parameter
     2. API key from database
@@ -218,36 +289,27 @@ async def create_llm_provider_with_db(
     Returns:
         LLMProvider instance
     """
+    from app.core.llm.registry import get_provider_registry
+
+    registry = get_provider_registry()
+
     # If API key explicitly provided, use it
     if api_key:
-        return LLMProvider(provider=provider, model=model, api_key=api_key, **llm_config)
+        return registry.get(provider, model, llm_config, api_key=api_key)
 
-    # Try to get API key from database
+    # Try to get API key from database (through the decrypted-key cache)
     try:
-        from app.models.database import ApiKey
-        from app.core.security.encryption import get_encryption_service
-        from datetime import datetime
+        from app.core.llm.key_cache import get_api_key_cache
+        from app.core.llm.key_usage import get_api_key_usage_recorder
 
-        # FUTURE: Add .where(ApiKey.user_id == current_user.id)
-        query = select(ApiKey).where(ApiKey.provider == provider.lower())
-        result = await db.execute(query)
-        key_record = result.scalar_one_or_none()
+        stored_key = await get_api_key_cache().get(db, provider)
 
-        if key_record:
-            # Decrypt the API key
-            encryption_service = get_encryption_service()
-            decrypted_key = encryption_service.decrypt(key_record.encrypted_key)
-
-            # Update last_used_at timestamp
-            key_record.last_used_at = datetime.utcnow()
-            await db.commit()
-
-            return LLMProvider(provider=provider, model=model, api_key=decrypted_key, **llm_config)
+        if stored_key:
+            get_api_key_usage_recorder().touch(stored_key.key_id)
+            return registry.get(provider, model, llm_config, api_key=stored_key.api_key)
     except Exception as e:
         # Log the error but don't fail - fall back to environment variables
         print(f"Warning: Failed to retrieve API key from database: {e}")
 
     # Fallback to environment variable (original behavior)
-    return LLMProvider(
-        provider=provider, model=model, api_key=None, **llm_config  # Will use environment variable
-    )
+    return registry.get(provider, model, llm_config)  # Will use environment variable
@@ -5,29 +5,49 @@ import litellm
 from functools import lru_cache
 
 
-# Provider display names and API key environment variable mappings
+# Provider display names, API key environment variable mappings, and fallback
+# context window sizes (in tokens) for models LiteLLM has no metadata for
 PROVIDER_METADATA = {
-    "openai": {"name": "OpenAI", "env_key": "OPENAI_API_KEY"},
-    "anthropic": {"name": "Anthropic", "env_key": "ANTHROPIC_API_KEY"},
-    "azure": {"name": "Azure OpenAI", "env_key": "AZURE_API_KEY"},
-    "cohere": {"name": "Cohere", "env_key": "COHERE_API_KEY"},
-    "huggingface": {"name": "Hugging Face", "env_key": "HUGGINGFACE_API_KEY"},
-    "together_ai": {"name": "Together AI", "env_key": "TOGETHER_API_KEY"},
-    "groq": {"name": "Groq", "env_key": "GROQ_API_KEY"},
-    "mistral": {"name": "Mistral AI", "env_key": "MISTRAL_API_KEY"},
-    "gemini": {"name": "Google Gemini", "env_key": "GEMINI_API_KEY"},
-    "vertex_ai": {"name": "Google Vertex AI", "env_key": "GOOGLE_APPLICATION_CREDENTIALS"},
-    "bedrock": {"name": "AWS Bedrock", "env_key": "AWS_ACCESS_KEY_ID"},
-    "ollama": {"name": "Ollama (Local)", "env_key": None},
-    "openrouter": {"name": "OpenRouter", "env_key": "OPENROUTER_API_KEY"},
-    "deepseek": {"name": "DeepSeek", "env_key": "DEEPSEEK_API_KEY"},
-    "fireworks_ai": {"name": "Fireworks AI", "env_key": "FIREWORKS_API_KEY"},
-    "perplexity": {"name": "Perplexity", "env_key": "PERPLEXITYAI_API_KEY"},
-    "replicate": {"name": "Replicate", "env_key": "REPLICATE_API_KEY"},
-    "ai21": {"name": "AI21 Labs", "env_key": "AI21_API_KEY"},
-    "xai": {"name": "xAI (Grok)", "env_key": "XAI_API_KEY"},
+    "openai": {"name": "OpenAI", "env_key": "OPENAI_API_KEY", "context_window": 128000},
+    "anthropic": {"name": "Anthropic", "env_key": "ANTHROPIC_API_KEY", "context_window": 200000},
+    "azure": {"name": "Azure OpenAI", "env_key": "AZURE_API_KEY", "context_window": 128000},
+    "cohere": {"name": "Cohere", "env_key": "COHERE_API_KEY", "context_window": 128000},
+    "huggingface": {
+        "name": "Hugging Face",
+        "env_key": "HUGGINGFACE_API_KEY",
+        "context_window": 32768,
+    },
+    "together_ai": {"name": "Together AI", "env_key": "TOGETHER_API_KEY", "context_window": 32768},
+    "groq": {"name": "Groq", "env_key": "GROQ_API_KEY", "context_window": 131072},
+    "mistral": {"name": "Mistral AI", "env_key": "MISTRAL_API_KEY", "context_window": 32768},
+    "gemini": {"name": "Google Gemini", "env_key": "GEMINI_API_KEY", "context_window": 1000000},
+    "vertex_ai": {
+        "name": "Google Vertex AI",
+        "env_key": "GOOGLE_APPLICATION_CREDENTIALS",
+        "context_window": 128000,
+    },
+    "bedrock": {"name": "AWS Bedrock", "env_key": "AWS_ACCESS_KEY_ID", "context_window": 128000},
+    "ollama": {"name": "Ollama (Local)", "env_key": None, "context_window": 8192},
+    "openrouter": {"name": "OpenRouter", "env_key": "OPENROUTER_API_KEY", "context_window": 128000},
+    "deepseek": {"name": "DeepSeek", "env_key": "DEEPSEEK_API_KEY", "context_window": 64000},
+    "fireworks_ai": {
+        "name": "Fireworks AI",
+        "env_key": "FIREWORKS_API_KEY",
+        "context_window": 32768,
+    },
+    "perplexity": {
+        "name": "Perplexity",
+        "env_key": "PERPLEXITYAI_API_KEY",
+        "context_window": 127072,
+    },
+    "replicate": {"name": "Replicate", "env_key": "REPLICATE_API_KEY", "context_window": 8192},
+    "ai21": {"name": "AI21 Labs", "env_key": "AI21_API_KEY", "context_window": 256000},
+    "xai": {"name": "xAI (Grok)", "env_key": "XAI_API_KEY", "context_window": 131072},
 }
 
+# Context window assumed for providers without metadata
+DEFAULT_CONTEXT_WINDOW = 8192
+
 # Commonly used providers to show first in the UI
 FEATURED_PROVIDERS = [
     "openai",
@@ -248,3 +268,31 @@ def get_test_model_for_provider(provider: str) -> str:
     }
 
     return test_models.get(provider, get_default_model_for_provider(provider) or "gpt-5-mini")
+
+
+@lru_cache(maxsize=256)
+def get_context_window(provider: str, model: str) -> int:
+    """
+    Get the maximum prompt size for a model, in tokens.
+
+    Uses LiteLLM's model metadata when it knows the model, falling back to
+    the provider's context_window in PROVIDER_METADATA.
+
+    Args:
+        provider: Provider identifier
+        model: Model ID, with or without the provider prefix
+
+    Returns:
+        Context window size in tokens
+    """
+    for candidate in (model, f"{provider}/{model}"):
+        try:
+            info = litellm.get_model_info(candidate)
+        except Exception:
+            continue
+        window = info.get("max_input_tokens") or info.get("max_tokens")
+        if window:
+            return int(window)
+
+    metadata = PROVIDER_METADATA.get(provider.lower(), {})
+    return metadata.get("context_window", DEFAULT_CONTEXT_WINDOW)
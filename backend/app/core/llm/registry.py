@@ -0,0 +1,138 @@
+"""Cache of constructed LLM providers.
+
+Providers are keyed by (provider, model, key hash, config), so every turn of
+every session on the same model and key shares one instance. Keys are hashed
+so the plaintext never appears in cache keys.
+"""
+
+import hashlib
+import json
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.core.llm.http_client import get_llm_http_client
+from app.core.llm.provider import LLMProvider, create_llm_provider
+
+ProviderKey = Tuple[str, str, str, str]
+
+
+def hash_secret(secret: str | bytes | None) -> str:
+    """
+    Hash an API key for use in cache keys.
+
+    Args:
+        secret: Key material, or None for environment-variable credentials
+
+    Returns:
+        Hex SHA-256, or "" for None
+    """
+    if secret is None:
+        return ""
+    if isinstance(secret, str):
+        secret = secret.encode("utf-8")
+    return hashlib.sha256(secret).hexdigest()
+
+
+class LLMProviderRegistry:
+    """
+    LRU cache of LLMProvider instances.
+
+    LLMProvider holds no per-request state and passes its credentials per call,
+    so cached instances are shared freely between sessions and concurrent turns.
+    """
+
+    def __init__(self, max_providers: Optional[int] = None):
+        """
+        Initialize the registry.
+
+        Args:
+            max_providers: Providers kept before the least recently used is dropped
+        """
+        self.max_providers = (
+            max_providers if max_providers is not None else settings.llm_provider_cache_size
+        )
+        self._providers: "OrderedDict[ProviderKey, LLMProvider]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(
+        self,
+        provider: str,
+        model: str,
+        llm_config: Dict[str, Any],
+        api_key: Optional[str] = None,
+    ) -> LLMProvider:
+        """
+        Get a cached provider, constructing it on a miss.
+
+        Args:
+            provider: Provider name
+            model: Model name
+            llm_config: LLM configuration dict
+            api_key: API key (None uses the provider's environment variable)
+
+        Returns:
+            LLMProvider instance
+        """
+        config_key = json.dumps(llm_config or {}, sort_keys=True, default=str)
+        cache_key = (provider.lower(), model, hash_secret(api_key), config_key)
+
+        cached = self._providers.get(cache_key)
+        if cached is not None:
+            self._providers.move_to_end(cache_key)
+            self.hits += 1
+            return cached
+
+        self.misses += 1
+
+        # Make sure calls go out over the pooled keep-alive client
+        get_llm_http_client()
+
+        instance = create_llm_provider(provider, model, llm_config or {}, api_key=api_key)
+        self._providers[cache_key] = instance
+        while len(self._providers) > self.max_providers:
+            self._providers.popitem(last=False)
+        return instance
+
+    def invalidate(self, provider: Optional[str] = None) -> int:
+        """
+        Drop cached providers, e.g. after an API key is replaced or deleted.
+
+        Args:
+            provider: Provider name to drop, or None for all
+
+        Returns:
+            Number of providers dropped
+        """
+        if provider is None:
+            dropped = len(self._providers)
+            self._providers.clear()
+            return dropped
+
+        stale = [key for key in self._providers if key[0] == provider.lower()]
+        for key in stale:
+            del self._providers[key]
+        return len(stale)
+
+    def __len__(self) -> int:
+        return len(self._providers)
+
+
+# Global registry instance
+_provider_registry: Optional[LLMProviderRegistry] = None
+
+
+def get_provider_registry() -> LLMProviderRegistry:
+    """
+    Get the global provider registry.
+
+    Returns:
+        LLMProviderRegistry instance
+    """
+    global _provider_registry
+
+    if _provider_registry is None:
+        _provider_registry = LLMProviderRegistry()
+
+    return _provider_registry
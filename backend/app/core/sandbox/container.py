@@ -1,25 +1,148 @@
 """Docker container wrapper for sandbox execution."""
 
 import os
+import time
+import uuid
+import shlex
+import codecs
 import asyncio
-from typing import Tuple
+import base64
+import functools
+import mimetypes
+import tarfile
+from contextlib import aclosing
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Dict, List, Sequence, Tuple
+from docker.errors import NotFound
 from docker.models.containers import Container as DockerContainer
 
+from app.core.config import settings
+from app.core.sandbox.tar_stream import TarArchiveReader, TarMemberReader, iter_tar_file
+
+# Exit status reported by coreutils `timeout` when a command overran its limit
+# (124 after SIGTERM, 128 + 9 when it had to escalate to SIGKILL)
+TIMEOUT_EXIT_CODES = (124, 137)
+
+# Extra seconds the event loop waits beyond the in-container kill before giving up
+EXEC_WAIT_SLACK = 5
+
+# Default coalescing thresholds for streamed exec output
+STREAM_FLUSH_BYTES = 4096
+STREAM_FLUSH_INTERVAL = 0.1  # seconds
+
+_exec_executor: ThreadPoolExecutor | None = None
+
+
+def get_exec_executor() -> ThreadPoolExecutor:
+    """Get the bounded thread pool used for blocking Docker exec calls."""
+    global _exec_executor
+    if _exec_executor is None:
+        _exec_executor = ThreadPoolExecutor(
+            max_workers=settings.sandbox_exec_max_workers,
+            thread_name_prefix="sandbox-exec",
+        )
+    return _exec_executor
+
+
+def build_exec_command(command: str, timeout: float | None = None) -> List[str]:
+    """
+    Build the argv for running a shell command inside the container.
+
+    When a timeout is given the command is wrapped in coreutils `timeout`, which
+    runs it in its own process group and signals the whole group (SIGTERM, then
+    SIGKILL after the grace period) so background children are killed too.
+
+    Args:
+        command: Shell command to run
+        timeout: Timeout in seconds (None or <= 0 disables it)
+
+    Returns:
+        Command argv list
+    """
+    if timeout and timeout > 0:
+        return [
+            "timeout",
+            f"--kill-after={settings.sandbox_exec_kill_grace}",
+            str(timeout),
+            "bash",
+            "-c",
+            command,
+        ]
+    return ["bash", "-c", command]
+
+
+def clamp_exec_timeout(timeout: float | None) -> float:
+    """
+    Bound a requested command timeout by settings.sandbox_exec_max_timeout.
+
+    A missing or non-positive timeout gets the maximum rather than no limit,
+    so no command can hold an exec thread forever.
+
+    Args:
+        timeout: Requested timeout in seconds
+
+    Returns:
+        Timeout in seconds, in (0, sandbox_exec_max_timeout]
+    """
+    if not timeout or timeout <= 0:
+        return settings.sandbox_exec_max_timeout
+    return min(timeout, settings.sandbox_exec_max_timeout)
+
+
+def decode_file_content(data: bytes, path: str) -> str:
+    """
+    Convert file bytes to the text form shown to the agent and the UI.
+
+    Args:
+        data: File content
+        path: File path (used to guess the MIME type of binary content)
+
+    Returns:
+        The content as text if it is valid UTF-8, otherwise a base64 data URI
+    """
+    try:
+        return data.decode("utf-8")
+    except UnicodeDecodeError:
+        mime_type, _ = mimetypes.guess_type(path)
+        b64_data = base64.b64encode(data).decode("ascii")
+        return f"data:{mime_type or 'application/octet-stream'};base64,{b64_data}"
+
 
 class SandboxContainer:
     """Wrapper for a Docker container used as a sandbox."""
 
-    def __init__(self, container: DockerContainer, workspace_path: str):
+    def __init__(
+        self,
+        container: DockerContainer,
+        workspace_path: str,
+        environment: Dict[str, str] | None = None,
+    ):
         """
         Initialize sandbox container.
 
         Args:
             container: Docker container instance
             workspace_path: Host path to workspace directory
+            environment: Variables set for every command, on top of the
+                container's own (for containers started before their session)
         """
         self.container = container
         self.workspace_path = workspace_path
+        self.environment = environment
         self.container_id = container.id
+        # Background setup (e.g. package installs) that commands must wait for
+        self.setup_task: asyncio.Task | None = None
+
+    async def wait_until_ready(self) -> None:
+        """Wait for background setup to finish before running commands."""
+        task = self.setup_task
+        if task is None or task.done() or task is asyncio.current_task():
+            return
+        try:
+            # Shielded so a cancelled command doesn't abort the install for everyone
+            await asyncio.shield(task)
+        except Exception as e:
+            print(f"Sandbox setup failed: {e}")
 
     @property
     def is_running(self) -> bool:
@@ -36,6 +159,10 @@ class SandboxContainer:
         """
         Execute a command in the container.
 
+        The blocking Docker exec call runs on a bounded thread pool so the event
+        loop keeps serving other sessions. The timeout is enforced inside the
+        container by killing the exec'd process group.
+
         Args:
             command: Command to execute
             workdir: Working directory for command
@@ -44,55 +171,222 @@ class SandboxContainer:
         Returns:
             Tuple of (exit_code, stdout, stderr)
         """
+        await self.wait_until_ready()
+        timeout = clamp_exec_timeout(timeout)
+
+        exec_call = functools.partial(
+            self.container.exec_run,
+            cmd=build_exec_command(command, timeout),
+            workdir=workdir,
+            environment=self.environment,
+            demux=True,
+            stream=False,
+        )
+        wait_timeout = timeout + settings.sandbox_exec_kill_grace + EXEC_WAIT_SLACK
+
         try:
-            # Execute command in container
-            exec_result = self.container.exec_run(
-                cmd=["bash", "-c", command],
-                workdir=workdir,
-                demux=True,
-                stream=False,
+            loop = asyncio.get_running_loop()
+            started = time.monotonic()
+            exec_result = await asyncio.wait_for(
+                loop.run_in_executor(get_exec_executor(), exec_call),
+                timeout=wait_timeout,
             )
+            elapsed = time.monotonic() - started
 
             exit_code = exec_result.exit_code
             stdout = exec_result.output[0].decode("utf-8") if exec_result.output[0] else ""
             stderr = exec_result.output[1].decode("utf-8") if exec_result.output[1] else ""
 
+            if exit_code in TIMEOUT_EXIT_CODES and elapsed >= timeout:
+                stderr = f"{stderr}\nCommand timed out after {timeout}s".lstrip("\n")
+
             return exit_code, stdout, stderr
 
+        except asyncio.TimeoutError:
+            return TIMEOUT_EXIT_CODES[0], "", f"Command timed out after {timeout}s"
         except Exception as e:
             return 1, "", f"Execution error: {str(e)}"
 
-    async def execute_stream(self, command: str, workdir: str = "/workspace"):
+    async def execute_stream(
+        self,
+        command: str,
+        workdir: str = "/workspace",
+        timeout: int = 30,
+        flush_bytes: int = STREAM_FLUSH_BYTES,
+        flush_interval: float = STREAM_FLUSH_INTERVAL,
+    ) -> AsyncIterator[Tuple[str, Any]]:
         """
-        Execute a command and stream output.
+        Execute a command and stream its output as it is produced.
+
+        The Docker exec stream is read on the exec thread pool and handed to the
+        event loop through a queue. Output is coalesced per stream and flushed
+        once `flush_bytes` are pending or `flush_interval` seconds have passed.
+        Closing the generator early (e.g. the consuming task is cancelled) kills
+        the exec'd process group.
 
         Args:
             command: Command to execute
             workdir: Working directory
+            timeout: Execution timeout in seconds
+            flush_bytes: Flush pending output once this many bytes are buffered
+            flush_interval: Flush pending output at least this often (seconds)
 
         Yields:
-            Output chunks
+            ("stdout" | "stderr", text) tuples, then a final ("exit", exit_code)
         """
+        await self.wait_until_ready()
+        timeout = clamp_exec_timeout(timeout)
+
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        pidfile = f"/tmp/.sandbox-exec-{uuid.uuid4().hex}.pid"
+        # Run the command in the background so its PID can be recorded for cancellation
+        script = (
+            f"{shlex.join(build_exec_command(command, timeout))} & pid=$!; "
+            f"echo $pid > {pidfile}; wait $pid; rc=$?; rm -f {pidfile}; exit $rc"
+        )
+
+        def _put(item: Tuple[str, Any]) -> None:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+            except RuntimeError:
+                pass  # Event loop already closed
+
+        def _pump() -> None:
+            api = self.container.client.api
+            try:
+                exec_id = api.exec_create(
+                    self.container.id,
+                    ["bash", "-c", script],
+                    workdir=workdir,
+                    environment=self.environment,
+                )["Id"]
+                for stdout, stderr in api.exec_start(exec_id, stream=True, demux=True):
+                    if stdout:
+                        _put(("stdout", stdout))
+                    if stderr:
+                        _put(("stderr", stderr))
+                _put(("exit", api.exec_inspect(exec_id).get("ExitCode")))
+            except Exception as e:
+                _put(("error", f"Execution error: {str(e)}"))
+
+        decoders = {
+            name: codecs.getincrementaldecoder("utf-8")(errors="replace")
+            for name in ("stdout", "stderr")
+        }
+        pending: dict[str, list[str]] = {"stdout": [], "stderr": []}
+        pending_bytes = 0
+        last_flush = time.monotonic()
+        started = last_flush
+        deadline = started + timeout + settings.sandbox_exec_kill_grace + EXEC_WAIT_SLACK
+        finished = False
+
+        def _drain() -> List[Tuple[str, str]]:
+            nonlocal pending_bytes, last_flush
+            chunks = [(name, "".join(parts)) for name, parts in pending.items() if parts]
+            for parts in pending.values():
+                parts.clear()
+            pending_bytes = 0
+            last_flush = time.monotonic()
+            return chunks
+
+        loop.run_in_executor(get_exec_executor(), _pump)
+        try:
+            while True:
+                now = time.monotonic()
+                wait = deadline - now
+                if pending_bytes:
+                    wait = min(wait, flush_interval - (now - last_flush))
+
+                try:
+                    kind, data = await asyncio.wait_for(queue.get(), timeout=wait)
+                except asyncio.TimeoutError:
+                    for chunk in _drain():
+                        yield chunk
+                    if time.monotonic() >= deadline:
+                        finished = True
+                        yield "stderr", f"\nCommand timed out after {timeout}s"
+                        yield "exit", TIMEOUT_EXIT_CODES[0]
+                        return
+                    continue
+
+                if kind in decoders:
+                    text = decoders[kind].decode(data)
+                    if text:
+                        pending[kind].append(text)
+                        pending_bytes += len(data)
+                    if pending_bytes >= flush_bytes or (
+                        time.monotonic() - last_flush >= flush_interval
+                    ):
+                        for chunk in _drain():
+                            yield chunk
+                    continue
+
+                # Terminal item: flush whatever is left, then report the exit status
+                finished = True
+                for name, decoder in decoders.items():
+                    tail = decoder.decode(b"", final=True)
+                    if tail:
+                        pending[name].append(tail)
+                for chunk in _drain():
+                    yield chunk
+
+                if kind == "error":
+                    yield "stderr", data
+                    yield "exit", 1
+                    return
+
+                exit_code = data
+                if exit_code in TIMEOUT_EXIT_CODES and time.monotonic() - started >= timeout:
+                    yield "stderr", f"\nCommand timed out after {timeout}s"
+                yield "exit", exit_code
+                return
+        finally:
+            if not finished:
+                # Consumer stopped early: kill the process instead of leaving it running
+                loop.run_in_executor(get_exec_executor(), self._kill_exec, pidfile)
+
+    def _kill_exec(self, pidfile: str) -> None:
+        """Terminate the process group of a streamed exec identified by its PID file."""
         try:
-            exec_instance = self.container.exec_run(
-                cmd=["bash", "-c", command],
-                workdir=workdir,
-                stream=True,
-                demux=True,
+            self.container.exec_run(
+                [
+                    "bash",
+                    "-c",
+                    f"pid=$(cat {pidfile} 2>/dev/null) && "
+                    f"(kill -TERM -- -$pid 2>/dev/null || kill -TERM $pid); rm -f {pidfile}",
+                ]
             )
+        except Exception as e:
+            print(f"Error killing exec: {e}")
 
-            for stdout, stderr in exec_instance.output:
-                if stdout:
-                    yield stdout.decode("utf-8")
-                if stderr:
-                    yield f"[ERROR] {stderr.decode('utf-8')}"
+    async def write_bytes(self, container_path: str, data: bytes | bytearray | memoryview) -> bool:
+        """
+        Write raw bytes to a file in the container.
+
+        The tar archive is produced piece by piece while put_archive sends it,
+        so the content is never copied into an intermediate archive buffer.
+
+        Args:
+            container_path: Path inside container
+            data: File content
 
+        Returns:
+            Success boolean
+        """
+        try:
+            archive = iter_tar_file(os.path.basename(container_path), data)
+            await asyncio.to_thread(
+                self.container.put_archive, path=os.path.dirname(container_path), data=archive
+            )
+            return True
         except Exception as e:
-            yield f"[ERROR] Execution error: {str(e)}"
+            print(f"Error writing file: {e}")
+            return False
 
     async def write_file(self, container_path: str, content: str) -> bool:
         """
-        Write content to a file in the container.
+        Write text to a file in the container.
 
         Args:
             container_path: Path inside container
@@ -101,98 +395,153 @@ class SandboxContainer:
         Returns:
             Success boolean
         """
+        return await self.write_bytes(container_path, content.encode("utf-8"))
+
+    async def open_stream(self, container_path: str) -> AsyncIterator[memoryview]:
+        """
+        Stream a file out of the container.
+
+        Archive chunks from get_archive are fed through a tar reader as they
+        arrive, so memory use stays at one chunk regardless of file size.
+
+        Args:
+            container_path: Path inside container
+
+        Yields:
+            Slices of the file content (views into the received chunks)
+
+        Raises:
+            FileNotFoundError: If the path doesn't exist or isn't a regular file
+            IsADirectoryError: If the path is a directory
+            IOError: If the archive stream ends early
+        """
+        reader = TarMemberReader()
+        async with aclosing(self._archive_chunks(container_path)) as chunks:
+            async for chunk in chunks:
+                for view in reader.feed(chunk):
+                    yield view
+                if reader.done:
+                    return
+        raise IOError(f"Archive for {container_path} ended early")
+
+    async def open_archive(
+        self, container_path: str, exclude: Sequence[str] = ()
+    ) -> AsyncIterator[Tuple[tarfile.TarInfo, memoryview]]:
+        """
+        Stream a file or directory tree out of the container as tar members.
+
+        One get_archive call covers the whole tree, so exporting a directory
+        costs a single round trip however many files it holds. With exclude,
+        the archive is made by tar inside the container instead, so excluded
+        entries never leave it.
+
+        Args:
+            container_path: Path inside container
+            exclude: Names directly under container_path to leave out
+
+        Yields:
+            (member, content slice) pairs as produced by TarArchiveReader
+
+        Raises:
+            FileNotFoundError: If the path doesn't exist
+            IOError: If the archive stream ends early
+        """
+        reader = TarArchiveReader()
+        source = (
+            self._tar_chunks(container_path, exclude)
+            if exclude
+            else self._archive_chunks(container_path)
+        )
+        async with aclosing(source) as chunks:
+            async for chunk in chunks:
+                for item in reader.feed(chunk):
+                    yield item
+                if reader.finished:
+                    return
+        raise IOError(f"Archive for {container_path} ended early")
+
+    async def _archive_chunks(self, container_path: str) -> AsyncIterator[bytes]:
+        """Yield raw get_archive chunks, pulling each one in a worker thread."""
         try:
-            # Create a tar archive with the file
-            import tarfile
-            import io
-            import asyncio
-
-            # Run blocking I/O in thread pool
-            def _write():
-                tar_stream = io.BytesIO()
-                tar = tarfile.open(fileobj=tar_stream, mode="w")
-
-                # Add file to tar
-                file_data = content.encode("utf-8")
-                tarinfo = tarfile.TarInfo(name=os.path.basename(container_path))
-                tarinfo.size = len(file_data)
-                tar.addfile(tarinfo, io.BytesIO(file_data))
-                tar.close()
-
-                # Put tar archive in container
-                tar_stream.seek(0)
-                self.container.put_archive(path=os.path.dirname(container_path), data=tar_stream)
-                return True
-
-            return await asyncio.to_thread(_write)
+            bits, _ = await asyncio.to_thread(self.container.get_archive, container_path)
+        except NotFound:
+            raise FileNotFoundError(f"File not found: {container_path}") from None
 
-        except Exception as e:
-            print(f"Error writing file: {e}")
-            return False
+        chunks = iter(bits)
+        try:
+            while (chunk := await asyncio.to_thread(next, chunks, None)) is not None:
+                yield chunk
+        finally:
+            # Release the HTTP connection if the caller stopped early
+            close = getattr(bits, "close", None)
+            if close:
+                close()
+
+    async def _tar_chunks(
+        self, container_path: str, exclude: Sequence[str]
+    ) -> AsyncIterator[bytes]:
+        """Yield a tar stream built in the container, named like get_archive's ("out/...")."""
+        parent, _, name = container_path.rstrip("/").rpartition("/")
+        cmd = ["tar", "-cf", "-", "-C", parent or "/"]
+        cmd += [f"--exclude={name}/{excluded}" for excluded in exclude]
+        cmd += ["--", name]
+
+        api = self.container.client.api
+        exec_id = (await asyncio.to_thread(api.exec_create, self.container.id, cmd))["Id"]
+        frames = await asyncio.to_thread(api.exec_start, exec_id, stream=True, demux=True)
+        try:
+            while (frame := await asyncio.to_thread(next, frames, None)) is not None:
+                stdout, _ = frame
+                if stdout:
+                    yield stdout
+        finally:
+            # Release the HTTP connection if the caller stopped early
+            close = getattr(frames, "close", None)
+            if close:
+                close()
+
+        if (await asyncio.to_thread(api.exec_inspect, exec_id)).get("ExitCode"):
+            raise FileNotFoundError(f"Could not archive {container_path}")
+
+    async def read_bytes(self, container_path: str) -> bytes:
+        """
+        Read a file from the container as raw bytes.
+
+        Args:
+            container_path: Path inside container
+
+        Returns:
+            File content
+
+        Raises:
+            FileNotFoundError: If the path doesn't exist or isn't a regular file
+            IsADirectoryError: If the path is a directory
+        """
+        content = bytearray()
+        async for view in self.open_stream(container_path):
+            content += view
+        return bytes(content)
 
     async def read_file(self, container_path: str) -> str | None:
         """
-        Read a file from the container.
+        Read a file from the container for display to the agent.
 
         Args:
             container_path: Path inside container
 
         Returns:
-            File content or None if error
+            File content as text
             For binary files (images, etc), returns base64-encoded string with prefix "data:image/..."
         """
         try:
-            import tarfile
-            import io
-            import asyncio
-            import base64
-            import mimetypes
-
-            # Run blocking I/O in thread pool
-            def _read():
-                # Get file as tar archive
-                bits, stat = self.container.get_archive(container_path)
-
-                # Extract content from tar
-                tar_stream = io.BytesIO()
-                for chunk in bits:
-                    tar_stream.write(chunk)
-                tar_stream.seek(0)
-
-                tar = tarfile.open(fileobj=tar_stream)
-                member = tar.next()
-                if member:
-                    f = tar.extractfile(member)
-                    if f:
-                        raw_bytes = f.read()
-
-                        # Try to decode as UTF-8 text
-                        try:
-                            content = raw_bytes.decode("utf-8")
-                            return content
-                        except UnicodeDecodeError:
-                            # Binary file - encode as base64 with data URI
-                            # Guess MIME type from file extension
-                            mime_type, _ = mimetypes.guess_type(container_path)
-                            if mime_type is None:
-                                mime_type = "application/octet-stream"
-
-                            b64_data = base64.b64encode(raw_bytes).decode("ascii")
-                            return f"data:{mime_type};base64,{b64_data}"
-
-                return None
-
-            return await asyncio.to_thread(_read)
-
+            data = await self.read_bytes(container_path)
         except Exception as e:
-            import traceback
-
-            error_details = traceback.format_exc()
             print(f"Error reading file: {e}")
-            print(f"Full traceback:\n{error_details}")
-            # Return error as string so FileReadTool can display it
+            # Raise with a readable message so FileReadTool can display it
             raise Exception(f"Failed to read file: {str(e)}")
 
+        return decode_file_content(data, container_path)
+
     def list_files(self, container_path: str = "/workspace") -> list[str]:
         """
         List files in a directory.
@@ -1,28 +1,69 @@
 """Container pool manager for efficient sandbox management."""
 
-from typing import Dict
+import asyncio
+import io
+import shlex
+import tarfile
+import uuid
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, List, Set
 from pathlib import Path
 import docker
 from docker.errors import DockerException, ImageNotFound
+from docker.models.containers import Container as DockerContainer
 
+from app.core.config import settings
 from app.core.sandbox.container import SandboxContainer
 from app.core.storage.storage_factory import create_storage
 from app.core.storage.workspace_storage import WorkspaceStorage
 from app.core.storage.project_volume_storage import get_project_volume_storage
 
+WARM_LABEL = "openclaudeui.role"
+WARM_LABEL_VALUE = "warm-sandbox"
+PACKAGE_INSTALL_TIMEOUT = 600  # Seconds allowed for pip/npm installs
+
+
+@dataclass
+class WarmContainer:
+    """A pre-started container waiting to be claimed by a session."""
+
+    container: DockerContainer
+    env_type: str
+    workspace_id: str  # ID its workspace was created under, adopted on claim
+
 
 class ContainerPoolManager:
-    """Manage a pool of Docker containers for sandboxed execution."""
+    """Manage a pool of Docker containers for sandboxed execution.
 
-    def __init__(self, pool_size: int = 5, storage: WorkspaceStorage | None = None):
+    For each environment type in `warm_env_types`, up to `pool_size` containers
+    are kept started with an empty workspace. A new session claims one, takes
+    over its workspace and gets a copy of the project files, so it skips image
+    checks, volume setup and container start. The pool refills in the background.
+    """
+
+    def __init__(
+        self,
+        pool_size: int = 5,
+        storage: WorkspaceStorage | None = None,
+        warm_env_types: List[str] | None = None,
+    ):
         """
         Initialize container pool manager.
 
         Args:
-            pool_size: Maximum number of containers in pool
+            pool_size: Number of warm containers kept per environment type
             storage: Storage backend (will be created from config if not provided)
+            warm_env_types: Environment types to keep warm (defaults to settings)
         """
         self.pool_size = pool_size
+        if warm_env_types is None:
+            warm_env_types = [
+                env_type.strip()
+                for env_type in settings.docker_warm_pool_env_types.split(",")
+                if env_type.strip()
+            ]
+        self.warm_env_types = warm_env_types
 
         try:
             self.docker_client = docker.from_env()
@@ -35,6 +76,17 @@ class ContainerPoolManager:
         # Track active containers by session ID
         self.active_containers: Dict[str, SandboxContainer] = {}
 
+        # Warm pool: started, unclaimed containers per environment type
+        self._warm: Dict[str, Deque[WarmContainer]] = {}
+        self._warm_pending: Dict[str, int] = {}
+        self._refill_tasks: Set[asyncio.Task] = set()
+        self._warm_started = False
+
+        # Sessions whose project files were copied in rather than mounted
+        self._project_snapshots: Dict[str, str] = {}
+        # Upload changes seen while a session is still claiming its warm container
+        self._pending_project_changes: Dict[str, Dict[str, bytes | None]] = {}
+
         # Environment type to image mapping
         self.env_images = {
             # Python environments
@@ -109,6 +161,13 @@ class ContainerPoolManager:
         """
         Create a new container for a session.
 
+        A warm container is claimed when one is available for the environment
+        type, the session has no workspace yet, the project has no uploaded
+        files (only a cold start can mount them read-only) and no custom
+        environment variables are requested (those can't be added to a
+        running container).
+        Package installs run in the background; commands wait for them.
+
         Args:
             session_id: Chat session ID
             project_id: Project ID (for mounting project files volume)
@@ -121,14 +180,35 @@ class ContainerPoolManager:
         # Check if container already exists for this session
         if session_id in self.active_containers:
             container = self.active_containers[session_id]
-            if container.is_running:
+            if await asyncio.to_thread(lambda: container.is_running):
                 return container
             else:
                 # Clean up dead container
                 await self.destroy_container(session_id)
 
         # Check if orphaned container with same name exists in Docker
-        container_name = f"openclaudeui-sandbox-{session_id}"
+        await asyncio.to_thread(self._remove_orphan, f"openclaudeui-sandbox-{session_id}")
+
+        sandbox = None
+        if not (environment_config or {}).get("env_vars"):
+            sandbox = await self._claim_warm_container(session_id, project_id, env_type)
+        if sandbox is None:
+            sandbox = await self._create_cold_container(
+                session_id, project_id, env_type, environment_config
+            )
+
+        # Install additional packages if specified, without holding up the session
+        packages = (environment_config or {}).get("packages")
+        if packages:
+            sandbox.setup_task = asyncio.create_task(
+                self._install_packages(sandbox, env_type, packages)
+            )
+
+        self.active_containers[session_id] = sandbox
+        return sandbox
+
+    def _remove_orphan(self, container_name: str) -> None:
+        """Remove a leftover container with the given name, if any."""
         try:
             existing = self.docker_client.containers.get(container_name)
             # Found orphaned container - remove it
@@ -141,14 +221,50 @@ class ContainerPoolManager:
         except Exception as e:
             print(f"Error checking for orphaned container: {e}")
 
+    def _run_container(
+        self,
+        image_name: str,
+        name: str,
+        volumes: Dict,
+        environment: Dict,
+        labels: Dict | None = None,
+    ) -> DockerContainer:
+        """Start a sandbox container with the standard resource limits."""
+        return self.docker_client.containers.run(
+            image_name,
+            detach=True,
+            tty=True,
+            stdin_open=True,
+            volumes=volumes,
+            environment=environment,
+            network_mode="bridge",
+            mem_limit="1g",  # Memory limit
+            cpu_quota=50000,  # CPU limit (50% of one core)
+            name=name,
+            labels=labels or {},
+        )
+
+    def _workspace_display(self, session_id: str) -> str:
+        """Describe where a session's workspace lives."""
+        # For volume/S3 storage, workspace_path is not directly accessible from host
+        return f"volume://{session_id}" if hasattr(self.storage, "get_volume_name") else "N/A"
+
+    async def _create_cold_container(
+        self,
+        session_id: str,
+        project_id: str,
+        env_type: str,
+        environment_config: Dict | None,
+    ) -> SandboxContainer:
+        """Create a session container from scratch with its volumes mounted."""
         # Ensure image exists
-        image_name = self._ensure_image_exists(env_type)
+        image_name = await asyncio.to_thread(self._ensure_image_exists, env_type)
 
         # Create session workspace using storage backend (for /workspace/out)
         await self.storage.create_workspace(session_id)
 
         # Get session volume configuration (mounts to /workspace/out)
-        session_volume_config = self.storage.get_volume_config(session_id)
+        session_volume_config = await asyncio.to_thread(self.storage.get_volume_config, session_id)
 
         # Get project volume configuration (mounts to /workspace/project_files)
         project_storage = get_project_volume_storage(self.docker_client)
@@ -169,42 +285,240 @@ class ContainerPoolManager:
 
         # Create container with volume mount
         try:
-            container = self.docker_client.containers.run(
+            container = await asyncio.to_thread(
+                self._run_container,
                 image_name,
-                detach=True,
-                tty=True,
-                stdin_open=True,
-                volumes=volume_config,
-                environment=env_vars,
-                network_mode="bridge",
-                mem_limit="1g",  # Memory limit
-                cpu_quota=50000,  # CPU limit (50% of one core)
-                name=f"openclaudeui-sandbox-{session_id}",
+                f"openclaudeui-sandbox-{session_id}",
+                volume_config,
+                env_vars,
             )
+            return SandboxContainer(container, self._workspace_display(session_id))
 
-            # Install additional packages if specified
-            if environment_config and "packages" in environment_config:
-                packages = environment_config["packages"]
-                if env_type.startswith("python"):
-                    if packages:
-                        install_cmd = f"pip install {' '.join(packages)}"
-                        container.exec_run(["bash", "-c", install_cmd])
-                elif env_type.startswith("node"):
-                    if packages:
-                        install_cmd = f"npm install -g {' '.join(packages)}"
-                        container.exec_run(["bash", "-c", install_cmd])
-
-            # For volume/S3 storage, workspace_path is not directly accessible from host
-            workspace_display = (
-                f"volume://{session_id}" if hasattr(self.storage, "get_volume_name") else "N/A"
+        except Exception as e:
+            raise Exception(f"Failed to create container: {e}")
+
+    async def _install_packages(
+        self, sandbox: SandboxContainer, env_type: str, packages: List[str]
+    ) -> None:
+        """Install extra packages into a sandbox."""
+        if env_type.startswith("python"):
+            install_cmd = f"pip install {shlex.join(packages)}"
+        elif env_type.startswith("node"):
+            install_cmd = f"npm install -g {shlex.join(packages)}"
+        else:
+            return
+
+        exit_code, _, stderr = await sandbox.execute(install_cmd, timeout=PACKAGE_INSTALL_TIMEOUT)
+        if exit_code != 0:
+            print(f"Package install failed in {sandbox.container_id}: {stderr}")
+
+    async def start_warm_pool(self) -> None:
+        """Remove warm containers left by a previous run and start filling the pool."""
+        if self._warm_started or self.pool_size <= 0:
+            return
+        self._warm_started = True
+
+        def _remove_stale():
+            stale = self.docker_client.containers.list(
+                all=True, filters={"label": f"{WARM_LABEL}={WARM_LABEL_VALUE}"}
             )
-            sandbox = SandboxContainer(container, workspace_display)
-            self.active_containers[session_id] = sandbox
+            for container in stale:
+                container.remove(force=True)
+            return len(stale)
+
+        removed = await asyncio.to_thread(_remove_stale)
+        if removed:
+            print(f"[WARM POOL] Removed {removed} stale warm containers")
+
+        for env_type in self.warm_env_types:
+            self._schedule_refill(env_type)
+
+    async def stop_warm_pool(self) -> None:
+        """Stop refilling and remove all unclaimed warm containers."""
+        self._warm_started = False
+        for task in list(self._refill_tasks):
+            task.cancel()
+        if self._refill_tasks:
+            await asyncio.gather(*self._refill_tasks, return_exceptions=True)
+
+        for pool in self._warm.values():
+            while pool:
+                await self._discard_warm_container(pool.popleft())
+
+    def warm_count(self, env_type: str) -> int:
+        """Number of unclaimed warm containers for an environment type."""
+        return len(self._warm.get(env_type, ()))
+
+    def _schedule_refill(self, env_type: str) -> None:
+        """Start background creation of warm containers up to the pool size."""
+        if not self._warm_started or env_type not in self.warm_env_types:
+            return
+
+        missing = self.pool_size - self.warm_count(env_type) - self._warm_pending.get(env_type, 0)
+        for _ in range(max(missing, 0)):
+            self._warm_pending[env_type] = self._warm_pending.get(env_type, 0) + 1
+            task = asyncio.create_task(self._add_warm_container(env_type))
+            self._refill_tasks.add(task)
+            task.add_done_callback(self._refill_tasks.discard)
+
+    async def _add_warm_container(self, env_type: str) -> None:
+        """Start one warm container and add it to the pool."""
+        try:
+            warm = await self._start_warm_container(env_type)
+            self._warm.setdefault(env_type, deque()).append(warm)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"[WARM POOL] Failed to start {env_type} container: {e}")
+        finally:
+            self._warm_pending[env_type] -= 1
+
+    async def _start_warm_container(self, env_type: str) -> WarmContainer:
+        """Start a container with a fresh workspace that no session owns yet."""
+        image_name = await asyncio.to_thread(self._ensure_image_exists, env_type)
+
+        workspace_id = f"warm-{uuid.uuid4().hex[:12]}"
+        await self.storage.create_workspace(workspace_id)
+        volume_config = await asyncio.to_thread(self.storage.get_volume_config, workspace_id)
+
+        container = await asyncio.to_thread(
+            self._run_container,
+            image_name,
+            f"openclaudeui-{workspace_id}",
+            volume_config,
+            {"WORKSPACE": "/workspace"},
+            {WARM_LABEL: WARM_LABEL_VALUE},
+        )
+        return WarmContainer(container=container, env_type=env_type, workspace_id=workspace_id)
+
+    async def _discard_warm_container(self, warm: WarmContainer) -> None:
+        """Remove an unclaimed warm container and its workspace."""
+        try:
+            await asyncio.to_thread(warm.container.remove, force=True)
+        except Exception as e:
+            print(f"[WARM POOL] Error removing warm container: {e}")
+        try:
+            await self.storage.delete_workspace(warm.workspace_id)
+        except Exception as e:
+            print(f"[WARM POOL] Error removing warm workspace: {e}")
 
-            return sandbox
+    async def _claim_warm_container(
+        self, session_id: str, project_id: str, env_type: str
+    ) -> SandboxContainer | None:
+        """
+        Hand a warm container over to a session.
 
-        except Exception as e:
-            raise Exception(f"Failed to create container: {e}")
+        Commands in the claimed container get SESSION_ID like a cold-started
+        one. Projects with uploaded files get a cold start instead, since the
+        project volume can only be mounted read-only when a container starts.
+
+        Args:
+            session_id: Chat session ID
+            project_id: Project ID of the session
+            env_type: Environment type
+
+        Returns:
+            SandboxContainer, or None if no warm container could be used
+        """
+        pool = self._warm.get(env_type)
+        if not pool:
+            return None
+
+        # The project volume isn't mounted, so uploads are copied in (read-only) by
+        # sync_project_file. Register before the first await: uploads landing
+        # while the claim is in progress are queued and applied before returning.
+        self._project_snapshots[session_id] = project_id
+        self._pending_project_changes[session_id] = {}
+        claimed = False
+        try:
+            project_storage = get_project_volume_storage(self.docker_client)
+            if await project_storage.list_files(project_id):
+                return None
+
+            while pool:
+                warm = pool.popleft()
+
+                adopted = False
+                try:
+                    adopted = await self.storage.adopt_workspace(warm.workspace_id, session_id)
+                    if not adopted:
+                        # Session already has files of its own; they must stay mounted
+                        pool.appendleft(warm)
+                        return None
+
+                    await asyncio.to_thread(
+                        warm.container.rename, f"openclaudeui-sandbox-{session_id}"
+                    )
+                    sandbox = SandboxContainer(
+                        warm.container,
+                        self._workspace_display(session_id),
+                        environment={"SESSION_ID": session_id},
+                    )
+                    changes = self._pending_project_changes[session_id]
+                    while changes:
+                        filename = next(iter(changes))
+                        await self._write_project_file(sandbox, filename, changes.pop(filename))
+
+                    claimed = True
+                    self._schedule_refill(env_type)
+                    print(f"[WARM POOL] Session {session_id} claimed warm {env_type} container")
+                    return sandbox
+                except Exception as e:
+                    print(f"[WARM POOL] Failed to claim warm container: {e}")
+                    await self._discard_warm_container(warm)
+                    if adopted:
+                        await self.storage.delete_workspace(session_id)
+                    self._schedule_refill(env_type)
+
+            return None
+        finally:
+            self._pending_project_changes.pop(session_id, None)
+            if not claimed:
+                self._project_snapshots.pop(session_id, None)
+
+    async def sync_project_file(
+        self, project_id: str, filename: str, content: bytes | None
+    ) -> None:
+        """
+        Mirror a project upload change into containers holding a copy of the files.
+
+        Copies are read-only like the project volume mounted in cold-started
+        containers (sandboxes run as root, so this guards against accidental
+        edits rather than enforcing them).
+
+        Args:
+            project_id: Project ID
+            filename: Name of the uploaded file
+            content: New file content, or None if the file was deleted
+        """
+        for session_id, snapshot_project_id in list(self._project_snapshots.items()):
+            if snapshot_project_id != project_id:
+                continue
+
+            pending = self._pending_project_changes.get(session_id)
+            if pending is not None:
+                # Still claiming its container; the claim applies this before returning
+                pending[filename] = content
+                continue
+
+            sandbox = self.active_containers.get(session_id)
+            if sandbox is not None:
+                await self._write_project_file(sandbox, filename, content)
+
+    @staticmethod
+    async def _write_project_file(
+        sandbox: SandboxContainer, filename: str, content: bytes | None
+    ) -> None:
+        """Write (or with None, delete) one project file in a container's copy."""
+        path = f"/workspace/project_files/{filename}"
+        if content is None:
+            await sandbox.execute(f"rm -f {shlex.quote(path)}")
+        else:
+            await asyncio.to_thread(
+                sandbox.container.put_archive,
+                "/workspace/project_files",
+                _single_file_tar(filename, content),
+            )
 
     async def get_container(self, session_id: str) -> SandboxContainer | None:
         """
@@ -233,7 +547,8 @@ class ContainerPoolManager:
         """
         container = self.active_containers.get(session_id)
         if container:
-            return container.reset()
+            # reset() drives its own event loop, so run it off the current one
+            return await asyncio.to_thread(container.reset)
         return False
 
     async def destroy_container(self, session_id: str) -> bool:
@@ -247,6 +562,7 @@ class ContainerPoolManager:
             Success boolean
         """
         container = self.active_containers.pop(session_id, None)
+        self._project_snapshots.pop(session_id, None)
         if container:
             try:
                 container.stop()
@@ -291,5 +607,22 @@ def get_container_manager() -> ContainerPoolManager:
     """Get global container pool manager instance."""
     global _container_manager
     if _container_manager is None:
-        _container_manager = ContainerPoolManager()
+        _container_manager = ContainerPoolManager(pool_size=settings.docker_container_pool_size)
     return _container_manager
+
+
+async def sync_project_file(project_id: str, filename: str, content: bytes | None) -> None:
+    """Mirror a project upload change into running sandboxes, if any exist."""
+    if _container_manager is not None:
+        await _container_manager.sync_project_file(project_id, filename, content)
+
+
+def _single_file_tar(filename: str, content: bytes, mode: int = 0o444) -> bytes:
+    """Build a tar archive holding one file (read-only by default)."""
+    tar_stream = io.BytesIO()
+    with tarfile.open(fileobj=tar_stream, mode="w") as tar:
+        tarinfo = tarfile.TarInfo(name=filename)
+        tarinfo.size = len(content)
+        tarinfo.mode = mode
+        tar.addfile(tarinfo, io.BytesIO(content))
+    return tar_stream.getvalue()
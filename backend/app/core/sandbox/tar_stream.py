@@ -0,0 +1,253 @@
+"""Incremental tar encoding and decoding for container file transfers.
+
+Docker's archive API moves files in and out of containers as tar streams.
+These helpers work on those streams without buffering the archive: the
+readers hand back member content as memoryview slices of the chunks they are
+fed, and the writer yields the header, the content and the padding as
+separate pieces for put_archive to send as they come.
+"""
+
+import tarfile
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+BLOCK_SIZE = tarfile.BLOCKSIZE
+WRITE_CHUNK_SIZE = 1024 * 1024
+
+_ZERO_BLOCK = tarfile.NUL * BLOCK_SIZE
+
+# Headers describing the next member (long names, pax records) rather than a file
+_EXTENSION_TYPES = (
+    tarfile.XHDTYPE,
+    tarfile.XGLTYPE,
+    tarfile.GNUTYPE_LONGNAME,
+    tarfile.GNUTYPE_LONGLINK,
+)
+
+
+def _padded(size: int) -> int:
+    """Round a member size up to a whole number of tar blocks."""
+    return -(-size // BLOCK_SIZE) * BLOCK_SIZE
+
+
+def _parse_pax(payload: bytes) -> Dict[str, str]:
+    """Parse pax extended header records ("<len> <key>=<value>\\n")."""
+    records = {}
+    pos = 0
+    while pos < len(payload):
+        space = payload.find(b" ", pos)
+        if space < 0:
+            break
+        length = int(payload[pos:space])
+        if length <= 0:
+            break
+        key, _, value = payload[space + 1 : pos + length - 1].partition(b"=")
+        records[key.decode("utf-8")] = value.decode("utf-8", "surrogateescape")
+        pos += length
+    return records
+
+
+class TarArchiveReader:
+    """
+    Walks a tar stream as it arrives.
+
+    Push raw archive chunks with feed(); every member comes back as a
+    (TarInfo, empty view) pair when its header is read, followed by
+    (TarInfo, slice) pairs for its content. Content slices are memoryviews of
+    the chunks passed in, so nothing is copied or buffered beyond a partial
+    header block and the (small) payloads of extended headers.
+    """
+
+    def __init__(self):
+        """Initialize the reader."""
+        self.finished = False  # End-of-archive marker seen
+        self._header = bytearray()
+        self._member: Optional[tarfile.TarInfo] = None
+        self._remaining = 0  # Content bytes of the current member still to come
+        self._skip = 0  # Padding bytes still to discard
+        self._extension: Optional[tarfile.TarInfo] = None
+        self._extension_payload = bytearray()
+        self._overrides: Dict[str, str] = {}  # Fields set by extended headers for the next member
+
+    def feed(self, chunk: bytes) -> List[Tuple[tarfile.TarInfo, memoryview]]:
+        """
+        Consume a chunk of the archive.
+
+        Args:
+            chunk: Next piece of the raw tar stream
+
+        Returns:
+            (member, content slice) pairs found in this chunk
+
+        Raises:
+            tarfile.TarError: If the archive is malformed
+        """
+        view = memoryview(chunk)
+        pos = 0
+        items: List[Tuple[tarfile.TarInfo, memoryview]] = []
+
+        while pos < len(view) and not self.finished:
+            available = len(view) - pos
+            if self._skip:
+                step = min(self._skip, available)
+                self._skip -= step
+            elif self._extension is not None:
+                step = min(self._extension.size - len(self._extension_payload), available)
+                self._extension_payload += view[pos : pos + step]
+                if len(self._extension_payload) == self._extension.size:
+                    self._finish_extension()
+            elif self._member is not None:
+                step = min(self._remaining, available)
+                items.append((self._member, view[pos : pos + step]))
+                self._remaining -= step
+                if self._remaining == 0:
+                    self._end_member()
+            else:
+                step = min(BLOCK_SIZE - len(self._header), available)
+                self._header += view[pos : pos + step]
+                if len(self._header) == BLOCK_SIZE:
+                    member = self._read_header()
+                    if member is not None:
+                        items.append((member, view[0:0]))
+            pos += step
+
+        return items
+
+    def _read_header(self) -> Optional[tarfile.TarInfo]:
+        """Parse a complete header block, returning the member it starts (if any)."""
+        block = bytes(self._header)
+        self._header.clear()
+
+        if block == _ZERO_BLOCK:
+            self.finished = True
+            return None
+
+        info = tarfile.TarInfo.frombuf(block, "utf-8", "surrogateescape")
+        if info.type in _EXTENSION_TYPES:
+            self._extension = info
+            if info.size == 0:
+                self._finish_extension()
+            return None
+
+        for field, value in self._overrides.items():
+            setattr(info, field, value)
+        self._overrides = {}
+
+        self._member = info
+        # Only regular files carry content (links and directories report size 0)
+        self._remaining = info.size if info.isreg() else 0
+        if self._remaining == 0:
+            self._end_member()
+        return info
+
+    def _finish_extension(self) -> None:
+        """Apply a fully read extended header to the member that follows it."""
+        extension, payload = self._extension, bytes(self._extension_payload)
+        self._extension = None
+        self._extension_payload.clear()
+        self._skip = _padded(extension.size) - extension.size
+
+        if extension.type == tarfile.XHDTYPE:
+            records = _parse_pax(payload)
+            if "path" in records:
+                self._overrides["name"] = records["path"]
+            if "linkpath" in records:
+                self._overrides["linkname"] = records["linkpath"]
+            if "size" in records:
+                self._overrides["size"] = int(records["size"])
+        elif extension.type == tarfile.GNUTYPE_LONGNAME:
+            self._overrides["name"] = payload.rstrip(tarfile.NUL).decode("utf-8", "surrogateescape")
+        elif extension.type == tarfile.GNUTYPE_LONGLINK:
+            self._overrides["linkname"] = payload.rstrip(tarfile.NUL).decode(
+                "utf-8", "surrogateescape"
+            )
+
+    def _end_member(self) -> None:
+        """Move past the current member's content padding."""
+        if self._member.isreg():
+            self._skip = _padded(self._member.size) - self._member.size
+        self._member = None
+
+
+class TarMemberReader:
+    """
+    Extracts the first member of a tar stream, which must be a regular file.
+
+    This is the shape of a get_archive response for a single file. Content
+    comes back as memoryview slices of the chunks passed to feed().
+    """
+
+    def __init__(self):
+        """Initialize the reader."""
+        self.member: Optional[tarfile.TarInfo] = None
+        self.done = False
+        self._archive = TarArchiveReader()
+        self._received = 0
+
+    def feed(self, chunk: bytes) -> List[memoryview]:
+        """
+        Consume a chunk of the archive.
+
+        Args:
+            chunk: Next piece of the raw tar stream
+
+        Returns:
+            Slices of the member's content found in this chunk
+
+        Raises:
+            FileNotFoundError: If the archive ends without a regular file
+            IsADirectoryError: If the archived path is a directory
+            tarfile.TarError: If the archive is malformed
+        """
+        views = []
+        for info, view in self._archive.feed(chunk):
+            if self.member is None:
+                if info.isdir():
+                    raise IsADirectoryError(f"Is a directory: {info.name}")
+                if not info.isreg():
+                    raise FileNotFoundError(f"Not a regular file: {info.name}")
+                self.member = info
+            elif info is not self.member:
+                break
+            if len(view):
+                views.append(view)
+                self._received += len(view)
+
+        if self.member is not None:
+            self.done = self._received == self.member.size
+        elif self._archive.finished:
+            raise FileNotFoundError("Archive contains no regular file")
+        return views
+
+
+def iter_tar_file(
+    name: str,
+    data: bytes | bytearray | memoryview,
+    mode: int = 0o644,
+    chunk_size: int = WRITE_CHUNK_SIZE,
+) -> Iterator[bytes | memoryview]:
+    """
+    Encode a single file as a tar stream, piece by piece.
+
+    Args:
+        name: Member name (the file's basename)
+        data: File content
+        mode: Permission bits
+        chunk_size: Largest content slice yielded at once
+
+    Yields:
+        Header block, content slices (views into data), padding and end-of-archive blocks
+    """
+    content = memoryview(data).cast("B")
+
+    info = tarfile.TarInfo(name=name)
+    info.size = len(content)
+    info.mode = mode
+    info.mtime = int(time.time())
+    yield info.tobuf(format=tarfile.PAX_FORMAT, encoding="utf-8", errors="surrogateescape")
+
+    for offset in range(0, len(content), chunk_size):
+        yield content[offset : offset + chunk_size]
+
+    padding = _padded(len(content)) - len(content)
+    yield tarfile.NUL * (padding + 2 * BLOCK_SIZE)
@@ -0,0 +1,249 @@
+"""Content-addressed blob store for images and other binary tool results."""
+
+import base64
+import hashlib
+import re
+from typing import Any, Dict, Optional, Set, Tuple
+
+from app.core.config import settings
+from app.core.storage.workspace_storage import WorkspaceStorage
+
+# Storage namespace (the "session" blobs are filed under in the backend)
+BLOB_NAMESPACE = "_blobs"
+# Marker URL used in formatted history until blob bytes are resolved
+BLOB_URL_PREFIX = "blob:sha256:"
+
+BLOB_HASH_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+_DATA_URI_PATTERN = re.compile(r"^data:([^;,]+)?(;base64)?,", re.IGNORECASE)
+
+# Leading bytes of the formats tools commonly produce
+_SIGNATURES = (
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+    (b"%PDF-", "application/pdf"),
+)
+
+
+def parse_data_uri(uri: str) -> Optional[Tuple[str, bytes]]:
+    """
+    Decode a base64 data URI.
+
+    Args:
+        uri: Data URI (data:image/png;base64,...)
+
+    Returns:
+        Tuple of (mime_type, bytes), or None if it isn't a base64 data URI
+    """
+    match = _DATA_URI_PATTERN.match(uri)
+    if not match or not match.group(2):
+        return None
+    try:
+        data = base64.b64decode(uri[match.end() :], validate=True)
+    except ValueError:
+        return None
+    return match.group(1) or "application/octet-stream", data
+
+
+def guess_mime_type(data: bytes) -> str:
+    """
+    Guess a blob's MIME type from its leading bytes.
+
+    Args:
+        data: Blob content
+
+    Returns:
+        MIME type, application/octet-stream if unknown
+    """
+    for signature, mime_type in _SIGNATURES:
+        if data.startswith(signature):
+            return mime_type
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    head = data[:256].lstrip().lower()
+    if head.startswith(b"<svg") or (head.startswith(b"<?xml") and b"<svg" in head):
+        return "image/svg+xml"
+    return "application/octet-stream"
+
+
+class BlobStore:
+    """
+    Stores immutable blobs keyed by the SHA-256 of their content.
+
+    Identical content is stored once. Blobs live in a reserved namespace of
+    a WorkspaceStorage backend, so they sit on local disk or in S3 alongside
+    workspaces depending on configuration.
+    """
+
+    def __init__(self, storage: WorkspaceStorage):
+        """
+        Initialize the blob store.
+
+        Args:
+            storage: Backend the blobs are written to
+        """
+        self.storage = storage
+        self._known: Set[str] = set()  # Hashes confirmed present, skips the existence check
+
+    @staticmethod
+    def _path(blob_hash: str) -> str:
+        """Storage path for a blob, fanned out by hash prefix."""
+        return f"/workspace/sha256/{blob_hash[:2]}/{blob_hash}"
+
+    @classmethod
+    def _type_path(cls, blob_hash: str) -> str:
+        """Storage path of the MIME type recorded when a blob was first stored."""
+        return f"{cls._path(blob_hash)}.type"
+
+    async def put(self, data: bytes, mime_type: Optional[str] = None) -> str:
+        """
+        Store a blob, skipping the write if identical content is already stored.
+
+        Args:
+            data: Blob content
+            mime_type: MIME type to serve the blob with, recorded with a new blob
+
+        Returns:
+            Hex SHA-256 of the content
+
+        Raises:
+            IOError: If the backend fails to write the blob
+        """
+        blob_hash = hashlib.sha256(data).hexdigest()
+        if blob_hash in self._known:
+            return blob_hash
+
+        path = self._path(blob_hash)
+        if not await self.storage.file_exists(BLOB_NAMESPACE, path):
+            if mime_type:
+                # Written first, so a stored blob never lacks the type it came with
+                await self.storage.write_file(
+                    BLOB_NAMESPACE, self._type_path(blob_hash), mime_type.encode("utf-8")
+                )
+            if not await self.storage.write_file(BLOB_NAMESPACE, path, data):
+                raise IOError(f"Failed to store blob {blob_hash}")
+
+        self._known.add(blob_hash)
+        return blob_hash
+
+    async def get(self, blob_hash: str) -> bytes:
+        """
+        Read a blob.
+
+        Args:
+            blob_hash: Hex SHA-256 of the content
+
+        Returns:
+            Blob content
+
+        Raises:
+            FileNotFoundError: If no blob has that hash
+        """
+        if not BLOB_HASH_PATTERN.match(blob_hash):
+            raise FileNotFoundError(f"Invalid blob hash: {blob_hash}")
+        return await self.storage.read_file(BLOB_NAMESPACE, self._path(blob_hash))
+
+    async def get_mime_type(self, blob_hash: str) -> Optional[str]:
+        """
+        Get the MIME type recorded when a blob was stored.
+
+        Args:
+            blob_hash: Hex SHA-256 of the content
+
+        Returns:
+            MIME type, or None if none was recorded
+        """
+        if not BLOB_HASH_PATTERN.match(blob_hash):
+            return None
+        try:
+            data = await self.storage.read_file(BLOB_NAMESPACE, self._type_path(blob_hash))
+        except FileNotFoundError:
+            return None
+        return data.decode("utf-8").strip() or None
+
+    async def exists(self, blob_hash: str) -> bool:
+        """Check whether a blob is stored."""
+        if blob_hash in self._known:
+            return True
+        if not BLOB_HASH_PATTERN.match(blob_hash):
+            return False
+        return await self.storage.file_exists(BLOB_NAMESPACE, self._path(blob_hash))
+
+    async def get_data_uri(self, blob_hash: str, mime_type: Optional[str] = None) -> str:
+        """
+        Read a blob as a base64 data URI (for inlining into LLM requests).
+
+        Args:
+            blob_hash: Hex SHA-256 of the content
+            mime_type: MIME type, guessed from the content if not given
+
+        Returns:
+            data:<mime>;base64,... URI
+        """
+        data = await self.get(blob_hash)
+        mime_type = mime_type or guess_mime_type(data)
+        return f"data:{mime_type};base64,{base64.b64encode(data).decode('ascii')}"
+
+    async def externalize_image(self, metadata: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Move an inline image data URI out of tool result metadata into the store.
+
+        Args:
+            metadata: ToolResult metadata, possibly holding image_data
+
+        Returns:
+            Metadata with image_data replaced by an image_blob reference
+            ({"hash", "mime_type", "size"}), or unchanged if there is no inline image
+        """
+        image_data = metadata.get("image_data")
+        if not isinstance(image_data, str):
+            return metadata
+        parsed = parse_data_uri(image_data)
+        if parsed is None:
+            return metadata
+
+        mime_type, data = parsed
+        blob_hash = await self.put(data, mime_type)
+        externalized = {key: value for key, value in metadata.items() if key != "image_data"}
+        externalized["image_blob"] = {"hash": blob_hash, "mime_type": mime_type, "size": len(data)}
+        return externalized
+
+
+def create_blob_store() -> BlobStore:
+    """
+    Create a blob store on the configured backend.
+
+    S3 mode keeps blobs in the workspace bucket; every other mode uses local
+    disk (Docker volumes are per-session and a poor fit for shared blobs).
+
+    Returns:
+        BlobStore instance
+    """
+    if settings.storage_mode == "s3":
+        from app.core.storage.storage_factory import get_storage
+
+        return BlobStore(get_storage())
+
+    from app.core.storage.local_storage import LocalStorage
+
+    return BlobStore(LocalStorage(workspace_base=settings.blob_storage_path))
+
+
+# Global blob store instance (lazy initialized)
+_blob_store: Optional[BlobStore] = None
+
+
+def get_blob_store() -> BlobStore:
+    """
+    Get the global blob store instance.
+
+    Returns:
+        BlobStore instance
+    """
+    global _blob_store
+
+    if _blob_store is None:
+        _blob_store = create_blob_store()
+
+    return _blob_store
@@ -1,34 +1,224 @@
 """Database setup and session management."""
 
 import os
-from typing import AsyncGenerator
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
-from sqlalchemy.orm import declarative_base
+from typing import Any, AsyncGenerator, Dict, List, Optional, Tuple
+from sqlalchemy import JSON, Delete, Insert, Update, event, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    create_async_engine,
+    async_sessionmaker,
+)
+from sqlalchemy.orm import Session, declarative_base
 
 from app.core.config import settings
 
 # Create data directory if it doesn't exist
 os.makedirs("./data", exist_ok=True)
 
-# Create async engine
-engine = create_async_engine(
-    settings.database_url,
-    echo=False,
-    future=True,
-)
+
+def is_sqlite_url(url: str) -> bool:
+    """Check whether a database URL points at SQLite."""
+    return url.startswith("sqlite")
+
+
+def is_memory_sqlite_url(url: str) -> bool:
+    """Check whether a SQLite URL is an in-memory database (not shareable between engines)."""
+    return is_sqlite_url(url) and (":memory:" in url or url.rstrip("/").endswith(":"))
+
+
+def is_postgres_url(url: str) -> bool:
+    """Check whether a database URL points at PostgreSQL."""
+    return url.startswith("postgresql")
+
+
+def postgres_engine_options() -> Dict[str, Any]:
+    """
+    Engine options for PostgreSQL, taken from the postgres_* settings.
+
+    asyncpg keeps prepared statements per connection; both its own cache and
+    SQLAlchemy's adapter cache follow postgres_statement_cache_size, so setting
+    it to 0 makes the pool safe behind PgBouncer in transaction mode.
+
+    Returns:
+        Keyword arguments for create_async_engine()
+    """
+    cache_size = settings.postgres_statement_cache_size
+    return {
+        "pool_size": settings.postgres_pool_size,
+        "max_overflow": settings.postgres_max_overflow,
+        "pool_timeout": settings.postgres_pool_timeout,
+        "pool_recycle": settings.postgres_pool_recycle,
+        "pool_pre_ping": settings.postgres_pool_pre_ping,
+        "connect_args": {
+            "prepared_statement_cache_size": cache_size,
+            "statement_cache_size": cache_size,
+        },
+    }
+
+
+def sqlite_pragmas(read_only: bool = False) -> List[str]:
+    """
+    PRAGMA statements run on every connection of the SQLite production profile.
+
+    WAL lets readers proceed while a writer commits, and synchronous=NORMAL is
+    durable across application crashes under WAL (only an OS crash can lose
+    the last commits). mmap and a larger page cache keep hot pages out of
+    read() calls, and busy_timeout makes lock waits block instead of failing.
+
+    Args:
+        read_only: Build the pragmas for a read-pool connection
+
+    Returns:
+        List of PRAGMA statements
+    """
+    pragmas = [
+        f"PRAGMA busy_timeout={settings.sqlite_busy_timeout_ms}",
+        f"PRAGMA mmap_size={settings.sqlite_mmap_size}",
+        # Negative cache_size is in KiB rather than pages
+        f"PRAGMA cache_size=-{settings.sqlite_cache_size_kib}",
+        "PRAGMA synchronous=NORMAL",
+    ]
+    if read_only:
+        pragmas.append("PRAGMA query_only=ON")
+    else:
+        # journal_mode is stored in the database file, so the writer sets it for everyone
+        pragmas.insert(0, "PRAGMA journal_mode=WAL")
+    return pragmas
+
+
+def _install_sqlite_pragmas(async_engine: AsyncEngine, read_only: bool) -> None:
+    """Run the profile's pragmas whenever the engine opens a connection."""
+    pragmas = sqlite_pragmas(read_only)
+
+    @event.listens_for(async_engine.sync_engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+
+def create_engines(url: str, profile: str = "default") -> Tuple[AsyncEngine, Optional[AsyncEngine]]:
+    """
+    Create the engines for a database URL and profile.
+
+    PostgreSQL URLs get one pooled engine sized by the postgres_* settings,
+    whatever the profile. For SQLite the "default" profile is a single engine
+    with driver defaults. The
+    "production" profile (SQLite files only) tunes every connection with
+    sqlite_pragmas() and splits traffic: writes go through one writer
+    connection, so sessions queue for it in-process instead of contending for
+    SQLite's file lock, while reads use a separate pool of query-only
+    connections that WAL lets run alongside the writer.
+
+    Args:
+        url: SQLAlchemy database URL
+        profile: "default" or "production"
+
+    Returns:
+        Tuple of (write engine, read engine or None when reads share the write engine)
+    """
+    if is_postgres_url(url):
+        return create_async_engine(url, echo=False, future=True, **postgres_engine_options()), None
+
+    if profile != "production" or not is_sqlite_url(url):
+        return create_async_engine(url, echo=False, future=True), None
+
+    if is_memory_sqlite_url(url):
+        print("[DATABASE] Production profile needs a database file, using defaults for :memory:")
+        return create_async_engine(url, echo=False, future=True), None
+
+    write_engine = create_async_engine(
+        url,
+        echo=False,
+        future=True,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=settings.database_write_timeout,
+    )
+    read_engine = create_async_engine(
+        url,
+        echo=False,
+        future=True,
+        pool_size=settings.database_read_pool_size,
+        max_overflow=0,
+    )
+    _install_sqlite_pragmas(write_engine, read_only=False)
+    _install_sqlite_pragmas(read_engine, read_only=True)
+    return write_engine, read_engine
+
+
+class RoutingSession(Session):
+    """
+    Session that sends writes to the writer engine and plain reads to the read pool.
+
+    Once a session writes (flush, DML or an explicit connection() call) it stays
+    on the writer until the transaction ends, so it always reads its own writes.
+    """
+
+    write_engine: AsyncEngine
+    read_engine: AsyncEngine
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if (
+            self.info.get("use_writer")
+            or self._flushing
+            or clause is None
+            or isinstance(clause, (Insert, Update, Delete))
+        ):
+            self.info["use_writer"] = True
+            return self.write_engine.sync_engine
+        return self.read_engine.sync_engine
+
+
+@event.listens_for(RoutingSession, "after_transaction_end")
+def _release_writer(session, transaction):
+    """Let the next transaction start reading from the pool again."""
+    if transaction.parent is None:
+        session.info.pop("use_writer", None)
+
+
+def create_session_factory(
+    write_engine: AsyncEngine, read_engine: Optional[AsyncEngine] = None
+) -> async_sessionmaker:
+    """
+    Create the session factory for a pair of engines.
+
+    Args:
+        write_engine: Engine used for writes (and reads when read_engine is None)
+        read_engine: Optional separate engine for reads
+
+    Returns:
+        async_sessionmaker producing AsyncSession instances
+    """
+    options = dict(class_=AsyncSession, expire_on_commit=False, autocommit=False, autoflush=False)
+    if read_engine is None:
+        return async_sessionmaker(write_engine, **options)
+
+    routing_class = type(
+        "BoundRoutingSession",
+        (RoutingSession,),
+        {"write_engine": write_engine, "read_engine": read_engine},
+    )
+    return async_sessionmaker(sync_session_class=routing_class, **options)
+
+
+# Create async engines (read_engine is None unless the production profile is enabled)
+engine, read_engine = create_engines(settings.database_url, settings.database_profile)
 
 # Create async session maker
-AsyncSessionLocal = async_sessionmaker(
-    engine,
-    class_=AsyncSession,
-    expire_on_commit=False,
-    autocommit=False,
-    autoflush=False,
-)
+AsyncSessionLocal = create_session_factory(engine, read_engine)
 
 # Base class for models
 Base = declarative_base()
 
+# JSON column type for models: JSONB on PostgreSQL (binary, indexable), JSON elsewhere
+JSONType = JSON().with_variant(JSONB(), "postgresql")
+
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     """Dependency for getting database session."""
@@ -43,12 +233,37 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
             await session.close()
 
 
+# Indexes older databases still carry that newer composite indexes replace
+SUPERSEDED_INDEXES = [
+    "ix_content_blocks_chat_session_id",
+    "ix_content_blocks_sequence_number",
+]
+
+
+def _drop_superseded_indexes(connection) -> None:
+    """Drop indexes that are no longer in the models, so writes stop maintaining them."""
+    for name in SUPERSEDED_INDEXES:
+        connection.execute(text(f"DROP INDEX IF EXISTS {name}"))
+
+
+def _create_missing_indexes(connection) -> None:
+    """Create indexes added to models after their table was first created."""
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
+
+
 async def init_db():
     """Initialize database tables."""
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        # create_all skips tables that already exist, including their new indexes
+        await conn.run_sync(_create_missing_indexes)
+        await conn.run_sync(_drop_superseded_indexes)
 
 
 async def close_db():
     """Close database connections."""
     await engine.dispose()
+    if read_engine is not None:
+        await read_engine.dispose()
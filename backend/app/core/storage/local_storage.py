@@ -164,3 +164,28 @@ class LocalStorage(WorkspaceStorage):
         """
         workspace_path = self._get_workspace_path(session_id)
         return {str(workspace_path.absolute()): {"bind": "/workspace", "mode": "rw"}}
+
+    async def adopt_workspace(self, source_session_id: str, session_id: str) -> bool:
+        """
+        Hand a pre-created workspace over to a session.
+
+        The directory is renamed in place; bind mounts follow the inode, so
+        containers already using it keep working.
+
+        Args:
+            source_session_id: ID the workspace was created under
+            session_id: Session taking over the workspace
+
+        Returns:
+            False if the session already has a workspace of its own
+        """
+        source = self._get_workspace_path(source_session_id)
+        target = self._get_workspace_path(session_id)
+
+        def _adopt():
+            if target.exists():
+                return False
+            source.rename(target)
+            return True
+
+        return await asyncio.to_thread(_adopt)
@@ -13,6 +13,7 @@ import docker
 from docker.errors import NotFound as DockerNotFound
 
 from app.core.storage.workspace_storage import FileInfo
+from app.core.storage.sidecar_pool import StorageSidecarPool, get_storage_sidecar_pool
 
 
 class ProjectVolumeStorage:
@@ -22,15 +23,26 @@ class ProjectVolumeStorage:
     Session containers mount this volume read-only at /workspace/project_files/.
 
     Volume naming: openclaudeui-project-{project_id}
+
+    Uploads and listings go through a long-lived sidecar container that mounts
+    the volume at /data (see StorageSidecarPool).
     """
 
-    def __init__(self, docker_client: Optional[docker.DockerClient] = None):
+    MOUNT_PATH = "/data"
+
+    def __init__(
+        self,
+        docker_client: Optional[docker.DockerClient] = None,
+        sidecars: Optional[StorageSidecarPool] = None,
+    ):
         """Initialize project volume storage.
 
         Args:
             docker_client: Docker client instance (creates one if not provided)
+            sidecars: Sidecar pool (defaults to the global pool)
         """
         self.docker_client = docker_client or docker.from_env()
+        self.sidecars = sidecars or get_storage_sidecar_pool(self.docker_client)
 
     def _get_volume_name(self, project_id: str) -> str:
         """Get Docker volume name for a project."""
@@ -70,35 +82,18 @@ class ProjectVolumeStorage:
         volume_name = self._get_volume_name(project_id)
 
         def _write():
-            # Ensure volume exists
-            try:
-                self.docker_client.volumes.get(volume_name)
-            except DockerNotFound:
-                self.docker_client.volumes.create(name=volume_name)
-
             # Create tar archive with the file
             tar_stream = io.BytesIO()
             with tarfile.open(fileobj=tar_stream, mode="w") as tar:
                 tarinfo = tarfile.TarInfo(name=filename)
                 tarinfo.size = len(content)
                 tar.addfile(tarinfo, io.BytesIO(content))
-            tar_stream.seek(0)
-
-            # Use temporary container to write file
-            container = self.docker_client.containers.run(
-                "alpine:latest",
-                command="sh -c 'sleep 2'",
-                volumes={volume_name: {"bind": "/data", "mode": "rw"}},
-                detach=True,
-                remove=False,
-            )
 
-            try:
-                container.wait(timeout=5)
-                container.put_archive(path="/data", data=tar_stream.getvalue())
-                return True
-            finally:
-                container.remove(force=True)
+            # Starting the sidecar creates the volume if it doesn't exist yet
+            self.sidecars.put_archive(
+                volume_name, self.MOUNT_PATH, self.MOUNT_PATH, tar_stream.getvalue()
+            )
+            return True
 
         try:
             return await asyncio.to_thread(_write)
@@ -122,35 +117,22 @@ class ProjectVolumeStorage:
         volume_name = self._get_volume_name(project_id)
 
         def _read():
-            container = self.docker_client.containers.run(
-                "alpine:latest",
-                command="sh -c 'sleep 5'",
-                volumes={volume_name: {"bind": "/data", "mode": "ro"}},
-                detach=True,
-                remove=False,
+            tar_stream = io.BytesIO(
+                self.sidecars.get_archive(
+                    volume_name, self.MOUNT_PATH, f"{self.MOUNT_PATH}/{filename}"
+                )
             )
 
-            try:
-                bits, stat = container.get_archive(f"/data/{filename}")
-
-                # Extract from tar
-                tar_stream = io.BytesIO()
-                for chunk in bits:
-                    tar_stream.write(chunk)
-                tar_stream.seek(0)
+            with tarfile.open(fileobj=tar_stream, mode="r") as tar:
+                member = tar.next()
+                if member is None:
+                    raise FileNotFoundError(f"File not found: {filename}")
 
-                with tarfile.open(fileobj=tar_stream, mode="r") as tar:
-                    member = tar.next()
-                    if member is None:
-                        raise FileNotFoundError(f"File not found: {filename}")
+                file_obj = tar.extractfile(member)
+                if file_obj is None:
+                    raise FileNotFoundError(f"File not found: {filename}")
 
-                    file_obj = tar.extractfile(member)
-                    if file_obj is None:
-                        raise FileNotFoundError(f"File not found: {filename}")
-
-                    return file_obj.read()
-            finally:
-                container.remove(force=True)
+                return file_obj.read()
 
         try:
             return await asyncio.to_thread(_read)
@@ -177,15 +159,32 @@ class ProjectVolumeStorage:
                 return []
 
             try:
-                result = self.docker_client.containers.run(
-                    "alpine:latest",
-                    command="sh -c 'find /data -maxdepth 1 -type f -exec stat -c \"%n %s\" {} \\;'",
-                    volumes={volume_name: {"bind": "/data", "mode": "ro"}},
-                    remove=True,
+                exit_code, stdout, stderr = self.sidecars.exec(
+                    volume_name,
+                    self.MOUNT_PATH,
+                    [
+                        "find",
+                        self.MOUNT_PATH,
+                        "-maxdepth",
+                        "1",
+                        "-type",
+                        "f",
+                        "-exec",
+                        "stat",
+                        "-c",
+                        "%n %s",
+                        "{}",
+                        "+",
+                    ],
                 )
+                if exit_code != 0 and not stdout:
+                    print(
+                        f"Error listing project files: {stderr.decode('utf-8', errors='replace')}"
+                    )
+                    return []
 
                 files = []
-                output = result.decode("utf-8").strip()
+                output = stdout.decode("utf-8").strip()
 
                 if output:
                     for line in output.split("\n"):
@@ -223,13 +222,10 @@ class ProjectVolumeStorage:
 
         def _delete():
             try:
-                self.docker_client.containers.run(
-                    "alpine:latest",
-                    command=f"sh -c 'rm -f /data/{filename}'",
-                    volumes={volume_name: {"bind": "/data", "mode": "rw"}},
-                    remove=True,
+                exit_code, _, _ = self.sidecars.exec(
+                    volume_name, self.MOUNT_PATH, ["rm", "-f", f"{self.MOUNT_PATH}/{filename}"]
                 )
-                return True
+                return exit_code == 0
             except Exception as e:
                 print(f"Error deleting file from project volume: {e}")
                 return False
@@ -250,6 +246,8 @@ class ProjectVolumeStorage:
         volume_name = self._get_volume_name(project_id)
 
         def _delete_volume():
+            # The sidecar holds the volume open, so it has to go first
+            self.sidecars.release(volume_name)
             try:
                 volume = self.docker_client.volumes.get(volume_name)
                 volume.remove(force=True)
@@ -0,0 +1,56 @@
+"""Shared Redis connection for state that must be visible to every worker."""
+
+import uuid
+
+try:
+    import redis.asyncio as redis_asyncio
+
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+from app.core.config import settings
+
+# Identifies this process in shared task records, so workers know which tasks they own
+WORKER_ID = uuid.uuid4().hex[:12]
+
+
+def shared_state_enabled() -> bool:
+    """Check whether stream and task state are shared through Redis."""
+    return bool(settings.stream_store_url)
+
+
+# Global client instance (lazy initialized)
+_redis_client = None
+
+
+def get_redis_client():
+    """
+    Get the shared Redis client for settings.stream_store_url.
+
+    Returns:
+        redis.asyncio.Redis instance (connects on first use)
+
+    Raises:
+        ImportError: If the redis package is not installed
+    """
+    global _redis_client
+
+    if not REDIS_AVAILABLE:
+        raise ImportError(
+            "redis is required when STREAM_STORE_URL is set. Install with: pip install redis"
+        )
+
+    if _redis_client is None:
+        _redis_client = redis_asyncio.from_url(settings.stream_store_url, decode_responses=True)
+
+    return _redis_client
+
+
+async def shutdown_redis_client() -> None:
+    """Close the shared Redis client."""
+    global _redis_client
+
+    if _redis_client is not None:
+        await _redis_client.aclose()
+        _redis_client = None
@@ -0,0 +1,353 @@
+"""Long-lived helper ("sidecar") containers for accessing Docker volumes.
+
+Volume-backed storage has to go through a container to touch files. Starting a
+fresh container per operation costs hundreds of milliseconds, so this pool keeps
+one idle container per volume and reuses it for tar put/get and exec calls.
+Sidecars that have not been used for `idle_ttl` seconds are removed by a
+background reaper thread.
+"""
+
+import time
+import threading
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple, TypeVar
+import docker
+from docker.errors import APIError, NotFound as DockerNotFound
+from docker.models.containers import Container as DockerContainer
+
+from app.core.config import settings
+
+T = TypeVar("T")
+
+SIDECAR_LABEL = "openclaudeui.role"
+SIDECAR_LABEL_VALUE = "storage-sidecar"
+
+
+@dataclass
+class _Sidecar:
+    """A running helper container bound to one volume."""
+
+    container: DockerContainer
+    mount_path: str
+    last_used: float = field(default_factory=time.monotonic)
+
+
+class StorageSidecarPool:
+    """Pool of long-lived helper containers, one per Docker volume.
+
+    All methods are blocking and meant to be called from worker threads
+    (the storage backends wrap them in asyncio.to_thread).
+    """
+
+    def __init__(
+        self,
+        docker_client: Optional[docker.DockerClient] = None,
+        idle_ttl: float | None = None,
+        image: str | None = None,
+        reap_interval: float | None = None,
+    ):
+        """
+        Initialize the sidecar pool.
+
+        Args:
+            docker_client: Docker client instance (will create if not provided)
+            idle_ttl: Seconds a sidecar may sit unused before it is removed
+            image: Image used for sidecar containers
+            reap_interval: Seconds between reaper passes (defaults to idle_ttl / 2)
+        """
+        self.docker_client = docker_client or docker.from_env()
+        self.idle_ttl = idle_ttl if idle_ttl is not None else settings.storage_sidecar_idle_ttl
+        self.image = image or settings.storage_sidecar_image
+        self.reap_interval = reap_interval or max(self.idle_ttl / 2, 1)
+
+        self._sidecars: Dict[str, _Sidecar] = {}
+        # Volumes whose sidecar is being started, set once it is published (or failed)
+        self._starting: Dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+        self._reaper: threading.Thread | None = None
+        self._stop_event = threading.Event()
+
+    def _sidecar_name(self, volume_name: str) -> str:
+        """Get the container name for a volume's sidecar."""
+        return f"openclaudeui-sidecar-{volume_name.removeprefix('openclaudeui-')}"
+
+    def _start_sidecar(self, volume_name: str, mount_path: str) -> DockerContainer:
+        """Start a sidecar for a volume, replacing any stale one left by a previous run."""
+        name = self._sidecar_name(volume_name)
+        try:
+            self.docker_client.containers.get(name).remove(force=True)
+        except DockerNotFound:
+            pass
+
+        return self.docker_client.containers.run(
+            self.image,
+            command=["tail", "-f", "/dev/null"],
+            volumes={volume_name: {"bind": mount_path, "mode": "rw"}},
+            labels={SIDECAR_LABEL: SIDECAR_LABEL_VALUE},
+            name=name,
+            detach=True,
+            network_mode="none",
+        )
+
+    def acquire(self, volume_name: str, mount_path: str) -> DockerContainer:
+        """
+        Get the running sidecar for a volume, starting one if needed.
+
+        Starting a sidecar (possibly pulling its image) happens outside the
+        pool lock, so other volumes are not held up; concurrent callers for
+        the same volume wait for the one start instead of racing it.
+
+        Args:
+            volume_name: Docker volume name
+            mount_path: Where the volume is mounted inside the sidecar
+
+        Returns:
+            Sidecar container
+        """
+        while True:
+            stale = None
+            with self._lock:
+                sidecar = self._sidecars.get(volume_name)
+                if sidecar and sidecar.mount_path != mount_path:
+                    stale = self._sidecars.pop(volume_name)
+                    sidecar = None
+
+                if sidecar:
+                    sidecar.last_used = time.monotonic()
+                    return sidecar.container
+
+                starting = self._starting.get(volume_name)
+                if starting is None:
+                    # Reserve the start for this caller
+                    starting = self._starting[volume_name] = threading.Event()
+                    break
+
+            if stale:
+                self._remove(stale)
+            starting.wait()
+
+        if stale:
+            self._remove(stale)
+        try:
+            container = self._start_sidecar(volume_name, mount_path)
+        except BaseException:
+            with self._lock:
+                self._starting.pop(volume_name).set()
+            raise
+
+        with self._lock:
+            self._sidecars[volume_name] = _Sidecar(container=container, mount_path=mount_path)
+            self._ensure_reaper()
+            self._starting.pop(volume_name).set()
+        return container
+
+    def run(
+        self, volume_name: str, mount_path: str, operation: Callable[[DockerContainer], T]
+    ) -> T:
+        """
+        Run an operation against a volume's sidecar.
+
+        If the sidecar has died or was removed behind our back, it is replaced
+        and the operation retried once.
+
+        Args:
+            volume_name: Docker volume name
+            mount_path: Where the volume is mounted inside the sidecar
+            operation: Callable receiving the sidecar container
+
+        Returns:
+            Result of the operation
+        """
+        container = self.acquire(volume_name, mount_path)
+        try:
+            return operation(container)
+        except APIError as e:
+            if not self._is_dead_container_error(e):
+                raise
+            self.release(volume_name)
+            return operation(self.acquire(volume_name, mount_path))
+
+    def exec(self, volume_name: str, mount_path: str, cmd: List[str]) -> Tuple[int, bytes, bytes]:
+        """
+        Execute a command in a volume's sidecar.
+
+        Args:
+            volume_name: Docker volume name
+            mount_path: Where the volume is mounted inside the sidecar
+            cmd: Command argv
+
+        Returns:
+            Tuple of (exit_code, stdout, stderr)
+        """
+        result = self.run(
+            volume_name, mount_path, lambda container: container.exec_run(cmd, demux=True)
+        )
+        stdout, stderr = result.output or (None, None)
+        return result.exit_code, stdout or b"", stderr or b""
+
+    def put_archive(self, volume_name: str, mount_path: str, path: str, data: bytes) -> None:
+        """
+        Extract a tar archive into a directory in a volume's sidecar.
+
+        The target directory is created on demand, so the common case of
+        writing into an existing directory is a single API call.
+
+        Args:
+            volume_name: Docker volume name
+            mount_path: Where the volume is mounted inside the sidecar
+            path: Directory inside the sidecar to extract into
+            data: Tar archive bytes
+        """
+
+        def _put(container: DockerContainer) -> None:
+            try:
+                container.put_archive(path=path, data=data)
+            except DockerNotFound as e:
+                if self._is_dead_container_error(e):
+                    raise
+                container.exec_run(["mkdir", "-p", path])
+                container.put_archive(path=path, data=data)
+
+        self.run(volume_name, mount_path, _put)
+
+    def get_archive(self, volume_name: str, mount_path: str, path: str) -> bytes:
+        """
+        Fetch a path from a volume's sidecar as a tar archive.
+
+        Args:
+            volume_name: Docker volume name
+            mount_path: Where the volume is mounted inside the sidecar
+            path: Path inside the sidecar
+
+        Returns:
+            Tar archive bytes
+        """
+        bits, _ = self.run(volume_name, mount_path, lambda container: container.get_archive(path))
+        return b"".join(bits)
+
+    def release(self, volume_name: str) -> None:
+        """
+        Remove a volume's sidecar (e.g. before the volume itself is deleted).
+
+        Args:
+            volume_name: Docker volume name
+        """
+        with self._lock:
+            sidecar = self._sidecars.pop(volume_name, None)
+        if sidecar:
+            self._remove(sidecar)
+        else:
+            # Not tracked by this process, but a stale one may still hold the volume
+            try:
+                self.docker_client.containers.get(self._sidecar_name(volume_name)).remove(
+                    force=True
+                )
+            except DockerNotFound:
+                pass
+            except Exception as e:
+                print(f"Error removing storage sidecar for {volume_name}: {e}")
+
+    def reap_idle(self) -> int:
+        """
+        Remove sidecars that have been idle longer than the TTL.
+
+        Returns:
+            Number of sidecars removed
+        """
+        now = time.monotonic()
+        with self._lock:
+            idle = [
+                volume_name
+                for volume_name, sidecar in self._sidecars.items()
+                if now - sidecar.last_used > self.idle_ttl
+            ]
+            reaped = [self._sidecars.pop(volume_name) for volume_name in idle]
+
+        for sidecar in reaped:
+            self._remove(sidecar)
+        return len(reaped)
+
+    def shutdown(self) -> None:
+        """Stop the reaper and remove all sidecars."""
+        self._stop_event.set()
+        with self._lock:
+            sidecars = list(self._sidecars.values())
+            self._sidecars.clear()
+        for sidecar in sidecars:
+            self._remove(sidecar)
+
+    @property
+    def active_count(self) -> int:
+        """Number of live sidecars."""
+        return len(self._sidecars)
+
+    def _ensure_reaper(self) -> None:
+        """Start the background reaper thread if it is not running (lock held)."""
+        if self._reaper and self._reaper.is_alive():
+            return
+        self._stop_event.clear()
+        self._reaper = threading.Thread(
+            target=self._reaper_worker, name="storage-sidecar-reaper", daemon=True
+        )
+        self._reaper.start()
+
+    def _reaper_worker(self) -> None:
+        """Background loop removing idle sidecars until the pool is empty or shut down."""
+        while not self._stop_event.wait(self.reap_interval):
+            try:
+                self.reap_idle()
+            except Exception as e:
+                print(f"Storage sidecar reaper error: {e}")
+            with self._lock:
+                if not self._sidecars:
+                    self._reaper = None
+                    return
+
+    @staticmethod
+    def _remove(sidecar: _Sidecar) -> None:
+        """Remove a sidecar container, ignoring ones that are already gone."""
+        try:
+            sidecar.container.remove(force=True)
+        except DockerNotFound:
+            pass
+        except Exception as e:
+            print(f"Error removing storage sidecar: {e}")
+
+    @staticmethod
+    def _is_dead_container_error(error: APIError) -> bool:
+        """Check whether an API error means the sidecar itself is gone or stopped."""
+        if isinstance(error, DockerNotFound) and "No such container" in str(error):
+            return True
+        return "is not running" in str(error)
+
+
+# Global instance
+_sidecar_pool: Optional[StorageSidecarPool] = None
+
+
+def get_storage_sidecar_pool(
+    docker_client: Optional[docker.DockerClient] = None,
+) -> StorageSidecarPool:
+    """Get global storage sidecar pool instance.
+
+    Args:
+        docker_client: Docker client (optional, creates one if needed)
+
+    Returns:
+        StorageSidecarPool instance
+    """
+    global _sidecar_pool
+
+    if _sidecar_pool is None:
+        _sidecar_pool = StorageSidecarPool(docker_client)
+
+    return _sidecar_pool
+
+
+def shutdown_storage_sidecar_pool() -> None:
+    """Remove all sidecars if the pool was ever used."""
+    global _sidecar_pool
+
+    if _sidecar_pool is not None:
+        _sidecar_pool.shutdown()
+        _sidecar_pool = None
@@ -4,37 +4,75 @@ import io
 import tarfile
 import asyncio
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, Optional
 import docker
 
 from app.core.storage.workspace_storage import WorkspaceStorage, FileInfo
+from app.core.storage.sidecar_pool import StorageSidecarPool, get_storage_sidecar_pool
+
+# Label on a session's volume pointing at the volume that actually holds its files
+ALIAS_LABEL = "openclaudeui.workspace-alias-of"
 
 
 class VolumeStorage(WorkspaceStorage):
-    """Storage backend using Docker named volumes for better isolation."""
+    """Storage backend using Docker named volumes for better isolation.
+
+    File operations go through a long-lived sidecar container per volume
+    (see StorageSidecarPool) instead of starting a container per call.
+    """
 
-    def __init__(self, docker_client: Optional[docker.DockerClient] = None):
+    MOUNT_PATH = "/workspace"
+
+    def __init__(
+        self,
+        docker_client: Optional[docker.DockerClient] = None,
+        sidecars: Optional[StorageSidecarPool] = None,
+    ):
         """
         Initialize volume storage.
 
         Args:
             docker_client: Docker client instance (will create if not provided)
+            sidecars: Sidecar pool (defaults to the global pool)
         """
         self.docker_client = docker_client or docker.from_env()
+        self.sidecars = sidecars or get_storage_sidecar_pool(self.docker_client)
         # Keep track of volumes we create
         self._volumes = {}
+        # Session ID -> volume actually holding its workspace (see adopt_workspace)
+        self._aliases: Dict[str, str] = {}
 
     def _get_volume_name(self, session_id: str) -> str:
         """Get volume name for a session."""
         return f"openclaudeui-workspace-{session_id}"
 
+    def _resolve_volume_name(self, session_id: str) -> str:
+        """
+        Get the volume holding a session's files, following adoption aliases.
+
+        Blocking on first lookup per session; call from a worker thread.
+        """
+        alias = self._aliases.get(session_id)
+        if alias:
+            return alias
+
+        volume_name = self._get_volume_name(session_id)
+        try:
+            volume = self.docker_client.volumes.get(volume_name)
+        except docker.errors.NotFound:
+            return volume_name
+
+        labels = volume.attrs.get("Labels") or {}
+        self._aliases[session_id] = labels.get(ALIAS_LABEL) or volume_name
+        return self._aliases[session_id]
+
     async def write_file(self, session_id: str, container_path: str, content: bytes) -> bool:
         """Write content to a file in the Docker volume."""
         try:
-            volume_name = self._get_volume_name(session_id)
 
-            # Create a temporary container to write to the volume
             def _write():
+                volume_name = self._resolve_volume_name(session_id)
+
                 # Create tar archive with the file
                 tar_stream = io.BytesIO()
                 tar = tarfile.open(fileobj=tar_stream, mode="w")
@@ -49,29 +87,14 @@ class VolumeStorage(WorkspaceStorage):
                 tar.addfile(tarinfo, io.BytesIO(content))
                 tar.close()
 
-                tar_stream.seek(0)
-
                 # Get directory path
                 dir_path = "/".join(path.split("/")[:-1]) if "/" in path else ""
 
-                # Run temporary container to write file
-                container = self.docker_client.containers.run(
-                    "alpine:latest",
-                    command=f"sh -c 'mkdir -p /{dir_path} && sleep 1'",
-                    volumes={volume_name: {"bind": "/workspace", "mode": "rw"}},
-                    detach=True,
-                    remove=False,
-                )
-
-                # Wait for container to start
-                container.wait(timeout=5)
-
-                # Write file using put_archive
+                # Write file through the volume's sidecar
                 target_path = f"/{dir_path}" if dir_path else "/"
-                container.put_archive(path=target_path, data=tar_stream.getvalue())
-
-                # Clean up
-                container.remove(force=True)
+                self.sidecars.put_archive(
+                    volume_name, self.MOUNT_PATH, target_path, tar_stream.getvalue()
+                )
 
                 return True
 
@@ -82,31 +105,17 @@ class VolumeStorage(WorkspaceStorage):
 
     async def read_file(self, session_id: str, container_path: str) -> bytes:
         """Read a file from the Docker volume."""
-        volume_name = self._get_volume_name(session_id)
 
         def _read():
-            # Run temporary container to read file
+            volume_name = self._resolve_volume_name(session_id)
             path = container_path.lstrip("/")
 
-            container = self.docker_client.containers.run(
-                "alpine:latest",
-                command="sh -c 'sleep 5'",
-                volumes={volume_name: {"bind": "/workspace", "mode": "ro"}},
-                detach=True,
-                remove=False,
+            # Get file using get_archive on the volume's sidecar
+            tar_stream = io.BytesIO(
+                self.sidecars.get_archive(volume_name, self.MOUNT_PATH, f"/{path}")
             )
 
-            try:
-                # Get file using get_archive
-                bits, stat = container.get_archive(f"/{path}")
-
-                # Extract from tar
-                tar_stream = io.BytesIO()
-                for chunk in bits:
-                    tar_stream.write(chunk)
-                tar_stream.seek(0)
-
-                tar = tarfile.open(fileobj=tar_stream, mode="r")
+            with tarfile.open(fileobj=tar_stream, mode="r") as tar:
                 member = tar.next()
 
                 if member is None:
@@ -116,12 +125,7 @@ class VolumeStorage(WorkspaceStorage):
                 if file_content is None:
                     raise FileNotFoundError(f"File not found: {container_path}")
 
-                content = file_content.read()
-                tar.close()
-
-                return content
-            finally:
-                container.remove(force=True)
+                return file_content.read()
 
         try:
             return await asyncio.to_thread(_read)
@@ -134,21 +138,22 @@ class VolumeStorage(WorkspaceStorage):
         self, session_id: str, container_path: str = "/workspace"
     ) -> List[FileInfo]:
         """List files in a directory in the Docker volume."""
-        volume_name = self._get_volume_name(session_id)
 
         def _list():
+            volume_name = self._resolve_volume_name(session_id)
             path = container_path.lstrip("/")
 
-            # Run temporary container to list files
-            result = self.docker_client.containers.run(
-                "alpine:latest",
-                command=f"sh -c 'find /{path} -type f -exec stat -c \"%n %s\" {{}} \\;'",
-                volumes={volume_name: {"bind": "/workspace", "mode": "ro"}},
-                remove=True,
+            exit_code, stdout, stderr = self.sidecars.exec(
+                volume_name,
+                self.MOUNT_PATH,
+                ["find", f"/{path}", "-type", "f", "-exec", "stat", "-c", "%n %s", "{}", "+"],
             )
+            if exit_code != 0 and not stdout:
+                print(f"Error listing files: {stderr.decode('utf-8', errors='replace')}")
+                return []
 
             files = []
-            output = result.decode("utf-8").strip()
+            output = stdout.decode("utf-8").strip()
 
             if output:
                 for line in output.split("\n"):
@@ -168,19 +173,14 @@ class VolumeStorage(WorkspaceStorage):
     async def delete_file(self, session_id: str, container_path: str) -> bool:
         """Delete a file from the Docker volume."""
         try:
-            volume_name = self._get_volume_name(session_id)
 
             def _delete():
+                volume_name = self._resolve_volume_name(session_id)
                 path = container_path.lstrip("/")
-
-                # Run temporary container to delete file
-                self.docker_client.containers.run(
-                    "alpine:latest",
-                    command=f"sh -c 'rm -rf /{path}'",
-                    volumes={volume_name: {"bind": "/workspace", "mode": "rw"}},
-                    remove=True,
+                exit_code, _, _ = self.sidecars.exec(
+                    volume_name, self.MOUNT_PATH, ["rm", "-rf", f"/{path}"]
                 )
-                return True
+                return exit_code == 0
 
             return await asyncio.to_thread(_delete)
         except Exception as e:
@@ -190,20 +190,14 @@ class VolumeStorage(WorkspaceStorage):
     async def file_exists(self, session_id: str, container_path: str) -> bool:
         """Check if a file exists in the Docker volume."""
         try:
-            volume_name = self._get_volume_name(session_id)
 
             def _exists():
+                volume_name = self._resolve_volume_name(session_id)
                 path = container_path.lstrip("/")
-
-                # Run temporary container to check file
-                result = self.docker_client.containers.run(
-                    "alpine:latest",
-                    command=f"sh -c 'test -e /{path} && echo exists || echo notfound'",
-                    volumes={volume_name: {"bind": "/workspace", "mode": "ro"}},
-                    remove=True,
+                exit_code, _, _ = self.sidecars.exec(
+                    volume_name, self.MOUNT_PATH, ["test", "-e", f"/{path}"]
                 )
-
-                return b"exists" in result
+                return exit_code == 0
 
             return await asyncio.to_thread(_exists)
         except Exception:
@@ -221,11 +215,10 @@ class VolumeStorage(WorkspaceStorage):
 
                 # Initialize directory structure
                 # Note: /workspace/project_files is mounted from project volume
-                self.docker_client.containers.run(
-                    "alpine:latest",
-                    command="sh -c 'mkdir -p /workspace/out'",
-                    volumes={volume_name: {"bind": "/workspace", "mode": "rw"}},
-                    remove=True,
+                self.sidecars.exec(
+                    self._resolve_volume_name(session_id),
+                    self.MOUNT_PATH,
+                    ["mkdir", "-p", "/workspace/out"],
                 )
             except docker.errors.APIError as e:
                 if "already exists" not in str(e):
@@ -238,13 +231,17 @@ class VolumeStorage(WorkspaceStorage):
         volume_name = self._get_volume_name(session_id)
 
         def _delete():
-            try:
-                volume = self.docker_client.volumes.get(volume_name)
-                volume.remove(force=True)
-                if session_id in self._volumes:
-                    del self._volumes[session_id]
-            except docker.errors.NotFound:
-                pass  # Volume already deleted
+            # An adopted workspace lives in the pre-created volume the alias points to
+            for name in dict.fromkeys([self._resolve_volume_name(session_id), volume_name]):
+                # The sidecar holds the volume open, so it has to go first
+                self.sidecars.release(name)
+                try:
+                    volume = self.docker_client.volumes.get(name)
+                    volume.remove(force=True)
+                except docker.errors.NotFound:
+                    pass  # Volume already deleted
+            self._volumes.pop(session_id, None)
+            self._aliases.pop(session_id, None)
 
         await asyncio.to_thread(_delete)
 
@@ -252,9 +249,10 @@ class VolumeStorage(WorkspaceStorage):
         self, session_id: str, source_path: Path, dest_container_path: str
     ) -> None:
         """Copy files from host to Docker volume."""
-        volume_name = self._get_volume_name(session_id)
 
         def _copy():
+            volume_name = self._resolve_volume_name(session_id)
+
             # Create tar archive from source
             tar_stream = io.BytesIO()
             tar = tarfile.open(fileobj=tar_stream, mode="w")
@@ -268,30 +266,17 @@ class VolumeStorage(WorkspaceStorage):
                         tar.add(file, arcname=str(arcname))
 
             tar.close()
-            tar_stream.seek(0)
 
             # Get destination path
             dest_path = dest_container_path.lstrip("/")
             parent_path = "/".join(dest_path.split("/")[:-1]) if "/" in dest_path else ""
 
-            # Run temporary container to copy files
-            container = self.docker_client.containers.run(
-                "alpine:latest",
-                command=f"sh -c 'mkdir -p /{parent_path} && sleep 2'",
-                volumes={volume_name: {"bind": "/workspace", "mode": "rw"}},
-                detach=True,
-                remove=False,
+            # Put archive through the volume's sidecar
+            target_path = f"/{parent_path}" if parent_path else "/"
+            self.sidecars.put_archive(
+                volume_name, self.MOUNT_PATH, target_path, tar_stream.getvalue()
             )
 
-            try:
-                container.wait(timeout=3)
-
-                # Put archive
-                target_path = f"/{parent_path}" if parent_path else "/"
-                container.put_archive(path=target_path, data=tar_stream.getvalue())
-            finally:
-                container.remove(force=True)
-
         await asyncio.to_thread(_copy)
 
     def get_volume_config(self, session_id: str) -> dict:
@@ -304,5 +289,37 @@ class VolumeStorage(WorkspaceStorage):
         Returns:
             Docker volume configuration dict
         """
-        volume_name = self._get_volume_name(session_id)
+        volume_name = self._resolve_volume_name(session_id)
         return {volume_name: {"bind": "/workspace", "mode": "rw"}}
+
+    async def adopt_workspace(self, source_session_id: str, session_id: str) -> bool:
+        """
+        Hand a pre-created workspace over to a session.
+
+        Docker volumes cannot be renamed, so the session gets an empty marker
+        volume under its own name whose label points at the source volume.
+        Containers already mounting the source volume keep working.
+
+        Args:
+            source_session_id: ID the workspace was created under
+            session_id: Session taking over the workspace
+
+        Returns:
+            False if the session already has a workspace of its own
+        """
+
+        def _adopt():
+            volume_name = self._get_volume_name(session_id)
+            try:
+                self.docker_client.volumes.get(volume_name)
+                return False
+            except docker.errors.NotFound:
+                pass
+
+            source = self._resolve_volume_name(source_session_id)
+            self.docker_client.volumes.create(name=volume_name, labels={ALIAS_LABEL: source})
+            self._aliases[session_id] = source
+            self._aliases.pop(source_session_id, None)
+            return True
+
+        return await asyncio.to_thread(_adopt)
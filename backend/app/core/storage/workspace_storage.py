@@ -126,3 +126,20 @@ class WorkspaceStorage(ABC):
             dest_container_path: Destination path in container
         """
         pass
+
+    async def adopt_workspace(self, source_session_id: str, session_id: str) -> bool:
+        """
+        Hand a workspace created under another ID over to a session.
+
+        Used by the warm container pool, whose containers mount a workspace
+        before the session they will serve exists. Backends that cannot do
+        this keep the default, which makes the pool fall back to cold starts.
+
+        Args:
+            source_session_id: ID the workspace was created under
+            session_id: Session taking over the workspace
+
+        Returns:
+            True if the session now owns the workspace
+        """
+        return False
@@ -0,0 +1,141 @@
+"""Incremental zip encoding for streamed downloads.
+
+zipfile can write to an unseekable stream: each entry is followed by a data
+descriptor instead of going back to patch its local header. ZipStreamWriter
+points it at a sink that is drained after every call, so archive bytes can be
+sent as soon as they are produced and nothing accumulates beyond the
+compressor's own buffer.
+"""
+
+import asyncio
+import io
+import time
+import zipfile
+from typing import AsyncIterable, AsyncIterator, List, Optional, Tuple
+
+# Chunks smaller than this are compressed on the event loop, larger ones in a thread
+INLINE_WRITE_BYTES = 64 * 1024
+
+
+class _Sink(io.RawIOBase):
+    """Unseekable write target that hands back whatever was written since the last drain."""
+
+    def __init__(self):
+        super().__init__()
+        self._parts: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts.clear()
+        return data
+
+
+class ZipStreamWriter:
+    """
+    Builds a zip archive entry by entry, returning encoded bytes as it goes.
+
+    Every method returns the archive bytes it produced, which the caller
+    sends on before feeding more content.
+    """
+
+    def __init__(self, compression: int = zipfile.ZIP_DEFLATED):
+        """
+        Initialize the writer.
+
+        Args:
+            compression: zipfile compression method for all entries
+        """
+        self.compression = compression
+        self._sink = _Sink()
+        self._zip = zipfile.ZipFile(self._sink, "w", compression)
+        self._entry: Optional[io.BufferedIOBase] = None
+
+    def open_entry(self, name: str, size: Optional[int] = None) -> bytes:
+        """
+        Finish the current entry and start a new one.
+
+        Args:
+            name: Entry name inside the archive
+            size: Uncompressed size if known (unknown sizes always get zip64 fields)
+
+        Returns:
+            Encoded bytes (the previous entry's trailer and the new local header)
+        """
+        self._close_entry()
+        info = zipfile.ZipInfo(name, date_time=time.localtime()[:6])
+        info.compress_type = self.compression
+        if size is not None:
+            info.file_size = size
+        self._entry = self._zip.open(info, "w", force_zip64=size is None)
+        return self._sink.drain()
+
+    def write(self, data: bytes | memoryview) -> bytes:
+        """
+        Add content to the current entry.
+
+        Args:
+            data: Next piece of the entry's content
+
+        Returns:
+            Encoded bytes (may be empty while the compressor buffers)
+        """
+        self._entry.write(data)
+        return self._sink.drain()
+
+    def close(self) -> bytes:
+        """
+        Finish the archive.
+
+        Returns:
+            Encoded bytes (the last entry's trailer and the central directory)
+        """
+        self._close_entry()
+        self._zip.close()
+        return self._sink.drain()
+
+    def _close_entry(self) -> None:
+        if self._entry is not None:
+            self._entry.close()
+            self._entry = None
+
+
+async def stream_zip(
+    chunks: AsyncIterable[Tuple[str, Optional[int], bytes | memoryview]],
+    compression: int = zipfile.ZIP_DEFLATED,
+) -> AsyncIterator[bytes]:
+    """
+    Encode a stream of file content as a zip archive.
+
+    Args:
+        chunks: (entry name, uncompressed size or None, content) triples; a new
+            entry starts whenever the name changes, and an empty content chunk
+            is enough to create an empty file
+        compression: zipfile compression method
+
+    Yields:
+        Archive bytes, starting as soon as the first entry arrives
+    """
+    writer = ZipStreamWriter(compression)
+    current = None
+
+    async for name, size, data in chunks:
+        if name != current:
+            current = name
+            yield writer.open_entry(name, size)
+        if not len(data):
+            continue
+        if len(data) < INLINE_WRITE_BYTES:
+            encoded = writer.write(data)
+        else:
+            encoded = await asyncio.to_thread(writer.write, data)
+        if encoded:
+            yield encoded
+
+    yield writer.close()
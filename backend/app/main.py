@@ -1,13 +1,22 @@
 """Main FastAPI application."""
 
+import asyncio
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.core.config import settings
 from app.core.storage.database import init_db, close_db
-from app.api.routes import projects, chat, sandbox, files, settings as settings_routes
+from app.api.routes import projects, chat, sandbox, files, blobs, settings as settings_routes
 from app.api.websocket.streaming_manager import streaming_manager
+from app.core.storage.sidecar_pool import shutdown_storage_sidecar_pool
+from app.core.sandbox import get_container_manager
+from app.services.block_persister import shutdown_block_persister
+from app.core.llm.http_client import shutdown_llm_http_client
+from app.core.llm.key_usage import shutdown_api_key_usage_recorder
+from app.core.storage.redis_client import shutdown_redis_client
+from app.api.websocket.task_registry import get_agent_task_registry, shutdown_agent_task_registry
+from app.services.stream_store import get_stream_state_store, shutdown_stream_state_store
 
 # Import all models to register them with SQLAlchemy Base before init_db
 import app.models.database  # noqa: F401
@@ -26,6 +35,18 @@ async def lifespan(app: FastAPI):
     await streaming_manager.start()
     print("Streaming manager started successfully")
 
+    # Connect the shared stream/task state (listens for cross-worker cancels)
+    get_stream_state_store()
+    await get_agent_task_registry().start()
+
+    # Pre-start warm sandbox containers (fills in the background)
+    container_manager = None
+    try:
+        container_manager = get_container_manager()
+        await container_manager.start_warm_pool()
+    except Exception as e:
+        print(f"Warm container pool disabled: {e}")
+
     yield
 
     # Shutdown
@@ -33,6 +54,20 @@ async def lifespan(app: FastAPI):
     await streaming_manager.stop()
     print("Streaming manager stopped successfully")
 
+    if container_manager:
+        await container_manager.stop_warm_pool()
+
+    await asyncio.to_thread(shutdown_storage_sidecar_pool)
+
+    # Write any block updates still queued before the engine goes away
+    await shutdown_block_persister()
+    await shutdown_api_key_usage_recorder()
+    await shutdown_llm_http_client()
+
+    await shutdown_stream_state_store()
+    await shutdown_agent_task_registry()
+    await shutdown_redis_client()
+
     print("Closing database connections...")
     await close_db()
     print("Application shutdown complete")
@@ -53,6 +88,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],  # Read by the block change feed client
 )
 
 # Include routers
@@ -60,6 +96,7 @@ app.include_router(projects.router, prefix="/api/v1")
 app.include_router(chat.router, prefix="/api/v1")
 app.include_router(sandbox.router, prefix="/api/v1")
 app.include_router(files.router, prefix="/api/v1")
+app.include_router(blobs.router, prefix="/api/v1")
 app.include_router(settings_routes.router, prefix="/api/v1")
 
 
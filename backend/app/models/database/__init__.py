@@ -5,7 +5,12 @@ from app.models.database.agent_config import AgentConfiguration
 from app.models.database.chat_session import ChatSession, ChatSessionStatus
 from app.models.database.message import Message, MessageRole
 from app.models.database.agent_action import AgentAction, AgentActionStatus
-from app.models.database.content_block import ContentBlock, ContentBlockType, ContentBlockAuthor
+from app.models.database.content_block import (
+    ContentBlock,
+    ContentBlockType,
+    ContentBlockAuthor,
+    ContentBlockTombstone,
+)
 from app.models.database.file import File, FileType
 from app.models.database.api_key import ApiKey
 
@@ -21,6 +26,7 @@ __all__ = [
     "ContentBlock",
     "ContentBlockType",
     "ContentBlockAuthor",
+    "ContentBlockTombstone",
     "File",
     "FileType",
     "ApiKey",
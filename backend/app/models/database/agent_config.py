@@ -1,10 +1,10 @@
 """Agent configuration database model."""
 
 import uuid
-from sqlalchemy import Column, String, Text, ForeignKey, JSON
+from sqlalchemy import Column, String, Text, ForeignKey
 from sqlalchemy.orm import relationship
 
-from app.core.storage.database import Base
+from app.core.storage.database import Base, JSONType
 
 
 class AgentConfiguration(Base):
@@ -22,12 +22,12 @@ class AgentConfiguration(Base):
     system_instructions = Column(Text, nullable=True)
 
     # Tool settings
-    enabled_tools = Column(JSON, default=list, nullable=False)  # list of tool names
+    enabled_tools = Column(JSONType, default=list, nullable=False)  # list of tool names
 
     # LLM settings
     llm_provider = Column(String(50), default="openai", nullable=False)
     llm_model = Column(String(100), default="gpt-4", nullable=False)
-    llm_config = Column(JSON, default=dict, nullable=False)  # temperature, max_tokens, etc.
+    llm_config = Column(JSONType, default=dict, nullable=False)  # temperature, max_tokens, etc.
 
     # Relationships
     project = relationship("Project", back_populates="agent_config")
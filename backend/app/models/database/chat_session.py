@@ -2,11 +2,11 @@
 
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, DateTime, ForeignKey, Enum, JSON
+from sqlalchemy import Column, String, DateTime, ForeignKey, Enum
 from sqlalchemy.orm import relationship
 import enum
 
-from app.core.storage.database import Base
+from app.core.storage.database import Base, JSONType
 
 
 class ChatSessionStatus(str, enum.Enum):
@@ -34,7 +34,7 @@ class ChatSession(Base):
     environment_type = Column(
         String(50), nullable=True
     )  # e.g., "python3.11", "nodejs", null if not set up
-    environment_config = Column(JSON, default=dict, nullable=True)  # packages, env vars, etc.
+    environment_config = Column(JSONType, default=dict, nullable=True)  # packages, env vars, etc.
 
     # Relationships
     project = relationship("Project", back_populates="chat_sessions")
@@ -2,11 +2,11 @@
 
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, DateTime, ForeignKey, Enum, JSON, Integer
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, String, DateTime, ForeignKey, Enum, Integer, Index, event
+from sqlalchemy.orm import Session, relationship
 import enum
 
-from app.core.storage.database import Base
+from app.core.storage.database import Base, JSONType
 
 
 class ContentBlockType(str, enum.Enum):
@@ -45,14 +45,20 @@ class ContentBlock(Base):
     """
 
     __tablename__ = "content_blocks"
+    __table_args__ = (
+        # Serves per-session listings ordered by sequence and next-sequence lookups
+        Index("ix_content_blocks_session_sequence", "chat_session_id", "sequence_number"),
+        # Serves the change feed (blocks updated since) and its max(updated_at) ETag
+        Index("ix_content_blocks_session_updated", "chat_session_id", "updated_at"),
+    )
 
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     chat_session_id = Column(
-        String(36), ForeignKey("chat_sessions.id", ondelete="CASCADE"), nullable=False, index=True
+        String(36), ForeignKey("chat_sessions.id", ondelete="CASCADE"), nullable=False
     )
 
     # Ordering - guarantees consistent display order
-    sequence_number = Column(Integer, nullable=False, index=True)
+    sequence_number = Column(Integer, nullable=False)
 
     # Block type and author (use values_callable to store lowercase values)
     block_type = Column(
@@ -63,7 +69,7 @@ class ContentBlock(Base):
     )
 
     # Content payload - structure depends on block_type
-    content = Column(JSON, nullable=False, default=dict)
+    content = Column(JSONType, nullable=False, default=dict)
 
     # Parent reference for threading (e.g., tool_result -> tool_call)
     parent_block_id = Column(
@@ -71,7 +77,7 @@ class ContentBlock(Base):
     )
 
     # Additional metadata (streaming state, etc.)
-    block_metadata = Column(JSON, nullable=False, default=dict)
+    block_metadata = Column(JSONType, nullable=False, default=dict)
 
     # Timestamps
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
@@ -85,3 +91,45 @@ class ContentBlock(Base):
 
     def __repr__(self):
         return f"<ContentBlock {self.id[:8]}... type={self.block_type.value} seq={self.sequence_number}>"
+
+
+class ContentBlockTombstone(Base):
+    """
+    Record of a deleted content block, so clients syncing changes can drop it.
+
+    Tombstones are written automatically when a block is deleted on its own;
+    blocks removed together with their chat session don't get one.
+    """
+
+    __tablename__ = "content_block_tombstones"
+
+    id = Column(String(36), primary_key=True)  # ID of the deleted block
+    chat_session_id = Column(
+        String(36), ForeignKey("chat_sessions.id", ondelete="CASCADE"), nullable=False
+    )
+    sequence_number = Column(Integer, nullable=False)
+    deleted_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index("ix_content_block_tombstones_session_deleted", "chat_session_id", "deleted_at"),
+    )
+
+
+@event.listens_for(Session, "before_flush")
+def _record_block_tombstones(session, flush_context, instances):
+    """Add a tombstone for every content block deleted without its chat session."""
+    if not session.deleted:
+        return
+
+    from app.models.database.chat_session import ChatSession
+
+    deleted_sessions = {obj.id for obj in session.deleted if isinstance(obj, ChatSession)}
+    for obj in session.deleted:
+        if isinstance(obj, ContentBlock) and obj.chat_session_id not in deleted_sessions:
+            session.add(
+                ContentBlockTombstone(
+                    id=obj.id,
+                    chat_session_id=obj.chat_session_id,
+                    sequence_number=obj.sequence_number,
+                )
+            )
@@ -2,11 +2,11 @@
 
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, DateTime, ForeignKey, Enum, Text, JSON
+from sqlalchemy import Column, String, DateTime, ForeignKey, Enum, Text
 from sqlalchemy.orm import relationship
 import enum
 
-from app.core.storage.database import Base
+from app.core.storage.database import Base, JSONType
 
 
 class MessageRole(str, enum.Enum):
@@ -29,7 +29,7 @@ class Message(Base):
     role = Column(Enum(MessageRole), nullable=False)
     content = Column(Text, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
-    message_metadata = Column(JSON, default=dict, nullable=False)  # attachments, etc.
+    message_metadata = Column(JSONType, default=dict, nullable=False)  # attachments, etc.
 
     # Relationships
     chat_session = relationship("ChatSession", back_populates="messages")
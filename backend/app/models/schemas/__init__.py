@@ -26,6 +26,7 @@ from app.models.schemas.content_block import (
     ContentBlockUpdate,
     ContentBlockResponse,
     ContentBlockListResponse,
+    ContentBlockChangesResponse,
 )
 from app.models.schemas.file import (
     FileResponse,
@@ -50,6 +51,7 @@ __all__ = [
     "ContentBlockUpdate",
     "ContentBlockResponse",
     "ContentBlockListResponse",
+    "ContentBlockChangesResponse",
     "FileResponse",
     "FileListResponse",
 ]
@@ -51,7 +51,17 @@ class ContentBlockListResponse(BaseModel):
     """Schema for content block list response."""
 
     blocks: List[ContentBlockResponse]
-    total: int
+    total: Optional[int] = None  # None when the request passed include_total=false
+    has_more: bool = False  # More blocks exist beyond this page in the direction paged
+
+
+class ContentBlockChangesResponse(BaseModel):
+    """Schema for the content block change feed."""
+
+    blocks: List[ContentBlockResponse]  # New or updated blocks, in sequence order
+    deleted: List[str] = Field(default_factory=list)  # IDs of blocks deleted since
+    max_seq: Optional[int] = None  # Pass back as since_seq
+    max_updated_at: Optional[datetime] = None  # Pass back as since_updated_at
 
 
 # Convenience schemas for specific block types
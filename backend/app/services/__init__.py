@@ -5,6 +5,7 @@ WebSocket communication, message persistence, and streaming management.
 """
 
 from .message_persistence import MessagePersistenceService, PersistenceError
+from .chunk_rope import ChunkRope
 from .streaming_buffer import StreamingBuffer
 from .event_bus import EventBus, StreamingEvent
 from .message_orchestrator import MessageOrchestrator
@@ -12,6 +13,7 @@ from .message_orchestrator import MessageOrchestrator
 __all__ = [
     "MessagePersistenceService",
     "PersistenceError",
+    "ChunkRope",
     "StreamingBuffer",
     "EventBus",
     "StreamingEvent",
@@ -0,0 +1,82 @@
+"""
+Block Count Cache - LRU-bounded cache of per-session content block totals.
+New blocks get increasing sequence numbers, and blocks deleted on their own
+(e.g. an empty assistant text block dropped mid-turn) leave a tombstone, so a
+session's total can only change when its highest sequence number or its
+tombstone count does. Each cached total is tagged with both, which the
+composite session indexes on the two tables answer without scanning blocks,
+and the full count(*) only runs when either has moved.
+"""
+
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.database import ContentBlock, ContentBlockTombstone
+
+
+class BlockCountCache:
+    """Per-session block totals, revalidated against the latest sequence number and deletions."""
+
+    def __init__(self, max_sessions: int = 256):
+        """
+        Initialize the cache.
+
+        Args:
+            max_sessions: Sessions kept before the least recently used is dropped
+        """
+        self.max_sessions = max_sessions
+        self._totals: "OrderedDict[str, Tuple[Tuple[Optional[int], int], int]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    async def get_total(self, db: AsyncSession, session_id: str) -> int:
+        """
+        Get the number of content blocks in a session.
+
+        Args:
+            db: Database session
+            session_id: Chat session ID
+
+        Returns:
+            Block count
+        """
+        result = await db.execute(
+            select(
+                select(func.max(ContentBlock.sequence_number))
+                .where(ContentBlock.chat_session_id == session_id)
+                .scalar_subquery(),
+                select(func.count())
+                .select_from(ContentBlockTombstone)
+                .where(ContentBlockTombstone.chat_session_id == session_id)
+                .scalar_subquery(),
+            )
+        )
+        max_sequence, deleted = result.one()
+        state = (max_sequence, deleted)
+
+        cached = self._totals.get(session_id)
+        if cached is not None and cached[0] == state:
+            self._totals.move_to_end(session_id)
+            self.hits += 1
+            return cached[1]
+
+        self.misses += 1
+        result = await db.execute(
+            select(func.count())
+            .select_from(ContentBlock)
+            .where(ContentBlock.chat_session_id == session_id)
+        )
+        total = result.scalar_one()
+
+        self._totals[session_id] = (state, total)
+        self._totals.move_to_end(session_id)
+        while len(self._totals) > self.max_sessions:
+            self._totals.popitem(last=False)
+        return total
+
+    def invalidate(self, session_id: str) -> None:
+        """Drop a session's cached total (e.g. when the session is deleted)."""
+        self._totals.pop(session_id, None)
@@ -0,0 +1,209 @@
+"""
+Block Persister - write-behind persistence for streaming content blocks.
+Updates are coalesced per block in memory and written by a background task
+as batched UPDATEs, so the token loop never waits on a database commit.
+Callers that need durability (finalize, cancel, disconnect) await flush().
+"""
+
+import asyncio
+import logging
+from typing import Any, Callable, Dict, Optional, Union
+
+from sqlalchemy import bindparam, update
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.core.config import settings
+from app.models.database import ContentBlock
+
+logger = logging.getLogger(__name__)
+
+# A column value, or a callable producing it at write time (e.g. joining a chunk rope)
+PendingValue = Union[Any, Callable[[], Any]]
+
+
+class BlockPersister:
+    """
+    Coalescing write-behind queue for ContentBlock updates.
+
+    Each update replaces the pending value for its block and column, so a
+    block that receives a thousand chunks between flushes is written once.
+    """
+
+    def __init__(
+        self,
+        session_factory: Optional[async_sessionmaker] = None,
+        flush_interval: Optional[float] = None,
+        max_pending: Optional[int] = None,
+    ):
+        """
+        Initialize the persister.
+
+        Args:
+            session_factory: Factory for the sessions used to write (defaults to AsyncSessionLocal)
+            flush_interval: Seconds between background flushes
+            max_pending: Pending blocks that trigger an early flush
+        """
+        if session_factory is None:
+            from app.core.storage.database import AsyncSessionLocal
+
+            session_factory = AsyncSessionLocal
+
+        self.session_factory = session_factory
+        self.flush_interval = (
+            flush_interval if flush_interval is not None else settings.block_flush_interval
+        )
+        self.max_pending = (
+            max_pending if max_pending is not None else settings.block_flush_max_pending
+        )
+
+        self._pending: Dict[str, Dict[str, PendingValue]] = {}
+        self._flush_lock = asyncio.Lock()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._worker: Optional[asyncio.Task] = None
+        self.flush_count = 0  # Batches written, for monitoring
+        self.write_count = 0  # Block rows written, for monitoring
+
+    def update(
+        self,
+        block_id: str,
+        content: PendingValue = None,
+        metadata: PendingValue = None,
+    ) -> None:
+        """
+        Queue an update for a block, replacing any pending one for the same columns.
+
+        Args:
+            block_id: ContentBlock ID
+            content: New content, or a callable returning it at write time
+            metadata: New block metadata, or a callable returning it at write time
+        """
+        pending = self._pending.setdefault(block_id, {})
+        if content is not None:
+            pending["content"] = content
+        if metadata is not None:
+            pending["block_metadata"] = metadata
+
+        self._ensure_worker()
+        if len(self._pending) >= self.max_pending:
+            self._wakeup.set()
+
+    def has_pending(self, block_id: Optional[str] = None) -> bool:
+        """Check whether any (or a specific block's) updates are waiting to be written."""
+        if block_id is None:
+            return bool(self._pending)
+        return block_id in self._pending
+
+    async def flush(self) -> int:
+        """
+        Write all pending updates now.
+
+        Returns:
+            Number of blocks written
+        """
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+
+            batch, self._pending = self._pending, {}
+            try:
+                written = await self._write(batch)
+            except BaseException:
+                # Put the batch back under anything queued meanwhile, so nothing is lost
+                for block_id, values in batch.items():
+                    self._pending[block_id] = {**values, **self._pending.get(block_id, {})}
+                raise
+
+            self.flush_count += 1
+            self.write_count += written
+            return written
+
+    async def _write(self, batch: Dict[str, Dict[str, PendingValue]]) -> int:
+        """Write one batch, grouping blocks by the columns they update."""
+        groups: Dict[tuple, list] = {}
+        for block_id, values in batch.items():
+            row = {"b_id": block_id}
+            for column, value in values.items():
+                row[f"v_{column}"] = value() if callable(value) else value
+            groups.setdefault(tuple(sorted(values)), []).append(row)
+
+        async with self.session_factory() as session:
+            connection = await session.connection()
+            for columns, rows in groups.items():
+                stmt = (
+                    update(ContentBlock)
+                    .where(ContentBlock.id == bindparam("b_id"))
+                    .values({column: bindparam(f"v_{column}") for column in columns})
+                )
+                # executemany: one prepared UPDATE for the whole group
+                await connection.execute(stmt, rows)
+            await session.commit()
+
+        logger.debug(f"Flushed {len(batch)} block updates")
+        return len(batch)
+
+    def _ensure_worker(self) -> None:
+        """Start the background flush task if it isn't running."""
+        if self._worker is not None and not self._worker.done():
+            return
+        self._wakeup = asyncio.Event()
+        self._worker = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        """Flush on the time budget, or early when too many blocks are pending."""
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+            try:
+                await self.flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Background block flush failed, will retry: {e}")
+
+            if not self._pending:
+                # Idle: let the task end, the next update starts a new one
+                self._worker = None
+                return
+
+    async def close(self) -> None:
+        """Stop the background task and write everything still pending."""
+        worker, self._worker = self._worker, None
+        if worker is not None and not worker.done():
+            worker.cancel()
+            try:
+                await worker
+            except asyncio.CancelledError:
+                pass
+        await self.flush()
+
+
+# Global instance
+_block_persister: Optional[BlockPersister] = None
+
+
+def get_block_persister() -> BlockPersister:
+    """
+    Get the global block persister instance.
+
+    Returns:
+        BlockPersister instance
+    """
+    global _block_persister
+
+    if _block_persister is None:
+        _block_persister = BlockPersister()
+
+    return _block_persister
+
+
+async def shutdown_block_persister() -> None:
+    """Flush and stop the global block persister."""
+    global _block_persister
+
+    if _block_persister is not None:
+        await _block_persister.close()
+        _block_persister = None
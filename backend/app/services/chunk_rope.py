@@ -0,0 +1,221 @@
+"""
+Chunk Rope - append-only accumulation of streamed text.
+Chunks are kept as a list with a running length, so appending is O(1)
+and readers can pull just the text after an offset they already have.
+The full string is only built when asked for (finalize or commit time).
+Discarding old chunks only advances a head index; the dead prefix is
+compacted once it makes up half the list, so trimming is amortized O(1)
+per chunk instead of copying the retained tail on every overflow.
+Each chunk's UTF-8 size is recorded as it arrives, so memory limits can be
+enforced in bytes while offsets stay in characters.
+"""
+
+from bisect import bisect_left, bisect_right
+from typing import Iterable, List, Optional
+
+
+class ChunkRope:
+    """
+    Append-only list of text chunks with absolute offsets.
+
+    Offsets and chunk indexes count from the start of the stream and stay
+    valid after old chunks are discarded with discard_head().
+    """
+
+    def __init__(self, chunks: Optional[Iterable[str]] = None):
+        """
+        Initialize the rope.
+
+        Args:
+            chunks: Optional initial chunks
+        """
+        self._chunks: List[str] = []
+        self._starts: List[int] = []  # Absolute offset of each chunk
+        self._byte_starts: List[int] = []  # Absolute UTF-8 byte offset of each chunk
+        self._head = 0  # List position of the first retained chunk (earlier ones are dead)
+        self._base = 0  # Absolute index of _chunks[0]
+        self._length = 0  # Absolute end offset
+        self._byte_length = 0  # Absolute end offset in UTF-8 bytes
+        self._joined = ""  # Cached join of the first _joined_count retained chunks
+        self._joined_count = 0
+
+        for chunk in chunks or ():
+            self.append(chunk)
+
+    def append(self, chunk: str, size: Optional[int] = None) -> None:
+        """
+        Append a chunk.
+
+        Args:
+            chunk: Text to append
+            size: The chunk's UTF-8 size, if the caller has already computed it
+        """
+        if not chunk:
+            return
+        self._chunks.append(chunk)
+        self._starts.append(self._length)
+        self._byte_starts.append(self._byte_length)
+        self._length += len(chunk)
+        self._byte_length += size if size is not None else len(chunk.encode("utf-8"))
+
+    def __len__(self) -> int:
+        """Total characters appended, including discarded ones."""
+        return self._length
+
+    def __bool__(self) -> bool:
+        return self._length > 0
+
+    @property
+    def chunk_count(self) -> int:
+        """Number of retained chunks."""
+        return len(self._chunks) - self._head
+
+    @property
+    def first_index(self) -> int:
+        """Absolute index of the first retained chunk."""
+        return self._base + self._head
+
+    @property
+    def start_offset(self) -> int:
+        """Absolute offset of the first retained character."""
+        return self._starts[self._head] if self.chunk_count else self._length
+
+    @property
+    def retained_length(self) -> int:
+        """Characters currently held in memory."""
+        return self._length - self.start_offset
+
+    @property
+    def retained_bytes(self) -> int:
+        """UTF-8 bytes of the text currently held in memory."""
+        start = self._byte_starts[self._head] if self.chunk_count else self._byte_length
+        return self._byte_length - start
+
+    def text(self) -> str:
+        """
+        Materialize the retained text.
+
+        Repeated calls only join the chunks appended since the last call.
+
+        Returns:
+            Retained text as a single string
+        """
+        if self._joined_count < self.chunk_count:
+            self._joined += "".join(self._chunks[self._head + self._joined_count :])
+            self._joined_count = self.chunk_count
+        return self._joined
+
+    def __str__(self) -> str:
+        return self.text()
+
+    def read_since(self, offset: int) -> str:
+        """
+        Get the text after an absolute offset.
+
+        Args:
+            offset: Number of characters the reader already has
+
+        Returns:
+            Text from offset to the end (from the first retained character if
+            offset points into discarded chunks)
+        """
+        if offset >= self._length:
+            return ""
+        offset = max(offset, self.start_offset)
+        index = bisect_right(self._starts, offset, lo=self._head) - 1
+        head = self._chunks[index][offset - self._starts[index] :]
+        return head + "".join(self._chunks[index + 1 :])
+
+    def chunks_since(self, index: int) -> List[str]:
+        """
+        Get chunks from an absolute chunk index.
+
+        Args:
+            index: Absolute index of the first chunk wanted
+
+        Returns:
+            Retained chunks from that index on
+        """
+        return self._chunks[max(index - self._base, self._head) :]
+
+    def discard_head(self, keep: int) -> int:
+        """
+        Drop old chunks, keeping the most recent ones.
+
+        Args:
+            keep: Number of chunks to retain
+
+        Returns:
+            Number of chunks dropped
+        """
+        drop = self.chunk_count - max(keep, 0)
+        if drop <= 0:
+            return 0
+        self._drop(drop)
+        return drop
+
+    def discard_to_length(self, max_length: int, min_chunks: int = 1) -> int:
+        """
+        Drop old chunks until at most max_length characters are retained.
+
+        Args:
+            max_length: Retained characters allowed
+            min_chunks: Most recent chunks kept even if they exceed max_length
+
+        Returns:
+            Number of chunks dropped
+        """
+        drop = 0
+        retained = self.retained_length
+        while retained > max_length and self.chunk_count - drop > min_chunks:
+            position = self._head + drop
+            retained -= len(self._chunks[position])
+            drop += 1
+        if drop:
+            self._drop(drop)
+        return drop
+
+    def discard_to_bytes(self, max_bytes: int, min_chunks: int = 1) -> int:
+        """
+        Drop old chunks until at most max_bytes of UTF-8 text are retained.
+
+        Args:
+            max_bytes: Retained bytes allowed
+            min_chunks: Most recent chunks kept even if they exceed max_bytes
+
+        Returns:
+            Number of chunks dropped
+        """
+        # Byte offsets ascend, so the first chunk to keep is found by bisection
+        keep_from = bisect_left(self._byte_starts, self._byte_length - max_bytes, lo=self._head)
+        drop = min(keep_from - self._head, self.chunk_count - min_chunks)
+        if drop <= 0:
+            return 0
+        self._drop(drop)
+        return drop
+
+    def _drop(self, count: int) -> None:
+        """Advance the head past count chunks, compacting the dead prefix when it's large."""
+        self._head += count
+        for index in range(self._head - count, self._head):
+            self._chunks[index] = ""  # Release the text now, compaction can wait
+        if self._head * 2 >= len(self._chunks):
+            del self._chunks[: self._head]
+            del self._starts[: self._head]
+            del self._byte_starts[: self._head]
+            self._base += self._head
+            self._head = 0
+        self._joined = ""
+        self._joined_count = 0
+
+    def clear(self) -> None:
+        """Drop all chunks and reset offsets."""
+        self._chunks.clear()
+        self._starts.clear()
+        self._byte_starts.clear()
+        self._head = 0
+        self._base = 0
+        self._length = 0
+        self._byte_length = 0
+        self._joined = ""
+        self._joined_count = 0
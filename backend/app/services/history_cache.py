@@ -0,0 +1,280 @@
+"""
+History Cache - incremental, LRU-bounded cache of formatted conversation history.
+Each session keeps the LLM messages already built from its content blocks,
+keyed by the last sequence number seen, so a new turn only loads and formats
+the blocks created since. Vision and text-only projections share one list of
+formatted blocks, so switching models doesn't reload anything. Images are
+held as blob references and only read from the blob store for vision models.
+"""
+
+import asyncio
+import json
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.storage.blob_store import BLOB_URL_PREFIX, BlobStore
+from app.models.database import ContentBlock, ContentBlockType
+
+logger = logging.getLogger(__name__)
+
+# (text-only message, vision message or None if the block has no image)
+FormattedBlock = Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]
+
+
+def format_block(block: ContentBlock) -> FormattedBlock:
+    """
+    Format a content block as LLM messages.
+
+    Args:
+        block: Content block to format
+
+    Returns:
+        The message for text-only models (None if the block is skipped) and,
+        for image tool results, the multi-part message for vision models
+    """
+    if block.block_type == ContentBlockType.USER_TEXT:
+        # User message
+        text = (
+            block.content.get("text", "") if isinstance(block.content, dict) else str(block.content)
+        )
+        return {"role": "user", "content": text}, None
+
+    if block.block_type == ContentBlockType.ASSISTANT_TEXT:
+        # Assistant message
+        text = (
+            block.content.get("text", "") if isinstance(block.content, dict) else str(block.content)
+        )
+        if not text:  # Only add non-empty assistant messages
+            return None, None
+        return {"role": "assistant", "content": text}, None
+
+    if block.block_type == ContentBlockType.TOOL_CALL:
+        # Tool call - add as assistant message with function_call
+        tool_name = block.content.get("tool_name", "unknown")
+        tool_args = block.content.get("arguments", {})
+        args_str = json.dumps(tool_args) if isinstance(tool_args, dict) else str(tool_args)
+        return {
+            "role": "assistant",
+            "content": f"Using tool: {tool_name}",
+            "function_call": {"name": tool_name, "arguments": args_str},
+        }, None
+
+    if block.block_type == ContentBlockType.TOOL_RESULT:
+        # Tool result - add as user message (function result)
+        tool_name = block.content.get("tool_name", "unknown")
+        result_text = block.content.get("result", "")
+        success = block.content.get("success", True)
+        metadata = block.block_metadata or {}
+
+        # Non-vision model or text-only result: Use text format
+        status_text = "Success" if success else "Error"
+        text_message = {
+            "role": "user",
+            "content": f"Tool result ({tool_name}) [{status_text}]: {result_text}",
+        }
+
+        # Vision model: Use multi-content format with image
+        vision_message = None
+        image_url = None
+        if metadata.get("type") == "image":
+            if metadata.get("image_blob"):
+                # Resolved to a data URI when a vision request is built
+                image_url = BLOB_URL_PREFIX + metadata["image_blob"]["hash"]
+            else:
+                image_url = metadata.get("image_data")  # Inline data URI (older blocks)
+        if image_url:
+            vision_message = {
+                "role": "user",
+                "content": [
+                    {"type": "text", "text": f"Tool result ({tool_name}): {result_text}"},
+                    {"type": "image_url", "image_url": {"url": image_url}},
+                ],
+            }
+        return text_message, vision_message
+
+    return None, None
+
+
+def _blob_hash(part: Dict[str, Any]) -> Optional[str]:
+    """Get the blob hash an image part refers to, if it hasn't been resolved."""
+    url = part.get("image_url", {}).get("url", "") if part.get("type") == "image_url" else ""
+    return url[len(BLOB_URL_PREFIX) :] if url.startswith(BLOB_URL_PREFIX) else None
+
+
+@dataclass
+class _SessionHistory:
+    """Cached history for one session."""
+
+    last_seq: int = 0
+    block_count: int = 0
+    last_updated_at: Optional[datetime] = None
+    blocks: List[FormattedBlock] = field(default_factory=list)
+    projections: Dict[bool, List[Dict[str, Any]]] = field(default_factory=dict)
+
+    def append(self, formatted: FormattedBlock) -> None:
+        """Add a formatted block, extending any projections already built."""
+        self.blocks.append(formatted)
+        for vision, messages in self.projections.items():
+            message = self._project(formatted, vision)
+            if message is not None:
+                messages.append(message)
+
+    def projection(self, vision: bool) -> List[Dict[str, Any]]:
+        """Get (building on first use) the message list for a model type."""
+        if vision not in self.projections:
+            self.projections[vision] = [
+                message
+                for message in (self._project(formatted, vision) for formatted in self.blocks)
+                if message is not None
+            ]
+        return self.projections[vision]
+
+    @staticmethod
+    def _project(formatted: FormattedBlock, vision: bool) -> Optional[Dict[str, Any]]:
+        text_message, vision_message = formatted
+        if vision and vision_message is not None:
+            return vision_message
+        return text_message
+
+
+class ConversationHistoryCache:
+    """
+    Per-session cache of LLM-formatted conversation history.
+
+    Entries are validated against the block count and latest updated_at of
+    the blocks they cover, so edits or deletions to cached blocks trigger a
+    rebuild instead of serving stale history.
+    """
+
+    def __init__(self, max_sessions: int = 256, blob_store: Optional[BlobStore] = None):
+        """
+        Initialize the cache.
+
+        Args:
+            max_sessions: Sessions kept before the least recently used is evicted
+            blob_store: Store images are read from (defaults to the global one)
+        """
+        self.max_sessions = max_sessions
+        self._blob_store = blob_store
+        self._entries: "OrderedDict[str, _SessionHistory]" = OrderedDict()
+        self.hits = 0  # Turns served incrementally
+        self.misses = 0  # Turns that (re)built the history from scratch
+
+    async def get_history(
+        self, db: AsyncSession, session_id: str, vision: bool
+    ) -> List[Dict[str, Any]]:
+        """
+        Get a session's conversation history formatted for the LLM API.
+
+        Args:
+            db: Database session
+            session_id: Chat session ID
+            vision: Whether to format image results for a vision model
+
+        Returns:
+            New list of message dicts (the dicts are shared with the cache; don't mutate them)
+        """
+        entry = self._entries.get(session_id)
+        if entry is not None and not await self._is_current(db, session_id, entry):
+            logger.info(f"History cache for session {session_id} is stale, rebuilding")
+            entry = None
+
+        if entry is None:
+            entry = _SessionHistory()
+            self.misses += 1
+        else:
+            self.hits += 1
+
+        # Only blocks created since the entry was last extended
+        query = (
+            select(ContentBlock)
+            .where(ContentBlock.chat_session_id == session_id)
+            .where(ContentBlock.sequence_number > entry.last_seq)
+            .order_by(ContentBlock.sequence_number.asc())
+            .execution_options(populate_existing=True)
+        )
+        result = await db.execute(query)
+        for block in result.scalars().all():
+            if block.sequence_number <= entry.last_seq:
+                continue  # Already appended by a concurrent call for the same session
+            entry.append(format_block(block))
+            entry.last_seq = block.sequence_number
+            entry.block_count += 1
+            if block.updated_at and (
+                entry.last_updated_at is None or block.updated_at > entry.last_updated_at
+            ):
+                entry.last_updated_at = block.updated_at
+
+        self._entries[session_id] = entry
+        self._entries.move_to_end(session_id)
+        while len(self._entries) > self.max_sessions:
+            self._entries.popitem(last=False)
+
+        messages = list(entry.projection(vision))
+        if vision:
+            messages = await self._resolve_images(messages)
+        return messages
+
+    async def _resolve_images(self, messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Swap blob references in vision messages for data URIs, leaving cached dicts intact."""
+        pending = [
+            index
+            for index, message in enumerate(messages)
+            if isinstance(message["content"], list)
+            and any(_blob_hash(part) for part in message["content"])
+        ]
+        if not pending:
+            return messages
+
+        if self._blob_store is None:
+            from app.core.storage.blob_store import get_blob_store
+
+            self._blob_store = get_blob_store()
+
+        resolved = await asyncio.gather(*(self._resolve_message(messages[i]) for i in pending))
+        for index, message in zip(pending, resolved):
+            messages[index] = message
+        return messages
+
+    async def _resolve_message(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        """Copy a message with its blob image parts inlined."""
+        parts = []
+        for part in message["content"]:
+            blob_hash = _blob_hash(part)
+            if blob_hash is None:
+                parts.append(part)
+                continue
+            try:
+                data_uri = await self._blob_store.get_data_uri(blob_hash)
+            except Exception as e:
+                logger.warning(f"Image blob {blob_hash} unavailable for history: {e}")
+                parts.append({"type": "text", "text": "[image no longer available]"})
+                continue
+            parts.append({"type": "image_url", "image_url": {"url": data_uri}})
+        return {**message, "content": parts}
+
+    async def _is_current(self, db: AsyncSession, session_id: str, entry: _SessionHistory) -> bool:
+        """Check that the blocks an entry covers haven't been edited or deleted."""
+        query = select(func.count(ContentBlock.id), func.max(ContentBlock.updated_at)).where(
+            ContentBlock.chat_session_id == session_id,
+            ContentBlock.sequence_number <= entry.last_seq,
+        )
+        count, last_updated_at = (await db.execute(query)).one()
+        return count == entry.block_count and last_updated_at == entry.last_updated_at
+
+    def invalidate(self, session_id: str) -> None:
+        """Drop a session's cached history."""
+        self._entries.pop(session_id, None)
+
+    def clear(self) -> None:
+        """Drop all cached history."""
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,275 @@
+"""
+Stream Hub - per-session broadcast of streaming events.
+The task producing a response publishes each event once; any number of
+attached WebSocket connections subscribe and receive them pushed through
+their own queue, with a bounded replay window for late joiners.
+"""
+
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+REPLAY_WINDOW = 1000  # Events kept per session for late joiners
+SUBSCRIBER_QUEUE_SIZE = 1000  # Pending events per subscriber before it is dropped
+
+
+class Subscription:
+    """A subscriber's view of a session channel."""
+
+    _CLOSED = object()
+
+    def __init__(self, channel: "SessionChannel", max_pending: int):
+        """
+        Initialize the subscription.
+
+        Args:
+            channel: Channel being subscribed to
+            max_pending: Queue size before the subscriber is considered lagging
+        """
+        self.channel = channel
+        self.lagged = False
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_pending + 1)
+        self._max_pending = max_pending
+        self._closed = False
+
+    def _deliver(self, event: Dict[str, Any]) -> None:
+        """Queue an event, dropping the subscriber if it can't keep up."""
+        if self._closed:
+            return
+        if self._queue.qsize() >= self._max_pending:
+            # Slow consumer: cut it off rather than buffer without bound
+            self.lagged = True
+            self._close()
+            return
+        self._queue.put_nowait(event)
+
+    def _close(self) -> None:
+        """Signal end of stream to the consumer."""
+        if not self._closed:
+            self._closed = True
+            self._queue.put_nowait(self._CLOSED)
+
+    async def get(self) -> Optional[Dict[str, Any]]:
+        """
+        Wait for the next event.
+
+        Returns:
+            The event, or None once the channel is closed or the subscriber lagged
+        """
+        event = await self._queue.get()
+        if event is self._CLOSED:
+            # Keep returning None on repeated calls
+            self._queue.put_nowait(self._CLOSED)
+            return None
+        return event
+
+    def drain(self) -> List[Dict[str, Any]]:
+        """
+        Take every event already queued, without waiting.
+
+        Returns:
+            Queued events (the end-of-stream marker stays queued for get())
+        """
+        events = []
+        while not self._queue.empty():
+            event = self._queue.get_nowait()
+            if event is self._CLOSED:
+                self._queue.put_nowait(self._CLOSED)
+                break
+            events.append(event)
+        return events
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> Dict[str, Any]:
+        event = await self.get()
+        if event is None:
+            raise StopAsyncIteration
+        return event
+
+    def unsubscribe(self) -> None:
+        """Stop receiving events."""
+        self.channel._subscribers.discard(self)
+        self._close()
+
+
+class SessionChannel:
+    """Broadcast channel for one session's streaming events."""
+
+    def __init__(self, session_id: str, replay_window: int = REPLAY_WINDOW):
+        """
+        Initialize the channel.
+
+        Args:
+            session_id: Chat session ID
+            replay_window: Number of recent events kept for late joiners
+        """
+        self.session_id = session_id
+        self.last_seq = 0
+        self.closed = False
+        self._replay: Deque[Tuple[int, Dict[str, Any]]] = deque(maxlen=replay_window)
+        self._subscribers: Set[Subscription] = set()
+
+    def publish(self, event: Dict[str, Any]) -> int:
+        """
+        Broadcast an event to all subscribers.
+
+        Args:
+            event: JSON-serializable event payload
+
+        Returns:
+            Sequence number assigned to the event
+        """
+        self.last_seq += 1
+        self._replay.append((self.last_seq, event))
+        for subscription in list(self._subscribers):
+            subscription._deliver(event)
+            if subscription.lagged:
+                self._subscribers.discard(subscription)
+                logger.warning(f"Dropped lagging subscriber for session {self.session_id}")
+        return self.last_seq
+
+    def subscribe(
+        self, after_seq: Optional[int] = None, max_pending: int = SUBSCRIBER_QUEUE_SIZE
+    ) -> Subscription:
+        """
+        Subscribe to events published from now on.
+
+        Args:
+            after_seq: If given, first replay retained events with a higher sequence number
+            max_pending: Queue size before the subscriber is dropped as lagging
+
+        Returns:
+            Subscription to read events from
+        """
+        subscription = Subscription(self, max_pending)
+        if after_seq is not None:
+            for seq, event in self._replay:
+                if seq > after_seq:
+                    subscription._deliver(event)
+
+        if self.closed:
+            subscription._close()
+        elif not subscription.lagged:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def replay(self, after_seq: int = 0) -> List[Dict[str, Any]]:
+        """
+        Get retained events newer than a sequence number.
+
+        Args:
+            after_seq: Sequence number already seen
+
+        Returns:
+            Events in publish order
+        """
+        return [event for seq, event in self._replay if seq > after_seq]
+
+    def entries_since(self, after_seq: int = 0) -> List[Tuple[int, Dict[str, Any]]]:
+        """
+        Get retained events newer than a sequence number, with their numbers.
+
+        Args:
+            after_seq: Sequence number already seen
+
+        Returns:
+            (sequence number, event) pairs in publish order
+        """
+        return [(seq, event) for seq, event in self._replay if seq > after_seq]
+
+    def close(self) -> None:
+        """End the stream for all subscribers."""
+        self.closed = True
+        for subscription in list(self._subscribers):
+            subscription._close()
+        self._subscribers.clear()
+
+    @property
+    def subscriber_count(self) -> int:
+        """Number of live subscribers."""
+        return len(self._subscribers)
+
+
+class StreamHub:
+    """Registry of per-session broadcast channels."""
+
+    def __init__(self, replay_window: int = REPLAY_WINDOW):
+        """
+        Initialize the hub.
+
+        Args:
+            replay_window: Events kept per session for late joiners
+        """
+        self.replay_window = replay_window
+        self._channels: Dict[str, SessionChannel] = {}
+
+    def channel(self, session_id: str) -> SessionChannel:
+        """
+        Get the open channel for a session, creating it if needed.
+
+        Args:
+            session_id: Chat session ID
+
+        Returns:
+            The session's channel
+        """
+        channel = self._channels.get(session_id)
+        if channel is None:
+            channel = SessionChannel(session_id, self.replay_window)
+            self._channels[session_id] = channel
+        return channel
+
+    def publish(self, session_id: str, event: Dict[str, Any]) -> int:
+        """
+        Publish an event to a session's subscribers.
+
+        Events for sessions without an open channel are dropped, so producers
+        that nobody can attach to don't accumulate replay state.
+
+        Args:
+            session_id: Chat session ID
+            event: JSON-serializable event payload
+
+        Returns:
+            Sequence number assigned to the event, or 0 if dropped
+        """
+        channel = self._channels.get(session_id)
+        if channel is None:
+            return 0
+        return channel.publish(event)
+
+    def subscribe(self, session_id: str, after_seq: Optional[int] = None) -> Subscription:
+        """
+        Subscribe to a session's events.
+
+        Args:
+            session_id: Chat session ID
+            after_seq: If given, replay retained events after this sequence number first
+
+        Returns:
+            Subscription to read events from
+        """
+        return self.channel(session_id).subscribe(after_seq=after_seq)
+
+    def close(self, session_id: str, channel: Optional[SessionChannel] = None) -> None:
+        """
+        Close a session's channel and release its replay window.
+
+        Args:
+            session_id: Chat session ID
+            channel: Only close if this is still the session's channel
+        """
+        current = self._channels.get(session_id)
+        if current is None or (channel is not None and current is not channel):
+            return
+        del self._channels[session_id]
+        current.close()
+
+    def has_channel(self, session_id: str) -> bool:
+        """Check whether a session has an open channel."""
+        return session_id in self._channels
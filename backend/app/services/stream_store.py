@@ -0,0 +1,459 @@
+"""
+Stream State Store - where reconnecting clients find a running stream.
+The worker producing a response keeps its live StreamState objects and
+publishes events through a StreamHub channel. LocalStreamStateStore serves
+snapshots and subscriptions from those directly, which is all a single
+worker needs. RedisStreamStateStore also forwards each channel's events to
+a Redis stream and periodically saves a snapshot, so a client reconnecting
+through any worker can sync and follow the stream from there.
+
+Snapshots carry the channel sequence number they were taken at. Events in
+Redis carry theirs too, so a remote subscriber skips what the snapshot
+already covers no matter how far the forwarder has got. While a stream is
+quiet (a long tool run, a slow model turn) the forwarder writes keep-alive
+entries, so remote subscribers can tell a quiet producer from a dead one.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from app.core.config import settings
+from app.services.chunk_rope import ChunkRope
+from app.services.stream_hub import REPLAY_WINDOW, SessionChannel, StreamHub, Subscription
+
+logger = logging.getLogger(__name__)
+
+# (stream_sync payload, channel sequence number it reflects)
+Snapshot = Tuple[Dict[str, Any], int]
+
+# Seconds of silence on a channel before its forwarder writes a keep-alive entry
+KEEPALIVE_INTERVAL = 15.0
+
+
+@dataclass
+class ToolCallState:
+    """State for an active tool call."""
+
+    tool_name: str
+    partial_args: str = ""
+    step: int = 0
+    status: str = "streaming"  # streaming, running, complete
+    output: str = ""  # Live output streamed while the tool runs
+
+
+@dataclass
+class StreamState:
+    """State for a streaming block, used for reconnection support."""
+
+    block_id: str
+    session_id: str
+    content: ChunkRope = field(default_factory=ChunkRope)  # Text of the streaming block
+    streaming: bool = True
+    sequence_number: int = 0
+    active_tool_call: Optional[ToolCallState] = None  # Track currently streaming tool call
+
+
+def build_stream_sync(state: StreamState) -> Dict[str, Any]:
+    """
+    Build the stream_sync payload sent to a reconnecting client.
+
+    Args:
+        state: Live stream state
+
+    Returns:
+        JSON-serializable stream_sync event
+    """
+    payload = {
+        "type": "stream_sync",
+        "block_id": state.block_id,
+        "accumulated_content": state.content.text(),
+        "streaming": state.streaming,
+        "sequence_number": state.sequence_number,
+    }
+
+    # Include active tool call state if present
+    if state.active_tool_call:
+        payload["active_tool_call"] = {
+            "tool_name": state.active_tool_call.tool_name,
+            "partial_args": state.active_tool_call.partial_args,
+            "step": state.active_tool_call.step,
+            "status": state.active_tool_call.status,
+            "output": state.active_tool_call.output,
+        }
+    return payload
+
+
+class StreamStateStore(ABC):
+    """
+    Interface for stream state and event fan-out.
+
+    states holds the live StreamState of streams produced by this worker and
+    is only ever read and mutated locally; the store decides what other
+    workers can see of it.
+    """
+
+    def __init__(self):
+        self.states: Dict[str, StreamState] = {}
+
+    @abstractmethod
+    def open_channel(self, session_id: str) -> SessionChannel:
+        """Open a fresh event channel for a session's new task, closing any previous one."""
+
+    @abstractmethod
+    def close_channel(self, session_id: str, channel: Optional[SessionChannel] = None) -> None:
+        """Close a session's channel (only if it is still channel, when given)."""
+
+    @abstractmethod
+    def publish(self, session_id: str, event: Dict[str, Any]) -> int:
+        """Publish an event to everyone following the session; returns its sequence number."""
+
+    @abstractmethod
+    async def snapshot(self, session_id: str) -> Optional[Snapshot]:
+        """Get the session's stream_sync payload and the sequence number it reflects."""
+
+    @abstractmethod
+    async def subscribe(
+        self,
+        session_id: str,
+        after_seq: Optional[int] = None,
+        is_running: Optional[Callable[[], Awaitable[bool]]] = None,
+    ):
+        """
+        Follow a session's events.
+
+        Returns an object with async get() (None at end of stream), a lagged
+        flag and unsubscribe(), like stream_hub.Subscription. is_running, when
+        given, is asked before a remote subscription gives up on a quiet
+        stream; it keeps waiting while the task is still running.
+        """
+
+    async def close(self) -> None:
+        """Release background resources."""
+
+
+class LocalStreamStateStore(StreamStateStore):
+    """In-process store: snapshots and events never leave this worker."""
+
+    def __init__(self, hub: Optional[StreamHub] = None):
+        """
+        Initialize the store.
+
+        Args:
+            hub: Stream hub used for fan-out (a new one by default)
+        """
+        super().__init__()
+        self.hub = hub or StreamHub()
+
+    def open_channel(self, session_id: str) -> SessionChannel:
+        self.hub.close(session_id)
+        return self.hub.channel(session_id)
+
+    def close_channel(self, session_id: str, channel: Optional[SessionChannel] = None) -> None:
+        self.hub.close(session_id, channel)
+
+    def publish(self, session_id: str, event: Dict[str, Any]) -> int:
+        return self.hub.publish(session_id, event)
+
+    async def snapshot(self, session_id: str) -> Optional[Snapshot]:
+        # No awaits: the snapshot and a following local subscribe happen in one step
+        state = self.states.get(session_id)
+        if state is None:
+            return None
+        last_seq = self.hub.channel(session_id).last_seq if self.hub.has_channel(session_id) else 0
+        return build_stream_sync(state), last_seq
+
+    async def subscribe(
+        self,
+        session_id: str,
+        after_seq: Optional[int] = None,
+        is_running: Optional[Callable[[], Awaitable[bool]]] = None,
+    ) -> Subscription:
+        # Local channels end with the task itself, so there is nothing to check
+        return self.hub.subscribe(session_id, after_seq=after_seq)
+
+
+class RedisSubscription:
+    """Follows a session's events from the Redis stream another worker writes."""
+
+    def __init__(
+        self,
+        redis,
+        key: str,
+        after_seq: int = 0,
+        block_ms: int = 1000,
+        idle_timeout: float = 60.0,
+        is_running: Optional[Callable[[], Awaitable[bool]]] = None,
+    ):
+        """
+        Initialize the subscription.
+
+        Args:
+            redis: redis.asyncio client (decode_responses=True)
+            key: Redis stream key of the session's events
+            after_seq: Events up to this sequence number are skipped
+            block_ms: Longest single blocking read
+            idle_timeout: Seconds without any entry (keep-alives included) before
+                checking whether the producer is still there
+            is_running: Whether the session's task is still running; the
+                subscription keeps waiting while it is, and gives up once it
+                isn't (or, without it, at the first idle timeout)
+        """
+        self.redis = redis
+        self.key = key
+        self.lagged = False
+        self._after_seq = after_seq
+        self._last_id = "0"  # Read the retained window first
+        self._pending: List[Dict[str, Any]] = []
+        self._block_ms = block_ms
+        self._idle_timeout = idle_timeout
+        self._is_running = is_running
+        self._closed = False
+        self._started = False  # Whether an event has been delivered yet
+
+    async def get(self) -> Optional[Dict[str, Any]]:
+        """
+        Wait for the next event.
+
+        Returns:
+            The event, or None once the stream ended or the subscriber lagged
+        """
+        idle_since = time.monotonic()
+        while not self._pending:
+            if self._closed:
+                return None
+            if time.monotonic() - idle_since > self._idle_timeout:
+                if self._is_running is not None and await self._is_running():
+                    idle_since = time.monotonic()
+                    continue
+                logger.warning(f"No events on {self.key} for {self._idle_timeout}s, giving up")
+                self._closed = True
+                return None
+
+            response = await self.redis.xread(
+                {self.key: self._last_id}, count=100, block=self._block_ms
+            )
+            for _key, entries in response or ():
+                idle_since = time.monotonic()
+                for entry_id, fields in entries:
+                    self._last_id = entry_id
+                    self._accept(fields)
+        return self._pending.pop(0)
+
+    def _accept(self, fields: Dict[str, str]) -> None:
+        """Queue an entry's event unless the snapshot already covers it."""
+        if self._closed:
+            return
+        if "closed" in fields:
+            self._closed = True
+            return
+        if "keepalive" in fields:
+            return
+        seq = int(fields["seq"])
+        if seq <= self._after_seq:
+            return
+        if seq > self._after_seq + 1 and self._started:
+            # Entries between the last one read and this one were trimmed away
+            self.lagged = True
+            self._closed = True
+            return
+        self._after_seq = seq
+        self._started = True
+        self._pending.append(json.loads(fields["event"]))
+
+    def unsubscribe(self) -> None:
+        """Stop receiving events."""
+        self._closed = True
+        self._pending.clear()
+
+
+class RedisStreamStateStore(LocalStreamStateStore):
+    """
+    Store shared through Redis, so any worker can attach to a running stream.
+
+    Streams produced here are served locally as before; each open channel
+    also gets a forwarder task that appends its events to a capped Redis
+    stream and saves a snapshot at most every sync_interval seconds.
+    """
+
+    def __init__(
+        self,
+        redis,
+        hub: Optional[StreamHub] = None,
+        sync_interval: Optional[float] = None,
+        ttl: Optional[int] = None,
+        replay_window: int = REPLAY_WINDOW,
+        key_prefix: str = "ocp",
+        keepalive_interval: float = KEEPALIVE_INTERVAL,
+    ):
+        """
+        Initialize the store.
+
+        Args:
+            redis: redis.asyncio client (decode_responses=True)
+            hub: Local stream hub (a new one by default)
+            sync_interval: Seconds between snapshot saves for a busy stream
+            ttl: Seconds shared records outlive their last update
+            replay_window: Events kept per session in Redis
+            key_prefix: Prefix for all Redis keys
+            keepalive_interval: Seconds of silence before a keep-alive entry is written
+        """
+        super().__init__(hub)
+        self.redis = redis
+        self.sync_interval = (
+            sync_interval if sync_interval is not None else settings.stream_state_sync_interval
+        )
+        self.ttl = ttl if ttl is not None else settings.stream_state_ttl
+        self.replay_window = replay_window
+        self.key_prefix = key_prefix
+        self.keepalive_interval = keepalive_interval
+        self._forwarders: Set[asyncio.Task] = set()
+
+    def events_key(self, session_id: str) -> str:
+        return f"{self.key_prefix}:stream:{session_id}:events"
+
+    def state_key(self, session_id: str) -> str:
+        return f"{self.key_prefix}:stream:{session_id}:state"
+
+    def open_channel(self, session_id: str) -> SessionChannel:
+        channel = super().open_channel(session_id)
+        forwarder = asyncio.create_task(self._forward(session_id, channel))
+        self._forwarders.add(forwarder)
+        forwarder.add_done_callback(self._forwarders.discard)
+        return channel
+
+    async def snapshot(self, session_id: str) -> Optional[Snapshot]:
+        if session_id in self.states:
+            return await super().snapshot(session_id)
+
+        raw = await self.redis.get(self.state_key(session_id))
+        if raw is None:
+            return None
+        stored = json.loads(raw)
+        return stored["payload"], stored["seq"]
+
+    async def subscribe(
+        self,
+        session_id: str,
+        after_seq: Optional[int] = None,
+        is_running: Optional[Callable[[], Awaitable[bool]]] = None,
+    ):
+        if self.hub.has_channel(session_id):
+            return await super().subscribe(session_id, after_seq)
+        return RedisSubscription(
+            self.redis, self.events_key(session_id), after_seq or 0, is_running=is_running
+        )
+
+    async def _forward(self, session_id: str, channel: SessionChannel) -> None:
+        """Copy a channel's events and snapshots to Redis until it closes."""
+        events_key = self.events_key(session_id)
+        state_key = self.state_key(session_id)
+        wakeup = channel.subscribe()  # Only a wakeup; events are read with their numbers
+        forwarded = 0
+        last_sync = 0.0
+        keepalive = False
+        try:
+            # Start a new stream for this task
+            await self.redis.delete(events_key, state_key)
+            while True:
+                done = channel.closed
+                pipe = self.redis.pipeline(transaction=False)
+                for seq, event in channel.entries_since(forwarded):
+                    pipe.xadd(
+                        events_key,
+                        {"seq": seq, "event": json.dumps(event, default=str)},
+                        maxlen=self.replay_window,
+                        approximate=True,
+                    )
+                    forwarded = seq
+
+                if done:
+                    pipe.xadd(events_key, {"closed": 1})
+                    pipe.delete(state_key)
+                    pipe.expire(events_key, 60)
+                else:
+                    if keepalive:
+                        pipe.xadd(
+                            events_key,
+                            {"keepalive": 1},
+                            maxlen=self.replay_window,
+                            approximate=True,
+                        )
+                        keepalive = False
+                    now = time.monotonic()
+                    if now - last_sync >= self.sync_interval:
+                        self._queue_snapshot(pipe, session_id, channel)
+                        last_sync = now
+                    pipe.expire(events_key, self.ttl)
+                await pipe.execute()
+                if done:
+                    return
+
+                try:
+                    event = await asyncio.wait_for(wakeup.get(), self.keepalive_interval)
+                except asyncio.TimeoutError:
+                    keepalive = True  # Quiet stream: tell remote subscribers we're alive
+                    continue
+                if event is None and wakeup.lagged:
+                    # Fell behind while writing; nothing is lost while events are retained
+                    wakeup = channel.subscribe()
+                wakeup.drain()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Stream forwarding to Redis failed for session {session_id}: {e}")
+        finally:
+            wakeup.unsubscribe()
+
+    def _queue_snapshot(self, pipe, session_id: str, channel: SessionChannel) -> None:
+        """Add the session's current snapshot to a pipeline."""
+        state = self.states.get(session_id)
+        if state is None:
+            return
+        # Payload and sequence number are read together, without yielding
+        stored = {"payload": build_stream_sync(state), "seq": channel.last_seq}
+        pipe.set(self.state_key(session_id), json.dumps(stored, default=str), ex=self.ttl)
+
+    async def close(self) -> None:
+        """Stop the forwarders."""
+        for forwarder in list(self._forwarders):
+            forwarder.cancel()
+        await asyncio.gather(*self._forwarders, return_exceptions=True)
+        self._forwarders.clear()
+
+
+# Global store instance
+_stream_state_store: Optional[StreamStateStore] = None
+
+
+def get_stream_state_store() -> StreamStateStore:
+    """
+    Get the global stream state store (Redis-backed when STREAM_STORE_URL is set).
+
+    Returns:
+        StreamStateStore instance
+    """
+    global _stream_state_store
+
+    if _stream_state_store is None:
+        from app.core.storage.redis_client import get_redis_client, shared_state_enabled
+
+        if shared_state_enabled():
+            _stream_state_store = RedisStreamStateStore(get_redis_client())
+        else:
+            _stream_state_store = LocalStreamStateStore()
+
+    return _stream_state_store
+
+
+async def shutdown_stream_state_store() -> None:
+    """Stop the global store's background work."""
+    global _stream_state_store
+
+    if _stream_state_store is not None:
+        await _stream_state_store.close()
+        _stream_state_store = None
@@ -1,14 +1,21 @@
 """
 Streaming Buffer - manages in-memory content during streaming.
 This service handles chunk accumulation without any database operations.
+Each stream is bounded by chunk count and UTF-8 size, and all streams together
+by a global byte ceiling that first evicts finished streams, least recently
+used first, from an LRU of finished streams. Memory statistics are kept as
+running totals, so reading them costs O(1) regardless of how many streams or
+chunks are buffered.
 """
 
-from collections import defaultdict
+from collections import OrderedDict
 from typing import Dict, List, Optional
 import time
 import logging
 from dataclasses import dataclass, field
 
+from app.services.chunk_rope import ChunkRope
+
 logger = logging.getLogger(__name__)
 
 
@@ -28,20 +35,43 @@ class StreamingBuffer:
     """
     Manages in-memory streaming content.
     No database operations - pure memory management.
+
+    Sizes are UTF-8 bytes, measured once per chunk as it arrives; read offsets
+    stay in characters.
     """
 
-    def __init__(self, max_buffer_size: int = 10000):
+    def __init__(
+        self,
+        max_buffer_size: int = 10000,
+        max_buffer_bytes: Optional[int] = None,
+        max_total_bytes: Optional[int] = None,
+    ):
         """
         Initialize the streaming buffer.
 
         Args:
             max_buffer_size: Maximum number of chunks to keep per message
+            max_buffer_bytes: Maximum bytes to keep per message (None for no limit)
+            max_total_bytes: Ceiling on bytes kept across all messages (None for no limit)
         """
-        self._buffers: Dict[str, List[str]] = defaultdict(list)
+        self._buffers: Dict[str, ChunkRope] = {}
+        # Finished streams, least recently used first: the eviction order
+        self._finished: "OrderedDict[str, None]" = OrderedDict()
         self._metadata: Dict[str, StreamMetadata] = {}
         self.max_buffer_size = max_buffer_size
+        self.max_buffer_bytes = max_buffer_bytes
+        self.max_total_bytes = max_total_bytes
 
-        logger.info(f"StreamingBuffer initialized with max_buffer_size={max_buffer_size}")
+        # Running totals behind get_memory_usage()
+        self._total_chunks = 0
+        self._total_bytes = 0
+        self._active_count = 0
+        self.evicted_streams = 0  # Finished streams dropped to stay under the ceiling
+
+        logger.info(
+            f"StreamingBuffer initialized with max_buffer_size={max_buffer_size}, "
+            f"max_buffer_bytes={max_buffer_bytes}, max_total_bytes={max_total_bytes}"
+        )
 
     def start_streaming(self, message_id: str) -> None:
         """
@@ -50,8 +80,10 @@ class StreamingBuffer:
         Args:
             message_id: Unique identifier for the message
         """
-        self._buffers[message_id] = []
+        self._remove(message_id)
+        self._buffers[message_id] = ChunkRope()
         self._metadata[message_id] = StreamMetadata()
+        self._active_count += 1
 
         logger.info(f"Started streaming buffer for message {message_id}")
 
@@ -69,24 +101,80 @@ class StreamingBuffer:
         if message_id not in self._buffers:
             raise ValueError(f"No active stream for message {message_id}")
 
-        # Prevent memory overflow
-        if len(self._buffers[message_id]) >= self.max_buffer_size:
-            # Keep last N chunks for recovery
+        buffer = self._buffers[message_id]
+        self._touch(message_id)
+
+        # Prevent memory overflow: drop the oldest chunks, keeping absolute indexes
+        if buffer.chunk_count >= self.max_buffer_size:
             logger.warning(
-                f"Buffer overflow for message {message_id}, truncating to last 1000 chunks"
+                f"Buffer overflow for message {message_id}, dropping oldest chunks "
+                f"beyond {self.max_buffer_size}"
             )
-            self._buffers[message_id] = self._buffers[message_id][-1000:]
+            self._discard(buffer, lambda: buffer.discard_head(self.max_buffer_size - 1))
+
+        size = len(chunk.encode("utf-8"))
+        buffer.append(chunk, size)
+        if chunk:
+            self._total_chunks += 1
+            self._total_bytes += size
+
+        if self.max_buffer_bytes is not None and buffer.retained_bytes > self.max_buffer_bytes:
+            self._discard(buffer, lambda: buffer.discard_to_bytes(self.max_buffer_bytes))
 
-        self._buffers[message_id].append(chunk)
+        if self.max_total_bytes is not None and self._total_bytes > self.max_total_bytes:
+            self._enforce_ceiling(message_id)
 
         # Update metadata
         metadata = self._metadata[message_id]
         metadata.chunk_count += 1
-        metadata.total_bytes += len(chunk)
+        metadata.total_bytes += size
 
-        logger.debug(
-            f"Added chunk #{metadata.chunk_count} ({len(chunk)} bytes) to message {message_id}"
-        )
+        logger.debug(f"Added chunk #{metadata.chunk_count} ({size} bytes) to message {message_id}")
+
+    def _discard(self, buffer: ChunkRope, discard) -> None:
+        """Run a discard on a rope and keep the running totals in step."""
+        before = buffer.retained_bytes
+        self._total_chunks -= discard()
+        self._total_bytes -= before - buffer.retained_bytes
+
+    def _touch(self, message_id: str) -> None:
+        """Mark a finished stream as recently used."""
+        if message_id in self._finished:
+            self._finished.move_to_end(message_id)
+
+    def _enforce_ceiling(self, current_id: str) -> None:
+        """
+        Get back under max_total_bytes.
+
+        Finished streams are evicted least recently used first, each in O(1).
+        If only active streams are left, the oldest chunks of the stream being
+        written are dropped instead, as with a per-stream overflow.
+        """
+        while self._total_bytes > self.max_total_bytes and self._finished:
+            message_id = next(iter(self._finished))
+            if message_id == current_id:
+                break  # Just touched, so every other finished stream is gone
+            logger.warning(f"Evicting finished stream {message_id} to stay under memory ceiling")
+            self._remove(message_id)
+            self.evicted_streams += 1
+
+        if self._total_bytes > self.max_total_bytes:
+            buffer = self._buffers[current_id]
+            allowed = max(buffer.retained_bytes - (self._total_bytes - self.max_total_bytes), 0)
+            logger.warning(f"Memory ceiling reached, trimming message {current_id}")
+            self._discard(buffer, lambda: buffer.discard_to_bytes(allowed))
+
+    def _remove(self, message_id: str) -> Optional[ChunkRope]:
+        """Drop a message's buffer and metadata, updating the running totals."""
+        buffer = self._buffers.pop(message_id, None)
+        if buffer is not None:
+            self._total_chunks -= buffer.chunk_count
+            self._total_bytes -= buffer.retained_bytes
+        self._finished.pop(message_id, None)
+        metadata = self._metadata.pop(message_id, None)
+        if metadata is not None and metadata.is_streaming:
+            self._active_count -= 1
+        return buffer
 
     def get_complete_content(self, message_id: str) -> str:
         """
@@ -102,7 +190,7 @@ class StreamingBuffer:
             logger.warning(f"No buffer found for message {message_id}")
             return ""
 
-        content = "".join(self._buffers[message_id])
+        content = self._buffers[message_id].text()
         logger.debug(
             f"Retrieved complete content for message {message_id}: {len(content)} characters"
         )
@@ -112,6 +200,9 @@ class StreamingBuffer:
         """
         Get chunks since a specific index (for reconnection).
 
+        Indexes count from the start of the stream, so they stay valid after
+        old chunks are truncated on overflow.
+
         Args:
             message_id: Message identifier
             chunk_index: Starting chunk index
@@ -123,12 +214,31 @@ class StreamingBuffer:
             logger.warning(f"No buffer found for message {message_id}")
             return []
 
-        chunks = self._buffers[message_id][chunk_index:]
+        self._touch(message_id)
+        chunks = self._buffers[message_id].chunks_since(chunk_index)
         logger.info(
             f"Retrieved {len(chunks)} chunks for message {message_id} starting from index {chunk_index}"
         )
         return chunks
 
+    def get_content_since(self, message_id: str, offset: int) -> str:
+        """
+        Get the content after a character offset (for reconnection).
+
+        Args:
+            message_id: Message identifier
+            offset: Number of characters the reader already has
+
+        Returns:
+            Content from the offset on
+        """
+        if message_id not in self._buffers:
+            logger.warning(f"No buffer found for message {message_id}")
+            return ""
+
+        self._touch(message_id)
+        return self._buffers[message_id].read_since(offset)
+
     def get_metadata(self, message_id: str) -> Optional[StreamMetadata]:
         """
         Get streaming metadata for a message.
@@ -157,7 +267,12 @@ class StreamingBuffer:
             return {}
 
         metadata = self._metadata[message_id]
+        if metadata.is_streaming:
+            self._active_count -= 1
         metadata.is_streaming = False
+        if message_id in self._buffers:
+            self._finished[message_id] = None
+            self._finished.move_to_end(message_id)
         metadata.end_time = time.time()
         metadata.error = error
 
@@ -186,10 +301,8 @@ class StreamingBuffer:
         Args:
             message_id: Message identifier
         """
-        content_length = len(self.get_complete_content(message_id))
-
-        self._buffers.pop(message_id, None)
-        self._metadata.pop(message_id, None)
+        buffer = self._remove(message_id)
+        content_length = len(buffer) if buffer is not None else 0
 
         logger.info(f"Cleaned up buffer for message {message_id} ({content_length} characters)")
 
@@ -206,19 +319,17 @@ class StreamingBuffer:
 
     def get_memory_usage(self) -> dict:
         """
-        Get current memory usage statistics.
+        Get current memory usage statistics (O(1), from running totals).
 
         Returns:
             Dictionary with memory usage information
         """
-        total_chunks = sum(len(chunks) for chunks in self._buffers.values())
-        total_bytes = sum(sum(len(chunk) for chunk in chunks) for chunks in self._buffers.values())
-
         return {
             "buffer_count": len(self._buffers),
-            "total_chunks": total_chunks,
-            "total_bytes": total_bytes,
-            "active_streams": len(self.get_active_streams()),
+            "total_chunks": self._total_chunks,
+            "total_bytes": self._total_bytes,
+            "active_streams": self._active_count,
+            "evicted_streams": self.evicted_streams,
         }
 
     def has_buffer(self, message_id: str) -> bool:
@@ -241,7 +352,10 @@ class StreamingBuffer:
             message_id: Message identifier
         """
         if message_id in self._buffers:
-            self._buffers[message_id] = []
+            buffer = self._buffers[message_id]
+            self._total_chunks -= buffer.chunk_count
+            self._total_bytes -= buffer.retained_bytes
+            buffer.clear()
             if message_id in self._metadata:
                 self._metadata[message_id].chunk_count = 0
                 self._metadata[message_id].total_bytes = 0
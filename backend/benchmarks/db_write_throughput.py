@@ -0,0 +1,198 @@
+"""Concurrent streaming-write benchmark for the database profiles.
+
+Simulates N chat sessions streaming at once: each inserts content blocks and
+commits a series of content updates per block (the write pattern of a
+streamed assistant message), while a reader keeps listing blocks the way the
+blocks API does. Reports write throughput, lock errors and read latency for
+each database URL and profile, so the SQLite profiles can be compared with
+PostgreSQL on the same workload.
+
+Usage:
+    python -m benchmarks.db_write_throughput --sessions 10
+    python -m benchmarks.db_write_throughput --postgres-url postgresql+asyncpg://u:p@localhost/bench
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.exc import OperationalError
+
+from app.core.storage.database import Base, create_engines, create_session_factory
+from app.models.database import ChatSession, ContentBlock, Project
+from app.models.database.content_block import ContentBlockAuthor, ContentBlockType
+
+
+def _percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def _stream_session(
+    session_factory, chat_session_id: str, blocks: int, updates: int, errors: List[str]
+) -> int:
+    """Write one session's blocks, committing every update like a streamed message."""
+    writes = 0
+    for sequence in range(blocks):
+        try:
+            async with session_factory() as db:
+                block = ContentBlock(
+                    chat_session_id=chat_session_id,
+                    sequence_number=sequence,
+                    block_type=ContentBlockType.ASSISTANT_TEXT,
+                    author=ContentBlockAuthor.ASSISTANT,
+                    content={"text": ""},
+                )
+                db.add(block)
+                await db.commit()
+                writes += 1
+
+                text = ""
+                for step in range(updates):
+                    text += f"chunk {step} "
+                    block.content = {"text": text}
+                    await db.commit()
+                    writes += 1
+        except OperationalError as e:
+            errors.append(str(e.orig))
+    return writes
+
+
+async def _read_loop(session_factory, session_ids: List[str], stop: asyncio.Event) -> List[float]:
+    """List blocks round-robin until stopped, returning per-query latencies."""
+    latencies = []
+    index = 0
+    while not stop.is_set():
+        started = time.perf_counter()
+        async with session_factory() as db:
+            await db.execute(
+                select(ContentBlock)
+                .where(ContentBlock.chat_session_id == session_ids[index % len(session_ids)])
+                .order_by(ContentBlock.sequence_number)
+            )
+        latencies.append((time.perf_counter() - started) * 1000)
+        index += 1
+        await asyncio.sleep(0)
+    return latencies
+
+
+async def run_benchmark(
+    url: str, profile: str, sessions: int, blocks: int, updates: int
+) -> Dict[str, Any]:
+    """
+    Run one benchmark pass against a fresh schema.
+
+    Args:
+        url: Database URL (the schema is dropped and recreated)
+        profile: Database profile passed to create_engines()
+        sessions: Number of concurrently streaming sessions
+        blocks: Blocks written per session
+        updates: Committed content updates per block
+
+    Returns:
+        Result dict with throughput and latency figures
+    """
+    write_engine, read_engine = create_engines(url, profile)
+    session_factory = create_session_factory(write_engine, read_engine)
+    try:
+        async with write_engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+            await conn.run_sync(Base.metadata.create_all)
+
+        async with session_factory() as db:
+            project = Project(name="benchmark")
+            db.add(project)
+            await db.flush()
+            chat_sessions = [
+                ChatSession(project_id=project.id, name=f"session {i}") for i in range(sessions)
+            ]
+            db.add_all(chat_sessions)
+            await db.commit()
+            session_ids = [chat_session.id for chat_session in chat_sessions]
+
+        errors: List[str] = []
+        stop = asyncio.Event()
+        reader = asyncio.create_task(_read_loop(session_factory, session_ids, stop))
+
+        started = time.perf_counter()
+        writes = await asyncio.gather(
+            *(
+                _stream_session(session_factory, session_id, blocks, updates, errors)
+                for session_id in session_ids
+            )
+        )
+        elapsed = time.perf_counter() - started
+
+        stop.set()
+        latencies = await reader
+    finally:
+        await write_engine.dispose()
+        if read_engine is not None:
+            await read_engine.dispose()
+
+    return {
+        "url": url.split("@")[-1],
+        "profile": profile,
+        "sessions": sessions,
+        "commits": sum(writes),
+        "seconds": round(elapsed, 3),
+        "commits_per_sec": round(sum(writes) / elapsed, 1) if elapsed else 0.0,
+        "errors": len(errors),
+        "read_queries": len(latencies),
+        "read_p50_ms": round(statistics.median(latencies), 2) if latencies else 0.0,
+        "read_p99_ms": round(_percentile(latencies, 99), 2),
+    }
+
+
+async def _main(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        targets = [
+            (f"sqlite+aiosqlite:///{os.path.join(tmp, profile + '.db')}", profile)
+            for profile in args.profile or ["default", "production"]
+        ]
+        if args.postgres_url:
+            targets.append((args.postgres_url, "default"))
+
+        for url, profile in targets:
+            result = await run_benchmark(url, profile, args.sessions, args.blocks, args.updates)
+            print(json.dumps(result))
+            results.append(result)
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--profile",
+        action="append",
+        choices=["default", "production"],
+        help="SQLite profile to run (repeatable, defaults to both)",
+    )
+    parser.add_argument(
+        "--postgres-url",
+        help="Also run against this PostgreSQL database (its tables are dropped and recreated)",
+    )
+    parser.add_argument("--sessions", type=int, default=10)
+    parser.add_argument("--blocks", type=int, default=5)
+    parser.add_argument("--updates", type=int, default=20)
+    parser.add_argument("--output", help="Also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(_main(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,401 @@
+"""End-to-end benchmark of the chat streaming pipeline.
+
+Drives the real ChatWebSocketHandler for N concurrent sessions: each session
+sends user messages over a fake WebSocket, the ReAct agent streams a scripted
+LLM response (text, parallel file reads, a streamed bash command, then the
+final answer) replayed by ReplayLLMProvider, tools run against an in-memory
+sandbox, and content blocks are written to a throwaway SQLite database through
+the normal commit and write-behind paths. Measures the hot path LLM chunk ->
+ReActAgent event -> handler -> send_json + ContentBlock commit:
+
+- chunks_per_sec: text chunks forwarded to the WebSocket per second, all sessions
+- forward_p50_ms / forward_p99_ms: time from the LLM yielding a chunk to send_json
+- commits_per_message: database commits per user message
+- memory_per_session_kib: peak traced allocations per session (separate pass,
+  so tracemalloc overhead doesn't skew the timings)
+
+Set DATABASE_PROFILE=production to measure the production SQLite profile.
+
+Usage:
+    python -m benchmarks.streaming_pipeline
+    python -m benchmarks.streaming_pipeline --sessions 10 --speed realtime --output results.json
+"""
+
+import argparse
+import asyncio
+import contextvars
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Tuple
+from unittest.mock import patch
+
+# The handler uses the app's global engine: point it at a throwaway database
+# before anything imports app.core.storage.database (removed by main, or at exit)
+_DATA_DIR = tempfile.TemporaryDirectory(prefix="streaming-pipeline-")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{os.path.join(_DATA_DIR.name, 'benchmark.db')}"
+
+from fastapi import WebSocketDisconnect  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+from app.api.websocket import chat_handler  # noqa: E402
+from app.api.websocket.task_registry import shutdown_agent_task_registry  # noqa: E402
+from app.core.llm.cassette import Cassette, ReplayLLMProvider, parse_replay_speed  # noqa: E402
+from app.core.storage.database import (  # noqa: E402
+    AsyncSessionLocal,
+    close_db,
+    engine,
+    init_db,
+)
+from app.models.database import AgentConfiguration, ChatSession, Project  # noqa: E402
+from app.services.block_persister import (  # noqa: E402
+    get_block_persister,
+    shutdown_block_persister,
+)
+
+# Delay recorded before each scripted chunk (played back at --speed)
+CHUNK_DELAY = 0.02
+
+SOURCE_FILES = {
+    "/workspace/main.py": "def main():\n    print('hello')\n\n\nmain()\n" * 20,
+    "/workspace/util.py": "def helper(value):\n    return value * 2\n" * 20,
+}
+
+
+class SessionProbe:
+    """Per-session measurements, shared by the fake LLM and the fake WebSocket."""
+
+    def __init__(self):
+        self.turn = 0
+        self.pending: Deque[float] = deque()  # Yield times of chunks not yet forwarded
+        self.latencies: List[float] = []
+        self.events = 0
+
+
+_probe: contextvars.ContextVar[SessionProbe] = contextvars.ContextVar("probe")
+
+
+def _text_chunks(text: str) -> List[Dict[str, Any]]:
+    return [{"delay": CHUNK_DELAY, "chunk": word + " "} for word in text.split()]
+
+
+def _tool_chunks(index: int, name: str, arguments: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Stream a tool call as a name delta followed by argument deltas."""
+    encoded = json.dumps(arguments)
+    middle = len(encoded) // 2
+    return [
+        {"delay": CHUNK_DELAY, "chunk": {"function_call": {"name": name}, "index": index}},
+        *(
+            {"delay": CHUNK_DELAY, "chunk": {"function_call": {"arguments": part}, "index": index}}
+            for part in (encoded[:middle], encoded[middle:])
+        ),
+    ]
+
+
+def build_script(answer_chunks: int) -> Cassette:
+    """
+    Build the LLM turns replayed for every user message.
+
+    Args:
+        answer_chunks: Text chunks in the final answer
+
+    Returns:
+        Cassette with one interaction per agent iteration
+    """
+    usage = {"prompt_tokens": 1200, "completion_tokens": 40, "cache_read_tokens": 1024}
+    answer = " ".join(f"word{i}" for i in range(answer_chunks))
+    turns = [
+        _text_chunks("Let me read the entry point and its helper first.")
+        + _tool_chunks(0, "file_read", {"path": "/workspace/main.py"})
+        + _tool_chunks(1, "file_read", {"path": "/workspace/util.py"}),
+        _text_chunks("Now I will run it.") + _tool_chunks(0, "bash", {"command": "python main.py"}),
+        _text_chunks(answer),
+    ]
+    return Cassette(
+        "<scripted>",
+        [
+            {"request_hash": f"turn-{i}", "model": "gpt-5-mini", "chunks": chunks, "usage": usage}
+            for i, chunks in enumerate(turns)
+        ],
+    )
+
+
+class ScriptedLLMProvider(ReplayLLMProvider):
+    """Replays the script in order for each session and timestamps every text chunk."""
+
+    def _interaction(self, messages: List[Dict[str, Any]], tools: Optional[List]) -> Dict:
+        probe = _probe.get()
+        interaction = self.cassette.interactions[probe.turn % len(self.cassette)]
+        probe.turn += 1
+        return interaction
+
+    async def generate_stream(self, messages, tools=None, on_usage=None, **kwargs):
+        probe = _probe.get()
+        async for chunk in super().generate_stream(messages, tools, on_usage, **kwargs):
+            if isinstance(chunk, str):
+                probe.pending.append(time.perf_counter())
+            yield chunk
+
+
+class InMemorySandbox:
+    """Sandbox container backed by a dict, answering commands instantly."""
+
+    def __init__(self):
+        self.files = dict(SOURCE_FILES)
+
+    async def execute(
+        self, command: str, workdir: str = "/workspace", timeout: int = 30
+    ) -> Tuple[int, str, str]:
+        return 0, f"ran: {command}", ""
+
+    async def execute_stream(
+        self, command: str, workdir: str = "/workspace", timeout: int = 30
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        for line in range(5):
+            await asyncio.sleep(0)
+            yield "stdout", f"hello {line}\n"
+        yield "exit", 0
+
+    async def read_file(self, container_path: str) -> str | None:
+        return self.files.get(container_path)
+
+    async def write_file(self, container_path: str, content: str) -> bool:
+        self.files[container_path] = content
+        return True
+
+
+class InMemoryContainerManager:
+    """Container manager handing out one in-memory sandbox per session."""
+
+    def __init__(self):
+        self.containers: Dict[str, InMemorySandbox] = {}
+
+    async def get_container(self, session_id: str) -> InMemorySandbox | None:
+        return self.containers.get(session_id)
+
+    async def create_container(self, session_id: str, *args, **kwargs) -> InMemorySandbox:
+        return self.containers.setdefault(session_id, InMemorySandbox())
+
+
+class FakeWebSocket:
+    """WebSocket that sends user messages one turn at a time and records forwarding latency."""
+
+    def __init__(self, probe: SessionProbe, messages: List[str]):
+        self.probe = probe
+        self.messages = deque(messages)
+        self.handler: Optional[chat_handler.ChatWebSocketHandler] = None
+
+    async def accept(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+    async def receive_text(self) -> str:
+        # Let the previous turn finish before sending the next message (or hanging up)
+        task = self.handler.current_agent_task if self.handler else None
+        if task is not None:
+            try:
+                await asyncio.shield(task)
+            except BaseException:
+                pass
+        if not self.messages:
+            raise WebSocketDisconnect()
+        return json.dumps({"type": "message", "content": self.messages.popleft()})
+
+    async def send_json(self, data: Dict[str, Any]) -> None:
+        if data.get("type") == "chunk" and self.probe.pending:
+            self.probe.latencies.append(time.perf_counter() - self.probe.pending.popleft())
+        json.dumps(data)  # Serialize like Starlette does
+        self.probe.events += 1
+
+
+async def _create_sessions(sessions: int) -> List[str]:
+    """Create a project, its agent configuration and sessions with an environment set up."""
+    async with AsyncSessionLocal() as db:
+        project = Project(name="streaming benchmark")
+        db.add(project)
+        await db.flush()
+        db.add(
+            AgentConfiguration(
+                project_id=project.id,
+                enabled_tools=["bash", "file_read", "file_write"],
+                llm_provider="openai",
+                llm_model="gpt-5-mini",
+                llm_config={},
+            )
+        )
+        chat_sessions = [
+            ChatSession(
+                project_id=project.id,
+                name=f"session {i}",
+                environment_type="python3.13",
+                title_auto_generated="Y",  # Title generation isn't part of the hot path
+            )
+            for i in range(sessions)
+        ]
+        db.add_all(chat_sessions)
+        await db.commit()
+        return [chat_session.id for chat_session in chat_sessions]
+
+
+async def _run_session(session_id: str, messages: int, probe: SessionProbe) -> None:
+    _probe.set(probe)
+    websocket = FakeWebSocket(probe, [f"Run main.py ({i})" for i in range(messages)])
+    async with AsyncSessionLocal() as db:
+        websocket.handler = chat_handler.ChatWebSocketHandler(websocket, db)
+        await websocket.handler.handle_connection(session_id)
+
+
+async def _run_pass(
+    sessions: int, messages: int, provider: ScriptedLLMProvider
+) -> Tuple[float, int, List[SessionProbe]]:
+    """Stream every session's messages, returning elapsed seconds, commits and probes."""
+    session_ids = await _create_sessions(sessions)
+    probes = [SessionProbe() for _ in session_ids]
+    commits = 0
+
+    def count_commit(_connection) -> None:
+        nonlocal commits
+        commits += 1
+
+    async def create_provider(**kwargs) -> ScriptedLLMProvider:
+        return provider
+
+    manager = InMemoryContainerManager()
+    event.listen(engine.sync_engine, "commit", count_commit)
+    try:
+        with (
+            patch.object(chat_handler, "create_llm_provider_with_db", create_provider),
+            patch.object(chat_handler, "get_container_manager", lambda: manager),
+        ):
+            started = time.perf_counter()
+            await asyncio.gather(
+                *(
+                    _run_session(session_id, messages, probe)
+                    for session_id, probe in zip(session_ids, probes)
+                )
+            )
+            await get_block_persister().flush()
+            elapsed = time.perf_counter() - started
+    finally:
+        event.remove(engine.sync_engine, "commit", count_commit)
+    return elapsed, commits, probes
+
+
+def _percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run_benchmark(
+    sessions: int, messages: int, answer_chunks: int, speed: float
+) -> Dict[str, Any]:
+    """
+    Run one benchmark level: a timed pass, then a memory pass under tracemalloc.
+
+    Args:
+        sessions: Number of concurrently streaming sessions
+        messages: User messages sent per session
+        answer_chunks: Text chunks in each final answer
+        speed: Replay speed-up factor for the scripted chunk delays (0 instant)
+
+    Returns:
+        Result dict with throughput, latency, commit and memory figures
+    """
+    provider = ScriptedLLMProvider(
+        build_script(answer_chunks), speed=speed, provider="openai", model="gpt-5-mini"
+    )
+
+    elapsed, commits, probes = await _run_pass(sessions, messages, provider)
+
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    tracemalloc.reset_peak()
+    await _run_pass(sessions, messages, provider)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    latencies = [latency * 1000 for probe in probes for latency in probe.latencies]
+    total_messages = sessions * messages
+    return {
+        "sessions": sessions,
+        "messages": total_messages,
+        "speed": speed,
+        "chunks": len(latencies),
+        "events": sum(probe.events for probe in probes),
+        "seconds": round(elapsed, 3),
+        "chunks_per_sec": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "forward_p50_ms": round(statistics.median(latencies), 3) if latencies else 0.0,
+        "forward_p99_ms": round(_percentile(latencies, 99), 3),
+        "commits": commits,
+        "commits_per_message": round(commits / total_messages, 2),
+        "memory_per_session_kib": round((peak - baseline) / sessions / 1024, 1),
+    }
+
+
+async def _main(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    await init_db()
+    results = []
+    try:
+        for sessions in args.sessions:
+            # The handler logs every event; keep that out of the results
+            stdout = sys.stdout
+            with open(os.devnull, "w") as devnull:
+                if not args.verbose:
+                    sys.stdout = devnull
+                try:
+                    result = await run_benchmark(
+                        sessions, args.messages, args.chunks, parse_replay_speed(args.speed)
+                    )
+                finally:
+                    sys.stdout = stdout
+            print(json.dumps(result))
+            results.append(result)
+    finally:
+        await shutdown_block_persister()
+        await shutdown_agent_task_registry()
+        await close_db()
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sessions",
+        type=int,
+        nargs="+",
+        default=[1, 10, 100],
+        help="Concurrent session counts to run (default: 1 10 100)",
+    )
+    parser.add_argument("--messages", type=int, default=1, help="User messages per session")
+    parser.add_argument("--chunks", type=int, default=200, help="Text chunks per final answer")
+    parser.add_argument(
+        "--speed",
+        default="instant",
+        help=f"Replay speed: instant, realtime ({CHUNK_DELAY * 1000:.0f} ms per chunk), "
+        "accelerated or a factor such as 4x",
+    )
+    parser.add_argument("--verbose", action="store_true", help="Show the handler's logs")
+    parser.add_argument("--output", help="Also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    try:
+        results = asyncio.run(_main(args))
+    finally:
+        _DATA_DIR.cleanup()
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
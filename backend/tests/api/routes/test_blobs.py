@@ -0,0 +1,108 @@
+"""Tests for Blobs API routes."""
+
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient, ASGITransport
+
+from app.api.routes.blobs import router
+from app.core.storage.blob_store import BlobStore
+from app.core.storage.local_storage import LocalStorage
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 32
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    """Point the global blob store at a temporary directory."""
+    store = BlobStore(LocalStorage(workspace_base=str(tmp_path)))
+    monkeypatch.setattr("app.api.routes.blobs.get_blob_store", lambda: store)
+    return store
+
+
+@pytest.fixture
+def app(store):
+    """Create FastAPI app with blobs router."""
+    app = FastAPI()
+    app.include_router(router, prefix="/api/v1")
+    return app
+
+
+@pytest.mark.api
+class TestBlobsAPI:
+    """Test cases for the blobs API."""
+
+    @pytest.mark.asyncio
+    async def test_get_blob(self, app, store):
+        """Test serving blob bytes with caching headers."""
+        blob_hash = await store.put(PNG)
+
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.get(f"/api/v1/blobs/{blob_hash}")
+
+        assert response.status_code == 200
+        assert response.content == PNG
+        assert response.headers["content-type"] == "image/png"
+        assert response.headers["etag"] == f'"{blob_hash}"'
+        assert "immutable" in response.headers["cache-control"]
+
+    @pytest.mark.asyncio
+    async def test_if_none_match_returns_304(self, app, store):
+        """Test that a matching ETag is answered without a body."""
+        blob_hash = await store.put(PNG)
+
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.get(
+                f"/api/v1/blobs/{blob_hash}",
+                headers={"If-None-Match": f'W/"other", "{blob_hash}"'},
+            )
+
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == f'"{blob_hash}"'
+
+    @pytest.mark.asyncio
+    async def test_if_none_match_star_needs_existing_blob(self, app, store):
+        """Test that "*" only matches a stored blob."""
+        blob_hash = await store.put(PNG)
+
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            missing = await client.get(f"/api/v1/blobs/{'0' * 64}", headers={"If-None-Match": "*"})
+            stored = await client.get(f"/api/v1/blobs/{blob_hash}", headers={"If-None-Match": "*"})
+
+        assert missing.status_code == 404
+        assert stored.status_code == 304
+
+    @pytest.mark.asyncio
+    async def test_serves_recorded_mime_type_without_sniffing(self, app, store):
+        """Test the type recorded at store time is served, with sniffing disabled."""
+        bmp = b"BM" + b"\x00" * 32
+        blob_hash = await store.put(bmp, "image/bmp")
+
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.get(f"/api/v1/blobs/{blob_hash}")
+
+        assert response.headers["content-type"] == "image/bmp"
+        assert response.headers["x-content-type-options"] == "nosniff"
+        assert "sandbox" in response.headers["content-security-policy"]
+
+    @pytest.mark.asyncio
+    async def test_blob_not_found(self, app):
+        """Test requesting an unknown blob."""
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.get(f"/api/v1/blobs/{'0' * 64}")
+
+        assert response.status_code == 404
+
+    @pytest.mark.asyncio
+    async def test_invalid_hash(self, app):
+        """Test that malformed hashes are rejected."""
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.get("/api/v1/blobs/not-a-hash")
+
+        assert response.status_code == 400
@@ -27,6 +27,12 @@ def app(db_session):
     return app
 
 
+async def _stream(chunks):
+    """Async iterator standing in for SandboxContainer.open_stream."""
+    for chunk in chunks:
+        yield memoryview(chunk)
+
+
 @pytest.mark.api
 class TestChatSessionAPI:
     """Test cases for Chat Session API."""
@@ -235,6 +241,181 @@ class TestContentBlocksAPI:
         assert data["total"] == 3
         assert len(data["blocks"]) == 3
 
+    @pytest.mark.asyncio
+    async def test_list_content_blocks_keyset_pages(self, app, db_session, sample_chat_session):
+        """Test paging forwards with after_seq and backwards with before_seq/latest."""
+        for i in range(10):
+            db_session.add(
+                ContentBlock(
+                    chat_session_id=sample_chat_session.id,
+                    block_type=ContentBlockType.USER_TEXT,
+                    author=ContentBlockAuthor.USER,
+                    content={"text": f"Test content {i}"},
+                    sequence_number=i,
+                )
+            )
+        await db_session.commit()
+
+        url = f"/api/v1/chats/{sample_chat_session.id}/blocks"
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            latest = (await client.get(url, params={"latest": True, "limit": 4})).json()
+            earlier = (await client.get(url, params={"before_seq": 6, "limit": 4})).json()
+            first = (await client.get(url, params={"before_seq": 2, "limit": 4})).json()
+            forward = (await client.get(url, params={"after_seq": 7, "limit": 4})).json()
+
+        def sequences(page):
+            return [b["sequence_number"] for b in page["blocks"]]
+
+        assert sequences(latest) == [6, 7, 8, 9]
+        assert latest["has_more"] is True
+        assert latest["total"] == 10
+        assert sequences(earlier) == [2, 3, 4, 5]
+        assert earlier["has_more"] is True
+        assert sequences(first) == [0, 1]
+        assert first["has_more"] is False
+        assert sequences(forward) == [8, 9]
+        assert forward["has_more"] is False
+
+    @pytest.mark.asyncio
+    async def test_list_content_blocks_total_optional_and_cached(
+        self, app, db_session, sample_chat_session
+    ):
+        """Test the total can be skipped and is recounted only after new blocks."""
+        from app.api.routes import chat
+
+        def add_block(sequence):
+            db_session.add(
+                ContentBlock(
+                    chat_session_id=sample_chat_session.id,
+                    block_type=ContentBlockType.USER_TEXT,
+                    author=ContentBlockAuthor.USER,
+                    content={"text": "x"},
+                    sequence_number=sequence,
+                )
+            )
+
+        add_block(0)
+        await db_session.commit()
+
+        url = f"/api/v1/chats/{sample_chat_session.id}/blocks"
+        misses = chat._block_counts.misses
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            no_total = (await client.get(url, params={"include_total": False})).json()
+            assert no_total["total"] is None
+            assert len(no_total["blocks"]) == 1
+
+            assert (await client.get(url)).json()["total"] == 1
+            assert (await client.get(url)).json()["total"] == 1
+            assert chat._block_counts.misses == misses + 1
+
+            add_block(1)
+            await db_session.commit()
+            assert (await client.get(url)).json()["total"] == 2
+            assert chat._block_counts.misses == misses + 2
+
+    @pytest.mark.asyncio
+    async def test_block_changes_since_cursor(self, app, db_session, sample_chat_session):
+        """Test the change feed returns new, updated and deleted blocks since a cursor."""
+        blocks = [
+            ContentBlock(
+                chat_session_id=sample_chat_session.id,
+                block_type=ContentBlockType.USER_TEXT,
+                author=ContentBlockAuthor.USER,
+                content={"text": f"Test content {i}"},
+                sequence_number=i,
+            )
+            for i in range(3)
+        ]
+        db_session.add_all(blocks)
+        await db_session.commit()
+
+        url = f"/api/v1/chats/{sample_chat_session.id}/blocks/changes"
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            initial = (await client.get(url)).json()
+            assert [b["sequence_number"] for b in initial["blocks"]] == [0, 1, 2]
+            cursor = {
+                "since_seq": initial["max_seq"],
+                "since_updated_at": initial["max_updated_at"],
+            }
+
+            blocks[0].content = {"text": "edited"}
+            await db_session.delete(blocks[1])
+            db_session.add(
+                ContentBlock(
+                    chat_session_id=sample_chat_session.id,
+                    block_type=ContentBlockType.ASSISTANT_TEXT,
+                    author=ContentBlockAuthor.ASSISTANT,
+                    content={"text": "new"},
+                    sequence_number=3,
+                )
+            )
+            await db_session.commit()
+
+            changes = (await client.get(url, params=cursor)).json()
+
+        assert [b["sequence_number"] for b in changes["blocks"]] == [0, 3]
+        assert changes["blocks"][0]["content"] == {"text": "edited"}
+        assert changes["deleted"] == [blocks[1].id]
+        assert changes["max_seq"] == 3
+
+    @pytest.mark.asyncio
+    async def test_block_changes_etag(self, app, db_session, sample_chat_session):
+        """Test If-None-Match short-circuits with 304 until the session changes."""
+        db_session.add(
+            ContentBlock(
+                chat_session_id=sample_chat_session.id,
+                block_type=ContentBlockType.USER_TEXT,
+                author=ContentBlockAuthor.USER,
+                content={"text": "hello"},
+                sequence_number=0,
+            )
+        )
+        await db_session.commit()
+
+        url = f"/api/v1/chats/{sample_chat_session.id}/blocks/changes"
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            first = await client.get(url, params={"since_seq": 0})
+            etag = first.headers["ETag"]
+
+            cached = await client.get(url, params={"since_seq": 0}, headers={"If-None-Match": etag})
+            assert cached.status_code == 304
+            assert cached.content == b""
+
+            other_cursor = await client.get(url, headers={"If-None-Match": etag})
+            assert other_cursor.status_code == 200
+
+            db_session.add(
+                ContentBlock(
+                    chat_session_id=sample_chat_session.id,
+                    block_type=ContentBlockType.ASSISTANT_TEXT,
+                    author=ContentBlockAuthor.ASSISTANT,
+                    content={"text": "hi"},
+                    sequence_number=1,
+                )
+            )
+            await db_session.commit()
+            changed = await client.get(
+                url, params={"since_seq": 0}, headers={"If-None-Match": etag}
+            )
+
+        assert first.json()["blocks"] == []
+        assert changed.status_code == 200
+        assert [b["sequence_number"] for b in changed.json()["blocks"]] == [1]
+        assert changed.headers["ETag"] != etag
+
+    @pytest.mark.asyncio
+    async def test_block_changes_session_not_found(self, app, db_session):
+        """Test the change feed for a non-existent session."""
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.get("/api/v1/chats/nonexistent/blocks/changes")
+
+        assert response.status_code == 404
+
     @pytest.mark.asyncio
     async def test_list_content_blocks_session_not_found(self, app, db_session):
         """Test listing blocks for non-existent session."""
@@ -333,7 +514,7 @@ class TestWorkspaceFilesAPI:
         """Test getting content of non-existent file."""
         with patch("app.api.routes.chat.get_container_manager") as mock_manager:
             mock_container = MagicMock()
-            mock_container.execute = AsyncMock(return_value=(1, "", ""))  # File not found
+            mock_container.read_bytes = AsyncMock(side_effect=FileNotFoundError("missing.txt"))
             mock_manager.return_value.get_container = AsyncMock(return_value=mock_container)
 
             transport = ASGITransport(app=app)
@@ -349,8 +530,7 @@ class TestWorkspaceFilesAPI:
         """Test successfully getting file content."""
         with patch("app.api.routes.chat.get_container_manager") as mock_manager:
             mock_container = MagicMock()
-            mock_container.execute = AsyncMock(return_value=(0, "", ""))  # File exists
-            mock_container.read_file = AsyncMock(return_value="file content here")
+            mock_container.read_bytes = AsyncMock(return_value=b"file content here")
             mock_manager.return_value.get_container = AsyncMock(return_value=mock_container)
 
             transport = ASGITransport(app=app)
@@ -370,8 +550,7 @@ class TestWorkspaceFilesAPI:
         """Test downloading a workspace file."""
         with patch("app.api.routes.chat.get_container_manager") as mock_manager:
             mock_container = MagicMock()
-            mock_container.execute = AsyncMock(return_value=(0, "", ""))
-            mock_container.read_file = AsyncMock(return_value="file content")
+            mock_container.open_stream = MagicMock(return_value=_stream([b"file ", b"content"]))
             mock_manager.return_value.get_container = AsyncMock(return_value=mock_container)
 
             transport = ASGITransport(app=app)
@@ -382,6 +561,47 @@ class TestWorkspaceFilesAPI:
 
             assert response.status_code == 200
             assert "attachment" in response.headers.get("content-disposition", "")
+            assert response.content == b"file content"
+
+    @pytest.mark.asyncio
+    async def test_download_workspace_file_binary(self, app, db_session, sample_chat_session):
+        """Test that binary files are downloaded byte for byte."""
+        payload = b"\x89PNG\r\n\x1a\n" + bytes(range(256))
+        with patch("app.api.routes.chat.get_container_manager") as mock_manager:
+            mock_container = MagicMock()
+            mock_container.open_stream = MagicMock(return_value=_stream([payload]))
+            mock_manager.return_value.get_container = AsyncMock(return_value=mock_container)
+
+            transport = ASGITransport(app=app)
+            async with AsyncClient(transport=transport, base_url="http://test") as client:
+                response = await client.get(
+                    f"/api/v1/chats/{sample_chat_session.id}/workspace/files/download?path=/workspace/out/plot.png"
+                )
+
+            assert response.status_code == 200
+            assert response.headers["content-type"] == "image/png"
+            assert response.content == payload
+
+    @pytest.mark.asyncio
+    async def test_download_workspace_file_not_found(self, app, db_session, sample_chat_session):
+        """Test downloading a missing file returns 404 before streaming starts."""
+
+        async def missing():
+            raise FileNotFoundError("missing.txt")
+            yield
+
+        with patch("app.api.routes.chat.get_container_manager") as mock_manager:
+            mock_container = MagicMock()
+            mock_container.open_stream = MagicMock(return_value=missing())
+            mock_manager.return_value.get_container = AsyncMock(return_value=mock_container)
+
+            transport = ASGITransport(app=app)
+            async with AsyncClient(transport=transport, base_url="http://test") as client:
+                response = await client.get(
+                    f"/api/v1/chats/{sample_chat_session.id}/workspace/files/download?path=/workspace/out/missing.txt"
+                )
+
+            assert response.status_code == 404
 
     @pytest.mark.asyncio
     async def test_download_all_workspace_files_no_files(
@@ -402,6 +622,82 @@ class TestWorkspaceFilesAPI:
             assert response.status_code == 404
             assert "No output files found" in response.json()["detail"]
 
+    @pytest.mark.asyncio
+    async def test_download_all_output_from_one_archive(self, app, db_session, sample_chat_session):
+        """Test output files are zipped from a single archive export of /workspace/out."""
+        import io
+        import tarfile
+        import zipfile
+
+        members = [("out", None), ("out/a.txt", b"alpha"), ("out/.tool_outputs/x.txt", b"spill")]
+        members.append(("out/b.bin", bytes(range(256))))
+
+        async def open_archive(path, exclude=()):
+            for name, content in members:
+                info = tarfile.TarInfo(name=name)
+                if content is None:
+                    info.type = tarfile.DIRTYPE
+                    yield info, memoryview(b"")
+                    continue
+                info.size = len(content)
+                yield info, memoryview(b"")
+                yield info, memoryview(content)
+
+        with patch("app.api.routes.chat.get_container_manager") as mock_manager:
+            mock_container = MagicMock()
+            mock_container.execute = AsyncMock(return_value=(0, "a.txt\t5\nb.bin\t256\n", ""))
+            mock_container.open_archive = MagicMock(side_effect=open_archive)
+            mock_manager.return_value.get_container = AsyncMock(return_value=mock_container)
+
+            transport = ASGITransport(app=app)
+            async with AsyncClient(transport=transport, base_url="http://test") as client:
+                response = await client.get(
+                    f"/api/v1/chats/{sample_chat_session.id}/workspace/download-all?type=output"
+                )
+
+        assert response.status_code == 200
+        mock_container.open_archive.assert_called_once_with(
+            "/workspace/out", exclude=[".tool_outputs"]
+        )
+        archive = zipfile.ZipFile(io.BytesIO(response.content))
+        assert archive.namelist() == ["a.txt", "b.bin"]
+        assert archive.read("b.bin") == bytes(range(256))
+
+    @pytest.mark.asyncio
+    async def test_download_all_output_from_storage(self, app, db_session, sample_chat_session):
+        """Test the storage fallback keeps file order and skips unreadable files."""
+        import io
+        import zipfile
+
+        listed = [
+            WorkspaceFile(name=name, path=f"/workspace/out/{name}", size=1, type="output")
+            for name in ["1.txt", "2.txt", "3.txt", "4.txt", "5.txt", "6.txt"]
+        ]
+
+        async def read_file(session_id, path):
+            if path.endswith("3.txt"):
+                raise FileNotFoundError(path)
+            return path.encode()
+
+        with (
+            patch("app.api.routes.chat.get_container_manager") as mock_manager,
+            patch("app.api.routes.chat._list_files_from_storage", AsyncMock(return_value=listed)),
+            patch("app.api.routes.chat.get_storage") as mock_storage,
+        ):
+            mock_manager.return_value.get_container = AsyncMock(return_value=None)
+            mock_storage.return_value.read_file = AsyncMock(side_effect=read_file)
+
+            transport = ASGITransport(app=app)
+            async with AsyncClient(transport=transport, base_url="http://test") as client:
+                response = await client.get(
+                    f"/api/v1/chats/{sample_chat_session.id}/workspace/download-all?type=output"
+                )
+
+        assert response.status_code == 200
+        archive = zipfile.ZipFile(io.BytesIO(response.content))
+        assert archive.namelist() == ["1.txt", "2.txt", "4.txt", "5.txt", "6.txt"]
+        assert archive.read("5.txt") == b"/workspace/out/5.txt"
+
     @pytest.mark.asyncio
     async def test_download_all_invalid_type(self, app, db_session, sample_chat_session):
         """Test downloading with invalid type parameter."""
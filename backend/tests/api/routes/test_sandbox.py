@@ -262,6 +262,15 @@ class TestSandboxModels:
         assert request.command == "ls -la"
         assert request.workdir == "/workspace"  # default
 
+    def test_execute_command_request_timeout_bounds(self):
+        """Test ExecuteCommandRequest rejects unbounded or oversized timeouts."""
+        from pydantic import ValidationError
+
+        for timeout in (0, -1, 10**6):
+            with pytest.raises(ValidationError):
+                ExecuteCommandRequest(command="ls", timeout=timeout)
+        assert ExecuteCommandRequest(command="ls", timeout=120).timeout == 120
+
     def test_execute_command_request_with_workdir(self):
         """Test ExecuteCommandRequest with custom workdir."""
         request = ExecuteCommandRequest(command="pwd", workdir="/workspace/out")
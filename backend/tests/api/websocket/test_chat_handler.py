@@ -3,7 +3,7 @@
 import pytest
 import asyncio
 from datetime import datetime
-from unittest.mock import AsyncMock, MagicMock
+from unittest.mock import AsyncMock, MagicMock, patch
 
 from app.api.websocket.chat_handler import (
     is_vision_model,
@@ -13,6 +13,7 @@ from app.api.websocket.chat_handler import (
     create_orchestrator,
 )
 from app.models.database import ContentBlock, ContentBlockType, ContentBlockAuthor
+from app.services.chunk_rope import ChunkRope
 
 
 @pytest.mark.websocket
@@ -84,6 +85,7 @@ class TestToolCallState:
         assert state.partial_args == ""
         assert state.step == 0
         assert state.status == "streaming"
+        assert state.output == ""
 
     def test_tool_call_state_custom_values(self):
         """Test ToolCallState with custom values."""
@@ -105,7 +107,7 @@ class TestStreamState:
         state = StreamState(block_id="block-123", session_id="session-456")
         assert state.block_id == "block-123"
         assert state.session_id == "session-456"
-        assert state.accumulated_content == ""
+        assert state.content.text() == ""
         assert state.streaming is True
         assert state.sequence_number == 0
         assert state.active_tool_call is None
@@ -116,12 +118,13 @@ class TestStreamState:
         state = StreamState(
             block_id="block-123",
             session_id="session-456",
-            accumulated_content="Hello world",
+            content=ChunkRope(["Hello ", "world"]),
             streaming=False,
             sequence_number=5,
             active_tool_call=tool_state,
         )
-        assert state.accumulated_content == "Hello world"
+        assert state.content.text() == "Hello world"
+        assert len(state.content) == 11
         assert state.streaming is False
         assert state.sequence_number == 5
         assert state.active_tool_call.tool_name == "bash"
@@ -370,3 +373,163 @@ class TestChatWebSocketHandlerConcurrency:
         # Due to lock, commits should not interleave
         # Should see: start, end, start, end, start, end
         assert call_order == ["start", "end", "start", "end", "start", "end"]
+
+
+@pytest.mark.websocket
+class TestAttachToExistingStream:
+    """Test forwarding a running task's events to a reconnected WebSocket."""
+
+    @pytest.fixture
+    def mock_websocket(self):
+        """Create a mock WebSocket."""
+        websocket = MagicMock()
+        websocket.send_json = AsyncMock()
+        return websocket
+
+    @pytest.fixture
+    def store(self, monkeypatch):
+        """Fresh in-process stream state store for each test."""
+        from app.api.websocket import chat_handler
+        from app.services.stream_store import LocalStreamStateStore
+
+        store = LocalStreamStateStore()
+        monkeypatch.setattr(chat_handler, "_stream_store", store)
+        return store
+
+    @pytest.fixture
+    def hub(self, store):
+        """The store's stream hub."""
+        return store.hub
+
+    def _make_task(self, session_id: str, release: asyncio.Event, hub):
+        """Create a registry entry for a task that runs until released."""
+        task = asyncio.create_task(release.wait())
+        channel = hub.channel(session_id)
+        task.add_done_callback(lambda _t: hub.close(session_id, channel))
+        existing = MagicMock()
+        existing.task = task
+        existing.status = "running"
+        existing.message_id = "block-1"
+        existing.cancel_event = asyncio.Event()
+        return existing
+
+    @pytest.mark.asyncio
+    async def test_forwards_published_events(self, mock_websocket, hub, store):
+        """Events published after the snapshot are pushed to the new connection."""
+        store.states["s1"] = StreamState(
+            block_id="block-1", session_id="s1", content=ChunkRope(["Hel"])
+        )
+        release = asyncio.Event()
+        existing = self._make_task("s1", release, hub)
+        producer = ChatWebSocketHandler(MagicMock(send_json=AsyncMock()), MagicMock())
+        handler = ChatWebSocketHandler(mock_websocket, MagicMock())
+
+        attach = asyncio.create_task(handler._attach_to_existing_stream("s1", existing))
+        await asyncio.sleep(0)
+        await producer._send_stream_event("s1", {"type": "chunk", "content": "lo"})
+        await producer._send_stream_event("s1", {"type": "assistant_text_end"})
+        release.set()
+        await asyncio.wait_for(attach, 1)
+
+        sent = [call.args[0] for call in mock_websocket.send_json.await_args_list]
+        assert sent[0]["type"] == "stream_sync"
+        assert sent[0]["accumulated_content"] == "Hel"
+        assert sent[1:] == [{"type": "chunk", "content": "lo"}, {"type": "assistant_text_end"}]
+        assert handler.current_agent_task is existing.task
+
+    @pytest.mark.asyncio
+    async def test_legacy_path_replays_backlog(self, mock_websocket, hub):
+        """Without stream state, the retained events are replayed first."""
+        release = asyncio.Event()
+        existing = self._make_task("s1", release, hub)
+        hub.publish("s1", {"type": "chunk", "content": "early"})
+        handler = ChatWebSocketHandler(mock_websocket, MagicMock())
+
+        attach = asyncio.create_task(handler._attach_to_existing_stream("s1", existing))
+        await asyncio.sleep(0)
+        release.set()
+        await asyncio.wait_for(attach, 1)
+
+        sent = [call.args[0] for call in mock_websocket.send_json.await_args_list]
+        assert sent[0] == {"type": "resuming_stream", "message_id": "block-1"}
+        assert sent[1] == {"type": "chunk", "content": "early"}
+        assert not hub.has_channel("s1")
+
+
+@pytest.mark.websocket
+class TestWriteBehindBlockUpdates:
+    """Test that block updates go through the write-behind persister."""
+
+    @pytest.fixture
+    def handler(self):
+        """Handler with a mocked persister."""
+        handler = ChatWebSocketHandler(MagicMock(), MagicMock())
+        handler.persister = MagicMock()
+        handler.persister.flush = AsyncMock()
+        return handler
+
+    @pytest.fixture
+    def block(self):
+        """An assistant text block."""
+        return ContentBlock(
+            id="block-1",
+            chat_session_id="s1",
+            sequence_number=1,
+            block_type=ContentBlockType.ASSISTANT_TEXT,
+            author=ContentBlockAuthor.ASSISTANT,
+            content={"text": ""},
+            block_metadata={"streaming": True},
+        )
+
+    def test_text_update_is_lazy(self, handler, block):
+        """Streaming text is queued as a callable joined at write time."""
+        rope = ChunkRope(["Hel"])
+        handler._queue_text_update(block, rope)
+        rope.append("lo")
+
+        kwargs = handler.persister.update.call_args.kwargs
+        assert handler.persister.update.call_args.args == ("block-1",)
+        assert kwargs["content"]() == {"text": "Hello"}
+        handler.persister.flush.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_persist_block_flushes(self, handler, block):
+        """Final updates are written before returning and mirrored on the block."""
+        await handler._persist_block(block, content={"text": "done"}, metadata={"streaming": False})
+
+        handler.persister.update.assert_called_once_with(
+            "block-1", content={"text": "done"}, metadata={"streaming": False}
+        )
+        handler.persister.flush.assert_awaited_once()
+        assert block.content == {"text": "done"}
+        assert block.block_metadata == {"streaming": False}
+
+
+@pytest.mark.unit
+class TestStoreImageBlob:
+    """Test that image results are stored as blobs instead of inline data."""
+
+    @pytest.mark.asyncio
+    async def test_image_data_replaced_with_blob_ref(self):
+        """Inline images are moved to the blob store."""
+        store = MagicMock()
+        store.externalize_image = AsyncMock(return_value={"image_blob": {"hash": "abc"}})
+        handler = ChatWebSocketHandler(MagicMock(), MagicMock())
+
+        with patch("app.api.websocket.chat_handler.get_blob_store", return_value=store):
+            metadata = await handler._store_image_blob({"image_data": "data:image/png;base64,AA"})
+
+        assert metadata == {"image_blob": {"hash": "abc"}}
+
+    @pytest.mark.asyncio
+    async def test_store_failure_keeps_inline_data(self):
+        """A blob store failure doesn't lose the image."""
+        store = MagicMock()
+        store.externalize_image = AsyncMock(side_effect=IOError("disk full"))
+        handler = ChatWebSocketHandler(MagicMock(), MagicMock())
+        original = {"image_data": "data:image/png;base64,AA"}
+
+        with patch("app.api.websocket.chat_handler.get_blob_store", return_value=store):
+            metadata = await handler._store_image_blob(original)
+
+        assert metadata is original
@@ -8,6 +8,7 @@ from unittest.mock import MagicMock
 from app.api.websocket.task_registry import (
     AgentTask,
     AgentTaskRegistry,
+    SharedAgentTaskRegistry,
     get_agent_task_registry,
 )
 
@@ -390,3 +391,88 @@ class TestAgentTaskRegistrySingleton:
         finally:
             # Restore original
             module._agent_task_registry = original
+
+
+@pytest.mark.websocket
+class TestSharedAgentTaskRegistry:
+    """Test task state shared between workers through Redis."""
+
+    @pytest.fixture
+    def redis(self):
+        """In-memory Redis shared by the simulated workers."""
+        fakeredis = pytest.importorskip("fakeredis")
+        return fakeredis.aioredis.FakeRedis(decode_responses=True)
+
+    @pytest.fixture
+    async def workers(self, redis):
+        """Two registries on the same Redis, as two worker processes would have."""
+        worker_a = SharedAgentTaskRegistry(redis, worker_id="a")
+        worker_b = SharedAgentTaskRegistry(redis, worker_id="b")
+        await worker_a.start()
+        await worker_b.start()
+        yield worker_a, worker_b
+        await worker_a.close()
+        await worker_b.close()
+
+    @pytest.mark.asyncio
+    async def test_task_visible_to_other_worker(self, workers):
+        """A task registered on one worker is found, with its block, on another."""
+        worker_a, worker_b = workers
+        task = asyncio.create_task(asyncio.sleep(10))
+        try:
+            await worker_a.register_task("session-1", "pending", task, asyncio.Event())
+            await worker_a.set_message_id("session-1", "block-1")
+
+            remote = await worker_b.get_task("session-1")
+            assert remote.status == "running"
+            assert remote.message_id == "block-1"
+            assert not remote.task.done()
+
+            await worker_a.mark_completed("session-1")
+            remote = await worker_b.get_task("session-1")
+            assert remote.status == "completed"
+            assert remote.task.done()
+        finally:
+            task.cancel()
+
+    @pytest.mark.asyncio
+    async def test_cancel_reaches_owning_worker(self, workers):
+        """Cancelling from another worker cancels the task where it runs."""
+        worker_a, worker_b = workers
+        task = asyncio.create_task(asyncio.sleep(10))
+        cancel_event = asyncio.Event()
+        await worker_a.register_task("session-1", "block-1", task, cancel_event)
+
+        assert await worker_b.cancel_task("session-1") is True
+        await asyncio.wait_for(cancel_event.wait(), 1)
+
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        remote = await worker_b.get_task("session-1")
+        assert remote.status == "cancelled"
+
+    @pytest.mark.asyncio
+    async def test_remote_cancel_event_publishes(self, workers):
+        """Setting the cancel event of a remote task cancels it on its worker."""
+        worker_a, worker_b = workers
+        task = asyncio.create_task(asyncio.sleep(10))
+        cancel_event = asyncio.Event()
+        await worker_a.register_task("session-1", "block-1", task, cancel_event)
+
+        remote = await worker_b.get_task("session-1")
+        remote.cancel_event.set()
+        await asyncio.wait_for(cancel_event.wait(), 1)
+        assert remote.cancel_event.is_set()
+        assert task.cancelled() or task.cancelling()
+
+    @pytest.mark.asyncio
+    async def test_cleanup_removes_own_record(self, workers):
+        """Cleaning up a finished task removes its shared record."""
+        worker_a, worker_b = workers
+        task = asyncio.create_task(asyncio.sleep(0))
+        await worker_a.register_task("session-1", "block-1", task, asyncio.Event())
+        await task
+
+        await worker_a.cleanup_task("session-1")
+
+        assert await worker_b.get_task("session-1") is None
@@ -0,0 +1,254 @@
+"""Tests for the agent context window manager."""
+
+import pytest
+from unittest.mock import MagicMock, patch
+
+from app.core.agent.context import (
+    ContextWindowManager,
+    HeuristicTokenizer,
+    LiteLLMTokenizer,
+    MESSAGE_OVERHEAD_TOKENS,
+    get_tokenizer,
+)
+from app.core.llm.providers import DEFAULT_CONTEXT_WINDOW, PROVIDER_METADATA, get_context_window
+
+
+def tool_result(name: str, size: int) -> dict:
+    return {"role": "user", "content": f"Tool '{name}' returned: " + "x" * size}
+
+
+@pytest.mark.unit
+class TestTokenizers:
+    """Test cases for the tokenizers."""
+
+    def test_heuristic_counts_four_chars_per_token(self):
+        """Test the heuristic estimate."""
+        tokenizer = HeuristicTokenizer()
+
+        assert tokenizer.count("") == 0
+        assert tokenizer.count("x" * 400) == 100
+
+    def test_litellm_tokenizer_falls_back_on_error(self):
+        """Test that tokenizer failures fall back to the heuristic."""
+        tokenizer = LiteLLMTokenizer("unknown-model")
+
+        with patch("litellm.token_counter", side_effect=Exception("no tokenizer")):
+            assert tokenizer.count("x" * 40) == 10
+
+    def test_get_tokenizer(self):
+        """Test selecting the tokenizer by name."""
+        assert isinstance(get_tokenizer("gpt-4o", "heuristic"), HeuristicTokenizer)
+        assert isinstance(get_tokenizer("gpt-4o", "litellm"), LiteLLMTokenizer)
+
+
+@pytest.mark.unit
+class TestContextWindowManager:
+    """Test cases for ContextWindowManager."""
+
+    def test_count_message_includes_function_call(self):
+        """Test counting content, function calls and images."""
+        manager = ContextWindowManager(budget=1000)
+
+        assert manager.count_message({"role": "user", "content": "x" * 40}) == (
+            10 + MESSAGE_OVERHEAD_TOKENS
+        )
+        call = {
+            "role": "assistant",
+            "content": None,
+            "function_call": {"name": "bash", "arguments": "x" * 40},
+        }
+        assert manager.count_message(call) == 1 + 10 + MESSAGE_OVERHEAD_TOKENS
+        image = {
+            "role": "user",
+            "content": [
+                {"type": "text", "text": "x" * 40},
+                {"type": "image_url", "image_url": {"url": "data:image/png;base64,AAAA"}},
+            ],
+        }
+        assert manager.count_message(image) > 1000
+
+    def test_count_message_is_cached(self):
+        """Test that each message is only tokenized once."""
+        tokenizer = MagicMock()
+        tokenizer.count.return_value = 5
+        manager = ContextWindowManager(budget=1000, tokenizer=tokenizer)
+        message = {"role": "user", "content": "hello"}
+
+        manager.count_message(message)
+        manager.count_message(message)
+
+        assert tokenizer.count.call_count == 1
+
+    def test_fit_under_budget_returns_copy(self):
+        """Test that prompts within budget are sent unchanged."""
+        manager = ContextWindowManager(budget=1000)
+        messages = [
+            {"role": "system", "content": "system"},
+            {"role": "user", "content": "hello"},
+        ]
+
+        fitted = manager.fit(messages)
+
+        assert fitted == messages
+        assert fitted is not messages
+        assert not manager.last_metrics.trimmed
+        assert manager.last_metrics.tokens_before == manager.last_metrics.tokens_after
+
+    def test_fit_elides_old_tool_outputs(self):
+        """Test that older tool outputs are cut down before anything is dropped."""
+        manager = ContextWindowManager(budget=700, keep_recent=2)
+        messages = [
+            {"role": "system", "content": "system"},
+            {"role": "user", "content": "run it"},
+            tool_result("bash", 2000),
+            tool_result("bash", 2000),
+            {"role": "user", "content": "now what?"},
+            tool_result("bash", 2000),
+        ]
+        original = [dict(message) for message in messages]
+
+        fitted = manager.fit(messages)
+
+        assert len(fitted) == len(messages)
+        assert "elided" in fitted[2]["content"]
+        assert fitted[2]["content"].startswith("Tool 'bash' returned: ")
+        # Most recent messages are pinned
+        assert fitted[-1] is messages[-1]
+        assert fitted[0] is messages[0]
+        # Inputs are never mutated
+        assert messages == original
+
+        metrics = manager.last_metrics
+        assert metrics.elided_messages >= 1
+        assert metrics.dropped_messages == 0
+        assert metrics.tokens_after <= metrics.budget < metrics.tokens_before
+
+    def test_fit_elides_history_images(self):
+        """Test that images in older vision tool results are dropped."""
+        manager = ContextWindowManager(budget=500, keep_recent=1)
+        messages = [
+            {"role": "system", "content": "system"},
+            {
+                "role": "user",
+                "content": [
+                    {"type": "text", "text": "Tool result (file_read): plot.png"},
+                    {"type": "image_url", "image_url": {"url": "data:image/png;base64,AAAA"}},
+                ],
+            },
+            {"role": "user", "content": "thanks"},
+        ]
+
+        fitted = manager.fit(messages)
+
+        assert isinstance(fitted[1]["content"], str)
+        assert fitted[1]["content"].startswith("Tool result (file_read): plot.png")
+        assert manager.last_metrics.elided_messages == 1
+
+    def test_fit_drops_oldest_messages_when_eliding_is_not_enough(self):
+        """Test that the oldest unpinned messages are dropped as a last resort."""
+        manager = ContextWindowManager(budget=300, keep_recent=1)
+        messages = [
+            {"role": "system", "content": "system"},
+            {"role": "user", "content": "x" * 1000},
+            {"role": "assistant", "content": "y" * 1000},
+            {"role": "user", "content": "latest"},
+        ]
+
+        fitted = manager.fit(messages)
+
+        assert fitted[0] is messages[0]
+        assert fitted[-1] is messages[-1]
+        assert messages[1] not in fitted
+        assert manager.last_metrics.dropped_messages >= 1
+        assert manager.last_metrics.messages_after == len(fitted)
+        assert manager.last_metrics.tokens_after <= 300
+
+    def test_fit_never_orphans_tool_results(self):
+        """Test that dropping turns keeps every tool call together with its results."""
+
+        def call(name: str) -> dict:
+            return {
+                "role": "assistant",
+                "content": None,
+                "function_call": {"name": name, "arguments": "{}"},
+            }
+
+        messages = [{"role": "system", "content": "system"}]
+        for turn in range(10):
+            messages += [
+                {"role": "user", "content": f"task {turn} " + "u" * 400},
+                call("file_read"),
+                tool_result("file_read", 150),
+                call("bash"),
+                tool_result("bash", 150),
+                {
+                    "role": "assistant",
+                    "content": None,
+                    "tool_calls": [{"id": f"call-{turn}", "function": {"name": "think"}}],
+                },
+                {"role": "tool", "tool_call_id": f"call-{turn}", "content": "ok"},
+                {"role": "assistant", "content": f"done {turn} " + "a" * 400},
+            ]
+        current_index = len(messages)
+        messages.append({"role": "user", "content": "current task"})
+        for _ in range(4):
+            messages += [call("bash"), tool_result("bash", 400)]
+
+        # keep_recent=3 would split the last call of the history from its result
+        manager = ContextWindowManager(budget=1500, keep_recent=3)
+        fitted = manager.fit(messages, current_index=current_index)
+
+        assert manager.last_metrics.dropped_messages > 0
+        assert fitted[0] is messages[0]
+        assert messages[current_index] in fitted
+        for index, message in enumerate(fitted):
+            if message.get("role") == "tool" or str(message.get("content")).startswith(
+                ("Tool '", "Tool result (")
+            ):
+                previous = fitted[index - 1]
+                assert previous.get("function_call") or previous.get("tool_calls"), index
+
+    def test_fit_reuses_elided_copies(self):
+        """Test that repeated calls elide each message only once."""
+        manager = ContextWindowManager(budget=700, keep_recent=1)
+        messages = [
+            {"role": "system", "content": "system"},
+            tool_result("bash", 4000),
+            {"role": "user", "content": "next"},
+        ]
+
+        first = manager.fit(messages)
+        messages.append({"role": "user", "content": "again"})
+        second = manager.fit(messages)
+
+        assert first[1] is second[1]
+
+    def test_for_model_uses_context_window(self):
+        """Test that the budget leaves room for the response."""
+        with patch("app.core.llm.providers.get_context_window", return_value=100000):
+            manager = ContextWindowManager.for_model("openai", "gpt-4o")
+
+        assert 50000 <= manager.budget < 100000
+
+
+@pytest.mark.unit
+class TestGetContextWindow:
+    """Test cases for get_context_window."""
+
+    def test_uses_litellm_model_info(self):
+        """Test that LiteLLM's metadata wins when it knows the model."""
+        get_context_window.cache_clear()
+        with patch("litellm.get_model_info", return_value={"max_input_tokens": 12345}):
+            assert get_context_window("openai", "some-model") == 12345
+        get_context_window.cache_clear()
+
+    def test_falls_back_to_provider_metadata(self):
+        """Test the PROVIDER_METADATA fallback for unknown models."""
+        get_context_window.cache_clear()
+        with patch("litellm.get_model_info", side_effect=Exception("unknown model")):
+            assert (
+                get_context_window("anthropic", "new-model")
+                == PROVIDER_METADATA["anthropic"]["context_window"]
+            )
+            assert get_context_window("no-such-provider", "model") == DEFAULT_CONTEXT_WINDOW
+        get_context_window.cache_clear()
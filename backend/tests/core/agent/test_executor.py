@@ -4,6 +4,7 @@ import pytest
 import asyncio
 from unittest.mock import AsyncMock, MagicMock
 
+from app.core.agent.context import ContextWindowManager
 from app.core.agent.executor import ReActAgent, AgentStep, AgentResponse
 from app.core.agent.tools.base import Tool, ToolRegistry, ToolResult, ToolParameter
 
@@ -38,6 +39,50 @@ class MockTool(Tool):
         return self._result
 
 
+class ReadOnlyMockTool(MockTool):
+    """Mock read-only tool that records how many calls overlap."""
+
+    def __init__(self, name: str = "file_read", tracker: dict = None):
+        super().__init__(name=name)
+        self.tracker = tracker if tracker is not None else {"running": 0, "max_running": 0}
+
+    @property
+    def read_only(self) -> bool:
+        return True
+
+    async def execute(self, **kwargs) -> ToolResult:
+        self.tracker["running"] += 1
+        self.tracker["max_running"] = max(self.tracker["max_running"], self.tracker["running"])
+        await asyncio.sleep(0.01)
+        self.tracker["running"] -= 1
+        return ToolResult(success=True, output=f"{self._name}: {kwargs.get('input')}")
+
+
+class StreamingMockTool(MockTool):
+    """Mock tool that reports output through an output callback."""
+
+    def __init__(self, name: str = "bash", chunks=None, hang: bool = False):
+        super().__init__(name=name, result=ToolResult(success=True, output="all output"))
+        self._chunks = chunks or []
+        self._hang = hang
+        self.cancelled = False
+
+    @property
+    def supports_output_streaming(self) -> bool:
+        return True
+
+    async def execute(self, output_callback=None, **kwargs) -> ToolResult:
+        for stream, text in self._chunks:
+            await output_callback(stream, text)
+        if self._hang:
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                self.cancelled = True
+                raise
+        return self._result
+
+
 @pytest.mark.unit
 class TestAgentStep:
     """Test cases for AgentStep model."""
@@ -177,6 +222,37 @@ class TestReActAgent:
         assert "test_tool" in system_message
         assert "A mock tool" in system_message
 
+    def test_system_message_memoized_per_tool_set(self, mock_llm_provider):
+        """Test the system message is reused until the tool set changes."""
+        registry = ToolRegistry()
+        registry.register(MockTool(name="zeta"))
+        registry.register(MockTool(name="alpha"))
+        agent = ReActAgent(llm_provider=mock_llm_provider, tool_registry=registry)
+
+        first = agent._build_system_message()
+        assert agent._build_system_message() is first
+        assert first.index("- alpha:") < first.index("- zeta:")
+
+        registry.register(MockTool(name="beta"))
+        assert "- beta:" in agent._build_system_message()
+
+    @pytest.mark.asyncio
+    async def test_records_llm_usage(self, mock_llm_provider):
+        """Test usage reported by the provider is kept per LLM call."""
+        from app.core.llm.prompt_cache import LLMUsage
+
+        async def mock_generate_stream(on_usage=None, **kwargs):
+            on_usage(LLMUsage(prompt_tokens=1200, cache_read_tokens=1024))
+            yield "Done"
+
+        mock_llm_provider.generate_stream = mock_generate_stream
+        agent = ReActAgent(llm_provider=mock_llm_provider, tool_registry=ToolRegistry())
+
+        _ = [item async for item in agent.run("Hi")]
+
+        assert len(agent.llm_usage) == 1
+        assert agent.llm_usage[0].cache_miss_tokens == 176
+
     def test_validate_before_edit_no_read(self, agent):
         """Test validation fails when file not read before edit."""
         messages = [
@@ -253,6 +329,39 @@ class TestReActAgent:
         assert chunk_events[0]["content"] == "Hello, "
         assert chunk_events[1]["content"] == "this is a response."
 
+    @pytest.mark.asyncio
+    async def test_run_fits_prompt_to_context_window(self, mock_llm_provider, mock_tool_registry):
+        """Test that long history is trimmed and prompt size recorded per call."""
+        sent = []
+
+        async def mock_generate_stream(messages, **kwargs):
+            sent.append(messages)
+            yield "Done."
+
+        mock_llm_provider.generate_stream = mock_generate_stream
+
+        agent = ReActAgent(
+            llm_provider=mock_llm_provider,
+            tool_registry=mock_tool_registry,
+            context_manager=ContextWindowManager(budget=3000, keep_recent=1),
+        )
+        history = [
+            {"role": "user", "content": f"Tool result (bash) [Success]: {'x' * 8000}"}
+            for _ in range(3)
+        ]
+
+        async for _ in agent.run("Hello", conversation_history=history):
+            pass
+
+        assert sent[0][0]["role"] == "system"
+        assert sent[0][-1] == {"role": "user", "content": "Hello"}
+        assert len(agent.prompt_metrics) == 1
+        metrics = agent.prompt_metrics[0]
+        assert metrics.trimmed
+        assert metrics.tokens_after <= 3000 < metrics.tokens_before
+        # History dicts are shared with the history cache and must stay intact
+        assert all(len(message["content"]) > 8000 for message in history)
+
     @pytest.mark.asyncio
     async def test_run_with_tool_call(self, mock_llm_provider):
         """Test run with tool execution."""
@@ -541,8 +650,8 @@ class TestReActAgent:
         assert streaming_events[0]["tool"] == "bash"
 
     @pytest.mark.asyncio
-    async def test_multiple_tool_calls_uses_first(self, mock_llm_provider):
-        """Test that only first tool call is executed per iteration."""
+    async def test_multiple_tool_calls_all_executed(self, mock_llm_provider):
+        """Test that every tool call of a turn is executed before the next LLM call."""
         registry = ToolRegistry()
         tool1 = MockTool(name="bash")
         tool2 = MockTool(name="file_read")
@@ -550,8 +659,9 @@ class TestReActAgent:
         registry.register(tool2)
 
         call_count = 0
+        second_call_messages = []
 
-        async def mock_generate_stream(**kwargs):
+        async def mock_generate_stream(messages, **kwargs):
             nonlocal call_count
             call_count += 1
             if call_count == 1:
@@ -565,6 +675,7 @@ class TestReActAgent:
                     "index": 1,
                 }
             else:
+                second_call_messages.extend(messages)
                 yield "Done"
 
         mock_llm_provider.generate_stream = mock_generate_stream
@@ -578,7 +689,181 @@ class TestReActAgent:
         async for item in agent.run("Do things"):
             results.append(item)
 
-        # Should only execute the first tool
+        # Both tools run in the order requested, each with its own action/observation
+        types = [r["type"] for r in results if r["type"] in ("action", "observation")]
+        assert types == ["action", "observation", "action", "observation"]
         action_events = [r for r in results if r["type"] == "action"]
-        assert len(action_events) == 1
-        assert action_events[0]["tool"] == "bash"
+        assert [a["tool"] for a in action_events] == ["bash", "file_read"]
+        assert call_count == 2
+
+        # Both results are fed back in the single follow-up LLM call
+        calls = [m["function_call"]["name"] for m in second_call_messages if m.get("function_call")]
+        assert calls == ["bash", "file_read"]
+        results_fed = [m for m in second_call_messages if "returned:" in str(m.get("content"))]
+        assert len(results_fed) == 2
+
+    @pytest.mark.asyncio
+    async def test_read_only_tool_calls_run_concurrently(self, mock_llm_provider):
+        """Test that consecutive read-only tool calls overlap."""
+        tracker = {"running": 0, "max_running": 0}
+        registry = ToolRegistry()
+        registry.register(ReadOnlyMockTool(name="file_read", tracker=tracker))
+        registry.register(ReadOnlyMockTool(name="search", tracker=tracker))
+
+        call_count = 0
+
+        async def mock_generate_stream(**kwargs):
+            nonlocal call_count
+            call_count += 1
+            if call_count == 1:
+                for index, (name, arg) in enumerate(
+                    [("file_read", "a.py"), ("file_read", "b.py"), ("search", "foo")]
+                ):
+                    yield {
+                        "function_call": {"name": name, "arguments": f'{{"input": "{arg}"}}'},
+                        "index": index,
+                    }
+            else:
+                yield "Done"
+
+        mock_llm_provider.generate_stream = mock_generate_stream
+        agent = ReActAgent(llm_provider=mock_llm_provider, tool_registry=registry)
+
+        results = [item async for item in agent.run("Explore")]
+
+        assert tracker["max_running"] == 3
+        observations = [r["content"] for r in results if r["type"] == "observation"]
+        assert observations == ["file_read: a.py", "file_read: b.py", "search: foo"]
+        assert call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_mutating_tool_calls_run_serially(self, mock_llm_provider):
+        """Test that a mutating call separates read-only calls and runs alone."""
+        tracker = {"running": 0, "max_running": 0}
+        order = []
+
+        class RecordingTool(MockTool):
+            async def execute(self, **kwargs) -> ToolResult:
+                order.append(("start", self._name))
+                assert tracker["running"] == 0
+                await asyncio.sleep(0.01)
+                order.append(("end", self._name))
+                return ToolResult(success=True, output="written")
+
+        registry = ToolRegistry()
+        registry.register(ReadOnlyMockTool(name="file_read", tracker=tracker))
+        registry.register(RecordingTool(name="file_write"))
+
+        call_count = 0
+
+        async def mock_generate_stream(**kwargs):
+            nonlocal call_count
+            call_count += 1
+            if call_count == 1:
+                for index, name in enumerate(["file_read", "file_write", "file_read"]):
+                    yield {
+                        "function_call": {"name": name, "arguments": '{"input": "x"}'},
+                        "index": index,
+                    }
+            else:
+                yield "Done"
+
+        mock_llm_provider.generate_stream = mock_generate_stream
+        agent = ReActAgent(llm_provider=mock_llm_provider, tool_registry=registry)
+
+        results = [item async for item in agent.run("Edit")]
+
+        assert tracker["max_running"] == 1
+        assert order == [("start", "file_write"), ("end", "file_write")]
+        tools = [r["tool"] for r in results if r["type"] == "action"]
+        assert tools == ["file_read", "file_write", "file_read"]
+
+    @pytest.mark.asyncio
+    async def test_batched_reads_not_counted_as_loop(self, mock_llm_provider):
+        """Test that reading many files in one turn doesn't trigger loop detection."""
+        registry = ToolRegistry()
+        registry.register(ReadOnlyMockTool(name="file_read"))
+
+        call_count = 0
+
+        async def mock_generate_stream(**kwargs):
+            nonlocal call_count
+            call_count += 1
+            if call_count == 1:
+                for index in range(6):
+                    yield {
+                        "function_call": {
+                            "name": "file_read",
+                            "arguments": f'{{"input": "{index}.py"}}',
+                        },
+                        "index": index,
+                    }
+            else:
+                yield "Done"
+
+        mock_llm_provider.generate_stream = mock_generate_stream
+        agent = ReActAgent(
+            llm_provider=mock_llm_provider, tool_registry=registry, max_same_tool_retries=3
+        )
+
+        results = [item async for item in agent.run("Read all")]
+
+        assert len([r for r in results if r["type"] == "observation"]) == 6
+        assert agent.tool_call_history == ["file_read"]
+
+    @pytest.mark.asyncio
+    async def test_streaming_tool_emits_output_chunks(self, mock_llm_provider):
+        """Test streaming tools relay output as action_output_chunk events."""
+        registry = ToolRegistry()
+        registry.register(StreamingMockTool(chunks=[("stdout", "a\n"), ("stderr", "b\n")]))
+
+        call_count = 0
+
+        async def mock_generate_stream(**kwargs):
+            nonlocal call_count
+            call_count += 1
+            if call_count == 1:
+                yield {"function_call": {"name": "bash", "arguments": '{"input": "make"}'}}
+            else:
+                yield "Done"
+
+        mock_llm_provider.generate_stream = mock_generate_stream
+        agent = ReActAgent(llm_provider=mock_llm_provider, tool_registry=registry)
+
+        results = [item async for item in agent.run("Build it")]
+        types = [r["type"] for r in results]
+
+        output_events = [r for r in results if r["type"] == "action_output_chunk"]
+        assert [(e["stream"], e["content"]) for e in output_events] == [
+            ("stdout", "a\n"),
+            ("stderr", "b\n"),
+        ]
+        assert output_events[0]["tool"] == "bash"
+        assert types.index("action_output_chunk") < types.index("observation")
+        observation = next(r for r in results if r["type"] == "observation")
+        assert observation["content"] == "all output"
+
+    @pytest.mark.asyncio
+    async def test_streaming_tool_cancelled_mid_run(self, mock_llm_provider):
+        """Test setting cancel_event aborts a running streaming tool."""
+        registry = ToolRegistry()
+        tool = StreamingMockTool(chunks=[("stdout", "working\n")], hang=True)
+        registry.register(tool)
+        cancel_event = asyncio.Event()
+
+        async def mock_generate_stream(**kwargs):
+            yield {"function_call": {"name": "bash", "arguments": '{"input": "sleep"}'}}
+
+        mock_llm_provider.generate_stream = mock_generate_stream
+        agent = ReActAgent(llm_provider=mock_llm_provider, tool_registry=registry)
+
+        results = []
+        async for item in agent.run("Run forever", cancel_event=cancel_event):
+            results.append(item)
+            if item["type"] == "action_output_chunk":
+                cancel_event.set()
+
+        assert results[-1]["type"] == "cancelled"
+        assert not any(r["type"] == "observation" for r in results)
+        await asyncio.sleep(0)
+        assert tool.cancelled is True
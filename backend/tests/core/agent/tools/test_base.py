@@ -180,6 +180,10 @@ class TestTool:
         assert definition.description == "A mock tool for testing"
         assert len(definition.parameters) == 2
 
+    def test_not_read_only_by_default(self):
+        """Test tools are treated as having side effects unless they opt out."""
+        assert MockTool().read_only is False
+
     def test_format_for_llm(self):
         """Test formatting tool for LLM function calling."""
         tool = MockTool()
@@ -322,3 +326,16 @@ class TestToolRegistry:
             assert tool_def["type"] == "function"
             assert "function" in tool_def
             assert "name" in tool_def["function"]
+
+    def test_get_tools_for_llm_stable(self):
+        """Test tool schemas are sorted by name and built once per tool set."""
+        registry = ToolRegistry()
+        registry.register(MockToolWithSchema())
+        registry.register(MockTool())
+
+        first = registry.get_tools_for_llm()
+        assert [t["function"]["name"] for t in first] == ["mock_schema_tool", "mock_tool"]
+        assert registry.get_tools_for_llm() is first
+
+        registry.unregister("mock_tool")
+        assert [t["function"]["name"] for t in registry.get_tools_for_llm()] == ["mock_schema_tool"]
@@ -172,3 +172,52 @@ class TestBashTool:
         assert "command" in props
         assert "workdir" in props
         assert "timeout" in props
+
+    @pytest.mark.asyncio
+    async def test_execute_streams_output(self, mock_container):
+        """Test output chunks reach the callback and the full output the result."""
+
+        async def fake_stream(command, workdir, timeout):
+            yield "stdout", "step 1\n"
+            yield "stderr", "warning\n"
+            yield "stdout", "step 2\n"
+            yield "exit", 0
+
+        mock_container.execute_stream = fake_stream
+        received = []
+
+        async def on_output(stream, text):
+            received.append((stream, text))
+
+        tool = BashTool(mock_container)
+        result = await tool.execute(command="make", output_callback=on_output)
+
+        assert received == [("stdout", "step 1\n"), ("stderr", "warning\n"), ("stdout", "step 2\n")]
+        assert result.success is True
+        assert "step 1\nstep 2" in result.output
+        assert "warning" in result.output
+        mock_container.execute.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_execute_streaming_failure_exit_code(self, mock_container):
+        """Test a streamed command's exit code decides success."""
+
+        async def fake_stream(command, workdir, timeout):
+            yield "stderr", "boom"
+            yield "exit", 2
+
+        mock_container.execute_stream = fake_stream
+
+        async def on_output(stream, text):
+            pass
+
+        tool = BashTool(mock_container)
+        result = await tool.execute(command="false", output_callback=on_output)
+
+        assert result.success is False
+        assert result.metadata["exit_code"] == 2
+        assert "boom" in result.output
+
+    def test_supports_output_streaming(self, mock_container):
+        """Test BashTool advertises output streaming."""
+        assert BashTool(mock_container).supports_output_streaming is True
@@ -26,8 +26,8 @@ class TestFileReadTool:
 
         assert tool.name == "file_read"
         assert "read" in tool.description.lower()
-        assert len(tool.parameters) == 1
-        assert tool.parameters[0].name == "path"
+        assert [p.name for p in tool.parameters] == ["path", "offset", "limit"]
+        assert tool.parameters[0].required is True
 
     @pytest.mark.asyncio
     async def test_read_text_file(self, mock_container):
@@ -57,6 +57,29 @@ class TestFileReadTool:
         assert "3:" in result.output
         assert result.metadata["line_count"] == 3
 
+    @pytest.mark.asyncio
+    async def test_read_with_offset_and_limit(self, mock_container):
+        """Test reading a slice of lines keeps the original line numbers."""
+        mock_container.read_file.return_value = "\n".join(f"line{i}" for i in range(1, 11))
+        tool = FileReadTool(mock_container)
+
+        result = await tool.execute(path="/workspace/out/test.txt", offset=4, limit=3)
+
+        assert result.success is True
+        assert result.output.splitlines() == ["   4: line4", "   5: line5", "   6: line6"]
+        assert result.metadata["line_count"] == 10
+
+    @pytest.mark.asyncio
+    async def test_read_offset_past_end(self, mock_container):
+        """Test that an offset past the last line reports the file length."""
+        mock_container.read_file.return_value = "line1\nline2"
+        tool = FileReadTool(mock_container)
+
+        result = await tool.execute(path="/workspace/out/test.txt", offset=5)
+
+        assert result.success is False
+        assert "2 lines" in result.error
+
     @pytest.mark.asyncio
     async def test_read_image_file(self, mock_container):
         """Test reading an image file."""
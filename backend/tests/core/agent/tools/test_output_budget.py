@@ -0,0 +1,169 @@
+"""Tests for the tool output budget."""
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from app.core.agent.tools.base import ToolResult
+from app.core.agent.tools.bash_tool import BashTool
+from app.core.agent.tools.file_tools import FileReadTool
+from app.core.agent.tools.output_budget import (
+    TOOL_OUTPUTS_DIR,
+    apply_output_budget,
+    fit_lines,
+    truncate_middle,
+)
+
+
+@pytest.fixture
+def container():
+    """Create a mock container that accepts spilled output."""
+    container = MagicMock()
+    container.execute = AsyncMock(return_value=(0, "", ""))
+    container.write_file = AsyncMock(return_value=True)
+    return container
+
+
+@pytest.mark.unit
+class TestTruncateMiddle:
+    """Test cases for truncate_middle."""
+
+    def test_short_text_unchanged(self):
+        """Test that text within the budget is returned as is."""
+        assert truncate_middle("hello", 10) == "hello"
+
+    def test_keeps_head_and_tail(self):
+        """Test that the middle is replaced with a marker."""
+        text = "H" * 600 + "M" * 5000 + "T" * 400
+
+        truncated = truncate_middle(text, 1000, "/workspace/out/.tool_outputs/x.txt")
+
+        assert truncated.startswith("H" * 600)
+        assert truncated.endswith("T" * 400)
+        assert "M" * 10 not in truncated
+        assert "5000 characters truncated" in truncated
+        assert "/workspace/out/.tool_outputs/x.txt" in truncated
+
+
+@pytest.mark.unit
+class TestApplyOutputBudget:
+    """Test cases for apply_output_budget."""
+
+    @pytest.mark.asyncio
+    async def test_small_output_untouched(self, container):
+        """Test that results within budget are returned without spilling."""
+        result = ToolResult(success=True, output="small")
+
+        budgeted = await apply_output_budget(container, result, max_chars=100)
+
+        assert budgeted is result
+        container.write_file.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_large_output_spilled(self, container):
+        """Test that oversized output is truncated and written to the workspace."""
+        output = "line\n" * 10000
+        result = ToolResult(success=True, output=output, metadata={"command": "cat big.log"})
+
+        budgeted = await apply_output_budget(container, result, max_chars=1000)
+
+        path = budgeted.metadata["full_output_path"]
+        assert path.startswith(f"{TOOL_OUTPUTS_DIR}/") and path.endswith(".txt")
+        container.write_file.assert_awaited_once_with(path, output)
+        assert len(budgeted.output) < 1200
+        assert path in budgeted.output
+        assert budgeted.metadata["output_truncated"] is True
+        assert budgeted.metadata["output_size"] == len(output)
+        assert budgeted.metadata["command"] == "cat big.log"
+        # Original result is left alone
+        assert result.output == output
+
+    @pytest.mark.asyncio
+    async def test_spill_failure_still_truncates(self, container):
+        """Test that output is truncated even if the spill file can't be written."""
+        container.write_file = AsyncMock(return_value=False)
+        result = ToolResult(success=True, output="x" * 5000)
+
+        budgeted = await apply_output_budget(container, result, max_chars=1000)
+
+        assert "full_output_path" not in budgeted.metadata
+        assert "characters truncated" in budgeted.output
+
+    @pytest.mark.asyncio
+    async def test_zero_budget_disables_truncation(self, container):
+        """Test that a budget of 0 turns truncation off."""
+        result = ToolResult(success=True, output="x" * 5000)
+
+        assert await apply_output_budget(container, result, max_chars=0) is result
+
+
+@pytest.mark.unit
+class TestFitLines:
+    """Test cases for fit_lines."""
+
+    def test_counts_lines_within_budget(self):
+        """Test that only whole lines that fit, newlines included, are counted."""
+        assert fit_lines(["aaaa", "bbbb", "cccc"], 9) == 2
+        assert fit_lines(["aaaa", "bbbb", "cccc"], 14) == 3
+
+    def test_keeps_at_least_one_line(self):
+        """Test that an over-long first line still counts, so reads make progress."""
+        assert fit_lines(["x" * 100, "y"], 10) == 1
+
+    def test_zero_budget_fits_everything(self):
+        """Test that a budget of 0 means no limit."""
+        assert fit_lines(["x" * 100] * 5, 0) == 5
+
+
+@pytest.mark.unit
+class TestToolsApplyBudget:
+    """Test that tools producing large output apply the budget."""
+
+    @pytest.mark.asyncio
+    async def test_bash_output_truncated(self, container, monkeypatch):
+        """Test that huge command output is truncated and spilled."""
+        monkeypatch.setattr("app.core.config.settings.tool_output_max_chars", 1000)
+        container.execute = AsyncMock(return_value=(0, "y" * 50000, ""))
+
+        result = await BashTool(container).execute(command="cat big.log")
+
+        assert result.success
+        assert len(result.output) < 1500
+        assert result.output.startswith("[SUCCESS]")
+        assert "Execution successful" in result.output
+        assert result.metadata["exit_code"] == 0
+        assert result.metadata["full_output_path"].startswith(TOOL_OUTPUTS_DIR)
+
+    @pytest.mark.asyncio
+    async def test_file_read_pages_large_files(self, container, monkeypatch):
+        """Test that a large text file read says which offset to read on from."""
+        monkeypatch.setattr("app.core.config.settings.tool_output_max_chars", 1000)
+        container.read_file = AsyncMock(return_value="\n".join(f"row {i}" for i in range(1, 10001)))
+        tool = FileReadTool(container)
+
+        first = await tool.execute(path="/workspace/out/big.txt")
+
+        assert first.success
+        assert len(first.output) < 1200
+        assert first.metadata["output_truncated"] is True
+        assert first.metadata["full_output_path"] == "/workspace/out/big.txt"
+        assert first.metadata["line_count"] == 10000
+        container.write_file.assert_not_called()
+        last_shown = first.output.split("[...")[0].strip().splitlines()[-1]
+        next_offset = int(last_shown.split(":")[0]) + 1
+        assert f'file_read(path="/workspace/out/big.txt", offset={next_offset})' in first.output
+
+        second = await tool.execute(path="/workspace/out/big.txt", offset=next_offset)
+
+        assert second.output.splitlines()[0] == f"{next_offset:>4}: row {next_offset}"
+
+    @pytest.mark.asyncio
+    async def test_file_read_single_long_line(self, container, monkeypatch):
+        """Test that a line longer than the budget is cut but still advances the offset."""
+        monkeypatch.setattr("app.core.config.settings.tool_output_max_chars", 1000)
+        container.read_file = AsyncMock(return_value="x" * 50000 + "\nend")
+
+        result = await FileReadTool(container).execute(path="/workspace/out/min.json")
+
+        assert len(result.output) < 1200
+        assert "characters truncated" in result.output
+        assert "offset=2" in result.output
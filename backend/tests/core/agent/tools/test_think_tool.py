@@ -20,6 +20,7 @@ class TestThinkTool:
         assert len(tool.parameters) == 1
         assert tool.parameters[0].name == "thought"
         assert tool.parameters[0].required is True
+        assert tool.read_only is True
 
     @pytest.mark.asyncio
     async def test_execute_simple_thought(self):
@@ -0,0 +1,331 @@
+"""Tests for LLM cassette recording and replay."""
+
+import asyncio
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.core.llm import cassette as cassette_module
+from app.core.llm.cassette import (
+    Cassette,
+    RecordingLLMProvider,
+    ReplayLLMProvider,
+    parse_replay_speed,
+    request_hash,
+)
+from app.core.llm.provider import LLMProvider, create_llm_provider
+
+MESSAGES = [{"role": "user", "content": "List the files"}]
+TOOLS = [{"type": "function", "function": {"name": "bash"}}]
+
+
+def _interaction(chunks, messages=MESSAGES, tools=None, usage=None):
+    return {
+        "request_hash": request_hash("gpt-5-mini", messages, tools),
+        "model": "gpt-5-mini",
+        "chunks": chunks,
+        "usage": usage,
+    }
+
+
+def _chunk(content=None, tool_call=None, usage=None):
+    item = MagicMock()
+    item.choices = [MagicMock()]
+    item.choices[0].delta.content = content
+    item.choices[0].delta.tool_calls = [tool_call] if tool_call else None
+    item.usage = usage
+    return item
+
+
+def _recorder(path):
+    return RecordingLLMProvider(Cassette(path), provider="openai", model="gpt-5-mini")
+
+
+def _replay(cassette, speed=0.0):
+    return ReplayLLMProvider(cassette, speed=speed, provider="openai", model="gpt-5-mini")
+
+
+@pytest.fixture(autouse=True)
+def fresh_cassettes(monkeypatch):
+    """Isolate the shared cassette cache per test."""
+    monkeypatch.setattr(cassette_module, "_cassettes", {})
+
+
+@pytest.mark.unit
+class TestParseReplaySpeed:
+    """Test replay speed parsing."""
+
+    def test_named_speeds(self):
+        assert parse_replay_speed("realtime") == 1.0
+        assert parse_replay_speed("instant") == 0.0
+        assert parse_replay_speed("accelerated") == 10.0
+
+    def test_factor(self):
+        assert parse_replay_speed("4x") == 4.0
+        assert parse_replay_speed(2.5) == 2.5
+
+    def test_invalid(self):
+        with pytest.raises(ValueError):
+            parse_replay_speed("warp")
+        with pytest.raises(ValueError):
+            parse_replay_speed(-1)
+
+
+@pytest.mark.unit
+class TestCassette:
+    """Test cassette storage and lookup."""
+
+    def test_save_and_load(self, tmp_path):
+        """Interactions survive a round trip through the file."""
+        path = str(tmp_path / "nested" / "llm.json")
+        cassette = Cassette(path)
+        cassette.add(_interaction([{"delay": 0.1, "chunk": "Hi"}]))
+        cassette.save()
+
+        loaded = Cassette.load(path)
+
+        assert len(loaded) == 1
+        assert loaded.interactions[0]["chunks"] == [{"delay": 0.1, "chunk": "Hi"}]
+
+    def test_load_missing(self, tmp_path):
+        """A missing file is an error unless recording."""
+        path = str(tmp_path / "none.json")
+        with pytest.raises(FileNotFoundError):
+            Cassette.load(path)
+        assert len(Cassette.load(path, missing_ok=True)) == 0
+
+    def test_find_by_hash_then_in_order(self):
+        """Known requests replay their own interaction; others cycle in order."""
+        first = _interaction([{"delay": 0, "chunk": "one"}], messages=[{"role": "user"}])
+        second = _interaction([{"delay": 0, "chunk": "two"}])
+        cassette = Cassette("unused.json", [first, second])
+
+        assert cassette.find(second["request_hash"]) is second
+        assert cassette.find(second["request_hash"]) is second
+        assert cassette.find("unknown") is first
+        assert cassette.find("unknown") is second
+        assert cassette.find("unknown") is first
+
+
+@pytest.mark.unit
+class TestRecordingLLMProvider:
+    """Test recording live streams."""
+
+    @pytest.mark.asyncio
+    async def test_records_chunks_timings_and_usage(self, tmp_path):
+        """Text, tool-call deltas, delays and usage all reach the cassette file."""
+        path = str(tmp_path / "llm.json")
+        provider = _recorder(path)
+
+        tool_call = MagicMock()
+        tool_call.function.name = "bash"
+        tool_call.function.arguments = '{"command": "ls"}'
+        tool_call.index = 0
+
+        async def mock_stream():
+            yield _chunk(content="Let me look")
+            await asyncio.sleep(0.02)
+            yield _chunk(
+                tool_call=tool_call,
+                usage={"prompt_tokens": 50, "completion_tokens": 5},
+            )
+
+        with patch("app.core.llm.provider.acompletion", new_callable=AsyncMock) as mock_acompletion:
+            mock_acompletion.return_value = mock_stream()
+            chunks = [c async for c in provider.generate_stream(MESSAGES, tools=TOOLS)]
+
+        saved = Cassette.load(path).interactions[0]
+        assert [c["chunk"] for c in saved["chunks"]] == chunks
+        assert saved["chunks"][1]["chunk"]["function_call"]["name"] == "bash"
+        assert saved["chunks"][1]["delay"] >= 0.015
+        assert saved["usage"]["prompt_tokens"] == 50
+        assert saved["request_hash"] == request_hash("gpt-5-mini", MESSAGES, TOOLS)
+        assert saved["complete"] is True
+
+    @pytest.mark.asyncio
+    async def test_consumer_time_not_recorded(self, tmp_path):
+        """Time the consumer spends on a chunk is not counted as model delay."""
+        path = str(tmp_path / "llm.json")
+        provider = _recorder(path)
+
+        async def mock_stream():
+            yield _chunk(content="a")
+            yield _chunk(content="b")
+
+        with patch("app.core.llm.provider.acompletion", new_callable=AsyncMock) as mock_acompletion:
+            mock_acompletion.return_value = mock_stream()
+            async for _ in provider.generate_stream(MESSAGES):
+                await asyncio.sleep(0.05)  # e.g. handler and DB work
+
+        saved = Cassette.load(path).interactions[0]
+        assert saved["chunks"][1]["delay"] < 0.04
+
+    @pytest.mark.asyncio
+    async def test_stream_closed_early_saved_incomplete(self, tmp_path):
+        """A stream the consumer abandons is saved but never replayed."""
+        path = str(tmp_path / "llm.json")
+        provider = _recorder(path)
+
+        async def mock_stream():
+            yield _chunk(content="a")
+            yield _chunk(content="b")
+
+        with patch("app.core.llm.provider.acompletion", new_callable=AsyncMock) as mock_acompletion:
+            mock_acompletion.return_value = mock_stream()
+            stream = provider.generate_stream(MESSAGES)
+            assert await stream.__anext__() == "a"
+            await stream.aclose()
+
+        cassette = Cassette.load(path)
+        assert cassette.interactions[0]["complete"] is False
+        assert [c["chunk"] for c in cassette.interactions[0]["chunks"]] == ["a"]
+        assert cassette.find(request_hash("gpt-5-mini", MESSAGES)) is None
+
+    @pytest.mark.asyncio
+    async def test_failed_stream_saved_incomplete(self, tmp_path):
+        """A stream that errors is saved marked incomplete and the error still raised."""
+        path = str(tmp_path / "llm.json")
+        provider = _recorder(path)
+
+        async def mock_stream():
+            yield _chunk(content="a")
+            raise ConnectionError("reset")
+
+        with patch("app.core.llm.provider.acompletion", new_callable=AsyncMock) as mock_acompletion:
+            mock_acompletion.return_value = mock_stream()
+            with pytest.raises(Exception):
+                async for _ in provider.generate_stream(MESSAGES):
+                    pass
+
+        assert Cassette.load(path).interactions[0]["complete"] is False
+
+
+@pytest.mark.unit
+class TestReplayLLMProvider:
+    """Test replaying recorded streams."""
+
+    @pytest.mark.asyncio
+    async def test_replays_chunks_and_usage(self):
+        """The recorded chunk sequence and usage come back without a model call."""
+        tool_chunk = {"function_call": {"name": "bash", "arguments": "{}"}, "index": 0}
+        cassette = Cassette(
+            "unused.json",
+            [
+                _interaction(
+                    [{"delay": 0.5, "chunk": "Hi"}, {"delay": 0.5, "chunk": tool_chunk}],
+                    usage={
+                        "prompt_tokens": 10,
+                        "completion_tokens": 2,
+                        "cache_read_tokens": 8,
+                        "cache_write_tokens": 0,
+                    },
+                )
+            ],
+        )
+        provider = _replay(cassette)
+        reported = []
+
+        with patch("app.core.llm.provider.acompletion", new_callable=AsyncMock) as mock_acompletion:
+            chunks = [c async for c in provider.generate_stream(MESSAGES, on_usage=reported.append)]
+
+        mock_acompletion.assert_not_called()
+        assert chunks == ["Hi", tool_chunk]
+        assert reported[0].cache_read_tokens == 8
+        assert reported[0].prompt_tokens == 10
+
+    @pytest.mark.asyncio
+    async def test_speed_scales_delays(self):
+        """Accelerated replay divides the recorded delays."""
+        cassette = Cassette(
+            "unused.json",
+            [_interaction([{"delay": 0.05, "chunk": "a"}, {"delay": 0.05, "chunk": "b"}])],
+        )
+
+        started = time.monotonic()
+        _ = [c async for c in _replay(cassette, speed=1.0).generate_stream(MESSAGES)]
+        realtime = time.monotonic() - started
+
+        started = time.monotonic()
+        _ = [c async for c in _replay(cassette, speed=10.0).generate_stream(MESSAGES)]
+        accelerated = time.monotonic() - started
+
+        assert realtime >= 0.09
+        assert accelerated < realtime / 3
+
+    @pytest.mark.asyncio
+    async def test_empty_cassette(self):
+        """Replaying from an empty cassette fails like a provider error."""
+        with pytest.raises(Exception, match="empty"):
+            _ = [c async for c in _replay(Cassette("unused.json")).generate_stream(MESSAGES)]
+
+    @pytest.mark.asyncio
+    async def test_generate_joins_recorded_text(self):
+        """Non-streaming calls get the recorded text as a completion."""
+        cassette = Cassette(
+            "unused.json",
+            [_interaction([{"delay": 0, "chunk": "Hello"}, {"delay": 0, "chunk": " there"}])],
+        )
+
+        response = await _replay(cassette).generate(MESSAGES)
+
+        assert response.choices[0].message.content == "Hello there"
+
+
+@pytest.mark.unit
+class TestCassetteSelection:
+    """Test choosing record/replay through create_llm_provider."""
+
+    def test_live_by_default(self):
+        provider = create_llm_provider("openai", "gpt-5-mini", {}, cassette_mode="")
+        assert type(provider) is LLMProvider
+
+    def test_record(self, tmp_path):
+        provider = create_llm_provider(
+            "openai",
+            "gpt-5-mini",
+            {"temperature": 0.2},
+            api_key="sk-test",
+            cassette_mode="record",
+            cassette_path=str(tmp_path / "new.json"),
+        )
+        assert isinstance(provider, RecordingLLMProvider)
+        assert provider.api_key == "sk-test"
+        assert provider.config == {"temperature": 0.2}
+
+    def test_replay_shares_cassette(self, tmp_path):
+        path = str(tmp_path / "llm.json")
+        Cassette(path, [_interaction([{"delay": 0, "chunk": "Hi"}])]).save()
+
+        first = create_llm_provider(
+            "openai", "gpt-5-mini", {}, cassette_mode="replay", cassette_path=path
+        )
+        second = create_llm_provider(
+            "anthropic",
+            "claude-sonnet-4-5",
+            {},
+            cassette_mode="replay",
+            cassette_path=path,
+            replay_speed="instant",
+        )
+
+        assert isinstance(first, ReplayLLMProvider)
+        assert first.speed == 1.0
+        assert second.speed == 0.0
+        assert first.cassette is second.cassette
+        assert second.model == "claude-sonnet-4-5"
+
+    def test_unknown_mode(self):
+        with pytest.raises(ValueError):
+            create_llm_provider("openai", "gpt-5-mini", {}, cassette_mode="rewind")
+
+    def test_settings_select_mode(self, tmp_path):
+        """LLM_CASSETTE_MODE applies when no mode is passed."""
+        path = str(tmp_path / "llm.json")
+        with (
+            patch("app.core.llm.provider.settings.llm_cassette_mode", "record"),
+            patch("app.core.llm.provider.settings.llm_cassette_path", path),
+        ):
+            provider = create_llm_provider("openai", "gpt-5-mini", {})
+        assert isinstance(provider, RecordingLLMProvider)
+        assert provider.cassette.path == path
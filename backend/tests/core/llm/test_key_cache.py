@@ -0,0 +1,98 @@
+"""Tests for the decrypted API key cache."""
+
+from datetime import datetime
+from unittest.mock import patch
+
+import pytest
+import pytest_asyncio
+
+from app.core.llm.key_cache import ApiKeyCache
+from app.models.database import ApiKey
+
+
+class FakeClock:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def decrypt():
+    """Patch decryption to echo the ciphertext."""
+    with patch("app.core.security.encryption.get_encryption_service") as service:
+        service.return_value.decrypt.side_effect = lambda data: f"plain:{data.decode()}"
+        yield service.return_value.decrypt
+
+
+@pytest_asyncio.fixture
+async def stored_key(db_session):
+    """A stored OpenAI key."""
+    key = ApiKey(provider="openai", encrypted_key=b"v1")
+    db_session.add(key)
+    await db_session.commit()
+    return key
+
+
+@pytest.mark.unit
+class TestApiKeyCache:
+    """Test cases for ApiKeyCache."""
+
+    @pytest.mark.asyncio
+    async def test_hit_within_ttl_skips_database(self, db_session, stored_key, decrypt):
+        """Test a fresh entry is served without queries or decryption."""
+        cache = ApiKeyCache(ttl=60, clock=FakeClock())
+
+        first = await cache.get(db_session, "OpenAI")
+        with patch.object(db_session, "execute") as execute:
+            second = await cache.get(db_session, "openai")
+
+        execute.assert_not_called()
+        assert first is second
+        assert first.api_key == "plain:v1"
+        assert first.key_id == stored_key.id
+        assert decrypt.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_unchanged_row_not_decrypted_again(self, db_session, stored_key, decrypt):
+        """Test an expired entry is revalidated by row version alone."""
+        clock = FakeClock()
+        cache = ApiKeyCache(ttl=60, clock=clock)
+        await cache.get(db_session, "openai")
+
+        clock.now = 120
+        key = await cache.get(db_session, "openai")
+
+        assert key.api_key == "plain:v1"
+        assert cache.decrypt_count == 1
+
+    @pytest.mark.asyncio
+    async def test_replaced_key_picked_up_after_ttl(self, db_session, stored_key, decrypt):
+        """Test a new row version is decrypted once the entry expires."""
+        clock = FakeClock()
+        cache = ApiKeyCache(ttl=60, clock=clock)
+        await cache.get(db_session, "openai")
+
+        stored_key.encrypted_key = b"v2"
+        stored_key.created_at = datetime(2030, 1, 1)
+        await db_session.commit()
+
+        assert (await cache.get(db_session, "openai")).api_key == "plain:v1"
+        clock.now = 120
+        assert (await cache.get(db_session, "openai")).api_key == "plain:v2"
+
+    @pytest.mark.asyncio
+    async def test_missing_key_cached_and_invalidated(self, db_session, decrypt):
+        """Test absence is cached too, and invalidate forces a fresh lookup."""
+        cache = ApiKeyCache(ttl=60, clock=FakeClock())
+
+        assert await cache.get(db_session, "anthropic") is None
+        db_session.add(ApiKey(provider="anthropic", encrypted_key=b"ant"))
+        await db_session.commit()
+        assert await cache.get(db_session, "anthropic") is None
+
+        cache.invalidate("anthropic")
+        assert (await cache.get(db_session, "anthropic")).api_key == "plain:ant"
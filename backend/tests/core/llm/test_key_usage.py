@@ -0,0 +1,66 @@
+"""Tests for batched API key usage tracking."""
+
+from datetime import datetime, timedelta
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.llm.key_usage import ApiKeyUsageRecorder
+from app.models.database import ApiKey
+
+
+@pytest.fixture
+def session_factory(async_engine):
+    """Session factory on the test engine."""
+    return async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+
+
+@pytest_asyncio.fixture
+async def api_keys(db_session):
+    """Two stored API keys."""
+    keys = [
+        ApiKey(provider="openai", encrypted_key=b"enc-openai"),
+        ApiKey(provider="anthropic", encrypted_key=b"enc-anthropic"),
+    ]
+    db_session.add_all(keys)
+    await db_session.commit()
+    return keys
+
+
+async def _last_used(session_factory, key_id):
+    async with session_factory() as session:
+        result = await session.execute(select(ApiKey.last_used_at).where(ApiKey.id == key_id))
+        return result.scalar_one()
+
+
+@pytest.mark.unit
+class TestApiKeyUsageRecorder:
+    """Test cases for ApiKeyUsageRecorder."""
+
+    @pytest.mark.asyncio
+    async def test_touches_coalesce_into_one_write(self, session_factory, api_keys):
+        """Test repeated use of a key is written once, with the latest time."""
+        recorder = ApiKeyUsageRecorder(session_factory, flush_interval=60)
+        start = datetime(2024, 1, 1, 12, 0, 0)
+
+        for i in range(5):
+            recorder.touch(api_keys[0].id, start + timedelta(seconds=i))
+        recorder.touch(api_keys[1].id, start)
+
+        assert await recorder.flush() == 2
+        assert await _last_used(session_factory, api_keys[0].id) == start + timedelta(seconds=4)
+        assert await _last_used(session_factory, api_keys[1].id) == start
+        await recorder.close()
+
+    @pytest.mark.asyncio
+    async def test_touch_does_not_write(self, session_factory, api_keys):
+        """Test recording use leaves the database alone until a flush."""
+        recorder = ApiKeyUsageRecorder(session_factory, flush_interval=60)
+
+        recorder.touch(api_keys[0].id)
+
+        assert await _last_used(session_factory, api_keys[0].id) is None
+        await recorder.close()
+        assert await _last_used(session_factory, api_keys[0].id) is not None
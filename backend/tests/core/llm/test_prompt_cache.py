@@ -0,0 +1,137 @@
+"""Tests for prompt-prefix caching support."""
+
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.llm.prompt_cache import (
+    LLMUsage,
+    add_cache_breakpoints,
+    parse_usage,
+    prompt_caching_mode,
+)
+
+
+@pytest.mark.unit
+class TestPromptCachingMode:
+    """Test provider caching detection."""
+
+    def test_anthropic_is_explicit(self):
+        assert prompt_caching_mode("anthropic", "claude-sonnet-4-5") == "explicit"
+
+    def test_openai_is_automatic(self):
+        assert prompt_caching_mode("openai", "gpt-5-mini") == "automatic"
+
+    def test_claude_on_bedrock_is_explicit(self):
+        """Anthropic models keep explicit caching on other hosts."""
+        assert prompt_caching_mode("bedrock", "anthropic.claude-3-5-sonnet") == "explicit"
+        assert prompt_caching_mode("bedrock", "amazon.nova-pro") is None
+
+    def test_unsupported_provider(self):
+        assert prompt_caching_mode("ollama", "llama3") is None
+
+
+@pytest.mark.unit
+class TestParseUsage:
+    """Test reading token usage from usage payloads."""
+
+    def test_openai_cached_tokens(self):
+        """OpenAI reports hits in prompt_tokens_details."""
+        usage = SimpleNamespace(
+            prompt_tokens=2000,
+            completion_tokens=50,
+            prompt_tokens_details=SimpleNamespace(cached_tokens=1536),
+        )
+
+        parsed = parse_usage(usage)
+
+        assert parsed.cache_read_tokens == 1536
+        assert parsed.cache_miss_tokens == 464
+        assert parsed.cache_write_tokens == 0
+
+    def test_anthropic_cache_fields(self):
+        """Anthropic reports cache reads and writes separately."""
+        parsed = parse_usage(
+            {
+                "prompt_tokens": 3000,
+                "completion_tokens": 10,
+                "cache_read_input_tokens": 2500,
+                "cache_creation_input_tokens": 400,
+            }
+        )
+
+        assert parsed.cache_read_tokens == 2500
+        assert parsed.cache_write_tokens == 400
+        assert parsed.cache_hit_ratio == pytest.approx(2500 / 3000)
+
+    def test_missing_usage(self):
+        """Payloads without token counts yield nothing."""
+        assert parse_usage(None) is None
+        assert parse_usage({"prompt_tokens": None}) is None
+
+    def test_accumulate(self):
+        """Usage adds up across calls."""
+        total = LLMUsage()
+        total.add(LLMUsage(prompt_tokens=100, cache_read_tokens=80, completion_tokens=5))
+        total.add(LLMUsage(prompt_tokens=120, cache_read_tokens=100, completion_tokens=7))
+
+        assert total.prompt_tokens == 220
+        assert total.cache_read_tokens == 180
+        assert total.completion_tokens == 12
+
+
+@pytest.mark.unit
+class TestAddCacheBreakpoints:
+    """Test cache_control breakpoint placement."""
+
+    def _request(self):
+        messages = [
+            {"role": "system", "content": "You are an agent."},
+            {"role": "user", "content": "Read a.py"},
+            {
+                "role": "assistant",
+                "content": None,
+                "function_call": {"name": "file_read", "arguments": "{}"},
+            },
+            {"role": "user", "content": "Tool 'file_read' returned: ..."},
+        ]
+        tools = [
+            {"type": "function", "function": {"name": "bash"}},
+            {"type": "function", "function": {"name": "file_read"}},
+        ]
+        return messages, tools
+
+    def test_breakpoints_on_system_tools_and_history(self):
+        """System prompt, last tool and last message end cacheable prefixes."""
+        messages, tools = self._request()
+
+        marked_messages, marked_tools = add_cache_breakpoints(messages, tools)
+
+        assert marked_messages[0]["content"] == [
+            {"type": "text", "text": "You are an agent.", "cache_control": {"type": "ephemeral"}}
+        ]
+        assert marked_messages[-1]["content"][0]["cache_control"] == {"type": "ephemeral"}
+        assert marked_messages[1] is messages[1]
+        assert "cache_control" not in marked_tools[0]
+        assert marked_tools[-1]["cache_control"] == {"type": "ephemeral"}
+
+    def test_inputs_not_mutated(self):
+        """Memoized schemas and history stay untouched."""
+        messages, tools = self._request()
+
+        add_cache_breakpoints(messages, tools)
+
+        assert messages[0]["content"] == "You are an agent."
+        assert messages[-1]["content"] == "Tool 'file_read' returned: ..."
+        assert "cache_control" not in tools[-1]
+
+    def test_history_boundary_skips_empty_messages(self):
+        """The breakpoint goes on the last message that has content."""
+        messages, _ = self._request()
+        messages = messages[:3]
+
+        marked, tools = add_cache_breakpoints(messages)
+
+        assert tools is None
+        assert marked[2] is messages[2]
+        assert marked[1]["content"][0]["cache_control"] == {"type": "ephemeral"}
@@ -38,18 +38,42 @@ class TestLLMProvider:
         assert provider.api_key == "test-key"
         assert provider.config["temperature"] == 0.7
 
-    def test_set_api_key_openai(self):
-        """Test setting OpenAI API key in environment."""
+    def test_api_key_not_written_to_environment(self):
+        """Test API keys stay on the provider instead of the process environment."""
         with patch.dict(os.environ, {}, clear=True):
             _provider = LLMProvider(provider="openai", api_key="sk-test-key")
-            # API key should be set in environment
-            assert os.environ.get("OPENAI_API_KEY") == "sk-test-key"
+            _other = LLMProvider(provider="anthropic", api_key="sk-ant-test-key")
 
-    def test_set_api_key_anthropic(self):
-        """Test setting Anthropic API key in environment."""
-        with patch.dict(os.environ, {}, clear=True):
-            _provider = LLMProvider(provider="anthropic", api_key="sk-ant-test-key")
-            assert os.environ.get("ANTHROPIC_API_KEY") == "sk-ant-test-key"
+            assert "OPENAI_API_KEY" not in os.environ
+            assert "ANTHROPIC_API_KEY" not in os.environ
+
+    @pytest.mark.asyncio
+    async def test_credentials_passed_per_call(self):
+        """Test concurrent providers each send their own key and endpoint."""
+        first = LLMProvider(provider="openai", api_key="sk-one")
+        second = LLMProvider(
+            provider="openai", api_key="sk-two", api_base="https://proxy.example/v1"
+        )
+
+        with patch("app.core.llm.provider.acompletion", new_callable=AsyncMock) as mock_acompletion:
+            await first.generate(messages=[{"role": "user", "content": "Hi"}])
+            await second.generate(messages=[{"role": "user", "content": "Hi"}])
+
+        first_call, second_call = mock_acompletion.call_args_list
+        assert first_call.kwargs["api_key"] == "sk-one"
+        assert "api_base" not in first_call.kwargs
+        assert second_call.kwargs["api_key"] == "sk-two"
+        assert second_call.kwargs["api_base"] == "https://proxy.example/v1"
+
+    @pytest.mark.asyncio
+    async def test_no_api_key_leaves_environment_lookup_to_litellm(self):
+        """Test providers without a key send no api_key kwarg."""
+        provider = LLMProvider()
+
+        with patch("app.core.llm.provider.acompletion", new_callable=AsyncMock) as mock_acompletion:
+            await provider.generate(messages=[{"role": "user", "content": "Hi"}])
+
+        assert "api_key" not in mock_acompletion.call_args.kwargs
 
     def test_build_model_name_openai(self):
         """Test building model name for OpenAI."""
@@ -166,6 +190,104 @@ class TestLLMProvider:
             assert chunks[0]["function_call"]["name"] == "test_tool"
 
 
+@pytest.mark.unit
+class TestPromptCaching:
+    """Test prompt caching and usage reporting in generate_stream."""
+
+    def _stream(self, usage=None):
+        async def mock_stream():
+            chunk = MagicMock()
+            chunk.choices = [MagicMock()]
+            chunk.choices[0].delta.content = "Hi"
+            chunk.choices[0].delta.tool_calls = None
+            chunk.usage = None
+            yield chunk
+            if usage is not None:
+                final = MagicMock()
+                final.choices = []
+                final.usage = usage
+                yield final
+
+        return mock_stream()
+
+    @pytest.mark.asyncio
+    async def test_anthropic_gets_cache_breakpoints(self):
+        """Explicit-caching providers get cache_control on system prompt and tools."""
+        provider = LLMProvider(provider="anthropic", model="claude-sonnet-4-5")
+        messages = [
+            {"role": "system", "content": "System"},
+            {"role": "user", "content": "Hello"},
+        ]
+        tools = [{"type": "function", "function": {"name": "bash"}}]
+
+        with patch("app.core.llm.provider.acompletion", new_callable=AsyncMock) as mock_acompletion:
+            mock_acompletion.return_value = self._stream()
+            _ = [chunk async for chunk in provider.generate_stream(messages, tools=tools)]
+
+        kwargs = mock_acompletion.call_args.kwargs
+        assert kwargs["messages"][0]["content"][0]["cache_control"] == {"type": "ephemeral"}
+        assert kwargs["tools"][-1]["cache_control"] == {"type": "ephemeral"}
+        assert kwargs["stream_options"] == {"include_usage": True}
+        assert messages[0]["content"] == "System"
+
+    @pytest.mark.asyncio
+    async def test_automatic_caching_sends_request_unchanged(self):
+        """Automatic-caching providers only ask for usage."""
+        provider = LLMProvider(provider="openai", model="gpt-5-mini")
+        messages = [{"role": "system", "content": "System"}]
+
+        with patch("app.core.llm.provider.acompletion", new_callable=AsyncMock) as mock_acompletion:
+            mock_acompletion.return_value = self._stream()
+            _ = [chunk async for chunk in provider.generate_stream(messages)]
+
+        kwargs = mock_acompletion.call_args.kwargs
+        assert kwargs["messages"] is messages
+        assert kwargs["stream_options"] == {"include_usage": True}
+
+    @pytest.mark.asyncio
+    async def test_caching_disabled(self):
+        """LLM_PROMPT_CACHING=false leaves requests alone."""
+        provider = LLMProvider(provider="anthropic", model="claude-sonnet-4-5")
+        messages = [{"role": "system", "content": "System"}]
+
+        with (
+            patch("app.core.llm.provider.settings.llm_prompt_caching", False),
+            patch("app.core.llm.provider.acompletion", new_callable=AsyncMock) as mock_acompletion,
+        ):
+            mock_acompletion.return_value = self._stream()
+            _ = [chunk async for chunk in provider.generate_stream(messages)]
+
+        kwargs = mock_acompletion.call_args.kwargs
+        assert kwargs["messages"] is messages
+        assert "stream_options" not in kwargs
+
+    @pytest.mark.asyncio
+    async def test_usage_recorded(self):
+        """Cache hits from the final chunk reach the callback, not the shared provider."""
+        provider = LLMProvider(provider="openai", model="gpt-5-mini")
+        usage = {
+            "prompt_tokens": 1000,
+            "completion_tokens": 20,
+            "prompt_tokens_details": {"cached_tokens": 768},
+        }
+        reported = []
+
+        with patch("app.core.llm.provider.acompletion", new_callable=AsyncMock) as mock_acompletion:
+            mock_acompletion.return_value = self._stream(usage)
+            chunks = [
+                chunk
+                async for chunk in provider.generate_stream(
+                    [{"role": "user", "content": "Hi"}], on_usage=reported.append
+                )
+            ]
+
+        assert chunks == ["Hi"]
+        assert reported[0].cache_read_tokens == 768
+        assert reported[0].cache_miss_tokens == 232
+        assert reported[0].prompt_tokens == 1000
+        assert not hasattr(provider, "usage")
+
+
 @pytest.mark.unit
 class TestCreateLLMProvider:
     """Test cases for create_llm_provider function."""
@@ -192,6 +314,14 @@ class TestCreateLLMProvider:
 class TestCreateLLMProviderWithDB:
     """Test cases for create_llm_provider_with_db function."""
 
+    @pytest.fixture(autouse=True)
+    def fresh_caches(self, monkeypatch):
+        """Isolate the global provider registry and key cache per test."""
+        from app.core.llm import key_cache, registry
+
+        monkeypatch.setattr(registry, "_provider_registry", registry.LLMProviderRegistry(8))
+        monkeypatch.setattr(key_cache, "_api_key_cache", key_cache.ApiKeyCache())
+
     @pytest.mark.asyncio
     async def test_with_explicit_api_key(self, db_session):
         """Test with explicitly provided API key."""
@@ -211,3 +341,29 @@ class TestCreateLLMProviderWithDB:
         # Should return provider without API key (will use env var)
         assert provider is not None
         assert provider.api_key is None
+
+    @pytest.mark.asyncio
+    async def test_db_key_decrypted_once_and_usage_batched(self, db_session):
+        """Test stored keys are decrypted once and use isn't committed per call."""
+        from app.models.database import ApiKey
+
+        key = ApiKey(provider="openai", encrypted_key=b"ciphertext")
+        db_session.add(key)
+        await db_session.commit()
+
+        recorder = MagicMock()
+        with (
+            patch("app.core.llm.key_usage.get_api_key_usage_recorder", return_value=recorder),
+            patch("app.core.security.encryption.get_encryption_service") as encryption,
+        ):
+            decrypt = encryption.return_value.decrypt
+            decrypt.return_value = "sk-db"
+            first = await create_llm_provider_with_db("openai", "gpt-4o", {}, db=db_session)
+            second = await create_llm_provider_with_db("openai", "gpt-4o", {}, db=db_session)
+
+        assert first is second
+        assert first.api_key == "sk-db"
+        decrypt.assert_called_once_with(b"ciphertext")
+        assert recorder.touch.call_count == 2
+        await db_session.refresh(key)
+        assert key.last_used_at is None
@@ -0,0 +1,77 @@
+"""Tests for the LLM provider registry."""
+
+import litellm
+import pytest
+
+from app.core.llm.http_client import get_llm_http_client, shutdown_llm_http_client
+from app.core.llm.registry import LLMProviderRegistry, hash_secret
+
+
+@pytest.mark.unit
+class TestLLMProviderRegistry:
+    """Test cases for LLMProviderRegistry."""
+
+    def test_reuses_provider(self):
+        """Test the same provider, model, key and config share one instance."""
+        registry = LLMProviderRegistry(max_providers=8)
+
+        first = registry.get("openai", "gpt-4o", {"temperature": 0.2}, api_key="sk-a")
+        second = registry.get("OpenAI", "gpt-4o", {"temperature": 0.2}, api_key="sk-a")
+
+        assert first is second
+        assert (registry.hits, registry.misses) == (1, 1)
+
+    def test_distinguishes_key_model_and_config(self):
+        """Test a different key, model or config gets its own provider."""
+        registry = LLMProviderRegistry(max_providers=8)
+        base = registry.get("openai", "gpt-4o", {}, api_key="sk-a")
+
+        assert registry.get("openai", "gpt-4o", {}, api_key="sk-b") is not base
+        assert registry.get("openai", "gpt-4o-mini", {}, api_key="sk-a") is not base
+        assert registry.get("openai", "gpt-4o", {"temperature": 1}, api_key="sk-a") is not base
+        assert len(registry) == 4
+
+    def test_lru_eviction(self):
+        """Test the least recently used provider is dropped past the limit."""
+        registry = LLMProviderRegistry(max_providers=2)
+        a = registry.get("openai", "a", {})
+        registry.get("openai", "b", {})
+        registry.get("openai", "a", {})  # a is now most recent
+        registry.get("openai", "c", {})
+
+        assert registry.get("openai", "a", {}) is a
+        assert len(registry) == 2
+        assert registry.get("openai", "b", {}) is not None
+        assert registry.misses == 4  # b was evicted and had to be rebuilt
+
+    def test_invalidate_provider(self):
+        """Test invalidating one provider leaves others cached."""
+        registry = LLMProviderRegistry(max_providers=8)
+        registry.get("openai", "gpt-4o", {}, api_key="sk-a")
+        kept = registry.get("anthropic", "claude", {}, api_key="sk-b")
+
+        assert registry.invalidate("OPENAI") == 1
+        assert registry.get("anthropic", "claude", {}, api_key="sk-b") is kept
+
+    def test_hash_secret_never_plaintext(self):
+        """Test cache keys carry a digest rather than the key itself."""
+        assert hash_secret(None) == ""
+        assert "sk-secret" not in hash_secret("sk-secret")
+        assert hash_secret("sk-secret") == hash_secret(b"sk-secret")
+
+
+@pytest.mark.unit
+class TestLLMHttpClient:
+    """Test cases for the shared LLM HTTP client."""
+
+    @pytest.mark.asyncio
+    async def test_installed_as_litellm_session(self):
+        """Test the pooled client is shared and handed to LiteLLM."""
+        client = get_llm_http_client()
+
+        assert get_llm_http_client() is client
+        assert litellm.aclient_session is client
+
+        await shutdown_llm_http_client()
+        assert litellm.aclient_session is None
+        assert client.is_closed
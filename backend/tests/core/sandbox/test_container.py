@@ -1,9 +1,25 @@
 """Tests for SandboxContainer."""
 
+import asyncio
+import threading
+import time
 import pytest
 from unittest.mock import MagicMock
 
-from app.core.sandbox.container import SandboxContainer
+from app.core.sandbox.container import SandboxContainer, build_exec_command, clamp_exec_timeout
+
+
+def _tar_archive(name, content):
+    """Build a single-file tar archive."""
+    import io
+    import tarfile
+
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w") as tar:
+        info = tarfile.TarInfo(name=name)
+        info.size = len(content)
+        tar.addfile(info, io.BytesIO(content))
+    return buffer.getvalue()
 
 
 @pytest.mark.unit
@@ -97,6 +113,204 @@ class TestSandboxContainer:
         assert stdout == ""
         assert "Execution error" in stderr
 
+    @pytest.mark.asyncio
+    async def test_execute_wraps_command_with_timeout(self, mock_docker_container):
+        """Test execute enforces the timeout inside the container."""
+        mock_docker_container.exec_run.return_value = MagicMock(exit_code=0, output=(b"", b""))
+        container = SandboxContainer(mock_docker_container, "/tmp/ws")
+
+        await container.execute("sleep 1", timeout=10)
+
+        cmd = mock_docker_container.exec_run.call_args.kwargs["cmd"]
+        assert cmd[0] == "timeout"
+        assert cmd[-3:] == ["bash", "-c", "sleep 1"]
+        assert "10" in cmd
+
+    @pytest.mark.asyncio
+    async def test_execute_runs_off_event_loop(self, mock_docker_container):
+        """Test the blocking exec call does not run on the event loop thread."""
+        loop_thread = threading.get_ident()
+        exec_threads = []
+
+        def exec_run(**kwargs):
+            exec_threads.append(threading.get_ident())
+            return MagicMock(exit_code=0, output=(b"ok", b""))
+
+        mock_docker_container.exec_run = exec_run
+        container = SandboxContainer(mock_docker_container, "/tmp/ws")
+
+        exit_code, stdout, _ = await container.execute("echo ok")
+
+        assert exit_code == 0
+        assert stdout == "ok"
+        assert exec_threads and exec_threads[0] != loop_thread
+
+    @pytest.mark.asyncio
+    async def test_execute_does_not_block_other_tasks(self, mock_docker_container):
+        """Test a slow exec leaves the event loop free for other coroutines."""
+        release = threading.Event()
+
+        def exec_run(**kwargs):
+            release.wait(timeout=5)
+            return MagicMock(exit_code=0, output=(b"done", b""))
+
+        mock_docker_container.exec_run = exec_run
+        container = SandboxContainer(mock_docker_container, "/tmp/ws")
+
+        task = asyncio.create_task(container.execute("pytest"))
+        await asyncio.sleep(0.05)
+        assert not task.done()
+
+        release.set()
+        exit_code, stdout, _ = await task
+        assert exit_code == 0
+        assert stdout == "done"
+
+    @pytest.mark.asyncio
+    async def test_execute_reports_timeout(self, mock_docker_container):
+        """Test a command killed by the timeout reports it in stderr."""
+
+        def exec_run(**kwargs):
+            time.sleep(0.1)
+            return MagicMock(exit_code=124, output=(b"partial", b""))
+
+        mock_docker_container.exec_run = exec_run
+        container = SandboxContainer(mock_docker_container, "/tmp/ws")
+
+        exit_code, stdout, stderr = await container.execute("sleep 60", timeout=0.05)
+
+        assert exit_code == 124
+        assert stdout == "partial"
+        assert "timed out after 0.05s" in stderr
+
+    @pytest.mark.asyncio
+    async def test_execute_wait_timeout(self, mock_docker_container, monkeypatch):
+        """Test execute gives up if the exec call never returns."""
+        release = threading.Event()
+
+        def exec_run(**kwargs):
+            release.wait(timeout=5)
+            return MagicMock(exit_code=0, output=(b"", b""))
+
+        mock_docker_container.exec_run = exec_run
+        monkeypatch.setattr("app.core.sandbox.container.EXEC_WAIT_SLACK", 0)
+        monkeypatch.setattr("app.core.sandbox.container.settings.sandbox_exec_kill_grace", 0)
+        container = SandboxContainer(mock_docker_container, "/tmp/ws")
+
+        exit_code, stdout, stderr = await container.execute("sleep 60", timeout=0.05)
+        release.set()
+
+        assert exit_code == 124
+        assert stdout == ""
+        assert "timed out" in stderr
+
+    @pytest.mark.asyncio
+    async def test_execute_never_unbounded(self, mock_docker_container, monkeypatch):
+        """Test a zero, negative or huge timeout is capped instead of disabling the limit."""
+        monkeypatch.setattr("app.core.sandbox.container.settings.sandbox_exec_max_timeout", 600)
+        mock_docker_container.exec_run.return_value = MagicMock(exit_code=0, output=(b"", b""))
+        container = SandboxContainer(mock_docker_container, "/tmp/ws")
+
+        for timeout in (0, -5, None, 10**6):
+            await container.execute("sleep 60", timeout=timeout)
+            cmd = mock_docker_container.exec_run.call_args.kwargs["cmd"]
+            assert cmd[0] == "timeout" and cmd[2] == "600"
+
+        assert clamp_exec_timeout(30) == 30
+
+    @staticmethod
+    def _mock_exec_api(mock_docker_container, frames, exit_code=0):
+        """Wire the low-level exec API used by execute_stream."""
+        api = mock_docker_container.client.api
+        api.exec_create.return_value = {"Id": "exec-1"}
+        api.exec_start.return_value = iter(frames)
+        api.exec_inspect.return_value = {"ExitCode": exit_code}
+        return api
+
+    @pytest.mark.asyncio
+    async def test_execute_stream_yields_output_and_exit_code(self, mock_docker_container):
+        """Test execute_stream relays stdout/stderr and ends with the exit code."""
+        self._mock_exec_api(
+            mock_docker_container,
+            [(b"line 1\n", None), (None, b"oops\n"), (b"line 2\n", None)],
+            exit_code=3,
+        )
+        container = SandboxContainer(mock_docker_container, "/tmp/ws")
+
+        items = [item async for item in container.execute_stream("make", timeout=10)]
+
+        assert items[-1] == ("exit", 3)
+        stdout = "".join(text for stream, text in items if stream == "stdout")
+        stderr = "".join(text for stream, text in items if stream == "stderr")
+        assert stdout == "line 1\nline 2\n"
+        assert stderr == "oops\n"
+
+    @pytest.mark.asyncio
+    async def test_execute_stream_coalesces_small_chunks(self, mock_docker_container):
+        """Test small chunks are batched until the size threshold is reached."""
+        self._mock_exec_api(mock_docker_container, [(b"x", None)] * 10)
+        container = SandboxContainer(mock_docker_container, "/tmp/ws")
+
+        items = [
+            item async for item in container.execute_stream("yes", flush_bytes=4, flush_interval=60)
+        ]
+
+        stdout_chunks = [text for stream, text in items if stream == "stdout"]
+        assert "".join(stdout_chunks) == "x" * 10
+        assert len(stdout_chunks) < 10
+
+    @pytest.mark.asyncio
+    async def test_execute_stream_decodes_split_utf8(self, mock_docker_container):
+        """Test multi-byte characters split across frames are decoded intact."""
+        data = "héllo".encode("utf-8")
+        self._mock_exec_api(mock_docker_container, [(data[:2], None), (data[2:], None)])
+        container = SandboxContainer(mock_docker_container, "/tmp/ws")
+
+        items = [item async for item in container.execute_stream("echo")]
+
+        assert "".join(text for stream, text in items if stream == "stdout") == "héllo"
+
+    @pytest.mark.asyncio
+    async def test_execute_stream_error(self, mock_docker_container):
+        """Test exec API failures are reported on stderr with exit code 1."""
+        mock_docker_container.client.api.exec_create.side_effect = Exception("gone")
+        container = SandboxContainer(mock_docker_container, "/tmp/ws")
+
+        items = [item async for item in container.execute_stream("ls")]
+
+        assert items[-1] == ("exit", 1)
+        assert "Execution error: gone" in items[-2][1]
+
+    @pytest.mark.asyncio
+    async def test_execute_stream_early_close_kills_process(self, mock_docker_container):
+        """Test abandoning the stream kills the exec'd process group."""
+        release = threading.Event()
+
+        def frames():
+            yield (b"started\n", None)
+            release.wait(timeout=5)
+
+        api = self._mock_exec_api(mock_docker_container, [])
+        api.exec_start.return_value = frames()
+        container = SandboxContainer(mock_docker_container, "/tmp/ws")
+
+        stream = container.execute_stream("sleep 100", flush_interval=0)
+        assert await stream.__anext__() == ("stdout", "started\n")
+        await stream.aclose()
+        release.set()
+
+        for _ in range(50):
+            if mock_docker_container.exec_run.called:
+                break
+            await asyncio.sleep(0.01)
+        kill_cmd = mock_docker_container.exec_run.call_args.args[0][-1]
+        assert "kill -TERM" in kill_cmd
+
+    def test_build_exec_command_without_timeout(self):
+        """Test commands without a timeout run bash directly."""
+        assert build_exec_command("ls", None) == ["bash", "-c", "ls"]
+        assert build_exec_command("ls", 0) == ["bash", "-c", "ls"]
+
     @pytest.mark.asyncio
     async def test_write_file(self, mock_docker_container):
         """Test writing file to container."""
@@ -155,6 +369,133 @@ class TestSandboxContainer:
 
         assert "Failed to read file" in str(exc_info.value)
 
+    @pytest.mark.asyncio
+    async def test_read_bytes_across_chunks(self, mock_docker_container):
+        """Test binary content survives archive chunks split at arbitrary points."""
+        content = bytes(range(256)) * 20
+        archive = _tar_archive("blob.bin", content)
+        chunks = [archive[i : i + 333] for i in range(0, len(archive), 333)]
+        mock_docker_container.get_archive = MagicMock(return_value=(iter(chunks), {}))
+        container = SandboxContainer(mock_docker_container, "/tmp/ws")
+
+        assert await container.read_bytes("/workspace/out/blob.bin") == content
+
+    @pytest.mark.asyncio
+    async def test_read_file_binary_as_data_uri(self, mock_docker_container):
+        """Test binary files are converted to a data URI at the read_file edge."""
+        archive = _tar_archive("plot.png", b"\x89PNG\r\n\x1a\n\x00")
+        mock_docker_container.get_archive = MagicMock(return_value=(iter([archive]), {}))
+        container = SandboxContainer(mock_docker_container, "/tmp/ws")
+
+        result = await container.read_file("/workspace/out/plot.png")
+
+        assert result.startswith("data:image/png;base64,")
+
+    @pytest.mark.asyncio
+    async def test_open_stream_yields_views_and_stops_early(self, mock_docker_container):
+        """Test open_stream yields memoryviews and stops reading after the member."""
+        archive = _tar_archive("data.txt", b"x" * 5000)
+        chunks = [archive[i : i + 1024] for i in range(0, len(archive), 1024)]
+        consumed = []
+
+        def bits():
+            for chunk in chunks:
+                consumed.append(chunk)
+                yield chunk
+
+        mock_docker_container.get_archive = MagicMock(return_value=(bits(), {}))
+        container = SandboxContainer(mock_docker_container, "/tmp/ws")
+
+        views = [view async for view in container.open_stream("/workspace/out/data.txt")]
+
+        assert all(isinstance(view, memoryview) for view in views)
+        assert b"".join(views) == b"x" * 5000
+        # Trailing padding and end-of-archive blocks are never pulled
+        assert len(consumed) < len(chunks)
+
+    @pytest.mark.asyncio
+    async def test_open_archive_with_exclude_uses_container_tar(self, mock_docker_container):
+        """Test excluded entries are left out by tar in the container, not streamed out."""
+        archive = _tar_archive("out/report.csv", b"a,b")
+        api = mock_docker_container.client.api
+        api.exec_create.return_value = {"Id": "exec-1"}
+        api.exec_start.return_value = iter([(archive, None)])
+        api.exec_inspect.return_value = {"ExitCode": 0}
+        container = SandboxContainer(mock_docker_container, "/tmp/ws")
+
+        members = {}
+        async for member, data in container.open_archive(
+            "/workspace/out", exclude=[".tool_outputs"]
+        ):
+            members[member.name] = members.get(member.name, b"") + bytes(data)
+
+        assert members == {"out/report.csv": b"a,b"}
+        mock_docker_container.get_archive.assert_not_called()
+        cmd = api.exec_create.call_args.args[1]
+        assert cmd == [
+            "tar",
+            "-cf",
+            "-",
+            "-C",
+            "/workspace",
+            "--exclude=out/.tool_outputs",
+            "--",
+            "out",
+        ]
+
+    @pytest.mark.asyncio
+    async def test_read_bytes_missing_file(self, mock_docker_container):
+        """Test a missing path surfaces as FileNotFoundError."""
+        from docker.errors import NotFound
+
+        mock_docker_container.get_archive = MagicMock(side_effect=NotFound("no such file"))
+        container = SandboxContainer(mock_docker_container, "/tmp/ws")
+
+        with pytest.raises(FileNotFoundError):
+            await container.read_bytes("/workspace/out/missing.bin")
+
+    @pytest.mark.asyncio
+    async def test_read_bytes_directory(self, mock_docker_container):
+        """Test reading a directory raises IsADirectoryError."""
+        import io
+        import tarfile
+
+        buffer = io.BytesIO()
+        with tarfile.open(fileobj=buffer, mode="w") as tar:
+            info = tarfile.TarInfo(name="out")
+            info.type = tarfile.DIRTYPE
+            tar.addfile(info)
+        mock_docker_container.get_archive = MagicMock(return_value=(iter([buffer.getvalue()]), {}))
+        container = SandboxContainer(mock_docker_container, "/tmp/ws")
+
+        with pytest.raises(IsADirectoryError):
+            await container.read_bytes("/workspace/out")
+
+    @pytest.mark.asyncio
+    async def test_write_bytes_streams_archive(self, mock_docker_container):
+        """Test write_bytes sends a valid tar stream without building it in memory."""
+        import io
+        import tarfile
+
+        sent = {}
+
+        def put_archive(path, data):
+            sent["path"] = path
+            sent["archive"] = b"".join(bytes(piece) for piece in data)
+            return True
+
+        mock_docker_container.put_archive = put_archive
+        container = SandboxContainer(mock_docker_container, "/tmp/ws")
+        content = bytes(range(256)) * 7
+
+        assert await container.write_bytes("/workspace/out/raw.bin", content) is True
+
+        assert sent["path"] == "/workspace/out"
+        with tarfile.open(fileobj=io.BytesIO(sent["archive"])) as tar:
+            member = tar.next()
+            assert member.name == "raw.bin"
+            assert tar.extractfile(member).read() == content
+
     def test_stop(self, mock_docker_container):
         """Test stopping container."""
         container = SandboxContainer(mock_docker_container, "/tmp/ws")
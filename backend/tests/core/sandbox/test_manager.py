@@ -0,0 +1,277 @@
+"""Tests for ContainerPoolManager's warm container pool."""
+
+import asyncio
+import io
+import tarfile
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.core.sandbox.manager import ContainerPoolManager
+
+
+def _make_container(name: str = "container") -> MagicMock:
+    """Create a mock Docker container."""
+    container = MagicMock()
+    container.id = f"{name}-id"
+    container.status = "running"
+    container.exec_run.return_value = MagicMock(exit_code=0, output=(b"", b""))
+    return container
+
+
+@pytest.fixture
+def storage():
+    """Mock workspace storage that supports adoption."""
+    storage = MagicMock()
+    storage.create_workspace = AsyncMock()
+    storage.delete_workspace = AsyncMock()
+    storage.adopt_workspace = AsyncMock(return_value=True)
+    storage.get_volume_config.side_effect = lambda sid: {f"vol-{sid}": {"bind": "/workspace"}}
+    return storage
+
+
+@pytest.fixture
+def project_storage():
+    """Mock project volume storage."""
+    project_storage = MagicMock()
+    project_storage.ensure_volume = AsyncMock()
+    project_storage.list_files = AsyncMock(return_value=[])
+    project_storage.get_volume_mount_config.return_value = {
+        "project-vol": {"bind": "/workspace/project_files", "mode": "ro"}
+    }
+    return project_storage
+
+
+@pytest.fixture
+def manager(storage, project_storage):
+    """Manager with a mocked Docker client handing out fresh containers."""
+    docker_client = MagicMock()
+    docker_client.containers.run.side_effect = lambda *a, **kw: _make_container(kw["name"])
+    docker_client.containers.list.return_value = []
+
+    with (
+        patch("app.core.sandbox.manager.docker.from_env", return_value=docker_client),
+        patch(
+            "app.core.sandbox.manager.get_project_volume_storage",
+            return_value=project_storage,
+        ),
+    ):
+        manager = ContainerPoolManager(pool_size=2, storage=storage, warm_env_types=["python3.13"])
+        manager._ensure_image_exists = MagicMock(return_value="openclaudeui-env-python3.13:latest")
+        yield manager
+
+
+async def _drain_refills(manager: ContainerPoolManager) -> None:
+    """Wait for background refill tasks to finish."""
+    while manager._refill_tasks:
+        await asyncio.gather(*manager._refill_tasks)
+
+
+@pytest.mark.unit
+class TestWarmPool:
+    """Test cases for the warm container pool."""
+
+    @pytest.mark.asyncio
+    async def test_start_fills_pool_per_env_type(self, manager, storage):
+        """start_warm_pool pre-starts pool_size containers per environment type."""
+        await manager.start_warm_pool()
+        await _drain_refills(manager)
+
+        assert manager.warm_count("python3.13") == 2
+        assert storage.create_workspace.await_count == 2
+        kwargs = manager.docker_client.containers.run.call_args.kwargs
+        assert kwargs["labels"] == {"openclaudeui.role": "warm-sandbox"}
+        assert kwargs["name"].startswith("openclaudeui-warm-")
+
+    @pytest.mark.asyncio
+    async def test_start_removes_stale_warm_containers(self, manager):
+        """Warm containers left by a previous run are removed on start."""
+        stale = _make_container("stale")
+        manager.docker_client.containers.list.return_value = [stale]
+
+        await manager.start_warm_pool()
+        await _drain_refills(manager)
+
+        stale.remove.assert_called_once_with(force=True)
+
+    @pytest.mark.asyncio
+    async def test_create_container_claims_warm_container(self, manager, storage):
+        """A new session takes a warm container instead of starting one."""
+        await manager.start_warm_pool()
+        await _drain_refills(manager)
+        run_calls = manager.docker_client.containers.run.call_count
+
+        sandbox = await manager.create_container("session-1", "project-1", "python3.13")
+
+        assert manager.docker_client.containers.run.call_count == run_calls
+        workspace_id = storage.adopt_workspace.await_args.args[0]
+        assert workspace_id.startswith("warm-")
+        storage.adopt_workspace.assert_awaited_once_with(workspace_id, "session-1")
+        sandbox.container.rename.assert_called_once_with("openclaudeui-sandbox-session-1")
+        sandbox.container.put_archive.assert_not_called()
+        assert manager.active_containers["session-1"] is sandbox
+
+        # The pool refills in the background
+        await _drain_refills(manager)
+        assert manager.warm_count("python3.13") == 2
+
+    @pytest.mark.asyncio
+    async def test_existing_workspace_uses_cold_start(self, manager, storage):
+        """Sessions that already have files get a container with their volume mounted."""
+        await manager.start_warm_pool()
+        await _drain_refills(manager)
+        storage.adopt_workspace.return_value = False
+
+        await manager.create_container("session-1", "project-1", "python3.13")
+
+        kwargs = manager.docker_client.containers.run.call_args.kwargs
+        assert kwargs["name"] == "openclaudeui-sandbox-session-1"
+        assert "vol-session-1" in kwargs["volumes"]
+        assert "project-vol" in kwargs["volumes"]
+        assert manager.warm_count("python3.13") == 2
+
+    @pytest.mark.asyncio
+    async def test_project_files_use_cold_start(self, manager, storage, project_storage):
+        """Uploaded project files are only ever mounted read-only, at container start."""
+        await manager.start_warm_pool()
+        await _drain_refills(manager)
+        project_storage.list_files.return_value = [MagicMock()]
+
+        await manager.create_container("session-1", "project-1", "python3.13")
+
+        storage.adopt_workspace.assert_not_awaited()
+        kwargs = manager.docker_client.containers.run.call_args.kwargs
+        assert kwargs["name"] == "openclaudeui-sandbox-session-1"
+        assert kwargs["volumes"]["project-vol"] == {
+            "bind": "/workspace/project_files",
+            "mode": "ro",
+        }
+        assert manager.warm_count("python3.13") == 2
+        # A mounted project needs no copying, so nothing is left registered
+        assert "session-1" not in manager._project_snapshots
+
+    @pytest.mark.asyncio
+    async def test_warm_and_cold_commands_see_same_environment(self, manager):
+        """Commands get SESSION_ID whichever way the container was started."""
+        cold = await manager.create_container("session-1", "project-1", "python3.13")
+        cold_env = manager.docker_client.containers.run.call_args.kwargs["environment"]
+
+        await manager.start_warm_pool()
+        await _drain_refills(manager)
+        warm = await manager.create_container("session-2", "project-1", "python3.13")
+        warm_env = {
+            **manager.docker_client.containers.run.call_args.kwargs["environment"],
+            **warm.environment,
+        }
+
+        assert cold.environment is None
+        assert cold_env == {"SESSION_ID": "session-1", "WORKSPACE": "/workspace"}
+        assert warm_env == {"SESSION_ID": "session-2", "WORKSPACE": "/workspace"}
+
+        await warm.execute("echo $SESSION_ID")
+        assert warm.container.exec_run.call_args.kwargs["environment"] == {
+            "SESSION_ID": "session-2"
+        }
+
+    @pytest.mark.asyncio
+    async def test_custom_env_vars_use_cold_start(self, manager, storage):
+        """Environment variables can't be added to a running container."""
+        await manager.start_warm_pool()
+        await _drain_refills(manager)
+
+        await manager.create_container(
+            "session-1", "project-1", "python3.13", {"env_vars": {"DEBUG": "1"}}
+        )
+
+        storage.adopt_workspace.assert_not_awaited()
+        kwargs = manager.docker_client.containers.run.call_args.kwargs
+        assert kwargs["environment"]["DEBUG"] == "1"
+        assert kwargs["environment"]["SESSION_ID"] == "session-1"
+
+    @pytest.mark.asyncio
+    async def test_packages_install_in_background(self, manager):
+        """Package installs don't block container creation; commands wait for them."""
+        install_started = asyncio.Event()
+        release_install = asyncio.Event()
+
+        async def _slow_install(sandbox, env_type, packages):
+            install_started.set()
+            await release_install.wait()
+
+        manager._install_packages = _slow_install
+        sandbox = await manager.create_container(
+            "session-1", "project-1", "python3.13", {"packages": ["numpy"]}
+        )
+        await install_started.wait()
+        assert not sandbox.setup_task.done()
+
+        command = asyncio.create_task(sandbox.execute("python -c 'import numpy'"))
+        await asyncio.sleep(0.05)
+        assert not command.done()
+
+        release_install.set()
+        exit_code, _, _ = await command
+        assert exit_code == 0
+
+    @pytest.mark.asyncio
+    async def test_install_packages_quotes_specs(self, manager):
+        """Package specs are shell-quoted."""
+        sandbox = MagicMock()
+        sandbox.execute = AsyncMock(return_value=(0, "", ""))
+
+        await manager._install_packages(sandbox, "python3.13", ["numpy>=2", "pandas"])
+
+        assert sandbox.execute.await_args.args[0] == "pip install 'numpy>=2' pandas"
+
+    @pytest.mark.asyncio
+    async def test_sync_project_file_updates_claimed_containers(self, manager):
+        """Uploads are copied into sandboxes holding a snapshot of the project files."""
+        await manager.start_warm_pool()
+        await _drain_refills(manager)
+        sandbox = await manager.create_container("session-1", "project-1", "python3.13")
+        sandbox.container.put_archive.reset_mock()
+
+        await manager.sync_project_file("project-1", "data.csv", b"a,b")
+        await manager.sync_project_file("project-2", "other.csv", b"x")
+
+        sandbox.container.put_archive.assert_called_once()
+        path, archive = sandbox.container.put_archive.call_args.args
+        assert path == "/workspace/project_files"
+        with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+            member = tar.getmember("data.csv")
+        assert member.mode & 0o222 == 0  # Read-only, like the cold-start mount
+
+    @pytest.mark.asyncio
+    async def test_upload_during_claim_reaches_container(self, manager, storage):
+        """An upload landing while a warm container is being claimed isn't lost."""
+        await manager.start_warm_pool()
+        await _drain_refills(manager)
+
+        async def adopt_while_uploading(workspace_id, session_id):
+            await manager.sync_project_file("project-1", "late.csv", b"1,2")
+            return True
+
+        storage.adopt_workspace.side_effect = adopt_while_uploading
+
+        sandbox = await manager.create_container("session-1", "project-1", "python3.13")
+
+        sandbox.container.put_archive.assert_called_once()
+        _, archive = sandbox.container.put_archive.call_args.args
+        with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+            assert tar.getnames() == ["late.csv"]
+        assert manager._project_snapshots["session-1"] == "project-1"
+        assert "session-1" not in manager._pending_project_changes
+
+    @pytest.mark.asyncio
+    async def test_stop_removes_unclaimed_containers(self, manager, storage):
+        """stop_warm_pool removes warm containers and their workspaces."""
+        await manager.start_warm_pool()
+        await _drain_refills(manager)
+        warm = list(manager._warm["python3.13"])
+
+        await manager.stop_warm_pool()
+
+        for entry in warm:
+            entry.container.remove.assert_called_once_with(force=True)
+        assert storage.delete_workspace.await_count == 2
+        assert manager.warm_count("python3.13") == 0
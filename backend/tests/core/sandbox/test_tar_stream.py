@@ -0,0 +1,119 @@
+"""Tests for incremental tar encoding and decoding."""
+
+import io
+import tarfile
+
+import pytest
+
+from app.core.sandbox.tar_stream import TarArchiveReader, TarMemberReader, iter_tar_file
+
+
+def _read_all(archive, chunk_size):
+    """Feed an archive to a reader in fixed-size chunks."""
+    reader = TarMemberReader()
+    content = bytearray()
+    for offset in range(0, len(archive), chunk_size):
+        for view in reader.feed(archive[offset : offset + chunk_size]):
+            content += view
+        if reader.done:
+            break
+    return reader, bytes(content)
+
+
+@pytest.mark.unit
+class TestTarMemberReader:
+    """Test cases for TarMemberReader."""
+
+    @pytest.mark.parametrize("chunk_size", [1, 7, 512, 4096, 1 << 20])
+    def test_chunk_boundaries(self, chunk_size):
+        """Test content is reassembled exactly whatever the chunking."""
+        content = bytes(range(256)) * 9 + b"tail"
+        archive = b"".join(bytes(piece) for piece in iter_tar_file("data.bin", content))
+
+        reader, result = _read_all(archive, chunk_size)
+
+        assert reader.done
+        assert reader.member.name == "data.bin"
+        assert result == content
+
+    def test_skips_pax_long_name_header(self):
+        """Test pax extended headers in front of the member are skipped."""
+        name = "n" * 150 + ".txt"
+        buffer = io.BytesIO()
+        with tarfile.open(fileobj=buffer, mode="w", format=tarfile.PAX_FORMAT) as tar:
+            info = tarfile.TarInfo(name=name)
+            info.size = 5
+            tar.addfile(info, io.BytesIO(b"hello"))
+
+        reader, result = _read_all(buffer.getvalue(), 100)
+
+        assert reader.member.name == name
+        assert result == b"hello"
+
+    def test_empty_file(self):
+        """Test a zero-length member completes without yielding content."""
+        archive = b"".join(bytes(piece) for piece in iter_tar_file("empty", b""))
+
+        reader, result = _read_all(archive, 512)
+
+        assert reader.done
+        assert result == b""
+
+    def test_empty_archive(self):
+        """Test an archive with no members raises FileNotFoundError."""
+        with pytest.raises(FileNotFoundError):
+            TarMemberReader().feed(tarfile.NUL * 1024)
+
+
+@pytest.mark.unit
+class TestTarArchiveReader:
+    """Test cases for TarArchiveReader."""
+
+    def test_walks_directory_archive(self):
+        """Test every member and its content is reported in order."""
+        buffer = io.BytesIO()
+        with tarfile.open(fileobj=buffer, mode="w", format=tarfile.GNU_FORMAT) as tar:
+            directory = tarfile.TarInfo(name="out")
+            directory.type = tarfile.DIRTYPE
+            tar.addfile(directory)
+            for name, content in [("out/a.txt", b"alpha"), ("out/" + "l" * 120, b"long")]:
+                info = tarfile.TarInfo(name=name)
+                info.size = len(content)
+                tar.addfile(info, io.BytesIO(content))
+
+        reader = TarArchiveReader()
+        files = {}
+        archive = buffer.getvalue()
+        for offset in range(0, len(archive), 300):
+            for info, view in reader.feed(archive[offset : offset + 300]):
+                files.setdefault(info.name, bytearray()).extend(view)
+
+        assert reader.finished
+        assert files == {"out": b"", "out/a.txt": b"alpha", "out/" + "l" * 120: b"long"}
+
+
+@pytest.mark.unit
+class TestIterTarFile:
+    """Test cases for iter_tar_file."""
+
+    def test_readable_by_tarfile(self):
+        """Test the produced stream is a valid archive."""
+        content = b"x" * 3000
+        pieces = list(iter_tar_file("out.txt", content, mode=0o600, chunk_size=1024))
+        archive = b"".join(bytes(piece) for piece in pieces)
+
+        assert len(archive) % tarfile.BLOCKSIZE == 0
+        with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+            member = tar.next()
+            assert member.mode == 0o600
+            assert tar.extractfile(member).read() == content
+
+    def test_content_yielded_as_views(self):
+        """Test content slices reference the input instead of copying it."""
+        content = bytearray(b"y" * 2500)
+
+        pieces = list(iter_tar_file("out.txt", content, chunk_size=1000))
+        views = [piece for piece in pieces if isinstance(piece, memoryview)]
+
+        assert [len(view) for view in views] == [1000, 1000, 500]
+        assert all(view.obj is content for view in views)
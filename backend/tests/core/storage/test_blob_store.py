@@ -0,0 +1,130 @@
+"""Tests for the content-addressed blob store."""
+
+import base64
+import hashlib
+
+import pytest
+from unittest.mock import AsyncMock
+
+from app.core.storage.blob_store import (
+    BlobStore,
+    guess_mime_type,
+    parse_data_uri,
+)
+from app.core.storage.local_storage import LocalStorage
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 32
+PNG_URI = "data:image/png;base64," + base64.b64encode(PNG).decode("ascii")
+
+
+@pytest.fixture
+def store(tmp_path):
+    """Create a blob store on local disk."""
+    return BlobStore(LocalStorage(workspace_base=str(tmp_path)))
+
+
+@pytest.mark.unit
+class TestDataUris:
+    """Test cases for data URI and MIME helpers."""
+
+    def test_parse_data_uri(self):
+        """Test decoding a base64 data URI."""
+        assert parse_data_uri(PNG_URI) == ("image/png", PNG)
+
+    def test_parse_rejects_non_base64(self):
+        """Test that plain text and URL-encoded data URIs are left alone."""
+        assert parse_data_uri("hello") is None
+        assert parse_data_uri("data:text/plain,hello") is None
+        assert parse_data_uri("data:image/png;base64,@@@") is None
+
+    def test_guess_mime_type(self):
+        """Test sniffing common formats."""
+        assert guess_mime_type(PNG) == "image/png"
+        assert guess_mime_type(b"\xff\xd8\xff\xe0rest") == "image/jpeg"
+        assert guess_mime_type(b"RIFF\x00\x00\x00\x00WEBPVP8 ") == "image/webp"
+        assert guess_mime_type(b'<svg xmlns="http://www.w3.org/2000/svg"/>') == "image/svg+xml"
+        assert guess_mime_type(b"\x00\x01") == "application/octet-stream"
+
+
+@pytest.mark.unit
+class TestBlobStore:
+    """Test cases for BlobStore."""
+
+    @pytest.mark.asyncio
+    async def test_put_and_get(self, store):
+        """Test that blobs are keyed by their SHA-256."""
+        blob_hash = await store.put(PNG)
+
+        assert blob_hash == hashlib.sha256(PNG).hexdigest()
+        assert await store.get(blob_hash) == PNG
+        assert await store.exists(blob_hash)
+
+    @pytest.mark.asyncio
+    async def test_put_deduplicates(self, tmp_path):
+        """Test that identical content is written once."""
+        storage = LocalStorage(workspace_base=str(tmp_path))
+        storage.write_file = AsyncMock(wraps=storage.write_file)
+        first = BlobStore(storage)
+        second = BlobStore(storage)  # Fresh process: only the backend knows the blob
+
+        assert await first.put(PNG) == await first.put(PNG)
+        await second.put(PNG)
+
+        assert storage.write_file.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_get_missing_or_invalid(self, store):
+        """Test that unknown and malformed hashes raise FileNotFoundError."""
+        with pytest.raises(FileNotFoundError):
+            await store.get("0" * 64)
+        with pytest.raises(FileNotFoundError):
+            await store.get("../../etc/passwd")
+        assert not await store.exists("../../etc/passwd")
+
+    @pytest.mark.asyncio
+    async def test_get_data_uri(self, store):
+        """Test inlining a blob for LLM requests."""
+        blob_hash = await store.put(PNG)
+
+        assert await store.get_data_uri(blob_hash) == PNG_URI
+
+    @pytest.mark.asyncio
+    async def test_put_failure_raises(self, store):
+        """Test that backend write failures surface."""
+        store.storage.write_file = AsyncMock(return_value=False)
+
+        with pytest.raises(IOError):
+            await store.put(PNG)
+
+    @pytest.mark.asyncio
+    async def test_externalize_image(self, store):
+        """Test replacing inline image data with a blob reference."""
+        metadata = {"type": "image", "filename": "a.png", "image_data": PNG_URI}
+
+        externalized = await store.externalize_image(metadata)
+
+        assert "image_data" not in externalized
+        assert externalized["filename"] == "a.png"
+        assert externalized["image_blob"] == {
+            "hash": hashlib.sha256(PNG).hexdigest(),
+            "mime_type": "image/png",
+            "size": len(PNG),
+        }
+        assert metadata["image_data"] == PNG_URI  # Input left intact
+        assert await store.get_mime_type(hashlib.sha256(PNG).hexdigest()) == "image/png"
+
+    @pytest.mark.asyncio
+    async def test_mime_type_missing(self, store):
+        """Test blobs stored without a type, and unknown hashes, have none recorded."""
+        blob_hash = await store.put(PNG)
+
+        assert await store.get_mime_type(blob_hash) is None
+        assert await store.get_mime_type("0" * 64) is None
+        assert await store.get_mime_type("../../etc/passwd") is None
+
+    @pytest.mark.asyncio
+    async def test_externalize_without_image(self, store):
+        """Test that metadata without an inline image is returned as is."""
+        metadata = {"path": "/workspace/out/a.txt"}
+
+        assert await store.externalize_image(metadata) is metadata
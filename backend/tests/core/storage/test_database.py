@@ -0,0 +1,249 @@
+"""Tests for database engine profiles and read/write routing."""
+
+import os
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import inspect, select, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.schema import CreateTable
+
+from app.core.storage.database import (
+    Base,
+    _create_missing_indexes,
+    _drop_superseded_indexes,
+    create_engines,
+    create_session_factory,
+    is_memory_sqlite_url,
+    sqlite_pragmas,
+)
+from app.models.database import ChatSession, ContentBlock, Project
+from app.models.database.content_block import ContentBlockAuthor, ContentBlockType
+
+# Live PostgreSQL tests run only when pointed at a server, e.g. a local test container
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL", "")
+
+
+@pytest_asyncio.fixture
+async def production_engines(tmp_path):
+    """Writer and reader engines of the production profile on a temp database file."""
+    url = f"sqlite+aiosqlite:///{tmp_path / 'profile.db'}"
+    write_engine, read_engine = create_engines(url, "production")
+    async with write_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield write_engine, read_engine
+    await write_engine.dispose()
+    await read_engine.dispose()
+
+
+@pytest.mark.unit
+class TestEngineProfiles:
+    """Test cases for create_engines."""
+
+    def test_default_profile_single_engine(self):
+        """Test the default profile keeps one engine with driver defaults."""
+        write_engine, read_engine = create_engines("sqlite+aiosqlite:///./x.db", "default")
+
+        assert read_engine is None
+        assert write_engine.url.database == "./x.db"
+
+    def test_memory_database_falls_back_to_default(self):
+        """Test :memory: databases can't be split across engines."""
+        assert is_memory_sqlite_url("sqlite+aiosqlite:///:memory:")
+        _, read_engine = create_engines("sqlite+aiosqlite:///:memory:", "production")
+
+        assert read_engine is None
+
+    def test_reader_pragmas_are_query_only(self):
+        """Test only the writer switches the journal mode and readers can't write."""
+        assert "PRAGMA journal_mode=WAL" in sqlite_pragmas()
+        assert "PRAGMA query_only=ON" in sqlite_pragmas(read_only=True)
+        assert "PRAGMA journal_mode=WAL" not in sqlite_pragmas(read_only=True)
+
+    @pytest.mark.asyncio
+    async def test_pragmas_applied_on_connect(self, production_engines):
+        """Test connections come up in WAL mode with the profile's settings."""
+        write_engine, read_engine = production_engines
+
+        async with write_engine.connect() as conn:
+            assert (await conn.execute(text("PRAGMA journal_mode"))).scalar() == "wal"
+            assert (await conn.execute(text("PRAGMA synchronous"))).scalar() == 1  # NORMAL
+            assert (await conn.execute(text("PRAGMA busy_timeout"))).scalar() > 0
+        async with read_engine.connect() as conn:
+            assert (await conn.execute(text("PRAGMA query_only"))).scalar() == 1
+
+
+@pytest.mark.unit
+class TestRoutingSession:
+    """Test cases for read/write routing in the production profile."""
+
+    @pytest.mark.asyncio
+    async def test_reads_use_pool_and_writes_use_writer(self, production_engines):
+        """Test selects go to the read pool and ORM writes to the writer."""
+        write_engine, read_engine = production_engines
+        factory = create_session_factory(write_engine, read_engine)
+
+        async with factory() as session:
+            assert session.sync_session.get_bind(clause=select(Project)) is read_engine.sync_engine
+            session.add(Project(name="routed"))
+            await session.commit()
+
+        async with factory() as session:
+            result = await session.execute(select(Project.name))
+            assert result.scalars().all() == ["routed"]
+
+    @pytest.mark.asyncio
+    async def test_reads_own_writes_before_commit(self, production_engines):
+        """Test a session that has written keeps reading from the writer."""
+        write_engine, read_engine = production_engines
+        factory = create_session_factory(write_engine, read_engine)
+
+        async with factory() as session:
+            session.add(Project(name="pending"))
+            await session.flush()
+            result = await session.execute(select(Project.name))
+            assert result.scalars().all() == ["pending"]
+            await session.rollback()
+
+            # Back on the read pool once the transaction is over
+            assert session.sync_session.get_bind(clause=select(Project)) is read_engine.sync_engine
+
+    @pytest.mark.asyncio
+    async def test_read_pool_rejects_writes(self, production_engines):
+        """Test a write that bypasses routing fails instead of racing the writer."""
+        _, read_engine = production_engines
+
+        async with read_engine.connect() as conn:
+            with pytest.raises(OperationalError):
+                await conn.execute(text("INSERT INTO projects (id, name) VALUES ('x', 'y')"))
+
+
+@pytest.mark.unit
+class TestPostgresSupport:
+    """Test cases for the PostgreSQL engine and schema."""
+
+    def test_postgres_engine_uses_pool_settings(self, monkeypatch):
+        """Test PostgreSQL URLs get a sized, pre-pinged pool regardless of profile."""
+        pytest.importorskip("asyncpg")
+        from app.core.config import settings
+
+        monkeypatch.setattr(settings, "postgres_pool_size", 7)
+        monkeypatch.setattr(settings, "postgres_max_overflow", 3)
+
+        write_engine, read_engine = create_engines(
+            "postgresql+asyncpg://user:pw@localhost:5432/db", "production"
+        )
+
+        assert read_engine is None
+        assert write_engine.pool.size() == 7
+        assert write_engine.pool._max_overflow == 3
+        assert write_engine.pool._pre_ping is True
+
+    def test_json_columns_are_jsonb_on_postgres(self):
+        """Test JSON columns compile to JSONB on PostgreSQL and JSON on SQLite."""
+        table = ContentBlock.__table__
+
+        postgres_ddl = str(CreateTable(table).compile(dialect=postgresql.dialect()))
+        sqlite_ddl = str(CreateTable(table).compile(dialect=sqlite.dialect()))
+
+        assert "content JSONB NOT NULL" in postgres_ddl
+        assert "content JSON NOT NULL" in sqlite_ddl
+
+    def test_content_blocks_composite_index(self):
+        """Test content_blocks has a (chat_session_id, sequence_number) index."""
+        columns = {
+            tuple(column.name for column in index.columns)
+            for index in ContentBlock.__table__.indexes
+        }
+
+        assert ("chat_session_id", "sequence_number") in columns
+        # The composite index covers these, so they'd only slow writes down
+        assert ("chat_session_id",) not in columns
+        assert ("sequence_number",) not in columns
+
+    @pytest.mark.asyncio
+    async def test_superseded_indexes_dropped(self, async_engine):
+        """Test init_db's index pass drops single-column indexes left by older versions."""
+        async with async_engine.begin() as conn:
+            await conn.execute(
+                text(
+                    "CREATE INDEX ix_content_blocks_sequence_number "
+                    "ON content_blocks (sequence_number)"
+                )
+            )
+            await conn.run_sync(_drop_superseded_indexes)
+            names = await conn.run_sync(
+                lambda sync_conn: {
+                    index["name"] for index in inspect(sync_conn).get_indexes("content_blocks")
+                }
+            )
+
+        assert "ix_content_blocks_sequence_number" not in names
+        assert "ix_content_blocks_session_sequence" in names
+
+    @pytest.mark.asyncio
+    async def test_missing_indexes_created_on_existing_tables(self, async_engine):
+        """Test init_db's index pass adds indexes to tables created before them."""
+        async with async_engine.begin() as conn:
+            await conn.execute(text("DROP INDEX ix_content_blocks_session_sequence"))
+            await conn.run_sync(_create_missing_indexes)
+            names = await conn.run_sync(
+                lambda sync_conn: {
+                    index["name"] for index in inspect(sync_conn).get_indexes("content_blocks")
+                }
+            )
+
+        assert "ix_content_blocks_session_sequence" in names
+
+
+@pytest.mark.integration
+@pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL not set")
+class TestPostgresIntegration:
+    """Round trip against a real PostgreSQL server (set TEST_DATABASE_URL)."""
+
+    @pytest.mark.asyncio
+    async def test_content_block_round_trip(self):
+        """Test blocks with JSONB content are written and listed in sequence order."""
+        write_engine, read_engine = create_engines(TEST_DATABASE_URL)
+        factory = create_session_factory(write_engine, read_engine)
+        try:
+            async with write_engine.begin() as conn:
+                await conn.run_sync(Base.metadata.drop_all)
+                await conn.run_sync(Base.metadata.create_all)
+
+            async with factory() as session:
+                project = Project(name="pg")
+                session.add(project)
+                await session.flush()
+                chat_session = ChatSession(project_id=project.id, name="pg")
+                session.add(chat_session)
+                await session.flush()
+                for sequence in (1, 0):
+                    session.add(
+                        ContentBlock(
+                            chat_session_id=chat_session.id,
+                            sequence_number=sequence,
+                            block_type=ContentBlockType.ASSISTANT_TEXT,
+                            author=ContentBlockAuthor.ASSISTANT,
+                            content={"text": f"block {sequence}", "nested": {"n": sequence}},
+                        )
+                    )
+                await session.commit()
+
+            async with factory() as session:
+                result = await session.execute(
+                    select(ContentBlock.content)
+                    .where(ContentBlock.chat_session_id == chat_session.id)
+                    .order_by(ContentBlock.sequence_number)
+                )
+                contents = result.scalars().all()
+
+            assert contents == [
+                {"text": "block 0", "nested": {"n": 0}},
+                {"text": "block 1", "nested": {"n": 1}},
+            ]
+        finally:
+            async with write_engine.begin() as conn:
+                await conn.run_sync(Base.metadata.drop_all)
+            await write_engine.dispose()
@@ -0,0 +1,249 @@
+"""Tests for StorageSidecarPool and the volume backends using it."""
+
+import io
+import tarfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock
+
+import pytest
+from docker.errors import APIError, NotFound as DockerNotFound
+
+from app.core.storage.sidecar_pool import StorageSidecarPool
+from app.core.storage.volume_storage import VolumeStorage
+from app.core.storage.project_volume_storage import ProjectVolumeStorage
+
+
+def _tar_bytes(name: str, content: bytes) -> bytes:
+    """Build a single-file tar archive."""
+    stream = io.BytesIO()
+    with tarfile.open(fileobj=stream, mode="w") as tar:
+        info = tarfile.TarInfo(name=name)
+        info.size = len(content)
+        tar.addfile(info, io.BytesIO(content))
+    return stream.getvalue()
+
+
+@pytest.fixture
+def docker_client():
+    """Docker client whose containers.run hands out fresh mock sidecars."""
+    client = MagicMock()
+    client.containers.get.side_effect = DockerNotFound("No such container")
+    client.volumes.get.return_value.attrs = {"Labels": None}
+
+    def _run(*args, **kwargs):
+        container = MagicMock()
+        container.exec_run.return_value = MagicMock(exit_code=0, output=(b"", b""))
+        return container
+
+    client.containers.run.side_effect = _run
+    return client
+
+
+@pytest.fixture
+def pool(docker_client):
+    """Sidecar pool with a long reap interval so the reaper stays idle."""
+    pool = StorageSidecarPool(docker_client, idle_ttl=60, reap_interval=3600)
+    yield pool
+    pool.shutdown()
+
+
+@pytest.mark.unit
+class TestStorageSidecarPool:
+    """Test cases for StorageSidecarPool."""
+
+    def test_reuses_sidecar_per_volume(self, pool, docker_client):
+        """Repeated operations on a volume reuse one container."""
+        first = pool.acquire("vol-a", "/workspace")
+        pool.exec("vol-a", "/workspace", ["true"])
+        pool.put_archive("vol-a", "/workspace", "/workspace", b"tar")
+
+        assert pool.acquire("vol-a", "/workspace") is first
+        assert docker_client.containers.run.call_count == 1
+
+        kwargs = docker_client.containers.run.call_args.kwargs
+        assert kwargs["volumes"] == {"vol-a": {"bind": "/workspace", "mode": "rw"}}
+        assert kwargs["detach"] is True
+
+    def test_separate_sidecar_per_volume(self, pool, docker_client):
+        """Each volume gets its own sidecar."""
+        assert pool.acquire("vol-a", "/workspace") is not pool.acquire("vol-b", "/data")
+        assert pool.active_count == 2
+
+    def test_exec_returns_demuxed_output(self, pool):
+        """exec returns exit code and separate stdout/stderr."""
+        container = pool.acquire("vol-a", "/workspace")
+        container.exec_run.return_value = MagicMock(exit_code=1, output=(None, b"oops"))
+
+        assert pool.exec("vol-a", "/workspace", ["false"]) == (1, b"", b"oops")
+        container.exec_run.assert_called_with(["false"], demux=True)
+
+    def test_put_archive_creates_missing_directory(self, pool):
+        """A missing target directory is created and the upload retried."""
+        container = pool.acquire("vol-a", "/workspace")
+        container.put_archive.side_effect = [DockerNotFound("Could not find the file"), True]
+
+        pool.put_archive("vol-a", "/workspace", "/workspace/out/new", b"tar")
+
+        container.exec_run.assert_called_once_with(["mkdir", "-p", "/workspace/out/new"])
+        assert container.put_archive.call_count == 2
+
+    def test_slow_start_does_not_block_other_volumes(self, pool, docker_client):
+        """A sidecar still starting for one volume doesn't hold up the others."""
+        ready = pool.acquire("vol-ready", "/workspace")
+        started, finish = threading.Event(), threading.Event()
+        fast_run = docker_client.containers.run.side_effect
+
+        def _slow_run(*args, **kwargs):
+            started.set()
+            assert finish.wait(5)
+            return fast_run(*args, **kwargs)
+
+        docker_client.containers.run.side_effect = _slow_run
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            slow = executor.submit(pool.acquire, "vol-slow", "/workspace")
+            assert started.wait(5)
+
+            assert pool.acquire("vol-ready", "/workspace") is ready
+            finish.set()
+            assert slow.result(timeout=5) is pool.acquire("vol-slow", "/workspace")
+
+    def test_concurrent_acquires_start_one_sidecar(self, pool, docker_client):
+        """Callers racing for a volume share the single sidecar being started."""
+        started, finish = threading.Event(), threading.Event()
+        fast_run = docker_client.containers.run.side_effect
+
+        def _slow_run(*args, **kwargs):
+            started.set()
+            assert finish.wait(5)
+            return fast_run(*args, **kwargs)
+
+        docker_client.containers.run.side_effect = _slow_run
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            futures = [executor.submit(pool.acquire, "vol-a", "/workspace") for _ in range(4)]
+            assert started.wait(5)
+            finish.set()
+            containers = {id(future.result(timeout=5)) for future in futures}
+
+        assert len(containers) == 1
+        assert docker_client.containers.run.call_count == 1
+
+    def test_failed_start_releases_reservation(self, pool, docker_client):
+        """A failed start lets the next caller try again."""
+        fast_run = docker_client.containers.run.side_effect
+        docker_client.containers.run.side_effect = APIError("pull access denied")
+
+        with pytest.raises(APIError):
+            pool.acquire("vol-a", "/workspace")
+
+        docker_client.containers.run.side_effect = fast_run
+        assert pool.acquire("vol-a", "/workspace") is not None
+        assert pool.active_count == 1
+
+    def test_replaces_dead_sidecar(self, pool, docker_client):
+        """A sidecar that stopped is replaced and the operation retried."""
+        dead = pool.acquire("vol-a", "/workspace")
+        dead.get_archive.side_effect = APIError("Container abc is not running")
+
+        replacement_bits = iter([b"data"])
+        docker_client.containers.run.side_effect = None
+        replacement = MagicMock()
+        replacement.get_archive.return_value = (replacement_bits, {})
+        docker_client.containers.run.return_value = replacement
+
+        assert pool.get_archive("vol-a", "/workspace", "/workspace/file") == b"data"
+        dead.remove.assert_called_once_with(force=True)
+        assert pool.acquire("vol-a", "/workspace") is replacement
+
+    def test_other_api_errors_propagate(self, pool):
+        """Errors unrelated to the sidecar's health are not retried."""
+        container = pool.acquire("vol-a", "/workspace")
+        container.get_archive.side_effect = DockerNotFound("Could not find the file")
+
+        with pytest.raises(DockerNotFound):
+            pool.get_archive("vol-a", "/workspace", "/workspace/missing")
+        assert pool.active_count == 1
+
+    def test_reap_idle_removes_expired_sidecars(self, pool):
+        """Sidecars idle past the TTL are removed, recent ones kept."""
+        old = pool.acquire("vol-old", "/workspace")
+        pool.acquire("vol-new", "/workspace")
+        pool._sidecars["vol-old"].last_used -= 120
+
+        assert pool.reap_idle() == 1
+        old.remove.assert_called_once_with(force=True)
+        assert pool.active_count == 1
+        assert "vol-new" in pool._sidecars
+
+    def test_release_removes_sidecar(self, pool):
+        """release removes the tracked sidecar."""
+        container = pool.acquire("vol-a", "/workspace")
+
+        pool.release("vol-a")
+
+        container.remove.assert_called_once_with(force=True)
+        assert pool.active_count == 0
+
+    def test_shutdown_removes_all(self, pool):
+        """shutdown removes every sidecar."""
+        containers = [pool.acquire(f"vol-{i}", "/workspace") for i in range(3)]
+
+        pool.shutdown()
+
+        for container in containers:
+            container.remove.assert_called_once_with(force=True)
+        assert pool.active_count == 0
+
+
+@pytest.mark.unit
+class TestVolumeStorageSidecars:
+    """Test that volume backends go through the sidecar pool."""
+
+    @pytest.mark.asyncio
+    async def test_volume_storage_reuses_sidecar(self, pool, docker_client):
+        """Workspace file operations share one sidecar per session volume."""
+        storage = VolumeStorage(docker_client, sidecars=pool)
+        volume_name = storage._get_volume_name("session-1")
+
+        assert await storage.write_file("session-1", "/workspace/out/a.txt", b"hello")
+
+        container = pool.acquire(volume_name, "/workspace")
+        container.get_archive.return_value = (iter([_tar_bytes("a.txt", b"hello")]), {})
+        container.exec_run.return_value = MagicMock(
+            exit_code=0, output=(b"/workspace/out/a.txt 5\n", None)
+        )
+
+        assert await storage.read_file("session-1", "/workspace/out/a.txt") == b"hello"
+        files = await storage.list_files("session-1", "/workspace/out")
+        assert await storage.file_exists("session-1", "/workspace/out/a.txt")
+
+        assert [(f.path, f.size) for f in files] == [("/workspace/out/a.txt", 5)]
+        assert docker_client.containers.run.call_count == 1
+        container.put_archive.assert_called_once()
+        assert container.put_archive.call_args.kwargs["path"] == "/workspace/out"
+
+    @pytest.mark.asyncio
+    async def test_delete_workspace_releases_sidecar(self, pool, docker_client):
+        """The sidecar is removed before the volume it holds."""
+        storage = VolumeStorage(docker_client, sidecars=pool)
+        container = pool.acquire(storage._get_volume_name("session-1"), "/workspace")
+
+        await storage.delete_workspace("session-1")
+
+        container.remove.assert_called_once_with(force=True)
+        docker_client.volumes.get.return_value.remove.assert_called_once_with(force=True)
+        assert pool.active_count == 0
+
+    @pytest.mark.asyncio
+    async def test_project_storage_uses_data_mount(self, pool, docker_client):
+        """Project uploads are written under /data in the project sidecar."""
+        storage = ProjectVolumeStorage(docker_client, sidecars=pool)
+
+        assert await storage.write_file("project-1", "data.csv", b"a,b")
+
+        kwargs = docker_client.containers.run.call_args.kwargs
+        assert kwargs["volumes"] == {
+            "openclaudeui-project-project-1": {"bind": "/data", "mode": "rw"}
+        }
+        container = pool.acquire("openclaudeui-project-project-1", "/data")
+        assert container.put_archive.call_args.kwargs["path"] == "/data"
@@ -0,0 +1,77 @@
+"""Tests for incremental zip encoding."""
+
+import io
+import zipfile
+
+import pytest
+
+from app.core.storage.zip_stream import INLINE_WRITE_BYTES, ZipStreamWriter, stream_zip
+
+
+async def _events(items):
+    """Async iterator over (name, size, chunk) triples."""
+    for item in items:
+        yield item
+
+
+async def _collect(chunks):
+    """Join a zip stream and open it."""
+    pieces = [piece async for piece in stream_zip(chunks)]
+    return pieces, zipfile.ZipFile(io.BytesIO(b"".join(pieces)))
+
+
+@pytest.mark.unit
+class TestZipStreamWriter:
+    """Test cases for ZipStreamWriter."""
+
+    def test_header_available_before_content(self):
+        """Test the local header is produced as soon as an entry opens."""
+        writer = ZipStreamWriter()
+
+        header = writer.open_entry("a.txt", 3)
+
+        assert header.startswith(b"PK\x03\x04")
+
+    def test_round_trip(self):
+        """Test a written archive reads back with every entry intact."""
+        writer = ZipStreamWriter()
+        parts = [writer.open_entry("a.txt", 5), writer.write(b"hello")]
+        parts += [writer.open_entry("b.bin"), writer.write(bytes(range(256))), writer.close()]
+
+        archive = zipfile.ZipFile(io.BytesIO(b"".join(parts)))
+
+        assert archive.namelist() == ["a.txt", "b.bin"]
+        assert archive.read("a.txt") == b"hello"
+        assert archive.read("b.bin") == bytes(range(256))
+        assert archive.testzip() is None
+
+
+@pytest.mark.unit
+class TestStreamZip:
+    """Test cases for stream_zip."""
+
+    @pytest.mark.asyncio
+    async def test_chunks_grouped_by_name(self):
+        """Test consecutive chunks with the same name form one entry."""
+        big = b"z" * (INLINE_WRITE_BYTES * 2)
+        events = [
+            ("report.csv", 10, memoryview(b"a,b\n")),
+            ("report.csv", 10, memoryview(b"1,2\n3,")),
+            ("empty.txt", 0, b""),
+            ("big.bin", len(big), big),
+        ]
+
+        pieces, archive = await _collect(_events(events))
+
+        assert len(pieces) > 1
+        assert archive.namelist() == ["report.csv", "empty.txt", "big.bin"]
+        assert archive.read("report.csv") == b"a,b\n1,2\n3,"
+        assert archive.read("empty.txt") == b""
+        assert archive.read("big.bin") == big
+
+    @pytest.mark.asyncio
+    async def test_no_entries(self):
+        """Test an empty input still yields a valid archive."""
+        _, archive = await _collect(_events([]))
+
+        assert archive.namelist() == []
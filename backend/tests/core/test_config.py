@@ -20,6 +20,7 @@ class TestSettings:
             assert settings.host == "127.0.0.1"
             assert settings.port == 8000
             assert settings.docker_container_pool_size == 5
+            assert settings.docker_warm_pool_env_types == ""  # Warm pool is opt-in
             assert settings.storage_mode == "volume"
             assert settings.default_llm_provider == "openai"
             assert settings.default_llm_model == "gpt-5-mini"
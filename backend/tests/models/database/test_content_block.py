@@ -3,7 +3,7 @@
 import pytest
 from sqlalchemy import select
 
-from app.models.database import ContentBlock
+from app.models.database import ContentBlock, ContentBlockTombstone
 from app.models.database.content_block import ContentBlockType, ContentBlockAuthor
 
 
@@ -217,3 +217,47 @@ class TestContentBlockModel:
         assert ContentBlockAuthor.ASSISTANT.value == "assistant"
         assert ContentBlockAuthor.SYSTEM.value == "system"
         assert ContentBlockAuthor.TOOL.value == "tool"
+
+    @pytest.mark.asyncio
+    async def test_delete_records_tombstone(self, db_session, sample_chat_session):
+        """Test deleting a block on its own leaves a tombstone for change sync."""
+        block = ContentBlock(
+            chat_session_id=sample_chat_session.id,
+            sequence_number=4,
+            block_type=ContentBlockType.USER_TEXT,
+            author=ContentBlockAuthor.USER,
+            content={"text": "gone"},
+        )
+        db_session.add(block)
+        await db_session.commit()
+        block_id = block.id
+
+        await db_session.delete(block)
+        await db_session.commit()
+
+        tombstone = await db_session.get(ContentBlockTombstone, block_id)
+        assert tombstone is not None
+        assert tombstone.chat_session_id == sample_chat_session.id
+        assert tombstone.sequence_number == 4
+        assert tombstone.deleted_at is not None
+
+    @pytest.mark.asyncio
+    async def test_session_delete_skips_tombstones(self, db_session, sample_chat_session):
+        """Test blocks removed with their session don't leave tombstones."""
+        db_session.add(
+            ContentBlock(
+                chat_session_id=sample_chat_session.id,
+                sequence_number=1,
+                block_type=ContentBlockType.USER_TEXT,
+                author=ContentBlockAuthor.USER,
+                content={"text": "x"},
+            )
+        )
+        await db_session.commit()
+        await db_session.refresh(sample_chat_session, ["content_blocks"])
+
+        await db_session.delete(sample_chat_session)
+        await db_session.commit()
+
+        result = await db_session.execute(select(ContentBlockTombstone))
+        assert result.scalars().all() == []
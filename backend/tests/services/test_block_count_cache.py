@@ -0,0 +1,79 @@
+"""Tests for BlockCountCache."""
+
+import pytest
+
+from app.models.database import ChatSession, ContentBlock
+from app.models.database.content_block import ContentBlockAuthor, ContentBlockType
+from app.services.block_count_cache import BlockCountCache
+
+
+def _block(chat_session_id, sequence):
+    return ContentBlock(
+        chat_session_id=chat_session_id,
+        block_type=ContentBlockType.USER_TEXT,
+        author=ContentBlockAuthor.USER,
+        content={"text": "x"},
+        sequence_number=sequence,
+    )
+
+
+@pytest.mark.unit
+class TestBlockCountCache:
+    """Test cases for BlockCountCache."""
+
+    @pytest.mark.asyncio
+    async def test_recounts_only_when_sequence_advances(self, db_session, sample_chat_session):
+        """Test totals are served from cache until a block is appended."""
+        cache = BlockCountCache()
+        db_session.add_all([_block(sample_chat_session.id, i) for i in range(3)])
+        await db_session.commit()
+
+        assert await cache.get_total(db_session, sample_chat_session.id) == 3
+        assert await cache.get_total(db_session, sample_chat_session.id) == 3
+        assert (cache.hits, cache.misses) == (1, 1)
+
+        db_session.add(_block(sample_chat_session.id, 3))
+        await db_session.commit()
+
+        assert await cache.get_total(db_session, sample_chat_session.id) == 4
+        assert cache.misses == 2
+
+    @pytest.mark.asyncio
+    async def test_recounts_after_block_deleted(self, db_session, sample_chat_session):
+        """Test deleting a block below the highest sequence number is noticed."""
+        cache = BlockCountCache()
+        blocks = [_block(sample_chat_session.id, i) for i in range(4)]
+        db_session.add_all(blocks)
+        await db_session.commit()
+        assert await cache.get_total(db_session, sample_chat_session.id) == 4
+
+        # Like the empty initial assistant text block dropped after tool blocks
+        await db_session.delete(blocks[1])
+        await db_session.commit()
+
+        assert await cache.get_total(db_session, sample_chat_session.id) == 3
+        assert cache.misses == 2
+
+    @pytest.mark.asyncio
+    async def test_empty_session_and_invalidate(self, db_session, sample_chat_session):
+        """Test empty sessions count as zero and invalidate forces a recount."""
+        cache = BlockCountCache()
+
+        assert await cache.get_total(db_session, sample_chat_session.id) == 0
+        cache.invalidate(sample_chat_session.id)
+        assert await cache.get_total(db_session, sample_chat_session.id) == 0
+        assert cache.misses == 2
+
+    @pytest.mark.asyncio
+    async def test_evicts_least_recently_used(self, db_session, sample_project):
+        """Test the cache keeps at most max_sessions totals."""
+        cache = BlockCountCache(max_sessions=2)
+        sessions = [ChatSession(project_id=sample_project.id, name=f"s{i}") for i in range(3)]
+        db_session.add_all(sessions)
+        await db_session.commit()
+
+        for chat_session in sessions:
+            await cache.get_total(db_session, chat_session.id)
+        await cache.get_total(db_session, sessions[0].id)
+
+        assert cache.misses == 4
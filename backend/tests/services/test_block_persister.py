@@ -0,0 +1,152 @@
+"""Tests for the write-behind BlockPersister."""
+
+import asyncio
+from unittest.mock import MagicMock
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.models.database import ContentBlock, ContentBlockAuthor, ContentBlockType
+from app.services.block_persister import BlockPersister
+from app.services.chunk_rope import ChunkRope
+
+
+@pytest.fixture
+def session_factory(async_engine):
+    """Session factory on the test engine."""
+    return async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+
+
+@pytest_asyncio.fixture
+async def blocks(db_session, sample_chat_session):
+    """Two streaming assistant blocks."""
+    created = []
+    for seq in (1, 2):
+        block = ContentBlock(
+            chat_session_id=sample_chat_session.id,
+            sequence_number=seq,
+            block_type=ContentBlockType.ASSISTANT_TEXT,
+            author=ContentBlockAuthor.ASSISTANT,
+            content={"text": ""},
+            block_metadata={"streaming": True},
+        )
+        db_session.add(block)
+        created.append(block)
+    await db_session.commit()
+    return created
+
+
+async def _load(session_factory, block_id: str) -> ContentBlock:
+    """Read a block back through a fresh session."""
+    async with session_factory() as session:
+        result = await session.execute(select(ContentBlock).where(ContentBlock.id == block_id))
+        return result.scalar_one()
+
+
+@pytest.mark.unit
+class TestBlockPersister:
+    """Test cases for BlockPersister."""
+
+    @pytest.mark.asyncio
+    async def test_updates_coalesce_per_block(self, session_factory, blocks):
+        """Repeated updates to a block are written once, with the latest value."""
+        persister = BlockPersister(session_factory, flush_interval=60, max_pending=100)
+        for i in range(100):
+            persister.update(blocks[0].id, content={"text": f"v{i}"})
+
+        assert await persister.flush() == 1
+        assert persister.flush_count == 1
+        assert (await _load(session_factory, blocks[0].id)).content == {"text": "v99"}
+        await persister.close()
+
+    @pytest.mark.asyncio
+    async def test_callable_resolved_at_write_time(self, session_factory, blocks):
+        """Lazy content is only built when the batch is written."""
+        persister = BlockPersister(session_factory, flush_interval=60, max_pending=100)
+        rope = ChunkRope(["Hel"])
+        persister.update(blocks[0].id, content=lambda: {"text": rope.text()})
+        rope.append("lo")
+
+        await persister.flush()
+
+        assert (await _load(session_factory, blocks[0].id)).content == {"text": "Hello"}
+        await persister.close()
+
+    @pytest.mark.asyncio
+    async def test_batch_with_different_columns(self, session_factory, blocks):
+        """Blocks updating different columns are written in the same flush."""
+        persister = BlockPersister(session_factory, flush_interval=60, max_pending=100)
+        persister.update(blocks[0].id, content={"text": "a"})
+        persister.update(blocks[1].id, metadata={"streaming": False})
+
+        assert await persister.flush() == 2
+
+        first = await _load(session_factory, blocks[0].id)
+        second = await _load(session_factory, blocks[1].id)
+        assert first.content == {"text": "a"}
+        assert first.block_metadata == {"streaming": True}
+        assert second.content == {"text": ""}
+        assert second.block_metadata == {"streaming": False}
+        await persister.close()
+
+    @pytest.mark.asyncio
+    async def test_background_flush_on_interval(self, session_factory, blocks):
+        """Pending updates are written by the background task without an explicit flush."""
+        persister = BlockPersister(session_factory, flush_interval=0.01, max_pending=100)
+        persister.update(blocks[0].id, content={"text": "later"})
+
+        for _ in range(100):
+            if not persister.has_pending():
+                break
+            await asyncio.sleep(0.01)
+
+        assert persister.write_count == 1
+        assert (await _load(session_factory, blocks[0].id)).content == {"text": "later"}
+        await persister.close()
+
+    @pytest.mark.asyncio
+    async def test_early_flush_when_too_many_pending(self, session_factory, blocks):
+        """Reaching max_pending wakes the background task before the interval."""
+        persister = BlockPersister(session_factory, flush_interval=60, max_pending=2)
+        persister.update(blocks[0].id, content={"text": "a"})
+        persister.update(blocks[1].id, content={"text": "b"})
+
+        for _ in range(100):
+            if not persister.has_pending():
+                break
+            await asyncio.sleep(0.01)
+
+        assert persister.write_count == 2
+        await persister.close()
+
+    @pytest.mark.asyncio
+    async def test_failed_write_keeps_updates(self, blocks):
+        """A failed flush puts its batch back; newer updates win over it."""
+        failing = MagicMock(side_effect=RuntimeError("database is locked"))
+        persister = BlockPersister(failing, flush_interval=60, max_pending=100)
+        persister.update(blocks[0].id, content={"text": "old"}, metadata={"streaming": True})
+
+        with pytest.raises(RuntimeError):
+            await persister.flush()
+        persister.update(blocks[0].id, content={"text": "new"})
+
+        assert persister.has_pending(blocks[0].id)
+        assert persister._pending[blocks[0].id] == {
+            "content": {"text": "new"},
+            "block_metadata": {"streaming": True},
+        }
+        persister._pending.clear()
+        await persister.close()
+
+    @pytest.mark.asyncio
+    async def test_close_writes_pending(self, session_factory, blocks):
+        """close() stops the worker and writes what is still queued."""
+        persister = BlockPersister(session_factory, flush_interval=60, max_pending=100)
+        persister.update(blocks[0].id, content={"text": "final"})
+
+        await persister.close()
+
+        assert not persister.has_pending()
+        assert (await _load(session_factory, blocks[0].id)).content == {"text": "final"}
@@ -0,0 +1,133 @@
+"""Tests for ChunkRope."""
+
+import pytest
+
+from app.services.chunk_rope import ChunkRope
+
+
+@pytest.mark.unit
+class TestChunkRope:
+    """Test cases for ChunkRope."""
+
+    def test_append_tracks_length(self):
+        """Length is the running total of appended characters."""
+        rope = ChunkRope()
+        rope.append("Hello")
+        rope.append("")
+        rope.append(" World")
+
+        assert len(rope) == 11
+        assert rope.chunk_count == 2
+        assert rope
+
+    def test_empty_rope(self):
+        """An empty rope has no text."""
+        rope = ChunkRope()
+
+        assert len(rope) == 0
+        assert not rope
+        assert rope.text() == ""
+        assert rope.read_since(0) == ""
+
+    def test_text_materializes_incrementally(self):
+        """text() joins all chunks and picks up later appends."""
+        rope = ChunkRope(["a", "b"])
+        assert rope.text() == "ab"
+
+        rope.append("c")
+
+        assert rope.text() == "abc"
+        assert str(rope) == "abc"
+
+    def test_read_since_offset(self):
+        """read_since returns the text after an offset, across chunk boundaries."""
+        rope = ChunkRope(["Hello", " ", "World"])
+
+        assert rope.read_since(0) == "Hello World"
+        assert rope.read_since(3) == "lo World"
+        assert rope.read_since(5) == " World"
+        assert rope.read_since(8) == "rld"
+        assert rope.read_since(11) == ""
+        assert rope.read_since(50) == ""
+
+    def test_chunks_since_index(self):
+        """chunks_since returns chunks from an index on."""
+        rope = ChunkRope([f"chunk{i}" for i in range(5)])
+
+        assert rope.chunks_since(3) == ["chunk3", "chunk4"]
+        assert rope.chunks_since(5) == []
+
+    def test_discard_head_keeps_absolute_positions(self):
+        """Offsets and indexes still refer to the whole stream after discarding."""
+        rope = ChunkRope(["aa", "bb", "cc", "dd"])
+
+        assert rope.discard_head(2) == 2
+
+        assert len(rope) == 8
+        assert rope.retained_length == 4
+        assert rope.first_index == 2
+        assert rope.start_offset == 4
+        assert rope.text() == "ccdd"
+        assert rope.chunks_since(3) == ["dd"]
+        assert rope.chunks_since(0) == ["cc", "dd"]
+        assert rope.read_since(5) == "cdd"
+        assert rope.read_since(0) == "ccdd"
+
+    def test_discard_without_compaction(self):
+        """Positions stay right while dropped chunks are still in the backing list."""
+        rope = ChunkRope([f"c{i}" for i in range(10)])
+
+        rope.discard_head(7)  # Dead prefix is compacted
+        rope.discard_head(6)  # Only the head index moves
+
+        assert rope.first_index == 4
+        assert rope.chunks_since(2) == [f"c{i}" for i in range(4, 10)]
+        assert rope.read_since(9) == "".join(f"c{i}" for i in range(4, 10))[1:]
+        assert rope.text() == "".join(f"c{i}" for i in range(4, 10))
+
+        rope.append("end")
+        assert rope.chunks_since(9) == ["c9", "end"]
+
+    def test_discard_to_length(self):
+        """Old chunks are dropped until the retained text fits, keeping the newest."""
+        rope = ChunkRope(["aaaa", "bbbb", "cccc"])
+
+        assert rope.discard_to_length(6) == 2
+        assert rope.text() == "cccc"
+        assert rope.first_index == 2
+
+        # The newest chunk is kept even if it alone is too long
+        assert rope.discard_to_length(1) == 0
+        assert rope.text() == "cccc"
+
+    def test_discard_to_bytes_counts_utf8(self):
+        """Byte limits count encoded size, not characters."""
+        rope = ChunkRope(["ab", "数据", "😀", "cd"])  # 2 + 6 + 4 + 2 bytes
+
+        assert rope.retained_bytes == 14
+        assert rope.discard_to_bytes(7) == 2
+        assert rope.text() == "😀cd"
+        assert rope.retained_bytes == 6
+        assert rope.retained_length == 3
+
+        # The newest chunk is kept even if it alone is too big
+        assert rope.discard_to_bytes(1) == 1
+        assert rope.text() == "cd"
+        assert rope.discard_to_bytes(1) == 0
+
+    def test_discard_head_noop(self):
+        """Nothing is dropped when fewer chunks than requested are held."""
+        rope = ChunkRope(["a"])
+
+        assert rope.discard_head(10) == 0
+        assert rope.text() == "a"
+
+    def test_clear(self):
+        """clear resets content and offsets."""
+        rope = ChunkRope(["a", "b"])
+        rope.text()
+        rope.clear()
+
+        assert len(rope) == 0
+        assert rope.chunk_count == 0
+        assert rope.text() == ""
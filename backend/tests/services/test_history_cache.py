@@ -0,0 +1,253 @@
+"""Tests for ConversationHistoryCache."""
+
+import base64
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import select
+from unittest.mock import AsyncMock
+
+from app.core.storage.blob_store import BLOB_URL_PREFIX, BlobStore
+from app.core.storage.local_storage import LocalStorage
+from app.models.database import ContentBlock, ContentBlockAuthor, ContentBlockType
+from app.services.history_cache import ConversationHistoryCache, format_block
+
+IMAGE = "data:image/png;base64,AAAA"
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 32
+
+
+def _block(session_id: str, seq: int, block_type: ContentBlockType, content: dict, **kwargs):
+    """Build a content block."""
+    author = {
+        ContentBlockType.USER_TEXT: ContentBlockAuthor.USER,
+        ContentBlockType.ASSISTANT_TEXT: ContentBlockAuthor.ASSISTANT,
+        ContentBlockType.TOOL_CALL: ContentBlockAuthor.ASSISTANT,
+        ContentBlockType.TOOL_RESULT: ContentBlockAuthor.TOOL,
+    }[block_type]
+    return ContentBlock(
+        chat_session_id=session_id,
+        sequence_number=seq,
+        block_type=block_type,
+        author=author,
+        content=content,
+        block_metadata=kwargs.get("metadata", {}),
+    )
+
+
+@pytest_asyncio.fixture
+async def conversation(db_session, sample_chat_session):
+    """A session with a user message, a tool call and an image result."""
+    sid = sample_chat_session.id
+    db_session.add_all(
+        [
+            _block(sid, 1, ContentBlockType.USER_TEXT, {"text": "look at this"}),
+            _block(
+                sid,
+                2,
+                ContentBlockType.TOOL_CALL,
+                {"tool_name": "file_read", "arguments": {"path": "a.png"}},
+            ),
+            _block(
+                sid,
+                3,
+                ContentBlockType.TOOL_RESULT,
+                {"tool_name": "file_read", "result": "image", "success": True},
+                metadata={"type": "image", "image_data": IMAGE},
+            ),
+        ]
+    )
+    await db_session.commit()
+    return sid
+
+
+@pytest.mark.unit
+class TestFormatBlock:
+    """Test cases for format_block."""
+
+    def test_empty_assistant_text_skipped(self):
+        """Empty assistant text produces no message."""
+        block = _block("s", 1, ContentBlockType.ASSISTANT_TEXT, {"text": ""})
+        assert format_block(block) == (None, None)
+
+    def test_tool_call(self):
+        """Tool calls carry JSON-encoded arguments."""
+        block = _block(
+            "s", 1, ContentBlockType.TOOL_CALL, {"tool_name": "bash", "arguments": {"cmd": "ls"}}
+        )
+        text_message, vision_message = format_block(block)
+        assert text_message["function_call"] == {"name": "bash", "arguments": '{"cmd": "ls"}'}
+        assert vision_message is None
+
+    def test_image_result_has_both_projections(self):
+        """Image results get a text message and a multi-part vision message."""
+        block = _block(
+            "s",
+            1,
+            ContentBlockType.TOOL_RESULT,
+            {"tool_name": "file_read", "result": "img", "success": True},
+            metadata={"type": "image", "image_data": IMAGE},
+        )
+        text_message, vision_message = format_block(block)
+        assert text_message["content"] == "Tool result (file_read) [Success]: img"
+        assert vision_message["content"][1]["image_url"]["url"] == IMAGE
+
+
+@pytest.mark.unit
+class TestConversationHistoryCache:
+    """Test cases for ConversationHistoryCache."""
+
+    @pytest.mark.asyncio
+    async def test_builds_history(self, db_session, conversation):
+        """The first call formats every block."""
+        cache = ConversationHistoryCache()
+
+        history = await cache.get_history(db_session, conversation, vision=False)
+
+        assert [m["role"] for m in history] == ["user", "assistant", "user"]
+        assert history[2]["content"].startswith("Tool result (file_read) [Success]")
+        assert cache.misses == 1
+
+    @pytest.mark.asyncio
+    async def test_appends_only_new_blocks(self, db_session, conversation):
+        """Later calls load only blocks after the cached sequence number."""
+        cache = ConversationHistoryCache()
+        await cache.get_history(db_session, conversation, vision=False)
+
+        db_session.add(_block(conversation, 4, ContentBlockType.ASSISTANT_TEXT, {"text": "ok"}))
+        await db_session.commit()
+        history = await cache.get_history(db_session, conversation, vision=False)
+
+        assert history[-1] == {"role": "assistant", "content": "ok"}
+        assert len(history) == 4
+        assert cache.hits == 1
+        assert cache.misses == 1
+
+    @pytest.mark.asyncio
+    async def test_vision_projection_without_reload(self, db_session, conversation):
+        """Switching to a vision model reuses the formatted blocks."""
+        cache = ConversationHistoryCache()
+        text_history = await cache.get_history(db_session, conversation, vision=False)
+        vision_history = await cache.get_history(db_session, conversation, vision=True)
+
+        assert isinstance(text_history[2]["content"], str)
+        assert vision_history[2]["content"][1]["image_url"]["url"] == IMAGE
+        assert cache.misses == 1
+
+        # Both projections keep growing
+        db_session.add(_block(conversation, 4, ContentBlockType.USER_TEXT, {"text": "next"}))
+        await db_session.commit()
+        assert len(await cache.get_history(db_session, conversation, vision=True)) == 4
+        assert len(await cache.get_history(db_session, conversation, vision=False)) == 4
+
+    @pytest.mark.asyncio
+    async def test_edited_block_triggers_rebuild(self, db_session, conversation):
+        """Changes to cached blocks are picked up."""
+        cache = ConversationHistoryCache()
+        await cache.get_history(db_session, conversation, vision=False)
+
+        block = (
+            await db_session.execute(select(ContentBlock).where(ContentBlock.sequence_number == 1))
+        ).scalar_one()
+        block.content = {"text": "edited"}
+        await db_session.commit()
+
+        history = await cache.get_history(db_session, conversation, vision=False)
+
+        assert history[0]["content"] == "edited"
+        assert cache.misses == 2
+
+    @pytest.mark.asyncio
+    async def test_deleted_block_triggers_rebuild(self, db_session, conversation):
+        """Deleting a cached block is picked up."""
+        cache = ConversationHistoryCache()
+        await cache.get_history(db_session, conversation, vision=False)
+
+        block = (
+            await db_session.execute(select(ContentBlock).where(ContentBlock.sequence_number == 2))
+        ).scalar_one()
+        await db_session.delete(block)
+        await db_session.commit()
+
+        history = await cache.get_history(db_session, conversation, vision=False)
+
+        assert len(history) == 2
+        assert cache.misses == 2
+
+    @pytest.mark.asyncio
+    async def test_returned_list_is_a_copy(self, db_session, conversation):
+        """Callers can extend the returned list without touching the cache."""
+        cache = ConversationHistoryCache()
+        history = await cache.get_history(db_session, conversation, vision=False)
+        history.append({"role": "user", "content": "extra"})
+
+        assert len(await cache.get_history(db_session, conversation, vision=False)) == 3
+
+    @pytest.mark.asyncio
+    async def test_lru_eviction(self, db_session, conversation):
+        """The least recently used session is evicted past max_sessions."""
+        cache = ConversationHistoryCache(max_sessions=1)
+        await cache.get_history(db_session, conversation, vision=False)
+        await cache.get_history(db_session, "other-session", vision=False)
+
+        assert len(cache) == 1
+        await cache.get_history(db_session, conversation, vision=False)
+        assert cache.misses == 3
+
+    @pytest.mark.asyncio
+    async def test_blob_images_resolved_only_for_vision(
+        self, db_session, sample_chat_session, tmp_path
+    ):
+        """Image blobs are read from the store for vision models only."""
+        store = BlobStore(LocalStorage(workspace_base=str(tmp_path)))
+        store.get = AsyncMock(wraps=store.get)
+        blob_hash = await store.put(PNG)
+        sid = sample_chat_session.id
+        db_session.add(
+            _block(
+                sid,
+                1,
+                ContentBlockType.TOOL_RESULT,
+                {"tool_name": "file_read", "result": "img", "success": True},
+                metadata={
+                    "type": "image",
+                    "image_blob": {"hash": blob_hash, "mime_type": "image/png", "size": len(PNG)},
+                },
+            )
+        )
+        await db_session.commit()
+        cache = ConversationHistoryCache(blob_store=store)
+
+        text_history = await cache.get_history(db_session, sid, vision=False)
+        assert isinstance(text_history[0]["content"], str)
+        store.get.assert_not_called()
+
+        vision_history = await cache.get_history(db_session, sid, vision=True)
+        url = vision_history[0]["content"][1]["image_url"]["url"]
+        assert url == "data:image/png;base64," + base64.b64encode(PNG).decode("ascii")
+
+        # The cached projection keeps the reference, not the bytes
+        cached = cache._entries[sid].projection(True)[0]
+        assert cached["content"][1]["image_url"]["url"].startswith(BLOB_URL_PREFIX)
+
+    @pytest.mark.asyncio
+    async def test_missing_blob_becomes_placeholder(
+        self, db_session, sample_chat_session, tmp_path
+    ):
+        """A blob that can't be read doesn't break the history."""
+        store = BlobStore(LocalStorage(workspace_base=str(tmp_path)))
+        sid = sample_chat_session.id
+        db_session.add(
+            _block(
+                sid,
+                1,
+                ContentBlockType.TOOL_RESULT,
+                {"tool_name": "file_read", "result": "img", "success": True},
+                metadata={"type": "image", "image_blob": {"hash": "0" * 64}},
+            )
+        )
+        await db_session.commit()
+        cache = ConversationHistoryCache(blob_store=store)
+
+        history = await cache.get_history(db_session, sid, vision=True)
+
+        assert history[0]["content"][1] == {"type": "text", "text": "[image no longer available]"}
@@ -0,0 +1,141 @@
+"""Tests for StreamHub service."""
+
+import asyncio
+
+import pytest
+
+from app.services.stream_hub import SessionChannel, StreamHub
+
+
+@pytest.mark.unit
+class TestSessionChannel:
+    """Test cases for SessionChannel."""
+
+    @pytest.mark.asyncio
+    async def test_publish_reaches_all_subscribers(self):
+        """Every subscriber receives each published event."""
+        channel = SessionChannel("session-1")
+        first = channel.subscribe()
+        second = channel.subscribe()
+
+        seq = channel.publish({"type": "chunk", "content": "hi"})
+
+        assert seq == 1
+        assert await first.get() == {"type": "chunk", "content": "hi"}
+        assert await second.get() == {"type": "chunk", "content": "hi"}
+
+    @pytest.mark.asyncio
+    async def test_subscriber_waits_for_push(self):
+        """get() blocks until an event is published."""
+        channel = SessionChannel("session-1")
+        subscription = channel.subscribe()
+
+        waiter = asyncio.create_task(subscription.get())
+        await asyncio.sleep(0)
+        assert not waiter.done()
+
+        channel.publish({"type": "chunk"})
+        assert await asyncio.wait_for(waiter, 1) == {"type": "chunk"}
+
+    @pytest.mark.asyncio
+    async def test_replay_after_seq(self):
+        """Late joiners can replay retained events after a sequence number."""
+        channel = SessionChannel("session-1")
+        for i in range(3):
+            channel.publish({"n": i})
+
+        subscription = channel.subscribe(after_seq=1)
+        channel.publish({"n": 3})
+
+        assert [(await subscription.get())["n"] for _ in range(3)] == [1, 2, 3]
+        assert channel.replay(2) == [{"n": 2}, {"n": 3}]
+
+    def test_replay_window_is_bounded(self):
+        """Only the most recent events are retained."""
+        channel = SessionChannel("session-1", replay_window=2)
+        for i in range(5):
+            channel.publish({"n": i})
+
+        assert channel.replay() == [{"n": 3}, {"n": 4}]
+        assert channel.last_seq == 5
+
+    @pytest.mark.asyncio
+    async def test_lagging_subscriber_is_dropped(self):
+        """A subscriber that falls too far behind is cut off and flagged."""
+        channel = SessionChannel("session-1")
+        slow = channel.subscribe(max_pending=2)
+        fast = channel.subscribe()
+
+        for i in range(3):
+            channel.publish({"n": i})
+
+        assert slow.lagged
+        assert channel.subscriber_count == 1
+        assert [(await slow.get())["n"] for _ in range(2)] == [0, 1]
+        assert await slow.get() is None
+        assert not fast.lagged
+
+    @pytest.mark.asyncio
+    async def test_close_ends_iteration(self):
+        """Closing the channel ends every subscriber's stream."""
+        channel = SessionChannel("session-1")
+        subscription = channel.subscribe()
+        channel.publish({"n": 0})
+        channel.close()
+
+        events = [event async for event in subscription]
+
+        assert events == [{"n": 0}]
+        assert await subscription.get() is None
+        assert channel.subscribe().lagged is False
+
+    @pytest.mark.asyncio
+    async def test_unsubscribe(self):
+        """Unsubscribed consumers stop receiving events."""
+        channel = SessionChannel("session-1")
+        subscription = channel.subscribe()
+        subscription.unsubscribe()
+
+        channel.publish({"n": 0})
+
+        assert channel.subscriber_count == 0
+        assert await subscription.get() is None
+
+
+@pytest.mark.unit
+class TestStreamHub:
+    """Test cases for StreamHub."""
+
+    def test_publish_without_channel_is_dropped(self):
+        """Events for sessions nobody opened a channel for aren't retained."""
+        hub = StreamHub()
+
+        assert hub.publish("session-1", {"n": 0}) == 0
+        assert not hub.has_channel("session-1")
+
+    @pytest.mark.asyncio
+    async def test_subscribe_and_publish(self):
+        """Subscribers of a session receive its events only."""
+        hub = StreamHub()
+        hub.channel("session-1")
+        hub.channel("session-2")
+        subscription = hub.subscribe("session-1")
+
+        hub.publish("session-2", {"n": "other"})
+        hub.publish("session-1", {"n": "mine"})
+
+        assert await subscription.get() == {"n": "mine"}
+
+    @pytest.mark.asyncio
+    async def test_close_only_matching_channel(self):
+        """A stale close for a replaced channel leaves the new one open."""
+        hub = StreamHub()
+        old = hub.channel("session-1")
+        hub.close("session-1")
+        new = hub.channel("session-1")
+
+        hub.close("session-1", old)
+
+        assert hub.has_channel("session-1")
+        assert hub.channel("session-1") is new
+        assert old.closed and not new.closed
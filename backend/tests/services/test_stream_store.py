@@ -0,0 +1,232 @@
+"""Tests for the stream state stores."""
+
+import asyncio
+
+import pytest
+
+from app.api.websocket.task_registry import SharedAgentTaskRegistry
+from app.services.chunk_rope import ChunkRope
+from app.services.stream_store import (
+    LocalStreamStateStore,
+    RedisStreamStateStore,
+    RedisSubscription,
+    StreamState,
+    ToolCallState,
+    build_stream_sync,
+)
+
+
+def _state(session_id: str = "s1", text: str = "Hel") -> StreamState:
+    return StreamState(block_id="block-1", session_id=session_id, content=ChunkRope([text]))
+
+
+async def _collect(subscription, timeout: float = 2.0):
+    """Read events until the subscription ends."""
+    events = []
+    while True:
+        event = await asyncio.wait_for(subscription.get(), timeout)
+        if event is None:
+            return events
+        events.append(event)
+
+
+@pytest.mark.unit
+class TestBuildStreamSync:
+    """Test the stream_sync payload."""
+
+    def test_includes_active_tool_call(self):
+        """Active tool call state is part of the payload."""
+        state = _state()
+        state.active_tool_call = ToolCallState(tool_name="bash", partial_args='{"c', step=2)
+
+        payload = build_stream_sync(state)
+
+        assert payload["type"] == "stream_sync"
+        assert payload["accumulated_content"] == "Hel"
+        assert payload["active_tool_call"]["tool_name"] == "bash"
+        assert payload["active_tool_call"]["partial_args"] == '{"c'
+
+    def test_without_tool_call(self):
+        """No active_tool_call key when nothing is running."""
+        assert "active_tool_call" not in build_stream_sync(_state())
+
+
+@pytest.mark.unit
+class TestLocalStreamStateStore:
+    """Test the in-process store."""
+
+    @pytest.mark.asyncio
+    async def test_snapshot_carries_channel_seq(self):
+        """The snapshot reflects the events published so far."""
+        store = LocalStreamStateStore()
+        store.open_channel("s1")
+        store.states["s1"] = _state()
+        store.publish("s1", {"type": "chunk"})
+        store.publish("s1", {"type": "chunk"})
+
+        payload, seq = await store.snapshot("s1")
+
+        assert payload["block_id"] == "block-1"
+        assert seq == 2
+
+    @pytest.mark.asyncio
+    async def test_snapshot_missing(self):
+        """No snapshot for a session without stream state."""
+        assert await LocalStreamStateStore().snapshot("s1") is None
+
+    @pytest.mark.asyncio
+    async def test_subscribe_after_snapshot(self):
+        """Subscribing after the snapshot's seq yields only newer events."""
+        store = LocalStreamStateStore()
+        channel = store.open_channel("s1")
+        store.publish("s1", {"n": 1})
+        subscription = await store.subscribe("s1", after_seq=1)
+        store.publish("s1", {"n": 2})
+        store.close_channel("s1", channel)
+
+        assert await _collect(subscription) == [{"n": 2}]
+
+    def test_open_channel_replaces_previous(self):
+        """A new task's channel closes the one before it."""
+        store = LocalStreamStateStore()
+        first = store.open_channel("s1")
+        second = store.open_channel("s1")
+
+        assert first.closed
+        assert not second.closed
+        store.close_channel("s1", first)  # Stale close is ignored
+        assert store.hub.has_channel("s1")
+
+
+@pytest.mark.unit
+class TestRedisStreamStateStore:
+    """Test sharing streams between workers through Redis."""
+
+    @pytest.fixture
+    def redis(self):
+        """In-memory Redis shared by the simulated workers."""
+        fakeredis = pytest.importorskip("fakeredis")
+        return fakeredis.aioredis.FakeRedis(decode_responses=True)
+
+    @pytest.fixture
+    async def workers(self, redis):
+        """Producing and attaching worker stores on the same Redis."""
+        producer = RedisStreamStateStore(redis, sync_interval=0)
+        follower = RedisStreamStateStore(redis, sync_interval=0)
+        yield producer, follower
+        await producer.close()
+        await follower.close()
+
+    async def _settle(self):
+        """Let the forwarder write what has been published."""
+        for _ in range(20):
+            await asyncio.sleep(0)
+
+    @pytest.mark.asyncio
+    async def test_remote_snapshot_and_events(self, workers):
+        """Another worker syncs from the snapshot and follows the rest of the stream."""
+        producer, follower = workers
+        channel = producer.open_channel("s1")
+        producer.states["s1"] = _state()
+        producer.publish("s1", {"n": 1})
+        await self._settle()
+
+        payload, seq = await follower.snapshot("s1")
+        assert payload["accumulated_content"] == "Hel"
+        assert seq == 1
+
+        subscription = await follower.subscribe("s1", after_seq=seq)
+        assert isinstance(subscription, RedisSubscription)
+        producer.publish("s1", {"n": 2})
+        producer.publish("s1", {"n": 3})
+        producer.close_channel("s1", channel)
+
+        assert await _collect(subscription) == [{"n": 2}, {"n": 3}]
+
+    @pytest.mark.asyncio
+    async def test_skips_events_covered_by_snapshot(self, workers):
+        """Events already forwarded before the snapshot's seq are not replayed."""
+        producer, follower = workers
+        channel = producer.open_channel("s1")
+        for n in range(1, 4):
+            producer.publish("s1", {"n": n})
+        await self._settle()
+
+        subscription = await follower.subscribe("s1", after_seq=2)
+        producer.close_channel("s1", channel)
+
+        assert await _collect(subscription) == [{"n": 3}]
+
+    @pytest.mark.asyncio
+    async def test_state_cleared_when_stream_ends(self, workers):
+        """A finished stream leaves no snapshot behind."""
+        producer, follower = workers
+        channel = producer.open_channel("s1")
+        producer.states["s1"] = _state()
+        producer.publish("s1", {"n": 1})
+        await self._settle()
+        del producer.states["s1"]
+        producer.close_channel("s1", channel)
+        await self._settle()
+
+        assert await follower.snapshot("s1") is None
+
+    @pytest.mark.asyncio
+    async def test_gap_marks_subscriber_lagged(self, redis):
+        """Trimmed entries between reads end the subscription as lagged."""
+        await redis.xadd("events", {"seq": 1, "event": '{"n": 1}'})
+        await redis.xadd("events", {"seq": 3, "event": '{"n": 3}'})
+        subscription = RedisSubscription(redis, "events", after_seq=0, block_ms=10)
+
+        assert await subscription.get() == {"n": 1}
+        assert await subscription.get() is None
+        assert subscription.lagged
+
+    @pytest.mark.asyncio
+    async def test_quiet_stream_waits_while_task_running(self, redis):
+        """Going idle past the timeout doesn't end the stream while the task is running."""
+        registry = SharedAgentTaskRegistry(redis, worker_id="a")
+        task = asyncio.create_task(asyncio.sleep(10))
+        try:
+            await registry.register_task("s1", "block-1", task, asyncio.Event())
+
+            async def is_running():
+                record = await registry.get_task("s1")
+                return record is not None and record.status == "running"
+
+            subscription = RedisSubscription(
+                redis, "events", block_ms=10, idle_timeout=0.05, is_running=is_running
+            )
+            waiting = asyncio.create_task(subscription.get())
+            await asyncio.sleep(0.3)
+            assert not waiting.done()
+
+            await redis.xadd("events", {"seq": 1, "event": '{"n": 1}'})
+            assert await asyncio.wait_for(waiting, 1) == {"n": 1}
+
+            await registry.mark_completed("s1")
+            assert await asyncio.wait_for(subscription.get(), 1) is None
+            assert not subscription.lagged
+        finally:
+            task.cancel()
+
+    @pytest.mark.asyncio
+    async def test_keepalive_holds_quiet_stream_open(self, redis):
+        """A quiet producer's keep-alive entries keep remote subscribers waiting."""
+        producer = RedisStreamStateStore(redis, sync_interval=0, keepalive_interval=0.02)
+        try:
+            channel = producer.open_channel("s1")
+            await self._settle()
+            subscription = RedisSubscription(
+                redis, producer.events_key("s1"), block_ms=10, idle_timeout=0.1
+            )
+            waiting = asyncio.create_task(subscription.get())
+            await asyncio.sleep(0.4)
+            assert not waiting.done()
+
+            producer.publish("s1", {"n": 1})
+            assert await asyncio.wait_for(waiting, 1) == {"n": 1}
+            producer.close_channel("s1", channel)
+            assert await _collect(subscription) == []
+        finally:
+            await producer.close()
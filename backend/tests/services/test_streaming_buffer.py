@@ -54,7 +54,7 @@ class TestStreamingBuffer:
         buffer.add_chunk(message_id, "Hello")
         buffer.add_chunk(message_id, " World")
 
-        assert len(buffer._buffers[message_id]) == 2
+        assert buffer._buffers[message_id].chunk_count == 2
         assert buffer._metadata[message_id].chunk_count == 2
         assert buffer._metadata[message_id].total_bytes == 11
 
@@ -79,7 +79,7 @@ class TestStreamingBuffer:
             buffer.add_chunk(message_id, f"chunk{i}")
 
         # Buffer should be truncated to last 1000 (or less if max is lower)
-        assert len(buffer._buffers[message_id]) <= 1000
+        assert buffer._buffers[message_id].chunk_count <= 1000
 
     def test_get_complete_content(self):
         """Test getting complete content."""
@@ -114,6 +114,19 @@ class TestStreamingBuffer:
         assert len(chunks) == 3
         assert chunks == ["chunk2", "chunk3", "chunk4"]
 
+    def test_get_content_since(self):
+        """Test getting content after a character offset."""
+        buffer = StreamingBuffer()
+        message_id = "msg-123"
+
+        buffer.start_streaming(message_id)
+        buffer.add_chunk(message_id, "Hello")
+        buffer.add_chunk(message_id, " World")
+
+        assert buffer.get_content_since(message_id, 3) == "lo World"
+        assert buffer.get_content_since(message_id, 11) == ""
+        assert buffer.get_content_since("nonexistent", 0) == ""
+
     def test_get_chunks_since_no_buffer(self):
         """Test getting chunks for non-existent buffer."""
         buffer = StreamingBuffer()
@@ -220,6 +233,98 @@ class TestStreamingBuffer:
         assert usage["total_bytes"] == 14
         assert usage["active_streams"] == 2
 
+    def test_memory_usage_tracks_removals(self):
+        """Test running totals follow overflow, reset, cleanup and restart."""
+        buffer = StreamingBuffer(max_buffer_size=3)
+
+        buffer.start_streaming("msg-1")
+        for i in range(5):
+            buffer.add_chunk("msg-1", "abcd")
+        assert buffer.get_memory_usage()["total_chunks"] == 3
+        assert buffer.get_memory_usage()["total_bytes"] == 12
+
+        buffer.start_streaming("msg-2")
+        buffer.add_chunk("msg-2", "xy")
+        buffer.reset_buffer("msg-1")
+        buffer.start_streaming("msg-2")  # Restart replaces the old buffer
+        buffer.add_chunk("msg-2", "z")
+        buffer.end_streaming("msg-2")
+        buffer.end_streaming("msg-2")
+
+        usage = buffer.get_memory_usage()
+        assert usage["total_chunks"] == 1
+        assert usage["total_bytes"] == 1
+        assert usage["active_streams"] == 1
+
+        buffer.cleanup("msg-1")
+        buffer.cleanup("msg-2")
+        usage = buffer.get_memory_usage()
+        assert (usage["buffer_count"], usage["total_chunks"], usage["total_bytes"]) == (0, 0, 0)
+        assert usage["active_streams"] == 0
+
+    def test_overflow_keeps_absolute_indexes(self):
+        """Test chunk indexes keep counting from the stream start across overflow."""
+        buffer = StreamingBuffer(max_buffer_size=4)
+        buffer.start_streaming("msg-1")
+        for i in range(10):
+            buffer.add_chunk("msg-1", f"c{i}")
+
+        assert buffer.get_chunks_since("msg-1", 8) == ["c8", "c9"]
+        assert buffer.get_chunks_since("msg-1", 0) == ["c6", "c7", "c8", "c9"]
+        assert buffer.get_complete_content("msg-1") == "c6c7c8c9"
+
+    def test_byte_limit_per_stream(self):
+        """Test a stream is trimmed to max_buffer_bytes, oldest chunks first."""
+        buffer = StreamingBuffer(max_buffer_bytes=10)
+        buffer.start_streaming("msg-1")
+        for i in range(5):
+            buffer.add_chunk("msg-1", f"{i}" * 4)
+
+        assert buffer.get_complete_content("msg-1") == "33334444"
+        assert buffer.get_memory_usage()["total_bytes"] == 8
+        assert buffer.get_metadata("msg-1").total_bytes == 20
+
+    def test_limits_count_utf8_bytes(self):
+        """Test CJK and emoji text is measured in encoded bytes, not characters."""
+        buffer = StreamingBuffer(max_buffer_bytes=12)
+        buffer.start_streaming("msg-1")
+        for chunk in ("数据", "分析", "😀"):  # 6 + 6 + 4 bytes
+            buffer.add_chunk("msg-1", chunk)
+
+        assert buffer.get_complete_content("msg-1") == "分析😀"
+        assert buffer.get_memory_usage()["total_bytes"] == 10
+        assert buffer.get_metadata("msg-1").total_bytes == 16
+
+    def test_global_ceiling_evicts_finished_lru(self):
+        """Test the global ceiling evicts finished streams, least recently used first."""
+        buffer = StreamingBuffer(max_total_bytes=20)
+        for message_id in ("old", "recent"):
+            buffer.start_streaming(message_id)
+            buffer.add_chunk(message_id, "x" * 8)
+            buffer.end_streaming(message_id)
+        buffer.get_content_since("old", 0)  # Reading marks "old" as recently used
+
+        buffer.start_streaming("live")
+        buffer.add_chunk("live", "y" * 8)
+
+        assert buffer.has_buffer("old")
+        assert not buffer.has_buffer("recent")
+        assert buffer.get_memory_usage()["evicted_streams"] == 1
+        assert buffer.get_memory_usage()["total_bytes"] == 16
+
+    def test_global_ceiling_trims_active_stream(self):
+        """Test the writing stream is trimmed when only active streams remain."""
+        buffer = StreamingBuffer(max_total_bytes=10)
+        buffer.start_streaming("a")
+        buffer.start_streaming("b")
+        buffer.add_chunk("a", "a" * 6)
+        for _ in range(3):
+            buffer.add_chunk("b", "bb")
+
+        assert buffer.has_buffer("a")
+        assert buffer.get_complete_content("b") == "bbbb"
+        assert buffer.get_memory_usage()["total_bytes"] == 10
+
     def test_has_buffer(self):
         """Test checking if buffer exists."""
         buffer = StreamingBuffer()
@@ -240,7 +345,7 @@ class TestStreamingBuffer:
 
         buffer.reset_buffer(message_id)
 
-        assert len(buffer._buffers[message_id]) == 0
+        assert buffer._buffers[message_id].chunk_count == 0
         assert buffer._metadata[message_id].chunk_count == 0
         assert buffer._metadata[message_id].total_bytes == 0
 
@@ -124,13 +124,22 @@ export const useOptimizedStreaming = ({
               step: toolCall.step
             }]);
           } else if (toolCall.status === 'running') {
-            // Tool is executing (arguments complete)
-            setStreamEvents([{
+            // Tool is executing (arguments complete), replay any output so far
+            const syncEvents: StreamEvent[] = [{
               type: 'action',
               tool: toolCall.tool_name,
               args: toolCall.partial_args ? JSON.parse(toolCall.partial_args) : {},
               step: toolCall.step
-            }]);
+            }];
+            if (toolCall.output) {
+              syncEvents.push({
+                type: 'action_output_chunk',
+                tool: toolCall.tool_name,
+                content: toolCall.output,
+                step: toolCall.step
+              });
+            }
+            setStreamEvents(syncEvents);
           }
         } else {
           // Clear any stale events from previous session
@@ -291,6 +300,17 @@ export const useOptimizedStreaming = ({
         });
         break;
 
+      case 'action_output_chunk':
+        // Live output from a running tool
+        eventBufferRef.current.push({
+          type: 'action_output_chunk',
+          content: data.content || '',
+          tool: data.tool,
+          stream: data.stream,
+          step: data.step,
+        });
+        break;
+
       case 'action':
         // Complete tool call
         setStreamEvents(prev =>
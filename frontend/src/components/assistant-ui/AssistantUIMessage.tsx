@@ -21,6 +21,7 @@ import { ToolStepGroup } from './ToolStepGroup';
 import { ContentBlock, StreamEvent } from '@/types';
 
 import type { ToolCallMessagePartStatus } from '@assistant-ui/react';
+import { getImageSource } from '@/services/api';
 
 // Threshold for lazy-loading syntax highlighting (in lines)
 const LAZY_HIGHLIGHT_THRESHOLD = 100;
@@ -323,6 +324,18 @@ const AssistantUIMessageInner: React.FC<AssistantUIMessageProps> = ({
             status: 'streaming',
             step: event.step || 0,
           });
+        } else if (event.type === 'action_output_chunk') {
+          // Live output from a running tool - shown as a partial result
+          const key = `${event.tool}-${event.step || 0}`;
+          const existing = streamingToolState.get(key);
+          streamingToolState.set(key, {
+            toolName: event.tool || 'unknown',
+            argsText: existing?.argsText || '',
+            args: existing?.args || {},
+            status: 'running',
+            result: (existing?.result || '') + (event.content || ''),
+            step: event.step || 0,
+          });
         } else if (event.type === 'action') {
           const key = `${event.tool}-${event.step || 0}`;
           streamingToolState.set(key, {
@@ -330,6 +343,7 @@ const AssistantUIMessageInner: React.FC<AssistantUIMessageProps> = ({
             argsText: JSON.stringify(event.args || {}, null, 2),
             args: event.args || {},
             status: 'running',
+            result: streamingToolState.get(key)?.result,
             step: event.step || 0,
           });
         } else if (event.type === 'tool_call_block' && event.block) {
@@ -393,7 +407,7 @@ const AssistantUIMessageInner: React.FC<AssistantUIMessageProps> = ({
 
         let resultValue: any = resultContent?.result || resultContent?.error;
         const isBinary = resultContent?.is_binary || resultMetadata?.is_binary;
-        const binaryData = resultContent?.binary_data || resultMetadata?.image_data;
+        const binaryData = resultContent?.binary_data || getImageSource(resultMetadata);
         const binaryType = resultContent?.binary_type || resultMetadata?.type;
 
         if (isBinary && binaryData) {
@@ -8,6 +8,7 @@
  * - Collapsible tool calls (collapsed by default when complete)
  * - Auto-expand on error or while running
  * - One-line summary for collapsed state
+ * - Truncated results can load the full output from the workspace on demand
  */
 
 import React, { useState, useEffect } from 'react';
@@ -15,7 +16,15 @@ import type { ToolCallMessagePartProps } from '@assistant-ui/react';
 import { Prism as SyntaxHighlighter } from 'react-syntax-highlighter';
 import { oneLight } from 'react-syntax-highlighter/dist/esm/styles/prism';
 import { ChevronRight, ChevronDown } from 'lucide-react';
+import { useQuery } from '@tanstack/react-query';
+import { useParams } from 'react-router-dom';
 import {ObservationContent} from "@/components/ProjectSession/components/MessageHelpers.tsx";
+import { workspaceAPI } from '@/services/api';
+
+type DefaultToolFallbackProps = ToolCallMessagePartProps & {
+  /** Workspace path holding the full output when the result was truncated */
+  fullOutputPath?: string;
+};
 
 const getFileExtension = (filePath: string): string => {
   const match = filePath.match(/\.([^.]+)$/);
@@ -85,13 +94,66 @@ const getToolSummary = (toolName: string, args: any): string => {
   }
 };
 
-export const DefaultToolFallback: React.FC<ToolCallMessagePartProps> = ({
+/**
+ * Loads a truncated tool result's full output through the workspace file
+ * content route, only once the user asks for it.
+ */
+const FullOutputViewer: React.FC<{ path: string }> = ({ path }) => {
+  const { sessionId } = useParams<{ sessionId: string }>();
+  const [isOpen, setIsOpen] = useState(false);
+
+  const { data, isLoading, isError } = useQuery({
+    queryKey: ['workspaceFileContent', sessionId, path],
+    queryFn: () => workspaceAPI.getFileContent(sessionId!, path),
+    enabled: isOpen && !!sessionId,
+    staleTime: 60000, // 1 minute
+  });
+
+  return (
+    <div style={{ marginTop: '8px' }}>
+      <button
+        type="button"
+        onClick={() => setIsOpen(!isOpen)}
+        style={{
+          background: 'none',
+          border: 'none',
+          padding: 0,
+          color: '#2563eb',
+          fontSize: '12px',
+          cursor: 'pointer',
+        }}
+      >
+        {isOpen ? 'Hide full output' : 'Output truncated - show full output'}
+      </button>
+      {isOpen && (
+        <pre style={{
+          margin: '8px 0 0',
+          padding: '10px',
+          background: '#ffffff',
+          border: '1px solid #e5e7eb',
+          borderRadius: '6px',
+          fontSize: '12px',
+          fontFamily: 'monospace',
+          overflow: 'auto',
+          maxHeight: '400px',
+          whiteSpace: 'pre-wrap',
+          wordBreak: 'break-word',
+        }}>
+          {isLoading ? 'Loading...' : isError ? `Could not load ${path}` : data?.content}
+        </pre>
+      )}
+    </div>
+  );
+};
+
+export const DefaultToolFallback: React.FC<DefaultToolFallbackProps> = ({
   toolName,
   args,
   argsText,
   result,
   isError,
   status,
+  fullOutputPath,
 }) => {
   const isRunning = status?.type === 'running';
   const hasResult = result !== undefined && result !== null;
@@ -338,6 +400,7 @@ export const DefaultToolFallback: React.FC<ToolCallMessagePartProps> = ({
               }}>
                 {formatValue(result)}
               </pre>
+              {fullOutputPath && !isRunning && <FullOutputViewer path={fullOutputPath} />}
             </div>
           )}
 
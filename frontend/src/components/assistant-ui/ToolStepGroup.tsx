@@ -13,6 +13,7 @@ import React, { useState, useMemo, useEffect } from 'react';
 import { ChevronRight, ChevronDown } from 'lucide-react';
 import { ContentBlock } from '@/types';
 import { DefaultToolFallback } from './DefaultToolFallback';
+import { getImageSource } from '@/services/api';
 
 // Streaming tool part from AssistantUIMessage
 interface StreamingToolPart {
@@ -253,7 +254,7 @@ const StepComponent: React.FC<{
             // Build result value
             let resultValue: any = resultContent?.result || resultContent?.error;
             const isBinary = resultContent?.is_binary || resultMetadata?.is_binary;
-            const binaryData = resultContent?.binary_data || resultMetadata?.image_data;
+            const binaryData = resultContent?.binary_data || getImageSource(resultMetadata);
 
             if (isBinary && binaryData) {
               resultValue = {
@@ -275,6 +276,7 @@ const StepComponent: React.FC<{
                 result={resultValue}
                 isError={resultContent ? !resultContent.success : false}
                 status={{ type: result ? 'complete' : 'running' }}
+                fullOutputPath={resultMetadata?.full_output_path}
                 addResult={() => {}}
                 resume={() => {}}
               />
@@ -316,7 +318,7 @@ export const ToolStepGroup: React.FC<ToolStepGroupProps> = ({
 
             let resultValue: any = resultContent?.result || resultContent?.error;
             const isBinary = resultContent?.is_binary || resultMetadata?.is_binary;
-            const binaryData = resultContent?.binary_data || resultMetadata?.image_data;
+            const binaryData = resultContent?.binary_data || getImageSource(resultMetadata);
 
             if (isBinary && binaryData) {
               resultValue = {
@@ -338,6 +340,7 @@ export const ToolStepGroup: React.FC<ToolStepGroupProps> = ({
                 result={resultValue}
                 isError={resultContent ? !resultContent.success : false}
                 status={{ type: result ? 'complete' : 'running' }}
+                fullOutputPath={resultMetadata?.full_output_path}
                 addResult={() => {}}
                 resume={() => {}}
               />
@@ -11,6 +11,9 @@ import type {
   ChatSessionListResponse,
   ContentBlock,
   ContentBlockListResponse,
+  ContentBlockListParams,
+  ContentBlockChangesResponse,
+  ContentBlockChangesParams,
 } from '@/types';
 
 const API_BASE_URL = 'http://127.0.0.1:8000/api/v1';
@@ -112,9 +115,34 @@ export const chatSessionsAPI = {
 
 // Content Blocks API (unified message model)
 export const contentBlocksAPI = {
-  list: async (chatSessionId: string): Promise<ContentBlockListResponse> => {
-    const { data } = await api.get<ContentBlockListResponse>(`/chats/${chatSessionId}/blocks`);
-    return data;
+  list: async (
+    chatSessionId: string,
+    params?: ContentBlockListParams
+  ): Promise<ContentBlockListResponse> => {
+    const { data } = params
+      ? await api.get<ContentBlockListResponse>(`/chats/${chatSessionId}/blocks`, { params })
+      : await api.get<ContentBlockListResponse>(`/chats/${chatSessionId}/blocks`);
+    return data;
+  },
+
+  // Returns null when nothing changed since the response that carried etag (HTTP 304)
+  changes: async (
+    chatSessionId: string,
+    params: ContentBlockChangesParams,
+    etag?: string
+  ): Promise<{ data: ContentBlockChangesResponse; etag?: string } | null> => {
+    const response = await api.get<ContentBlockChangesResponse>(
+      `/chats/${chatSessionId}/blocks/changes`,
+      {
+        params,
+        headers: etag ? { 'If-None-Match': etag } : undefined,
+        validateStatus: (status) => (status >= 200 && status < 300) || status === 304,
+      }
+    );
+    if (response.status === 304) {
+      return null;
+    }
+    return { data: response.data, etag: response.headers['etag'] };
   },
 
   get: async (chatSessionId: string, blockId: string): Promise<ContentBlock> => {
@@ -176,6 +204,22 @@ export interface WorkspaceFileContent {
   mime_type: string | null;
 }
 
+export const blobsAPI = {
+  // Content-addressed, immutable: the browser caches these by URL and ETag
+  url: (hash: string): string => `${API_BASE_URL}/blobs/${hash}`,
+};
+
+/**
+ * Image source for a tool result: a blob URL for stored images, or the
+ * inline data URI older results carry.
+ */
+export const getImageSource = (metadata: any): string | undefined => {
+  if (metadata?.image_blob?.hash) {
+    return blobsAPI.url(metadata.image_blob.hash);
+  }
+  return metadata?.image_data;
+};
+
 export const workspaceAPI = {
   listFiles: async (sessionId: string): Promise<WorkspaceFilesResponse> => {
     const { data } = await api.get<WorkspaceFilesResponse>(`/chats/${sessionId}/workspace/files`);
@@ -83,7 +83,30 @@ export interface ContentBlock {
 
 export interface ContentBlockListResponse {
   blocks: ContentBlock[];
-  total: number;
+  total: number | null;
+  has_more: boolean;
+}
+
+// Change feed since a sync cursor (see GET /chats/{id}/blocks/changes)
+export interface ContentBlockChangesResponse {
+  blocks: ContentBlock[];
+  deleted: string[];
+  max_seq: number | null;
+  max_updated_at: string | null;
+}
+
+export interface ContentBlockChangesParams {
+  since_seq?: number;
+  since_updated_at?: string;
+}
+
+// Keyset pagination over sequence numbers (see GET /chats/{id}/blocks)
+export interface ContentBlockListParams {
+  limit?: number;
+  after_seq?: number;
+  before_seq?: number;
+  latest?: boolean;
+  include_total?: boolean;
 }
 
 // Content payload structures for different block types
@@ -109,13 +132,14 @@ export interface ToolResultContent {
 
 // WebSocket streaming events
 export interface StreamEvent {
-  type: 'chunk' | 'action' | 'action_streaming' | 'action_args_chunk' |
+  type: 'chunk' | 'action' | 'action_streaming' | 'action_args_chunk' | 'action_output_chunk' |
         'user_text_block' | 'assistant_text_start' | 'assistant_text_end' |
         'tool_call_block' | 'tool_result_block' | 'stream_sync';
   content?: string;
   tool?: string;
   args?: any;
   partial_args?: string;
+  stream?: string;               // For action_output_chunk ("stdout" | "stderr")
   step?: number;
   success?: boolean;
   status?: string;